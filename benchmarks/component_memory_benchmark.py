@@ -0,0 +1,160 @@
+"""
+Memory of the components of a large trace: the __slots__ component model against the previous
+classes with a per-instance __dict__, and the time to add the components and serialize the trace.
+
+Each span is a root LLM component created by AgenticTracing.add_component from the dict of
+the LLM tracer, its payloads (info, data, network calls) are shared by both models and not
+counted in the bytes per span.
+
+Usage:
+    python benchmarks/component_memory_benchmark.py [--spans 100000]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+from ragaai_catalyst.tracers.agentic_tracing.data.data_structure import Component, Interaction
+from ragaai_catalyst.tracers.agentic_tracing.tracers.main_tracer import AgenticTracing
+from ragaai_catalyst.tracers.utils.serialization import dump_bytes
+
+
+class LegacyInteraction:
+    """Interaction before __slots__."""
+
+    def __init__(self, id, type, content, timestamp):
+        self.id = id
+        self.type = type
+        self.content = content
+        self.timestamp = timestamp
+
+    def to_dict(self):
+        return {"id": self.id, "interaction_type": self.type, "content": self.content, "timestamp": self.timestamp}
+
+
+class LegacyComponent:
+    """Component before __slots__."""
+
+    def __init__(self, id, hash_id, source_hash_id, type, name, start_time, end_time, parent_id, info,
+                 extra_info=None, data={}, metadata=None, metrics=None, feedback=None, network_calls=None,
+                 interactions=None, error=None):
+        self.id = id
+        self.hash_id = hash_id
+        self.source_hash_id = source_hash_id
+        self.type = type
+        self.name = name
+        self.start_time = start_time
+        self.end_time = end_time
+        self.parent_id = parent_id
+        self.info = info
+        self.extra_info = extra_info
+        self.data = data
+        self.metadata = metadata or {}
+        self.metrics = metrics or []
+        self.feedback = feedback
+        self.network_calls = network_calls or []
+        self.interactions = []
+        self.error = error
+        if interactions:
+            for interaction in interactions:
+                if isinstance(interaction, dict):
+                    self.interactions.append(
+                        LegacyInteraction(
+                            id=interaction.get("id", str(uuid.uuid4())),
+                            type=interaction.get("interaction_type", ""),
+                            content=str(interaction.get("content", "")),
+                            timestamp=interaction.get("timestamp", datetime.now().astimezone().isoformat())
+                        )
+                    )
+                else:
+                    self.interactions.append(interaction)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "hash_id": self.hash_id,
+            "source_hash_id": self.source_hash_id,
+            "type": self.type,
+            "name": self.name,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "parent_id": self.parent_id,
+            "info": self.info,
+            "extra_info": self.extra_info,
+            "error": self.error,
+            "data": self.data,
+            "metadata": self.metadata,
+            "metrics": self.metrics,
+            "feedback": self.feedback,
+            "network_calls": [call.to_dict() if hasattr(call, 'to_dict') else call for call in self.network_calls],
+            "interactions": self.interactions
+        }
+
+
+FIELDS = [
+    "id", "hash_id", "source_hash_id", "type", "name", "start_time", "end_time", "parent_id", "info", "extra_info",
+    "data", "metadata", "metrics", "feedback", "network_calls", "interactions", "error",
+]
+
+
+def legacy_add_component(component_data):
+    """The component conversion of AgenticTracing.add_component before __slots__."""
+    filtered_data = {k: v for k, v in component_data.items() if k in FIELDS}
+    return LegacyComponent(**filtered_data)
+
+
+def component_dicts(count):
+    # Payloads shared by every span, only the per-span objects are measured
+    info = {"model": "gpt-4o", "cost": {"total_cost": 0.001}, "tokens": {"total_tokens": 12}}
+    data = {"input": "prompt", "output": "answer"}
+    network_calls = [{"url": "https://api", "method": "POST"}]
+    interaction = {"id": "interaction", "interaction_type": "input", "content": "hi", "timestamp": "2025-01-01T00:00:00"}
+    for i in range(count):
+        yield {
+            "id": f"span-{i}", "hash_id": "hash", "source_hash_id": None, "type": "llm", "name": "chat",
+            "start_time": "2025-01-01T00:00:00", "end_time": "2025-01-01T00:00:01", "parent_id": None,
+            "info": info, "extra_info": None, "data": data, "metadata": {}, "metrics": [], "feedback": None,
+            "network_calls": network_calls, "interactions": [interaction], "error": None,
+        }
+
+
+def measure(name, convert, dicts):
+    gc.collect()
+    start = time.perf_counter()
+    components = [convert(component_data) for component_data in dicts]
+    elapsed = time.perf_counter() - start
+    del components
+
+    # Traced separately, tracemalloc slows allocations down
+    gc.collect()
+    tracemalloc.start()
+    components = [convert(component_data) for component_data in dicts]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    dump_bytes({"spans": components})
+    serialize = time.perf_counter() - start
+    print(f"{name:>9}: {size / len(components):>7.0f} bytes/span, add {elapsed * 1000:>7.1f} ms, "
+          f"serialize {serialize * 1000:>7.1f} ms  ({len(components)} spans)")
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spans", type=int, default=100_000)
+    args = parser.parse_args()
+
+    # The dicts exist before either model converts them, they are not part of the measure
+    dicts = list(component_dicts(args.spans))
+    assert isinstance(AgenticTracing._to_component(dicts[0]), Component)
+    assert isinstance(AgenticTracing._to_component(dicts[0]).interactions[0], Interaction)
+    legacy = measure("legacy", legacy_add_component, dicts)
+    slotted = measure("__slots__", AgenticTracing._to_component, dicts)
+    print(f"{1 - slotted / legacy:.0%} less memory per span")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Size of a turn-heavy agent trace, with and without the chat histories of its LLM spans saved as
+deltas of the previous call of their conversation (RAGAAI_CATALYST_TRACE_HISTORY_DELTAS).
+
+Each turn of the agent calls the LLM with the whole conversation so far, its input as saved by
+the LLM tracer, followed by a tool call whose result is added to the conversation. The prompt
+of each call is repeated by its 'llm_call_start' workflow interaction.
+
+Usage:
+    python benchmarks/history_delta_benchmark.py [--turns 200]
+"""
+import argparse
+import time
+
+from ragaai_catalyst.tracers.agentic_tracing.utils.history_deltas import decode_history_deltas, encode_history_deltas
+from ragaai_catalyst.tracers.utils.serialization import dump_bytes
+
+SYSTEM_PROMPT = "You are a research agent. Use the tools to answer the question. " * 20
+
+
+def make_trace(turns):
+    history = [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": "Summarize the reports."}]
+    spans, workflow = [], []
+    for turn in range(turns):
+        span_id = len(spans) + 1
+        llm_input = {"args": [], "kwargs": {"model": "gpt-4o", "messages": list(history)}}
+        answer = f"Calling search for report {turn}."
+        spans.append({"id": span_id, "type": "llm", "name": "chat", "data": {"input": llm_input, "output": answer}})
+        workflow.append({"id": str(len(workflow) + 1), "span_id": span_id, "interaction_type": "llm_call_start",
+                         "content": {"prompt": llm_input}})
+        result = f"Report {turn}: " + "revenue grew in every region. " * 10
+        spans.append({"id": span_id + 1, "type": "tool", "name": "search",
+                      "data": {"input": {"args": [turn], "kwargs": {}}, "output": result}})
+        history += [{"role": "assistant", "content": answer}, {"role": "tool", "content": result}]
+    return {"id": "trace", "data": [{"spans": spans}], "workflow": workflow}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+
+    trace = make_trace(args.turns)
+    start = time.perf_counter()
+    plain = dump_bytes(trace)
+    plain_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoded = encode_history_deltas(trace)
+    encode_time = time.perf_counter() - start
+    start = time.perf_counter()
+    saved = dump_bytes(encoded)
+    delta_time = time.perf_counter() - start
+
+    # Restored by the trace readers, before the upload
+    start = time.perf_counter()
+    decoded = decode_history_deltas(dict(encoded))
+    decode_time = time.perf_counter() - start
+    assert dump_bytes(decoded) == plain
+
+    print(f"    plain: {len(plain) / 2**20:>8.1f} MiB, serialize {plain_time * 1000:>7.1f} ms  ({args.turns} turns)")
+    print(f"   deltas: {len(saved) / 2**20:>8.1f} MiB, serialize {delta_time * 1000:>7.1f} ms "
+          f"+ encode {encode_time * 1000:>6.1f} ms, decode {decode_time * 1000:>6.1f} ms")
+    print(f"{1 - len(saved) / len(plain):.1%} smaller")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Size and serialization time of a prompt-heavy agent trace, with and without its large payloads
+stored once in a blob table (RAGAAI_CATALYST_TRACE_BLOB_THRESHOLD).
+
+Each LLM span sends the same system prompt, tool schemas and retrieved documents, followed by
+a short question. The request body of its network call and its workflow interactions repeat
+the prompt, as recorded by the tracers.
+
+Usage:
+    python benchmarks/payload_blob_benchmark.py [--spans 500] [--threshold 1024]
+"""
+import argparse
+import time
+
+from ragaai_catalyst.tracers.agentic_tracing.utils.payload_blobs import decode_blobs, encode_blobs
+from ragaai_catalyst.tracers.utils.serialization import dump_bytes
+
+SYSTEM_PROMPT = "You are a support agent for an online store. Follow the policies below.\n" + "Policy. " * 1000
+TOOLS = [
+    {"type": "function", "function": {
+        "name": f"tool_{i}",
+        "description": "Looks up an order, a customer or a product. " * 5,
+        "parameters": {"type": "object", "properties": {"id": {"type": "string"}}, "required": ["id"]},
+    }}
+    for i in range(20)
+]
+DOCUMENTS = [f"Document {i}: " + "The return window is 30 days. " * 60 for i in range(5)]
+
+
+def make_trace(count):
+    spans, workflow = [], []
+    for i in range(count):
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "system", "content": "\n\n".join(DOCUMENTS[i % 3:i % 3 + 3])},
+            {"role": "user", "content": f"Where is my order {i}?"},
+        ]
+        answer = f"Your order {i} ships tomorrow."
+        spans.append({
+            "id": f"span-{i}",
+            "type": "llm",
+            "name": "chat",
+            "data": {"input": {"messages": messages, "tools": TOOLS}, "output": answer},
+            "network_calls": [{
+                "url": "https://api.openai.com/v1/chat/completions",
+                "request": {"headers": {}, "body": {"model": "gpt-4o", "messages": messages, "tools": TOOLS}},
+                "response": {"headers": {}, "body": answer},
+            }],
+        })
+        workflow.append({"id": str(2 * i + 1), "content": {"prompt": spans[-1]["data"]["input"]}})
+        workflow.append({"id": str(2 * i + 2), "content": {"response": answer}})
+    return {"id": "trace", "data": [{"spans": spans}], "workflow": workflow}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spans", type=int, default=500)
+    parser.add_argument("--threshold", type=int, default=1024)
+    args = parser.parse_args()
+
+    trace = make_trace(args.spans)
+    start = time.perf_counter()
+    plain = dump_bytes(trace)
+    plain_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoded = encode_blobs(trace, args.threshold)
+    encode_time = time.perf_counter() - start
+    start = time.perf_counter()
+    saved = dump_bytes(encoded)
+    blob_time = time.perf_counter() - start
+
+    # Restored by the trace readers, before the upload
+    decoded = decode_blobs(dict(encoded))
+    assert dump_bytes(decoded) == plain
+
+    print(f"    plain: {len(plain) / 2**20:>8.1f} MiB, serialize {plain_time * 1000:>7.1f} ms  ({args.spans} spans)")
+    print(f"    blobs: {len(saved) / 2**20:>8.1f} MiB, serialize {blob_time * 1000:>7.1f} ms "
+          f"+ encode {encode_time * 1000:>7.1f} ms  ({len(encoded['blobs'])} blobs)")
+    print(f"{1 - len(saved) / len(plain):.1%} smaller")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compile throughput of PromptObject: the precompiled template against the previous
+deepcopy + regex + str.replace implementation.
+
+Usage:
+    python benchmarks/prompt_compile_benchmark.py [--messages 4] [--variables 8] [--iterations 20000]
+"""
+import argparse
+import copy
+import timeit
+
+from ragaai_catalyst.prompt_manager import PromptObject
+
+
+def legacy_compile(prompt, **kwargs):
+    """The compile() implementation before templates were precompiled."""
+    required_variables = set()
+    for item in prompt.text:
+        required_variables.update(prompt._extract_variable_from_content(item["content"]))
+    missing_variables = [item for item in required_variables if item not in kwargs]
+    extra_variables = [item for item in kwargs if item not in required_variables]
+    if missing_variables or extra_variables:
+        raise ValueError("Variable mismatch")
+    updated_text = copy.deepcopy(prompt.text)
+    for item in updated_text:
+        item["content"] = prompt._add_variable_value_to_content(item["content"], kwargs)
+    return updated_text
+
+
+def build_prompt(num_messages, num_variables):
+    filler = "You are a helpful assistant answering questions about the provided documents. " * 5
+    text = []
+    for i in range(num_messages):
+        placeholders = " ".join(f"{{{{var_{j}}}}}" for j in range(i % num_variables, num_variables))
+        text.append({"role": "user" if i % 2 else "system", "content": f"{filler} {placeholders} {filler}"})
+    values = {f"var_{j}": f"value number {j}" for j in range(num_variables)}
+    return PromptObject(text, [], "gpt-4o-mini"), values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=4)
+    parser.add_argument("--variables", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    prompt, values = build_prompt(args.messages, args.variables)
+    assert prompt.compile(**values) == legacy_compile(prompt, **values)
+
+    for name, fn in [("legacy", lambda: legacy_compile(prompt, **values)), ("compiled", lambda: prompt.compile(**values))]:
+        seconds = min(timeit.repeat(fn, number=args.iterations, repeat=3))
+        print(f"{name:>9}: {args.iterations / seconds:>10,.0f} compiles/s  ({seconds / args.iterations * 1e6:.2f} us/compile)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Sanitization of the arguments of traced calls: the bounded Sanitizer against the previous
+sanitize_value of the tracer mixins, which copied every argument and called str() eagerly.
+
+The arguments are a DataFrame, an embedding vector and a list of documents, as passed to a
+retrieval tool. Each call is timed, then the saved size of its input once serialized.
+
+Usage:
+    python benchmarks/sanitization_benchmark.py [--rows 100000] [--documents 5000] [--calls 20]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from ragaai_catalyst.tracers.utils.sanitization import Sanitizer
+from ragaai_catalyst.tracers.utils.serialization import dump_bytes
+
+
+def legacy_sanitize_input(args, kwargs):
+    """The _sanitize_input of the tool, agent and custom tracers before Sanitizer."""
+
+    def sanitize_value(value):
+        if isinstance(value, (int, float, bool, str)):
+            return value
+        elif isinstance(value, list):
+            return [sanitize_value(item) for item in value]
+        elif isinstance(value, dict):
+            return {key: sanitize_value(val) for key, val in value.items()}
+        else:
+            return str(value)  # Convert non-standard types to string
+
+    return {
+        "args": [sanitize_value(arg) for arg in args],
+        "kwargs": {key: sanitize_value(val) for key, val in kwargs.items()},
+    }
+
+
+class Document:
+    def __init__(self, text, metadata):
+        self.page_content = text
+        self.metadata = metadata
+
+    def __str__(self):
+        return f"page_content={self.page_content!r} metadata={self.metadata!r}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+
+    frame = pd.DataFrame({"id": np.arange(args.rows), "score": np.random.rand(args.rows)})
+    embedding = np.random.rand(1536).astype(np.float32)
+    documents = [Document("lorem ipsum " * 100, {"source": f"doc-{i}"}) for i in range(args.documents)]
+    call_args, call_kwargs = (frame, embedding), {"documents": documents, "top_k": 5}
+
+    sanitizer = Sanitizer()
+    for name, sanitize in [("legacy", legacy_sanitize_input), ("sanitizer", sanitizer.sanitize_input)]:
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            sanitized = sanitize(call_args, call_kwargs)
+        elapsed = (time.perf_counter() - start) / args.calls
+        start = time.perf_counter()
+        size = len(dump_bytes(sanitized))
+        serialize = time.perf_counter() - start
+        print(f"{name:>9}: {elapsed * 1000:>8.2f} ms/call, serialize {serialize * 1000:>7.1f} ms, "
+              f"{size / 1024:>8.0f} KiB saved  ({args.rows} rows, {args.documents} documents)")
+
+
+if __name__ == "__main__":
+    main()
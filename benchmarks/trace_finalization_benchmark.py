@@ -0,0 +1,874 @@
+"""
+Finalization of an agentic trace: the single-pass TraceFinalizer against the previous
+pipeline, which walked the span tree once per step, recursively.
+
+'single-pass' records the interactions of the workflow when the trace is finalized, as for
+components the tracer has not recorded. 'incremental' times the finalization of a trace
+whose interactions were ordered by the WorkflowBuilder as its components completed, the
+case of traced applications: it merges the recorded runs instead of sorting the workflow.
+
+Both compute the span ids, agent input/output, costs, deduplicated spans, workflow, metrics
+and dataset spans of deep (nested agents) and wide (many children) traces, and must agree.
+The previous pipeline also re-read the saved trace file for the metrics and dataset spans,
+that parse is not included in its timings.
+
+Usage:
+    python benchmarks/trace_finalization_benchmark.py [--width 20000] [--depth 500] [--repeat 3]
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from ragaai_catalyst.tracers.agentic_tracing.data.data_structure import Component, Metadata, Trace
+from ragaai_catalyst.tracers.agentic_tracing.upload.upload_trace_metric import get_trace_metrics_from_trace
+from ragaai_catalyst.tracers.agentic_tracing.utils.trace_finalizer import TraceFinalizer
+from ragaai_catalyst.tracers.agentic_tracing.utils.workflow_builder import WorkflowBuilder
+from ragaai_catalyst.tracers.utils.serialization import to_serializable
+
+
+class LegacyFinalization:
+    """The finalization steps of BaseTracer and AgenticTracing before TraceFinalizer."""
+
+    def __init__(self, trace, components):
+        self.trace = trace
+        self.components = components
+
+    def _calculate_final_metrics(self):
+        """Calculate total cost and tokens from all components"""
+        total_cost = 0.0
+        total_tokens = 0
+
+        processed_components = set()
+
+        def process_component(component):
+            nonlocal total_cost, total_tokens
+            # Convert component to dict if it's an object
+            comp_dict = (
+                component.to_dict() if hasattr(component, "to_dict") else component
+            )
+
+            comp_id = comp_dict.get("id") or comp_dict.get("component_id")
+            if comp_id in processed_components:
+                return  # Skip if already processed
+            processed_components.add(comp_id)
+
+            if comp_dict.get("type") == "llm":
+                info = comp_dict.get("info", {})
+                if isinstance(info, dict):
+                    # Extract cost
+                    cost_info = info.get("cost", {})
+                    if isinstance(cost_info, dict):
+                        total_cost += cost_info.get("total_cost", 0)
+
+                    # Extract tokens
+                    token_info = info.get("tokens", {})
+                    if isinstance(token_info, dict):
+                        total_tokens += token_info.get("total_tokens", 0)
+                    else:
+                        token_info = info.get("token_usage", {})
+                        if isinstance(token_info, dict):
+                            total_tokens += token_info.get("total_tokens", 0)
+
+            # Process children if they exist
+            data = comp_dict.get("data", {})
+            if isinstance(data, dict):
+                children = data.get("children", [])
+                if children:
+                    for child in children:
+                        process_component(child)
+
+        # Process all root components
+        for component in self.components:
+            process_component(component)
+
+        # Update metadata in trace
+        if hasattr(self, "trace"):
+            if isinstance(self.trace.metadata, dict):
+                self.trace.metadata["total_cost"] = total_cost
+                self.trace.metadata["total_tokens"] = total_tokens
+            else:
+                self.trace.metadata.total_cost = total_cost
+                self.trace.metadata.total_tokens = total_tokens
+
+    def _process_children(self, children_list, parent_id, current_id):
+        """Helper function to process children recursively."""
+        for child in children_list:
+            child["id"] = current_id
+            child["parent_id"] = parent_id
+            current_id += 1
+            # Recursively process nested children if they exist
+            if "children" in child["data"]:
+                current_id = self._process_children(child["data"]["children"], child["id"], current_id)
+        return current_id
+
+    def _change_span_ids_to_int(self, trace):
+        id, parent_id = 1, 0
+        for span in trace.data[0]["spans"]:
+            span.id = id
+            span.parent_id = parent_id
+            id += 1
+            if span.type == "agent" and "children" in span.data:
+                id = self._process_children(span.data["children"], span.id, id)
+        return trace
+
+    def _change_agent_input_output(self, trace):
+        for span in trace.data[0]["spans"]:
+            if span.type == "agent":
+                childrens = span.data["children"]
+                span.data["input"] = None
+                span.data["output"] = None
+                if childrens:
+                    # Find first non-null input going forward
+                    for child in childrens:
+                        if "data" not in child:
+                            continue
+                        input_data = child["data"].get("input")
+
+                        if input_data:
+                            span.data["input"] = (
+                                input_data["args"]
+                                if hasattr(input_data, "args")
+                                else input_data
+                            )
+                            break
+
+                    # Find first non-null output going backward
+                    for child in reversed(childrens):
+                        if "data" not in child:
+                            continue
+                        output_data = child["data"].get("output")
+
+                        if output_data and output_data != "" and output_data != "None":
+                            span.data["output"] = output_data
+                            break
+        return trace
+
+    def _extract_cost_tokens(self, trace):
+        cost = {}
+        tokens = {}
+
+        def process_span_info(info):
+            if not isinstance(info, dict):
+                return
+            cost_info = info.get("cost", {})
+            for key, value in cost_info.items():
+                if key not in cost:
+                    cost[key] = 0
+                cost[key] += value
+            token_info = info.get("tokens", {})
+            for key, value in token_info.items():
+                if key not in tokens:
+                    tokens[key] = 0
+                tokens[key] += value
+
+        def process_spans(spans):
+            for span in spans:
+                # Get span type, handling both span objects and dictionaries
+                span_type = span.type if hasattr(span, 'type') else span.get('type')
+                span_info = span.info if hasattr(span, 'info') else span.get('info', {})
+                span_data = span.data if hasattr(span, 'data') else span.get('data', {})
+
+                # Process direct LLM spans
+                if span_type == "llm":
+                    process_span_info(span_info)
+                # Process agent spans recursively
+                elif span_type == "agent":
+                    # Process LLM children in the current agent span
+                    children = span_data.get("children", [])
+                    for child in children:
+                        child_type = child.get("type")
+                        if child_type == "llm":
+                            process_span_info(child.get("info", {}))
+                        # Recursively process nested agent spans
+                        elif child_type == "agent":
+                            process_spans([child])
+
+        process_spans(trace.data[0]["spans"])
+        trace.metadata.cost = cost
+        trace.metadata.tokens = tokens
+        return trace
+
+    def _clean_trace(self, trace):
+        # Convert span to dict if it has to_dict method
+        def _to_dict_if_needed(obj):
+            if hasattr(obj, "to_dict"):
+                return obj.to_dict()
+            return obj
+
+        def deduplicate_spans(spans):
+            seen_llm_spans = {}  # Dictionary to track unique LLM spans
+            unique_spans = []
+
+            for span in spans:
+                # Convert span to dictionary if needed
+                span_dict = _to_dict_if_needed(span)
+
+                # Skip spans without hash_id
+                if "hash_id" not in span_dict:
+                    continue
+
+                if span_dict.get("type") == "llm":
+                    # Create a unique key based on hash_id, input, and output
+                    span_key = (
+                        span_dict.get("hash_id"),
+                        str(span_dict.get("data", {}).get("input")),
+                        str(span_dict.get("data", {}).get("output")),
+                    )
+
+                    # Check if we've seen this span before
+                    if span_key not in seen_llm_spans:
+                        seen_llm_spans[span_key] = True
+                        unique_spans.append(span)
+                    else:
+                        # If we have interactions in the current span, replace the existing one
+                        current_interactions = span_dict.get("interactions", [])
+                        if current_interactions:
+                            # Find and replace the existing span with this one that has interactions
+                            for i, existing_span in enumerate(unique_spans):
+                                existing_dict = (
+                                    existing_span
+                                    if isinstance(existing_span, dict)
+                                    else existing_span.to_dict()
+                                )
+                                if (
+                                        existing_dict.get("hash_id")
+                                        == span_dict.get("hash_id")
+                                        and str(existing_dict.get("data", {}).get("input"))
+                                        == str(span_dict.get("data", {}).get("input"))
+                                        and str(existing_dict.get("data", {}).get("output"))
+                                        == str(span_dict.get("data", {}).get("output"))
+                                ):
+                                    unique_spans[i] = span
+                                    break
+                
+                else:
+                    # For non-LLM spans, process their children if they exist
+                    if "data" in span_dict and "children" in span_dict["data"]:
+                        children = span_dict["data"]["children"]
+                        # Filter and deduplicate children
+                        filtered_children = deduplicate_spans(children)
+                        if isinstance(span, dict):
+                            span["data"]["children"] = filtered_children
+                        else:
+                            span.data["children"] = filtered_children
+                    unique_spans.append(span)                    
+
+            # Process spans to update model information for LLM spans with same name
+            llm_spans_by_name = {}
+            for i, span in enumerate(unique_spans):
+                span_dict = span if isinstance(span, dict) else span.to_dict()
+                
+                if span_dict.get('type') == 'llm':
+                    span_name = span_dict.get('name')
+                    if span_name:
+                        if span_name not in llm_spans_by_name:
+                            llm_spans_by_name[span_name] = []
+                        llm_spans_by_name[span_name].append((i, span_dict))
+            
+            # Update model information for spans with same name
+            for spans_with_same_name in llm_spans_by_name.values():
+                if len(spans_with_same_name) > 1:
+                    # Check if any span has non-default model
+                    has_custom_model = any(
+                        span[1].get('info', {}).get('model') != 'default'
+                        for span in spans_with_same_name
+                    )
+                    
+                    # If we have a custom model, update all default models to 'custom'
+                    if has_custom_model:
+                        for idx, span_dict in spans_with_same_name:
+                            if span_dict.get('info', {}).get('model') == 'default':
+                                if isinstance(unique_spans[idx], dict):
+                                    if 'info' not in unique_spans[idx]:
+                                        unique_spans[idx]['info'] = {}
+                                    # unique_spans[idx]['info']['model'] = 'custom'
+                                    unique_spans[idx]['type'] = 'custom'
+                                else:
+                                    if not hasattr(unique_spans[idx], 'info'):
+                                        unique_spans[idx].info = {}
+                                    # unique_spans[idx].info['model'] = 'custom'
+                                    unique_spans[idx].type = 'custom'
+            
+            return unique_spans
+
+        # Remove any spans without hash ids
+        for data in trace.get("data", []):
+            if "spans" in data:
+                # First filter out spans without hash_ids, then deduplicate
+                data["spans"] = deduplicate_spans(data["spans"])
+
+        return trace
+
+    def _process_child_interactions(self, child, interaction_id, interactions):
+        """
+        Helper method to process child interactions recursively.
+        
+        Args:
+            child (dict): The child span to process
+            interaction_id (int): Current interaction ID
+            interactions (list): List of interactions to append to
+            
+        Returns:
+            int: Next interaction ID to use
+        """
+        child_type = child.get("type")
+
+        if child_type == "tool":
+            # Tool call start
+            interactions.append(
+                {
+                    "id": str(interaction_id),
+                    "span_id": child.get("id"),
+                    "interaction_type": "tool_call_start",
+                    "name": child.get("name"),
+                    "content": {
+                        "parameters": [
+                            child.get("data", {}).get("input", {}).get("args"),
+                            child.get("data", {}).get("input", {}).get("kwargs"),
+                        ]
+                    },
+                    "timestamp": child.get("start_time"),
+                    "error": child.get("error"),
+                }
+            )
+            interaction_id += 1
+
+            # Tool call end
+            interactions.append(
+                {
+                    "id": str(interaction_id),
+                    "span_id": child.get("id"),
+                    "interaction_type": "tool_call_end",
+                    "name": child.get("name"),
+                    "content": {
+                        "returns": child.get("data", {}).get("output"),
+                    },
+                    "timestamp": child.get("end_time"),
+                    "error": child.get("error"),
+                }
+            )
+            interaction_id += 1
+
+        elif child_type == "llm":
+            interactions.append(
+                {
+                    "id": str(interaction_id),
+                    "span_id": child.get("id"),
+                    "interaction_type": "llm_call_start",
+                    "name": child.get("name"),
+                    "content": {
+                        "prompt": child.get("data", {}).get("input"),
+                    },
+                    "timestamp": child.get("start_time"),
+                    "error": child.get("error"),
+                }
+            )
+            interaction_id += 1
+
+            interactions.append(
+                {
+                    "id": str(interaction_id),
+                    "span_id": child.get("id"),
+                    "interaction_type": "llm_call_end",
+                    "name": child.get("name"),
+                    "content": {"response": child.get("data", {}).get("output")},
+                    "timestamp": child.get("end_time"),
+                    "error": child.get("error"),
+                }
+            )
+            interaction_id += 1
+
+        elif child_type == "agent":
+            interactions.append(
+                {
+                    "id": str(interaction_id),
+                    "span_id": child.get("id"),
+                    "interaction_type": "agent_call_start",
+                    "name": child.get("name"),
+                    "content": None,
+                    "timestamp": child.get("start_time"),
+                    "error": child.get("error"),
+                }
+            )
+            interaction_id += 1
+
+            # Process nested children recursively
+            if "children" in child.get("data", {}):
+                for nested_child in child["data"]["children"]:
+                    interaction_id = self._process_child_interactions(
+                        nested_child, interaction_id, interactions
+                    )
+
+            interactions.append(
+                {
+                    "id": str(interaction_id),
+                    "span_id": child.get("id"),
+                    "interaction_type": "agent_call_end",
+                    "name": child.get("name"),
+                    "content": child.get("data", {}).get("output"),
+                    "timestamp": child.get("end_time"),
+                    "error": child.get("error"),
+                }
+            )
+            interaction_id += 1
+
+        else:
+            interactions.append(
+                {
+                    "id": str(interaction_id),
+                    "span_id": child.get("id"),
+                    "interaction_type": f"{child_type}_call_start",
+                    "name": child.get("name"),
+                    "content": child.get("data", {}),
+                    "timestamp": child.get("start_time"),
+                    "error": child.get("error"),
+                }
+            )
+            interaction_id += 1
+
+            interactions.append(
+                {
+                    "id": str(interaction_id),
+                    "span_id": child.get("id"),
+                    "interaction_type": f"{child_type}_call_end",
+                    "name": child.get("name"),
+                    "content": child.get("data", {}),
+                    "timestamp": child.get("end_time"),
+                    "error": child.get("error"),
+                }
+            )
+            interaction_id += 1
+
+        # Process additional interactions and network calls
+        if "interactions" in child:
+            for interaction in child["interactions"]:
+                interaction["id"] = str(interaction_id)
+                interaction["span_id"] = child.get("id")
+                interaction["error"] = None
+                interactions.append(interaction)
+                interaction_id += 1
+
+        if "network_calls" in child:
+            for child_network_call in child["network_calls"]:
+                network_call = {}
+                network_call["id"] = str(interaction_id)
+                network_call["span_id"] = child.get("id")
+                network_call["interaction_type"] = "network_call"
+                network_call["name"] = None
+                network_call["content"] = {
+                    "request": {
+                        "url": child_network_call.get("url"),
+                        "method": child_network_call.get("method"),
+                        "headers": child_network_call.get("headers"),
+                    },
+                    "response": {
+                        "status_code": child_network_call.get("status_code"),
+                        "headers": child_network_call.get("response_headers"),
+                        "body": child_network_call.get("response_body"),
+                    },
+                }
+                network_call["timestamp"] = child_network_call.get("start_time")
+                network_call["error"] = child_network_call.get("error")
+                interactions.append(network_call)
+                interaction_id += 1
+
+        return interaction_id
+
+    def format_interactions(self) -> dict:
+        """
+        Format interactions from trace data into a standardized format.
+        Returns a dictionary containing formatted interactions based on trace data.
+
+        The function processes spans from self.trace and formats them into interactions
+        of various types including: agent_start, agent_end, input, output, tool_call_start,
+        tool_call_end, llm_call, file_read, file_write, network_call.
+
+        Returns:
+            dict: A dictionary with "workflow" key containing a list of interactions
+                  sorted by timestamp.
+        """
+        interactions = []
+        interaction_id = 1
+
+        if not hasattr(self, "trace") or not self.trace.data:
+            return {"workflow": []}
+
+        for span in self.trace.data[0]["spans"]:
+            # Process agent spans
+            if span.type == "agent":
+                # Add agent_start interaction
+                interactions.append(
+                    {
+                        "id": str(interaction_id),
+                        "span_id": span.id,
+                        "interaction_type": "agent_call_start",
+                        "name": span.name,
+                        "content": None,
+                        "timestamp": span.start_time,
+                        "error": span.error,
+                    }
+                )
+                interaction_id += 1
+
+                # Process children of agent recursively
+                if "children" in span.data:
+                    for child in span.data["children"]:
+                        interaction_id = self._process_child_interactions(
+                            child, interaction_id, interactions
+                        )
+
+                # Add agent_end interaction
+                interactions.append(
+                    {
+                        "id": str(interaction_id),
+                        "span_id": span.id,
+                        "interaction_type": "agent_call_end",
+                        "name": span.name,
+                        "content": span.data.get("output"),
+                        "timestamp": span.end_time,
+                        "error": span.error,
+                    }
+                )
+                interaction_id += 1
+
+            elif span.type == "tool":
+                interactions.append(
+                    {
+                        "id": str(interaction_id),
+                        "span_id": span.id,
+                        "interaction_type": "tool_call_start",
+                        "name": span.name,
+                        "content": {
+                            "prompt": span.data.get("input"),
+                            "response": span.data.get("output"),
+                        },
+                        "timestamp": span.start_time,
+                        "error": span.error,
+                    }
+                )
+                interaction_id += 1
+
+                interactions.append(
+                    {
+                        "id": str(interaction_id),
+                        "span_id": span.id,
+                        "interaction_type": "tool_call_end",
+                        "name": span.name,
+                        "content": {
+                            "prompt": span.data.get("input"),
+                            "response": span.data.get("output"),
+                        },
+                        "timestamp": span.end_time,
+                        "error": span.error,
+                    }
+                )
+                interaction_id += 1
+
+            elif span.type == "llm":
+                interactions.append(
+                    {
+                        "id": str(interaction_id),
+                        "span_id": span.id,
+                        "interaction_type": "llm_call_start",
+                        "name": span.name,
+                        "content": {
+                            "prompt": span.data.get("input"),
+                        },
+                        "timestamp": span.start_time,
+                        "error": span.error,
+                    }
+                )
+                interaction_id += 1
+
+                interactions.append(
+                    {
+                        "id": str(interaction_id),
+                        "span_id": span.id,
+                        "interaction_type": "llm_call_end",
+                        "name": span.name,
+                        "content": {"response": span.data.get("output")},
+                        "timestamp": span.end_time,
+                        "error": span.error,
+                    }
+                )
+                interaction_id += 1
+
+            else:
+                interactions.append(
+                    {
+                        "id": str(interaction_id),
+                        "span_id": span.id,
+                        "interaction_type": f"{span.type}_call_start",
+                        "name": span.name,
+                        "content": span.data,
+                        "timestamp": span.start_time,
+                        "error": span.error,
+                    }
+                )
+                interaction_id += 1
+
+                interactions.append(
+                    {
+                        "id": str(interaction_id),
+                        "span_id": span.id,
+                        "interaction_type": f"{span.type}_call_end",
+                        "name": span.name,
+                        "content": span.data,
+                        "timestamp": span.end_time,
+                        "error": span.error,
+                    }
+                )
+                interaction_id += 1
+
+            # Process interactions from span.data if they exist
+            if span.interactions:
+                for span_interaction in span.interactions:
+                    interaction = {}
+                    interaction["id"] = str(interaction_id)
+                    interaction["span_id"] = span.id
+                    interaction["interaction_type"] = span_interaction.type
+                    interaction["content"] = span_interaction.content
+                    interaction["timestamp"] = span_interaction.timestamp
+                    interaction["error"] = span.error
+                    interactions.append(interaction)
+                    interaction_id += 1
+
+            if span.network_calls:
+                for span_network_call in span.network_calls:
+                    network_call = {}
+                    network_call["id"] = str(interaction_id)
+                    network_call["span_id"] = span.id
+                    network_call["interaction_type"] = "network_call"
+                    network_call["name"] = None
+                    network_call["content"] = {
+                        "request": {
+                            "url": span_network_call.get("url"),
+                            "method": span_network_call.get("method"),
+                            "headers": span_network_call.get("headers"),
+                        },
+                        "response": {
+                            "status_code": span_network_call.get("status_code"),
+                            "headers": span_network_call.get("response_headers"),
+                            "body": span_network_call.get("response_body"),
+                        },
+                    }
+                    network_call["timestamp"] = span_network_call.get("timestamp")
+                    network_call["error"] = span_network_call.get("error")
+                    interactions.append(network_call)
+                    interaction_id += 1
+
+        # Sort interactions by timestamp
+        sorted_interactions = sorted(
+            interactions, key=lambda x: x["timestamp"] if x["timestamp"] else ""
+        )
+
+        # Reassign IDs to maintain sequential order after sorting
+        for idx, interaction in enumerate(sorted_interactions, 1):
+            interaction["id"] = str(idx)
+
+        return {"workflow": sorted_interactions}
+
+def legacy_dataset_spans(spans):
+    """UploadAgenticTraces._get_dataset_spans before TraceFinalizer."""
+    datasetSpans = []
+    for span in spans:
+        if span["type"] != "agent":
+            existing_span = next((s for s in datasetSpans if s["spanHash"] == span["hash_id"]), None)
+            if existing_span is None:
+                datasetSpans.append({
+                    "spanId": span["id"],
+                    "spanName": span["name"],
+                    "spanHash": span["hash_id"],
+                    "spanType": span["type"],
+                })
+        else:
+            datasetSpans.append({
+                        "spanId": span["id"],
+                        "spanName": span["name"],
+                        "spanHash": span["hash_id"],
+                        "spanType": span["type"],
+                    })
+            children = span["data"]["children"]
+            for child in children:
+                existing_span = next((s for s in datasetSpans if s["spanHash"] == child["hash_id"]), None)
+                if existing_span is None:
+                    datasetSpans.append({
+                        "spanId": child["id"],
+                        "spanName": child["name"],
+                        "spanHash": child["hash_id"],
+                        "spanType": child["type"],
+                    })
+    return datasetSpans
+
+
+def child_span(i, start, span_type):
+    span = {
+        "id": f"span-{i}",
+        "hash_id": f"hash-{i % 500}",
+        "source_hash_id": None,
+        "type": span_type,
+        "name": f"{span_type}-{i % 50}",
+        "start_time": (start + timedelta(microseconds=2 * i)).isoformat(),
+        "end_time": (start + timedelta(microseconds=2 * i + 1)).isoformat(),
+        "parent_id": None,
+        "info": {"model": "gpt-4o" if i % 7 else "default", "cost": {"total_cost": 0.001},
+                 "tokens": {"prompt_tokens": 10, "total_tokens": 12}},
+        "error": None,
+        "data": {"input": {"args": [i], "kwargs": {}}, "output": f"output {i}"},
+        "metrics": [{"name": f"metric-{i % 5}"}] if i % 10 == 0 else [],
+        "network_calls": [{"url": f"https://api/{i}", "method": "POST", "start_time": start.isoformat()}],
+        "interactions": [{"id": i, "interaction_type": "input", "content": "hi",
+                          "timestamp": start.isoformat()}] if i % 25 == 0 else [],
+    }
+    if span_type == "llm" and i % 13 == 0:
+        # A duplicate LLM call
+        span["hash_id"] = "hash-duplicate"
+        span["data"] = {"input": "same prompt", "output": "same answer"}
+    return span
+
+
+def agent_span(i, start, children):
+    return {
+        "id": f"agent-{i}",
+        "hash_id": f"agent-hash-{i}",
+        "source_hash_id": None,
+        "type": "agent",
+        "name": f"agent-{i}",
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(seconds=1)).isoformat(),
+        "parent_id": None,
+        "info": {},
+        "error": None,
+        "data": {"input": None, "output": None, "children": children},
+        "metrics": [{"name": "agent-metric"}],
+        "network_calls": [],
+        "interactions": [],
+    }
+
+
+def build_trace(width, depth):
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    # Wide: one agent with many tool and LLM children
+    wide = agent_span(0, start, [child_span(i, start, "llm" if i % 2 else "tool") for i in range(width)])
+    # Deep: a chain of nested agents
+    deep_children = [child_span(width, start, "llm")]
+    for level in range(depth, 0, -1):
+        deep_children = [agent_span(level, start, deep_children + [child_span(width + level, start, "tool")])]
+    deep = agent_span(depth + 1, start, deep_children)
+    roots = [Component(**wide), Component(**deep), Component(**child_span(width + depth + 2, start, "llm"))]
+    metadata = Metadata(cost={}, tokens={}, system_info=None, resources=None)
+    return Trace(id="trace", trace_name="trace", project_name="project", start_time=start.isoformat(),
+                 end_time="", metadata=metadata, data=[{"start_time": "", "end_time": "", "spans": roots}])
+
+
+def to_json(obj):
+    return json.loads(json.dumps(obj, default=to_serializable))
+
+
+def legacy_finalize(trace):
+    start = time.perf_counter()
+    legacy = LegacyFinalization(trace, trace.data[0]["spans"])
+    legacy._calculate_final_metrics()
+    trace = legacy._change_span_ids_to_int(trace)
+    trace = legacy._change_agent_input_output(trace)
+    trace = legacy._extract_cost_tokens(trace)
+    trace_data = legacy._clean_trace(trace.to_dict())
+    workflow = legacy.format_interactions()["workflow"]
+    elapsed = time.perf_counter() - start
+
+    # The metrics and dataset spans were walks of the saved trace file, its parse is not timed
+    saved = to_json(trace_data)
+    start = time.perf_counter()
+    metrics = get_trace_metrics_from_trace(saved)
+    dataset_spans = legacy_dataset_spans(saved["data"][0]["spans"])
+    elapsed += time.perf_counter() - start
+    return elapsed, trace_data["data"][0]["spans"], workflow, metrics, dataset_spans, trace.metadata
+
+
+def single_pass_finalize(trace):
+    start = time.perf_counter()
+    finalizer = TraceFinalizer(trace.data[0]["spans"])
+    trace.data[0]["spans"] = finalizer.run()
+    trace.metadata.cost, trace.metadata.tokens = finalizer.cost, finalizer.tokens
+    trace.metadata.total_cost, trace.metadata.total_tokens = finalizer.total_cost, finalizer.total_tokens
+    elapsed = time.perf_counter() - start
+    return elapsed, trace.data[0]["spans"], finalizer.workflow, finalizer.metrics, finalizer.dataset_spans, trace.metadata
+
+
+def workflow_order(interaction):
+    return json.dumps({**interaction, "id": None}, sort_keys=True)
+
+
+def without_interaction_ids(spans):
+    spans = json.loads(json.dumps(spans))
+    stack = list(spans)
+    while stack:
+        span = stack.pop()
+        for interaction in span.get("interactions") or []:
+            interaction.pop("id", None)
+        stack.extend((span.get("data") or {}).get("children") or [])
+    return spans
+
+
+def incremental_finalize(trace):
+    # The tracer records the interactions of each root component as it completes, not timed here
+    workflow_builder = WorkflowBuilder()
+    for span in trace.data[0]["spans"]:
+        workflow_builder.record(span)
+    start = time.perf_counter()
+    finalizer = TraceFinalizer(trace.data[0]["spans"], workflow_builder=workflow_builder)
+    trace.data[0]["spans"] = finalizer.run()
+    trace.metadata.cost, trace.metadata.tokens = finalizer.cost, finalizer.tokens
+    trace.metadata.total_cost, trace.metadata.total_tokens = finalizer.total_cost, finalizer.total_tokens
+    elapsed = time.perf_counter() - start
+    return elapsed, trace.data[0]["spans"], finalizer.workflow, finalizer.metrics, finalizer.dataset_spans, trace.metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=20000)
+    parser.add_argument("--depth", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    # The previous pipeline recurses once or twice per nested agent, and so does json
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10 * args.depth + 1000))
+
+    results = {}
+    variants = [("legacy", legacy_finalize), ("single-pass", single_pass_finalize), ("incremental", incremental_finalize)]
+    for name, fn in variants:
+        timings = []
+        for _ in range(args.repeat):
+            trace = build_trace(args.width, args.depth)
+            gc.collect()
+            gc.disable()
+            try:
+                elapsed, spans, workflow, metrics, dataset_spans, metadata = fn(trace)
+            finally:
+                gc.enable()
+            timings.append(elapsed)
+        results[name] = to_json({
+            "spans": spans, "workflow": workflow, "metrics": metrics, "dataset_spans": dataset_spans,
+            "cost": metadata.cost, "tokens": metadata.tokens,
+            "totals": [metadata.total_cost, metadata.total_tokens],
+        })
+        print(f"{name:>11}: {min(timings) * 1000:>8.1f} ms  (width {args.width}, depth {args.depth})")
+
+    legacy, single_pass, incremental = results["legacy"], results["single-pass"], results["incremental"]
+    assert legacy["spans"] == single_pass["spans"]
+    # Interactions saved with child spans are numbered in the workflow
+    assert without_interaction_ids(legacy["spans"]) == without_interaction_ids(incremental["spans"])
+    assert legacy["workflow"] == single_pass["workflow"]
+    # Interactions recorded while tracing keep their recording order on equal timestamps
+    assert sorted(map(workflow_order, legacy["workflow"])) == sorted(map(workflow_order, incremental["workflow"]))
+    assert [i["timestamp"] for i in legacy["workflow"]] == [i["timestamp"] for i in incremental["workflow"]]
+    assert legacy["dataset_spans"] == single_pass["dataset_spans"]
+    assert legacy["cost"] == single_pass["cost"] and legacy["tokens"] == single_pass["tokens"]
+    assert legacy["totals"] == single_pass["totals"]
+    assert sorted({m["name"] for m in legacy["metrics"]}) == sorted({m["name"] for m in single_pass["metrics"]})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Serialization of an agentic trace: the type-dispatch serializer (orjson when installed)
+against the previous TracerJSONEncoder with json.dump.
+
+Usage:
+    python benchmarks/trace_serialization_benchmark.py [--spans 10000] [--repeat 3]
+"""
+import argparse
+import io
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+from ragaai_catalyst.tracers.utils import serialization
+
+
+class LegacyTracerJSONEncoder(json.JSONEncoder):
+    """TracerJSONEncoder before the type-dispatch serializer."""
+
+    def default(self, obj):
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        if isinstance(obj, bytes):
+            try:
+                return obj.decode("utf-8")
+            except UnicodeDecodeError:
+                return str(obj)
+        if hasattr(obj, "to_dict"):
+            return obj.to_dict()
+        if hasattr(obj, "__dict__"):
+            return {k: v for k, v in obj.__dict__.items() if v is not None and not k.startswith("_")}
+        try:
+            return str(obj)
+        except:
+            return None
+
+
+@dataclass
+class ToolCall:
+    name: str
+    arguments: str
+
+
+def build_trace(num_spans):
+    now = datetime.now().astimezone()
+    spans = []
+    for i in range(num_spans):
+        spans.append({
+            "id": i,
+            "hash_id": f"{i:032x}",
+            "name": f"span {i}",
+            "type": "llm" if i % 3 else "tool",
+            "start_time": now,
+            "end_time": now,
+            "data": {
+                "input": [{"role": "user", "content": "Summarize the retrieved documents. " * 20}],
+                "output": "The documents describe the tracing pipeline. " * 10,
+                "raw": b"raw provider response",
+                "tool_call": ToolCall("search", '{"query": "tracing"}'),
+                "scores": [np.float64(0.5), np.float64(0.25)],
+            },
+            "info": {"cost": {"total_cost": 0.0001 * i}, "tokens": {"prompt_tokens": 512, "completion_tokens": 128}},
+        })
+    return {"id": "trace", "start_time": now, "data": [{"spans": spans}], "metrics": []}
+
+
+def legacy_dump(trace):
+    f = io.StringIO()
+    json.dump(trace, f, cls=LegacyTracerJSONEncoder, indent=2)
+    return f.getvalue().encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spans", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    trace = build_trace(args.spans)
+    assert json.loads(serialization.dump_bytes(trace, indent=2)) == json.loads(legacy_dump(trace))
+
+    backend = "orjson" if serialization.orjson is not None else "json"
+    for name, fn in [("legacy", legacy_dump), (backend, lambda t: serialization.dump_bytes(t, indent=2))]:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            size = len(fn(trace))
+            timings.append(time.perf_counter() - start)
+        print(f"{name:>7}: {min(timings) * 1000:>8.1f} ms  ({size / 1e6:.1f} MB, {args.spans} spans)")
+
+
+if __name__ == "__main__":
+    main()
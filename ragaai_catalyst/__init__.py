@@ -8,7 +8,8 @@ from .synthetic_data_generation import SyntheticDataGeneration
 from .redteaming import RedTeaming
 from .guardrails_manager import GuardrailsManager
 from .guard_executor import GuardExecutor
-from .tracers import Tracer, init_tracing, trace_agent, trace_llm, trace_tool, current_span, trace_custom
+from .llm_cache import LLMResponseCache
+from .tracers import Tracer, init_tracing, trace_agent, trace_llm, trace_tool, current_span, trace_custom, trace_session
 
 
 
@@ -23,10 +24,12 @@ __all__ = [
     "RedTeaming",
     "GuardrailsManager", 
     "GuardExecutor",
+    "LLMResponseCache",
     "init_tracing", 
     "trace_agent", 
     "trace_llm",
     "trace_tool",
     "current_span",
-    "trace_custom"
+    "trace_custom",
+    "trace_session",
 ]
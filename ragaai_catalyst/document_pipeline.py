@@ -0,0 +1,153 @@
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import PyPDF2
+import tiktoken
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.txt', '.md', '.csv')
+GLOB_CHARACTERS = ('*', '?', '[')
+MIN_PAGES_PER_WORKER = 8
+
+
+def _extract_pdf_pages(file_path, start, end):
+    """Extract the text of pages [start, end) of a PDF. Runs inside a worker process."""
+    text = ""
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page in pdf_reader.pages[start:end]:
+            text += page.extract_text()
+    return text
+
+
+def extract_pdf_text(file_path, max_workers=None):
+    """
+    Extract the text of a PDF, splitting its pages across a process pool.
+
+    Small documents, or `max_workers=1`, are read in the calling process since
+    spawning workers would cost more than it saves.
+
+    Args:
+        file_path (str): The path to the PDF file.
+        max_workers (int, optional): Maximum number of worker processes. Defaults to the CPU count.
+
+    Returns:
+        str: The extracted text content, in page order.
+    """
+    with open(file_path, 'rb') as file:
+        num_pages = len(PyPDF2.PdfReader(file).pages)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    num_workers = min(max_workers, num_pages // MIN_PAGES_PER_WORKER)
+    if num_workers <= 1:
+        return _extract_pdf_pages(file_path, 0, num_pages)
+
+    pages_per_worker = (num_pages + num_workers - 1) // num_workers
+    ranges = [(start, min(start + pages_per_worker, num_pages)) for start in range(0, num_pages, pages_per_worker)]
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        parts = executor.map(_extract_pdf_pages, [file_path] * len(ranges), *zip(*ranges))
+        return "".join(parts)
+
+
+def chunk_text(text, chunk_tokens=2000, overlap_tokens=200, encoding_name="cl100k_base"):
+    """
+    Split a text into windows of at most `chunk_tokens` tokens, consecutive windows sharing
+    `overlap_tokens` tokens so that no passage is cut without context.
+
+    Args:
+        text (str): The text to split.
+        chunk_tokens (int): Maximum number of tokens per chunk.
+        overlap_tokens (int): Number of tokens shared by consecutive chunks.
+        encoding_name (str): The tiktoken encoding used to count tokens.
+
+    Returns:
+        list: A list of (chunk_text, token_count) tuples.
+
+    Raises:
+        ValueError: If the overlap is not smaller than the chunk size.
+    """
+    if overlap_tokens >= chunk_tokens:
+        raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+
+    encoding = tiktoken.get_encoding(encoding_name)
+    tokens = encoding.encode(text)
+    if len(tokens) <= chunk_tokens:
+        return [(text, len(tokens))]
+
+    chunks = []
+    step = chunk_tokens - overlap_tokens
+    start = 0
+    while True:
+        window = tokens[start:start + chunk_tokens]
+        chunks.append((encoding.decode(window), len(window)))
+        if start + chunk_tokens >= len(tokens):
+            return chunks
+        start += step
+
+
+def allocate_questions(token_counts, n):
+    """
+    Distribute `n` questions across chunks proportionally to their token counts,
+    using the largest remainder method so the allocations always sum to `n`.
+
+    Args:
+        token_counts (list): Token count of every chunk.
+        n (int): Total number of questions to generate.
+
+    Returns:
+        list: Number of questions to generate from each chunk.
+    """
+    total = sum(token_counts)
+    if total == 0:
+        return [0] * len(token_counts)
+    quotas = [n * count / total for count in token_counts]
+    allocations = [int(quota) for quota in quotas]
+    by_remainder = sorted(range(len(quotas)), key=lambda i: quotas[i] - allocations[i], reverse=True)
+    for i in by_remainder[:n - sum(allocations)]:
+        allocations[i] += 1
+    return allocations
+
+
+def is_glob_pattern(input_path):
+    """
+    Whether a string is a glob pattern matching existing paths, such as "docs/**/*.pdf".
+
+    The string must hold one of the wildcards '*', '?' or '[', look like a path (hold a path
+    separator or end with a supported extension) and match at least one path, so that raw
+    text holding these characters is not taken for a pattern.
+
+    Args:
+        input_path (str): The path or text.
+
+    Returns:
+        bool: True for a glob pattern.
+    """
+    if not any(character in input_path for character in GLOB_CHARACTERS):
+        return False
+    separators = {os.sep, '/'} | ({os.altsep} if os.altsep else set())
+    if not (any(separator in input_path for separator in separators)
+            or input_path.lower().endswith(SUPPORTED_EXTENSIONS)):
+        return False
+    return next(glob.iglob(input_path, recursive=True), None) is not None
+
+
+def iter_document_paths(input_path):
+    """
+    Lazily list the supported documents of a directory (searched recursively) or a glob pattern.
+
+    Args:
+        input_path (str): A directory path or a glob pattern such as "docs/**/*.pdf".
+
+    Yields:
+        str: The path of every supported document, in sorted order within a directory.
+    """
+    if os.path.isdir(input_path):
+        for root, dirs, files in os.walk(input_path):
+            dirs.sort()
+            for file_name in sorted(files):
+                if file_name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    yield os.path.join(root, file_name)
+    else:
+        for file_path in glob.iglob(input_path, recursive=True):
+            if os.path.isfile(file_path) and file_path.lower().endswith(SUPPORTED_EXTENSIONS):
+                yield file_path
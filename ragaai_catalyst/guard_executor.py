@@ -1,14 +1,20 @@
+import asyncio
+import contextlib
+import threading
+import aiohttp
 import litellm
 import json
 import requests
 import os
 import logging
+from .llm_cache import resolve_cache
+from .guardrail_prescreen import GuardrailPreScreen
 logger = logging.getLogger('LiteLLM')
 logger.setLevel(logging.ERROR)
 
 class GuardExecutor:
 
-    def __init__(self,id,guard_manager,field_map={}):
+    def __init__(self,id,guard_manager,field_map={},max_concurrency=16,prescreen=None):
         self.deployment_id = id
         self.field_map = field_map
         self.guard_manager = guard_manager
@@ -16,42 +22,148 @@ class GuardExecutor:
         if not self.deployment_details:
             raise ValueError('Error in getting deployment details')
         self.base_url = guard_manager.base_url
+        self.max_concurrency = max_concurrency
+        # Decides obvious cases locally; True builds it from the deployment's guardrails
+        if prescreen is True:
+            prescreen = GuardrailPreScreen.from_deployment(self.deployment_details)
+        self.prescreen = prescreen or None
+        # Keep-alive connections to the ingest endpoint, reused across calls
+        self._http = requests.Session()
+        # One aiohttp session per event loop, a session cannot be used from another loop
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
         for key in field_map.keys():
             if key not in ['prompt','context','response','instruction']:
                 print('Keys in field map should be in ["prompt","context","response","instruction"]')
 
-    def execute_deployment(self,payload):
+    def _ingest_request(self):
         api = self.base_url + f'/guardrail/deployment/{self.deployment_id}/ingest'
-
-        payload = json.dumps(payload)
         headers = {
             'x-project-id': str(self.guard_manager.project_id),
             'Content-Type': 'application/json',
             'Authorization': f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}'
         }
+        return api, headers
+
+    def _ingest_result(self,status_code,response_json):
+        if status_code!=200:
+            print('Error in running deployment ',response_json['message'])
+        if response_json['success']:
+            return response_json
+        else:
+            print(response_json['message'])
+            return None
+
+    def execute_deployment(self,payload):
+        if self.prescreen is not None:
+            verdict = self.prescreen.screen(payload)
+            if verdict is not None:
+                return verdict
+        api, headers = self._ingest_request()
         try:
-            response = requests.request("POST", api, headers=headers, data=payload,timeout=self.guard_manager.timeout)
+            response = self._http.post(api, headers=headers, data=json.dumps(payload),timeout=self.guard_manager.timeout)
         except Exception as e:
             print('Failed running guardrail: ',str(e))
             return None
-        if response.status_code!=200:
-            print('Error in running deployment ',response.json()['message'])
-        if response.json()['success']:
-            return response.json()
-        else:
-            print(response.json()['message'])
+        return self._remote_result(payload,response.status_code,response.json())
+
+    def _remote_result(self,payload,status_code,response_json):
+        result = self._ingest_result(status_code,response_json)
+        if self.prescreen is not None:
+            self.prescreen.record_remote(payload,result)
+        return result
+
+    def _get_session(self):
+        loop = asyncio.get_running_loop()
+        with self._sessions_lock:
+            # The sessions of loops closed without aclose() can no longer be closed or used
+            for closed_loop in [other for other in self._sessions if other.is_closed()]:
+                del self._sessions[closed_loop]
+            session = self._sessions.get(loop)
+            if session is None or session.closed:
+                session = self._sessions[loop] = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                    timeout=aiohttp.ClientTimeout(total=self.guard_manager.timeout)
+                )
+        return session
+
+    async def aexecute_deployment(self,payload):
+        """
+        Async variant of `execute_deployment`, sent over a pooled connection to the ingest endpoint.
+
+        Args:
+            payload (dict): The document to run the guardrails on.
+
+        Returns:
+            dict: The deployment response, or None if the run failed.
+        """
+        if self.prescreen is not None:
+            verdict = self.prescreen.screen(payload)
+            if verdict is not None:
+                return verdict
+        api, headers = self._ingest_request()
+        try:
+            async with self._get_session().post(api, headers=headers, data=json.dumps(payload)) as response:
+                response_json = await response.json(content_type=None)
+                status_code = response.status
+        except Exception as e:
+            print('Failed running guardrail: ',str(e))
             return None
+        return self._remote_result(payload,status_code,response_json)
+
+    async def aexecute_deployments(self,payloads):
+        """
+        Run the guardrails on many documents concurrently, at most `max_concurrency` in flight.
 
-    def llm_executor(self,messages,model_params,llm_caller):
+        Args:
+            payloads (list): The documents to run the guardrails on.
+
+        Returns:
+            list: The deployment responses, in the order of `payloads`.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(payload):
+            async with semaphore:
+                return await self.aexecute_deployment(payload)
+
+        return await asyncio.gather(*(run(payload) for payload in payloads))
+
+    async def aclose(self):
+        """
+        Close the pooled connections used by the async methods in the running event loop.
+
+        Each event loop has its own connections: await it in every loop the async methods ran in,
+        before the loop ends.
+        """
+        with self._sessions_lock:
+            session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    def llm_executor(self,messages,model_params,llm_caller,cache=None,refresh_cache=False):
         if llm_caller == 'litellm':
             model_params['messages'] = messages
+            cache = resolve_cache(cache)
+            if cache is not None:
+                return cache.get_or_call('guard_executor', model_params, lambda: litellm.completion(**model_params), refresh=refresh_cache)
             response = litellm.completion(**model_params)
             return response
         else:
             print(f"{llm_caller} not supported currently, use litellm as llm caller")
 
-    
-    def __call__(self,messages,prompt_params,model_params,llm_caller='litellm'):
+    async def allm_executor(self,messages,model_params,llm_caller,cache=None,refresh_cache=False):
+        if llm_caller == 'litellm':
+            # Concurrent calls may share model_params, so never mutate it here
+            model_params = dict(model_params, messages=messages)
+            cache = resolve_cache(cache)
+            if cache is not None:
+                return await cache.aget_or_call('guard_executor', model_params, lambda: litellm.acompletion(**model_params), refresh=refresh_cache)
+            return await litellm.acompletion(**model_params)
+        else:
+            print(f"{llm_caller} not supported currently, use litellm as llm caller")
+
+    def _prepare_doc(self,messages,prompt_params):
         for key in self.field_map:
             if key not in ['prompt','response']:
                 if self.field_map[key] not in prompt_params:
@@ -67,26 +179,105 @@ class GuardExecutor:
         doc = dict()
         doc['prompt'] = prompt
         doc['context'] = prompt_params[context_var]
+        return doc
+
+    def _complete_doc(self,doc,prompt_params,llm_response):
+        doc['response'] = llm_response['choices'][0].message.content
+        if 'instruction' in self.field_map:
+            instruction = prompt_params[self.field_map['instruction']]
+            doc['instruction'] = instruction
+        return doc
+
+    def _guarded_result(self,response,llm_response):
+        if response and response['data']['status'] == 'FAIL':
+            print('Guardrail deployment run retured failed status, replacing with alternate response')
+            return response['data']['alternateResponse'],llm_response,response
+        else:
+            return None,llm_response,response
+    
+    def __call__(self,messages,prompt_params,model_params,llm_caller='litellm',cache=None,refresh_cache=False):
+        doc = self._prepare_doc(messages,prompt_params)
         
         # inactive the guardrails that needs Response variable
         #deployment_response = self.execute_deployment(doc)
         
         # activate only guardrails that require response
         try:
-            llm_response = self.llm_executor(messages,model_params,llm_caller)
+            llm_response = self.llm_executor(messages,model_params,llm_caller,cache,refresh_cache)
         except Exception as e:
             print('Error in running llm:',str(e))
             return None
-        doc['response'] = llm_response['choices'][0].message.content
-        if 'instruction' in self.field_map:
-            instruction = prompt_params[self.field_map['instruction']]
-            doc['instruction'] = instruction
+        doc = self._complete_doc(doc,prompt_params,llm_response)
         response = self.execute_deployment(doc)
-        if response and response['data']['status'] == 'FAIL':
-            print('Guardrail deployment run retured failed status, replacing with alternate response')
-            return response['data']['alternateResponse'],llm_response,response
-        else:
-            return None,llm_response,response
+        return self._guarded_result(response,llm_response)
+
+    async def acall(self,messages,prompt_params,model_params,llm_caller='litellm',speculative=False,cache=None,refresh_cache=False):
+        """
+        Async variant of `__call__`.
+
+        In speculative mode the LLM call starts concurrently with a guardrail run on the
+        input alone. If the input fails the guardrails, the LLM call is cancelled and the
+        alternate response is returned without waiting for it; otherwise the output is
+        checked once the LLM responds.
+
+        Args:
+            messages (list): The chat messages sent to the LLM.
+            prompt_params (dict): Values of the variables named in the field map.
+            model_params (dict): Parameters of the LLM call.
+            llm_caller (str): The library used to call the LLM. Only 'litellm' is supported.
+            speculative (bool): Run the input guardrails concurrently with the LLM call.
+            cache (LLMResponseCache | bool, optional): Response cache for the LLM call.
+            refresh_cache (bool): Call the LLM even on a cache hit and overwrite the cached response.
+
+        Returns:
+            tuple: The alternate response (None when the guardrails pass), the LLM response
+                and the deployment response, or None if the LLM call failed.
+        """
+        doc = self._prepare_doc(messages,prompt_params)
+        llm_task = asyncio.ensure_future(self.allm_executor(messages,model_params,llm_caller,cache,refresh_cache))
+
+        if speculative:
+            input_response = await self.aexecute_deployment(dict(doc))
+            if input_response and input_response['data']['status'] == 'FAIL':
+                llm_task.cancel()
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await llm_task
+                return self._guarded_result(input_response,None)
+
+        try:
+            llm_response = await llm_task
+        except Exception as e:
+            print('Error in running llm:',str(e))
+            return None
+        doc = self._complete_doc(doc,prompt_params,llm_response)
+        response = await self.aexecute_deployment(doc)
+        return self._guarded_result(response,llm_response)
+
+    async def abatch(self,conversations,model_params,llm_caller='litellm',speculative=False,cache=None,refresh_cache=False):
+        """
+        Run `acall` on many conversations concurrently, at most `max_concurrency` at a time.
+
+        This is a concurrent fan-out, not a batched ingestion: each conversation still makes its
+        own LLM call and its own guardrail deployment requests.
+
+        Args:
+            conversations (list): (messages, prompt_params) pairs.
+            model_params (dict): Parameters of the LLM calls, shared by every conversation.
+            llm_caller (str): The library used to call the LLM. Only 'litellm' is supported.
+            speculative (bool): Run the input guardrails concurrently with each LLM call.
+            cache (LLMResponseCache | bool, optional): Response cache for the LLM calls.
+            refresh_cache (bool): Call the LLM even on a cache hit and overwrite the cached responses.
+
+        Returns:
+            list: The result of `acall` for each conversation, in order.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(messages,prompt_params):
+            async with semaphore:
+                return await self.acall(messages,prompt_params,model_params,llm_caller,speculative,cache,refresh_cache)
+
+        return await asyncio.gather(*(run(messages,prompt_params) for messages,prompt_params in conversations))
 
 
 
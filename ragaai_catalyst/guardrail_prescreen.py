@@ -0,0 +1,299 @@
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict, deque
+
+TEXT_FIELDS = ('prompt', 'context', 'response', 'instruction')
+# Fields evaluated by a guardrail without mappings, the others being reference material
+GUARDRAIL_FIELDS = ('prompt', 'response')
+# Guardrail params holding word lists that fail the guardrail when any of them appears
+KEYWORD_PARAMS = ('competitors', 'keywords', 'bannedWords', 'banned_words', 'blockedWords', 'words')
+# Guardrail params holding patterns that fail the guardrail when they match
+REGEX_PARAMS = ('regex', 'regexes', 'pattern', 'patterns')
+
+
+class KeywordAutomaton:
+    """
+    An Aho–Corasick automaton finding whole-word, case-insensitive keyword matches
+    in a single pass over the text, whatever the number of keywords.
+    """
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [None]
+        for keyword in keywords:
+            self._insert(keyword.lower())
+        self._build_fail_links()
+
+    def __bool__(self):
+        return len(self._goto) > 1
+
+    def _insert(self, keyword):
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state] = keyword
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+
+    def find(self, text):
+        """
+        Find the first keyword occurring as a whole word in the text.
+
+        Args:
+            text (str): The text to search.
+
+        Returns:
+            str: The matched keyword, or None.
+        """
+        text = text.lower()
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            match_state = state
+            while match_state:
+                keyword = self._output[match_state]
+                if keyword is not None:
+                    start = end - len(keyword) + 1
+                    before = text[start - 1] if start > 0 else ' '
+                    after = text[end + 1] if end + 1 < len(text) else ' '
+                    if not before.isalnum() and not after.isalnum():
+                        return keyword
+                match_state = self._fail[match_state]
+        return None
+
+
+class GuardrailPreScreen:
+    """
+    Decides obvious guardrail cases locally, so that only ambiguous documents are sent
+    to the remote deployment.
+
+    A document is blocked locally when it exceeds the length limit, contains a blocked
+    keyword or matches a blocked pattern. It passes locally when it matches an allow
+    pattern, or when every guardrail of the deployment has a local equivalent and none
+    of them fired. Recent verdicts, local or remote, are memoized.
+    """
+
+    def __init__(self, block_keywords=(), block_patterns=(), allow_patterns=(), max_length=None,
+                 fields=TEXT_FIELDS, field_rules=None, remote_required=True, alternate_response=None,
+                 memo_size=1024):
+        """
+        Initialize the pre-screen.
+
+        Args:
+            block_keywords (iterable): Words or phrases that fail the document, matched case-insensitively.
+            block_patterns (iterable): Regular expressions that fail the document when they match.
+            allow_patterns (iterable): Regular expressions that pass the document when they fully match.
+            max_length (int, optional): Maximum number of characters of any screened field.
+            fields (iterable): Document fields the rules apply to.
+            field_rules (dict, optional): Block rules of single fields, as field -> (keywords, patterns),
+                such as the rules of guardrails evaluating only some of the fields.
+            remote_required (bool): Whether documents not blocked locally still need the remote
+                deployment, i.e. the deployment has guardrails without a local equivalent.
+            alternate_response (str, optional): Response returned for locally blocked documents.
+            memo_size (int): Number of recent verdicts to remember.
+        """
+        self.fields = tuple(fields)
+        block_keywords, block_patterns = list(block_keywords), list(block_patterns)
+        field_rules = field_rules or {}
+        # field -> (keyword automaton, block regex), fields with the same rules share them
+        self._rules = {}
+        compiled = {}
+        for field in dict.fromkeys(self.fields + tuple(field_rules)):
+            keywords, patterns = field_rules.get(field, ((), ()))
+            if field in self.fields:
+                keywords, patterns = block_keywords + list(keywords), block_patterns + list(patterns)
+            key = (tuple(keywords), tuple(patterns))
+            if key not in compiled:
+                compiled[key] = (KeywordAutomaton(keywords), self._compile(patterns))
+            self._rules[field] = compiled[key]
+        self.allow_regex = self._compile(allow_patterns)
+        self.max_length = max_length
+        self.remote_required = remote_required
+        self.alternate_response = alternate_response
+        self.memo_size = memo_size
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self._decisions = {}
+
+    @staticmethod
+    def _compile(patterns):
+        patterns = list(patterns)
+        if not patterns:
+            return None
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+
+    @classmethod
+    def from_deployment(cls, deployment_details, **kwargs):
+        """
+        Build a pre-screen from the deployment returned by `GuardrailsManager.get_deployment`.
+
+        Keyword lists (such as competitors) and regex params of the active deployment guardrails
+        become local block rules of the fields they evaluate: the variables of their mappings,
+        or the prompt and response. Guardrails without a local equivalent keep the remote call
+        mandatory for documents that are not blocked locally.
+
+        Args:
+            deployment_details (dict): The deployment details.
+            **kwargs: Extra rules and options, as accepted by the constructor.
+
+        Returns:
+            GuardrailPreScreen: The pre-screen.
+        """
+        data = (deployment_details or {}).get('data', {})
+        field_rules = {}
+        guardrails = [guardrail for guardrail in data.get('guardrailsResponse') or [] if cls._is_active(guardrail)]
+        remote_required = False
+        if data.get('deploymentFailCondition') == 'ALL_FAIL' and len(guardrails) > 1:
+            # A single guardrail failing does not fail the deployment, so nothing can be decided locally
+            guardrails, remote_required = [], True
+        for guardrail in guardrails:
+            config = guardrail.get('metricSpec', guardrail).get('config') or {}
+            params = config.get('params') or {}
+            fields = [mapping['variableName'].lower() for mapping in config.get('mappings') or []
+                      if isinstance(mapping, dict) and mapping.get('variableName')] or GUARDRAIL_FIELDS
+            translated = False
+            for name, param in params.items():
+                value = param.get('value') if isinstance(param, dict) else None
+                values = [value] if isinstance(value, str) else value
+                if not isinstance(values, list) or not values:
+                    continue
+                if name in KEYWORD_PARAMS or name in REGEX_PARAMS:
+                    for field in fields:
+                        rules = field_rules.setdefault(field, ([], []))
+                        rules[0 if name in KEYWORD_PARAMS else 1].extend(str(v) for v in values)
+                    translated = True
+            remote_required = remote_required or not translated
+
+        if 'alternate_response' not in kwargs:
+            try:
+                fail_action = data.get('failAction') or {}
+                kwargs['alternate_response'] = json.loads(fail_action.get('args') or '{}').get('alternateResponse')
+            except (TypeError, ValueError, AttributeError):
+                pass
+        kwargs.setdefault('remote_required', remote_required)
+        return cls(field_rules=field_rules, **kwargs)
+
+    @staticmethod
+    def _is_active(guardrail):
+        # Guardrails are switched off by an 'isActive' flag, or an 'isActive' param of their config
+        spec = guardrail.get('metricSpec', guardrail)
+        active = guardrail.get('isActive', spec.get('isActive'))
+        if active is None:
+            param = ((spec.get('config') or {}).get('params') or {}).get('isActive')
+            active = param.get('value') if isinstance(param, dict) else param
+        return active is not False
+
+    @staticmethod
+    def _memo_key(doc):
+        return hashlib.sha256(json.dumps(doc, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _record(self, path):
+        with self._lock:
+            self._decisions[path] = self._decisions.get(path, 0) + 1
+
+    def _verdict(self, status, path, reason=None):
+        verdict = {'success': True, 'data': {'status': status, 'decisionPath': path}}
+        if reason:
+            verdict['data']['reason'] = reason
+        if status == 'FAIL':
+            verdict['data']['alternateResponse'] = self.alternate_response
+        return verdict
+
+    def screen(self, doc):
+        """
+        Try to decide a document locally.
+
+        Args:
+            doc (dict): The document that would be sent to the deployment.
+
+        Returns:
+            dict: A deployment-shaped response whose data holds the status and the
+                'decisionPath' that decided it, or None if the remote deployment must decide.
+        """
+        key = self._memo_key(doc)
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+        if cached is not None:
+            self._record('memo')
+            return dict(cached, data=dict(cached['data'], decisionPath='memo'))
+
+        verdict = self._screen(doc)
+        if verdict is not None:
+            self._record(verdict['data']['decisionPath'])
+            self._remember(key, verdict)
+        return verdict
+
+    def _screen(self, doc):
+        texts = [(doc[field], rules) for field, rules in self._rules.items() if isinstance(doc.get(field), str)]
+        for text, (keywords, block_regex) in texts:
+            if self.max_length is not None and len(text) > self.max_length:
+                return self._verdict('FAIL', 'length', f'text longer than {self.max_length} characters')
+            if keywords:
+                keyword = keywords.find(text)
+                if keyword is not None:
+                    return self._verdict('FAIL', 'keyword', f'blocked keyword: {keyword}')
+            if block_regex is not None:
+                match = block_regex.search(text)
+                if match:
+                    return self._verdict('FAIL', 'regex', f'blocked pattern: {match.group(0)}')
+        if self.allow_regex is not None and texts and all(self.allow_regex.fullmatch(text.strip()) for text, _ in texts):
+            return self._verdict('PASS', 'allow')
+        if not self.remote_required:
+            return self._verdict('PASS', 'rules')
+        return None
+
+    def record_remote(self, doc, response):
+        """
+        Remember the verdict of the remote deployment for a document.
+
+        Args:
+            doc (dict): The document sent to the deployment.
+            response (dict): The deployment response. Failed calls (None) are not remembered.
+        """
+        self._record('remote')
+        if response:
+            self._remember(self._memo_key(doc), response)
+
+    def _remember(self, key, verdict):
+        with self._lock:
+            self._memo[key] = verdict
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    def stats(self):
+        """
+        Get the number of documents decided by each path.
+
+        Returns:
+            dict: Counts per decision path ('memo', 'length', 'keyword', 'regex', 'allow',
+                'rules' or 'remote'), the total and the share decided locally ('offload_ratio').
+        """
+        with self._lock:
+            decisions = dict(self._decisions)
+        total = sum(decisions.values())
+        local = total - decisions.get('remote', 0)
+        return {'decisions': decisions, 'total': total, 'offload_ratio': local / total if total else 0.0}
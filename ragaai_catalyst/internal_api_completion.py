@@ -5,9 +5,27 @@ import logging
 import traceback
 import pandas as pd
 
+from .llm_cache import resolve_cache
+
 logger = logging.getLogger(__name__)
 
-def api_completion(messages, model_config, kwargs):
+def api_completion(messages, model_config, kwargs, cache=None, refresh_cache=False):
+    cache = resolve_cache(cache)
+    if cache is None:
+        return _api_completion(messages, model_config, kwargs)
+    request = {
+        'messages': messages,
+        'model_config': {k: v for k, v in model_config.items() if k not in ['job_id', 'log_level']},
+        'user_id': kwargs.get('user_id', '1'),
+        'internal_llm_proxy': kwargs.get('internal_llm_proxy', -1)
+    }
+    return cache.get_or_call(
+        'internal_api_completion', request,
+        lambda: _api_completion(messages, model_config, kwargs),
+        refresh=refresh_cache
+    )
+
+def _api_completion(messages, model_config, kwargs):
     attempts = 0
     while attempts < 3:
 
@@ -0,0 +1,284 @@
+import contextlib
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Request fields that never take part in the cache key
+_EXCLUDED_KEY_FIELDS = {"api_key", "headers", "timeout"}
+
+_replay_counts = contextvars.ContextVar("ragaai_llm_cache_replay_counts", default=None)
+
+
+def make_cache_key(namespace, request):
+    """
+    Build a content-addressed key from a canonical JSON form of an LLM request.
+
+    Args:
+        namespace (str): Name of the calling integration, so identical requests sent
+            through different code paths do not share entries.
+        request (dict): The request, typically model, messages and generation parameters.
+
+    Returns:
+        str: The SHA-256 hex digest of the canonical request.
+    """
+    material = {k: v for k, v in request.items() if k not in _EXCLUDED_KEY_FIELDS}
+    canonical = json.dumps([namespace, material], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    A two-tier cache for LLM responses: an in-memory LRU in front of an optional SQLite file.
+
+    Entries are pickled, so any picklable response (strings, DataFrames, litellm responses)
+    can be cached, and callers always receive their own copy.
+
+    Unpickling runs code chosen by whoever wrote the data, so the SQLite file must only be
+    writable by the user running the cache: it is created readable and writable by its owner
+    only, and a file from another source must never be used as a cache.
+    """
+
+    def __init__(self, max_entries=1024, path=None, ttl=None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum number of entries kept in memory.
+            path (str, optional): Path of the SQLite file backing the cache. Memory only when None.
+                The file is trusted, see the class docstring.
+            ttl (float, optional): Time to live of an entry in seconds. Entries never expire when None.
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # Created for the owner only, an existing file keeps its permissions
+            os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value BLOB, created_at REAL)"
+            )
+            self._db.commit()
+
+    def _expired(self, created_at):
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def get(self, key):
+        """
+        Look up an entry.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            tuple: (True, value) on a hit, (False, None) on a miss.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._expired(created_at):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return True, pickle.loads(value)
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if not self._expired(created_at):
+                        self._remember(key, value, created_at)
+                        self._stats["disk_hits"] += 1
+                        return True, pickle.loads(value)
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self._stats["misses"] += 1
+            return False, None
+
+    def set(self, key, value):
+        """
+        Store an entry in both tiers.
+
+        Args:
+            key (str): The cache key.
+            value: The response to store. Must be picklable.
+        """
+        try:
+            payload = pickle.dumps(value)
+        except Exception as e:
+            logger.debug(f"Response for key {key} is not cacheable: {e}")
+            return
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, payload, created_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, payload, created_at),
+                )
+                self._db.commit()
+            self._stats["stores"] += 1
+
+    def _remember(self, key, payload, created_at):
+        self._memory[key] = (payload, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_or_call(self, namespace, request, fn, refresh=False, should_cache=None):
+        """
+        Return the cached response of a request, calling `fn` on a miss.
+
+        Inside a `replay_scope`, the k-th identical request of the scope gets its own entry,
+        so flows that sample the same prompt repeatedly replay the same sequence of responses.
+
+        Args:
+            namespace (str): Name of the calling integration.
+            request (dict): The request used to build the key.
+            fn (callable): Zero-argument function performing the actual call.
+            refresh (bool): Skip the lookup, call `fn` and overwrite the entry.
+            should_cache (callable, optional): Predicate deciding whether a response is stored.
+
+        Returns:
+            The cached or freshly computed response.
+        """
+        key = self._scoped_key(namespace, request)
+        if not refresh:
+            hit, value = self.get(key)
+            if hit:
+                return value
+
+        value = fn()
+        if value is not None and (should_cache is None or should_cache(value)):
+            self.set(key, value)
+        return value
+
+    async def aget_or_call(self, namespace, request, fn, refresh=False, should_cache=None):
+        """
+        Async variant of `get_or_call`, where `fn` is a zero-argument coroutine function.
+
+        Returns:
+            The cached or freshly computed response.
+        """
+        key = self._scoped_key(namespace, request)
+        if not refresh:
+            hit, value = self.get(key)
+            if hit:
+                return value
+
+        value = await fn()
+        if value is not None and (should_cache is None or should_cache(value)):
+            self.set(key, value)
+        return value
+
+    def _scoped_key(self, namespace, request):
+        key = make_cache_key(namespace, request)
+        counts = _replay_counts.get()
+        if counts is not None:
+            occurrence = counts.get(key, 0)
+            counts[key] = occurrence + 1
+            key = f"{key}:{occurrence}"
+        return key
+
+    @contextlib.contextmanager
+    def replay_scope(self):
+        """Count identical requests made within the block, giving each repetition its own entry."""
+        token = _replay_counts.set({})
+        try:
+            yield self
+        finally:
+            _replay_counts.reset(token)
+
+    def stats(self):
+        """
+        Get the hit/miss statistics of the cache.
+
+        Returns:
+            dict: Hit, miss and store counters, plus the overall hit rate.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """
+    Get the process-wide cache shared by every integration when called with `cache=True`.
+
+    The cache is backed by SQLite when the RAGAAI_CATALYST_LLM_CACHE_PATH environment
+    variable is set, and its TTL in seconds can be set with RAGAAI_CATALYST_LLM_CACHE_TTL.
+    The file holds pickles and must be trusted, see `LLMResponseCache`.
+
+    Returns:
+        LLMResponseCache: The shared cache.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            ttl = os.getenv("RAGAAI_CATALYST_LLM_CACHE_TTL")
+            _default_cache = LLMResponseCache(
+                path=os.getenv("RAGAAI_CATALYST_LLM_CACHE_PATH"),
+                ttl=float(ttl) if ttl else None,
+            )
+        return _default_cache
+
+
+def set_default_cache(cache):
+    """
+    Replace the process-wide cache used when called with `cache=True`.
+
+    Args:
+        cache (LLMResponseCache): The cache to share.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = cache
+
+
+def resolve_cache(cache):
+    """
+    Resolve the `cache` argument accepted by the LLM calling functions.
+
+    Args:
+        cache (LLMResponseCache | bool | None): A cache, True for the shared default cache,
+            or None/False to bypass caching.
+
+    Returns:
+        LLMResponseCache | None: The cache to use, or None to bypass it.
+    """
+    if cache is True:
+        return get_default_cache()
+    return cache or None
@@ -2,19 +2,27 @@ import os
 import requests
 import json
 import re
+import time
+import logging
+import threading
 from .ragaai_catalyst import RagaAICatalyst
-import copy
+
+logger = logging.getLogger(__name__)
 
 class PromptManager:
     NUM_PROJECTS = 100
     TIMEOUT = 10
 
-    def __init__(self, project_name):
+    def __init__(self, project_name, cache_ttl=None, background_refresh=True):
         """
         Initialize the PromptManager with a project name.
 
         Args:
             project_name (str): The name of the project.
+            cache_ttl (float, optional): Seconds a fetched prompt is served from the client-side cache
+                before being revalidated with the server. Caching is disabled when None.
+            background_refresh (bool): Serve a stale cached prompt immediately and revalidate it in a
+                background thread, instead of revalidating before returning.
 
         Raises:
             requests.RequestException: If there's an error with the API request.
@@ -54,6 +62,7 @@ class PromptManager:
                 "Authorization": f'Bearer {os.getenv("RAGAAI_CATALYST_TOKEN")}',
                 "X-Project-Id": str(self.project_id)
             }
+        self.prompt_cache = PromptCache(cache_ttl, background_refresh) if cache_ttl is not None else None
 
 
     def list_prompts(self):
@@ -77,6 +86,10 @@ class PromptManager:
         """
         Get a specific prompt.
 
+        When the prompt cache is enabled, a cached prompt is returned while it is fresh. Once
+        its TTL expires it is revalidated with its ETag, so an unchanged prompt is not downloaded
+        again.
+
         Args:
             prompt_name (str): The name of the prompt.
             version (str, optional): The version of the prompt. Defaults to None.
@@ -88,6 +101,46 @@ class PromptManager:
             ValueError: If the prompt or version is not found.
             requests.RequestException: If there's an error with the API request.
         """
+        if self.prompt_cache is None:
+            return self._fetch_prompt(prompt_name, version)
+
+        key = (self.project_name, prompt_name, version)
+        entry = self.prompt_cache.get(key)
+        if entry is None:
+            prompt_object = self._fetch_prompt(prompt_name, version)
+            self.prompt_cache.put(key, prompt_object)
+            return prompt_object
+        if self.prompt_cache.is_fresh(entry):
+            return entry["prompt"]
+        if self.prompt_cache.background_refresh:
+            if self.prompt_cache.start_refresh(key):
+                threading.Thread(target=self._revalidate_prompt, args=(key, entry), daemon=True).start()
+            return entry["prompt"]
+        self._revalidate_prompt(key, entry)
+        return self.prompt_cache.get(key)["prompt"]
+
+    def _revalidate_prompt(self, key, entry):
+        """
+        Revalidate a cached prompt with the server using its ETag.
+
+        Args:
+            key (tuple): The (project, prompt name, version) cache key.
+            entry (dict): The cache entry to revalidate.
+        """
+        _, prompt_name, version = key
+        try:
+            prompt_object = Prompt().get_prompt(self.base_url, self.headers, self.timeout, prompt_name, version,
+                                                etag=entry["prompt"].etag)
+            if prompt_object is None:
+                self.prompt_cache.touch(key)
+            else:
+                self.prompt_cache.put(key, prompt_object)
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Failed to revalidate prompt {prompt_name}, serving the cached version: {str(e)}")
+        finally:
+            self.prompt_cache.end_refresh(key)
+
+    def _fetch_prompt(self, prompt_name, version=None):
         try:
             prompt_list = self.list_prompts()
         except requests.RequestException as e:
@@ -141,6 +194,59 @@ class PromptManager:
             raise requests.RequestException(f"Error fetching prompt versions: {str(e)}")
 
 
+class PromptCache:
+    def __init__(self, ttl, background_refresh=True):
+        """
+        Initialize a client-side cache of fetched prompts.
+
+        Args:
+            ttl (float): Seconds an entry is served without revalidation.
+            background_refresh (bool): Whether stale entries are revalidated in the background.
+        """
+        self.ttl = ttl
+        self.background_refresh = background_refresh
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key, prompt):
+        with self._lock:
+            self._entries[key] = {"prompt": prompt, "fetched_at": time.monotonic()}
+
+    def touch(self, key):
+        """Mark an entry as fresh again after the server confirmed it is unchanged."""
+        with self._lock:
+            if key in self._entries:
+                self._entries[key] = dict(self._entries[key], fetched_at=time.monotonic())
+
+    def is_fresh(self, entry):
+        return time.monotonic() - entry["fetched_at"] < self.ttl
+
+    def start_refresh(self, key):
+        """Claim the revalidation of an entry. Returns False if one is already in flight."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
 class Prompt:
     def __init__(self):
         """
@@ -250,7 +356,7 @@ class Prompt:
         prompt_text = response.json()["data"]["docs"][0]["textFields"]
         return prompt_text
 
-    def get_prompt(self, base_url, headers, timeout, prompt_name, version=None):
+    def get_prompt(self, base_url, headers, timeout, prompt_name, version=None, etag=None):
         """
         Get a prompt, optionally specifying a version.
 
@@ -260,24 +366,28 @@ class Prompt:
             timeout (int): The timeout for the request.
             prompt_name (str): The name of the prompt.
             version (str, optional): The version of the prompt. Defaults to None.
+            etag (str, optional): ETag of a cached copy. The request is then conditional.
 
         Returns:
-            PromptObject: An object representing the prompt.
+            PromptObject: An object representing the prompt, or None if `etag` was given
+                and the prompt has not changed.
 
         Raises:
             requests.RequestException: If there's an error with the API request.
         """
+        if etag:
+            headers = {**headers, "If-None-Match": etag}
         if version:
             response = self._get_response_by_version(base_url, headers, timeout, prompt_name, version)
-            prompt_text = response.json()["data"]["docs"][0]["textFields"]
-            prompt_parameters = response.json()["data"]["docs"][0]["modelSpecs"]["parameters"]
-            model = response.json()["data"]["docs"][0]["modelSpecs"]["model"]
         else:
             response = self._get_response(base_url, headers, timeout, prompt_name)
-            prompt_text = response.json()["data"]["docs"][0]["textFields"]
-            prompt_parameters = response.json()["data"]["docs"][0]["modelSpecs"]["parameters"]
-            model = response.json()["data"]["docs"][0]["modelSpecs"]["model"]
-        return PromptObject(prompt_text, prompt_parameters, model)
+        if etag and response.status_code == 304:
+            return None
+        doc = response.json()["data"]["docs"][0]
+        prompt_text = doc["textFields"]
+        prompt_parameters = doc["modelSpecs"]["parameters"]
+        model = doc["modelSpecs"]["model"]
+        return PromptObject(prompt_text, prompt_parameters, model, etag=response.headers.get("ETag"))
 
 
     def list_prompt_versions(self, base_url, headers, timeout, prompt_name):
@@ -313,7 +423,9 @@ class Prompt:
 
 
 class PromptObject:
-    def __init__(self, text, parameters, model):
+    VARIABLE_PATTERN = re.compile(r'\{\{(.*?)\}\}')
+
+    def __init__(self, text, parameters, model, etag=None):
         """
         Initialize a PromptObject with the given text.
 
@@ -321,11 +433,22 @@ class PromptObject:
             text (str): The text of the prompt.
             parameters (dict): The parameters of the prompt.
             model (str): The model of the prompt.
+            etag (str, optional): The server ETag of this prompt version, used to revalidate cached copies.
         """
         self.text = text
         self.parameters = parameters
         self.model = model
-    
+        self.etag = etag
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        self._text = value
+        self._template = None
+
     def _extract_variable_from_content(self, content):
         """
         Extract variables from the content.
@@ -336,8 +459,7 @@ class PromptObject:
         Returns:
             list: A list of variable names found in the content.
         """
-        pattern = r'\{\{(.*?)\}\}'
-        matches = re.findall(pattern, content)
+        matches = self.VARIABLE_PATTERN.findall(content)
         variables = [match.strip() for match in matches if '"' not in match]
         return variables
 
@@ -360,6 +482,38 @@ class PromptObject:
                 content = content.replace(f"{{{{{key}}}}}", value)
         return content
 
+    def _compile_template(self):
+        """
+        Pre-split every message at its {{variable}} placeholders.
+
+        Each message becomes a list of literal parts with empty slots where the variables go,
+        so compiling only fills the slots and joins the parts.
+
+        Returns:
+            tuple: The set of required variables, and for each message the message without its
+                content, the list of parts and the (slot index, variable) pairs.
+        """
+        required_variables = set()
+        messages = []
+        for item in self.text:
+            content = item["content"]
+            variables = set(self._extract_variable_from_content(content))
+            required_variables.update(variables)
+            parts, slots, position = [], [], 0
+            for match in self.VARIABLE_PATTERN.finditer(content):
+                # Only exact {{name}} placeholders are substituted, as in _add_variable_value_to_content
+                if match.group(1) not in variables:
+                    continue
+                parts.append(content[position:match.start()])
+                slots.append((len(parts), match.group(1)))
+                parts.append(None)
+                position = match.end()
+            parts.append(content[position:])
+            message = {key: value for key, value in item.items() if key != "content"}
+            messages.append((message, parts, slots))
+        self._template = (frozenset(required_variables), messages)
+        return self._template
+
     def compile(self, **kwargs):
         """
         Compile the prompt by replacing variables with provided values.
@@ -373,23 +527,30 @@ class PromptObject:
         Raises:
             ValueError: If there are missing or extra variables, or if a value is not a string.
         """
-        required_variables = self.get_variables()
-        provided_variables = set(kwargs.keys())
+        required_variables, messages = self._template or self._compile_template()
 
-        missing_variables = [item for item in required_variables if item not in provided_variables]
-        extra_variables = [item for item in provided_variables if item not in required_variables]
+        if kwargs.keys() != required_variables:
+            provided_variables = set(kwargs.keys())
+            missing_variables = [item for item in required_variables if item not in provided_variables]
+            extra_variables = [item for item in provided_variables if item not in required_variables]
 
-        if missing_variables:
-            raise ValueError(f"Missing variable(s): {', '.join(missing_variables)}")
-        if extra_variables:
-            raise ValueError(f"Extra variable(s) provided: {', '.join(extra_variables)}")
+            if missing_variables:
+                raise ValueError(f"Missing variable(s): {', '.join(missing_variables)}")
+            if extra_variables:
+                raise ValueError(f"Extra variable(s) provided: {', '.join(extra_variables)}")
 
-        updated_text = copy.deepcopy(self.text)
-
-        for item in updated_text:
-            item["content"] = self._add_variable_value_to_content(item["content"], kwargs)
+        for key, value in kwargs.items():
+            if not isinstance(value, str):
+                raise ValueError(f"Value for variable '{key}' must be a string, not {type(value).__name__}")
 
-        return updated_text
+        compiled = []
+        for message, parts, slots in messages:
+            if slots:
+                parts = parts.copy()
+                for index, variable in slots:
+                    parts[index] = kwargs[variable]
+            compiled.append({**message, "content": "".join(parts)})
+        return compiled
     
     def get_variables(self):
         """
@@ -398,15 +559,8 @@ class PromptObject:
         Returns:
             list: A list of variable names found in the prompt text.
         """
-        variables = set()
-        for item in self.text:
-            content = item["content"]
-            for var in self._extract_variable_from_content(content):
-                variables.add(var)
-        if variables:
-            return list(variables)
-        else:
-            return []
+        required_variables, _ = self._template or self._compile_template()
+        return list(required_variables)
     
     def _convert_value(self, value, type_):
         """
@@ -4,10 +4,29 @@ import subprocess
 import logging
 import traceback
 
+from .llm_cache import resolve_cache
+
 logger = logging.getLogger(__name__)
 
 def api_completion(model,messages, api_base='http://127.0.0.1:8000',
-                    api_key='',model_config=dict()):
+                    api_key='',model_config=dict(),cache=None,refresh_cache=False):
+    cache = resolve_cache(cache)
+    if cache is None:
+        return _api_completion(model,messages,api_base,api_key,model_config)
+    request = {
+        'model': model,
+        'messages': messages,
+        'api_base': api_base,
+        'model_config': {k: v for k, v in model_config.items() if k not in ['job_id','log_level']}
+    }
+    return cache.get_or_call(
+        'proxy_call', request,
+        lambda: _api_completion(model,messages,api_base,api_key,model_config),
+        refresh=refresh_cache,
+        should_cache=lambda response: None not in response
+    )
+
+def _api_completion(model,messages,api_base,api_key,model_config):
     whoami = get_username()
     all_response = list()
     job_id = model_config.get('job_id',-1)
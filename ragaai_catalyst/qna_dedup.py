@@ -0,0 +1,168 @@
+import re
+import zlib
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class NearDuplicateIndex:
+    """
+    A MinHash LSH index used to detect near-duplicate questions in synthetic QnA batches.
+
+    Every text is normalized, split into word shingles and reduced to a MinHash signature.
+    Signatures are bucketed into LSH bands, so a lookup only compares against the few
+    candidates sharing a band instead of every stored question. Optionally, an embedding
+    function can be supplied to also catch paraphrases that share few words.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=64, shingle_size=3, embedding_fn=None,
+                 embedding_threshold=0.92, seed=1):
+        """
+        Initialize the index.
+
+        Args:
+            threshold (float): Estimated Jaccard similarity at or above which two texts are duplicates.
+            num_perm (int): Number of MinHash permutations per signature.
+            shingle_size (int): Number of consecutive words in a shingle.
+            embedding_fn (callable, optional): Function mapping a list of texts to a list of vectors.
+                When given, texts whose cosine similarity reaches `embedding_threshold` are also duplicates.
+            embedding_threshold (float): Cosine similarity threshold used with `embedding_fn`.
+            seed (int): Seed for the MinHash permutations.
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in the range (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.embedding_fn = embedding_fn
+        self.embedding_threshold = embedding_threshold
+        self.bands, self.rows = self._optimal_bands(threshold, num_perm)
+
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+        self._buckets = [dict() for _ in range(self.bands)]
+        self._signatures = []
+        self._embeddings = []
+        self._embedding_matrix = None
+
+    def __len__(self):
+        return len(self._signatures)
+
+    @staticmethod
+    def _optimal_bands(threshold, num_perm):
+        """Pick the band/row split whose LSH S-curve midpoint is closest to the threshold."""
+        best, best_error = (num_perm, 1), float("inf")
+        for rows in range(1, num_perm + 1):
+            if num_perm % rows:
+                continue
+            bands = num_perm // rows
+            error = abs((1 / bands) ** (1 / rows) - threshold)
+            if error < best_error:
+                best, best_error = (bands, rows), error
+        return best
+
+    def _shingles(self, text):
+        normalized = _WHITESPACE.sub(" ", _NON_WORD.sub(" ", str(text).lower())).strip()
+        words = normalized.split(" ")
+        if len(words) <= self.shingle_size:
+            return {normalized}
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def _signature(self, text):
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in self._shingles(text)),
+            dtype=np.uint64,
+        )
+        permuted = np.bitwise_and((np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME, _MAX_HASH)
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _is_minhash_duplicate(self, signature, band_keys):
+        candidates = set()
+        for bucket, key in zip(self._buckets, band_keys):
+            candidates.update(bucket.get(key, ()))
+        for candidate in candidates:
+            if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                return True
+        return False
+
+    def _is_embedding_duplicate(self, vector):
+        if vector is None or not self._embeddings:
+            return False
+        if self._embedding_matrix is None:
+            self._embedding_matrix = np.vstack(self._embeddings)
+        return float(np.max(self._embedding_matrix @ vector)) >= self.embedding_threshold
+
+    def _embed(self, texts):
+        if self.embedding_fn is None:
+            return [None] * len(texts)
+        vectors = np.asarray(self.embedding_fn(list(texts)), dtype=np.float64)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return list(vectors / norms)
+
+    def _add(self, signature, band_keys, vector):
+        position = len(self._signatures)
+        self._signatures.append(signature)
+        for bucket, key in zip(self._buckets, band_keys):
+            bucket.setdefault(key, []).append(position)
+        if vector is not None:
+            self._embeddings.append(vector)
+            self._embedding_matrix = None
+
+    def is_duplicate(self, text):
+        """
+        Check whether a text is a near duplicate of anything already in the index.
+
+        Args:
+            text (str): The text to check.
+
+        Returns:
+            bool: True if the text is a near duplicate.
+        """
+        signature = self._signature(text)
+        if self._is_minhash_duplicate(signature, self._band_keys(signature)):
+            return True
+        return self._is_embedding_duplicate(self._embed([text])[0])
+
+    def add(self, text):
+        """
+        Add a text to the index without checking it.
+
+        Args:
+            text (str): The text to add.
+        """
+        signature = self._signature(text)
+        self._add(signature, self._band_keys(signature), self._embed([text])[0])
+
+    def filter_batch(self, texts):
+        """
+        Keep the texts of a batch that are not near duplicates of the index or of earlier texts
+        in the same batch, and add the kept ones to the index.
+
+        Args:
+            texts (list): The texts of the new batch.
+
+        Returns:
+            tuple: A list of booleans marking the kept texts, and the duplicate rate of the batch.
+        """
+        texts = list(texts)
+        vectors = self._embed(texts)
+        keep = []
+        for text, vector in zip(texts, vectors):
+            signature = self._signature(text)
+            band_keys = self._band_keys(signature)
+            duplicate = self._is_minhash_duplicate(signature, band_keys) or self._is_embedding_duplicate(vector)
+            if not duplicate:
+                self._add(signature, band_keys, vector)
+            keep.append(not duplicate)
+        duplicate_rate = (len(texts) - sum(keep)) / len(texts) if texts else 0.0
+        return keep, duplicate_rate
@@ -1,9 +1,16 @@
+import asyncio
+import inspect
 import logging
+import math
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Optional
 
 import giskard as scanner
 import pandas as pd
+from giskard.scanner.scanner import Scanner
 
 logging.getLogger('giskard.core').disabled = True
 logging.getLogger('giskard.scanner.logger').disabled = True
@@ -12,6 +19,169 @@ logging.getLogger('giskard.datasets.base').disabled = True
 logging.getLogger('giskard.utils.logging_utils').disabled = True
 
 
+class ConcurrentModelRunner:
+    """
+    Calls the user's model on row batches of a probe DataFrame concurrently.
+
+    Sync models run on a bounded thread pool, async models are gathered on a single
+    event loop under a semaphore. Each batch is a DataFrame slice, so models that
+    predict a whole DataFrame at once get vectorized batches rather than single rows.
+    """
+
+    def __init__(self, model, concurrency=1, batch_size=None, rate_limit=None):
+        """
+        Initialize the runner.
+
+        :param model: The model function, taking a DataFrame and returning one output per row (sync or async).
+        :param concurrency: Maximum number of model calls in flight.
+        :param batch_size: Number of rows per model call. Defaults to splitting every probe
+                           DataFrame evenly across the concurrent calls.
+        :param rate_limit: Maximum number of model calls started per second. Unlimited when None.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1.")
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        if rate_limit is not None and rate_limit <= 0:
+            raise ValueError("rate_limit must be positive.")
+        self.model = model
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.rate_limit = rate_limit
+        self.is_async = inspect.iscoroutinefunction(model)
+        self._lock = threading.Lock()
+        self._next_call_at = 0.0
+        self._stats = {"calls": 0, "rows": 0, "model_time": 0.0}
+
+    def predict(self, df):
+        """
+        Predict the outputs of a probe DataFrame.
+
+        :param df: The probe DataFrame.
+        :return: A list with one model output per row, in row order.
+        """
+        batches = self._split(df)
+        if self.is_async:
+            outputs = self._run_until_complete(self._gather(batches))
+        elif len(batches) == 1:
+            outputs = [self._call(batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+                outputs = list(executor.map(self._call, batches))
+        return [prediction for output in outputs for prediction in output]
+
+    def _split(self, df):
+        batch_size = self.batch_size or max(1, math.ceil(len(df) / self.concurrency))
+        return [df.iloc[start:start + batch_size] for start in range(0, len(df), batch_size)] or [df]
+
+    def _reserve_slot(self):
+        """Return how long the caller must wait before starting a call to respect the rate limit."""
+        if self.rate_limit is None:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_call_at)
+            self._next_call_at = start_at + 1.0 / self.rate_limit
+        return start_at - now
+
+    def _record(self, batch, elapsed):
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["rows"] += len(batch)
+            self._stats["model_time"] += elapsed
+
+    def _call(self, batch):
+        delay = self._reserve_slot()
+        if delay:
+            time.sleep(delay)
+        start = time.perf_counter()
+        output = self.model(batch)
+        self._record(batch, time.perf_counter() - start)
+        return list(output)
+
+    async def _acall(self, semaphore, batch):
+        async with semaphore:
+            delay = self._reserve_slot()
+            if delay:
+                await asyncio.sleep(delay)
+            start = time.perf_counter()
+            output = await self.model(batch)
+            self._record(batch, time.perf_counter() - start)
+            return list(output)
+
+    async def _gather(self, batches):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(self._acall(semaphore, batch) for batch in batches))
+
+    @staticmethod
+    def _run_until_complete(coroutine):
+        try:
+            # Try to get the current event loop
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            # If no event loop exists (e.g., in Jupyter), create a new one
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+
+        try:
+            # Handle both IPython and regular Python environments
+            import nest_asyncio
+            nest_asyncio.apply()
+        except ImportError:
+            pass  # nest_asyncio not available, continue without it
+
+        return loop.run_until_complete(coroutine)
+
+    def stats(self):
+        """
+        Get the cumulative model call statistics.
+
+        :return: A dict with the number of calls, the number of rows predicted and the time spent in the model.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+
+class _TimedScanner(Scanner):
+    """
+    A giskard Scanner timing each of its detectors, appending one row per detector to
+    `timings` with its elapsed time and the model calls it made.
+    """
+
+    def __init__(self, runner, timings, params=None, only=None):
+        super().__init__(params, only=only)
+        self.runner = runner
+        self.timings = timings
+
+    def get_detectors(self, *args, **kwargs):
+        return [self._timed(detector) for detector in super().get_detectors(*args, **kwargs)]
+
+    def _timed(self, detector):
+        run = detector.run
+
+        def timed_run(*args, **kwargs):
+            before = self.runner.stats()
+            start = time.perf_counter()
+            issues = []
+            try:
+                issues = run(*args, **kwargs)
+                return issues
+            finally:
+                after = self.runner.stats()
+                self.timings.append({
+                    "detector": detector.__class__.__name__,
+                    "elapsed_s": time.perf_counter() - start,
+                    "model_calls": after["calls"] - before["calls"],
+                    "model_rows": after["rows"] - before["rows"],
+                    "model_time_s": after["model_time"] - before["model_time"],
+                    "issues": len(issues or []),
+                })
+
+        # The detectors are created for this scan only
+        detector.run = timed_run
+        return detector
+
+
 class RedTeaming:
 
     def __init__(self,
@@ -54,19 +224,30 @@ class RedTeaming:
             self,
             model: Callable,
             evaluators: Optional[list] = None,
-            save_report: bool = True
+            save_report: bool = True,
+            concurrency: int = 1,
+            batch_size: Optional[int] = None,
+            rate_limit: Optional[float] = None,
+            save_timings: bool = False
     ) -> pd.DataFrame:
         """
         Runs red teaming on the provided model and returns a DataFrame of the results.
 
+        The probes of every evaluator are split into row batches sent to the model concurrently.
+        The time spent by each evaluator is kept in `self.evaluator_timings` and in the
+        `evaluator_timings` attribute of the returned DataFrame.
+
         :param model: The model function provided by the user (can be sync or async).
         :param evaluators: Optional list of scan metrics to run.
         :param save_report: Boolean flag indicating whether to save the scan report as a CSV file.
+        :param concurrency: Maximum number of model calls in flight (threads for sync models,
+                            concurrent tasks for async ones).
+        :param batch_size: Number of probe rows per model call. Defaults to splitting the probes
+                           of each evaluator evenly across `concurrency` calls.
+        :param rate_limit: Maximum number of model calls started per second. Unlimited when None.
+        :param save_timings: Boolean flag indicating whether to save the evaluator timings as a CSV file.
         :return: A DataFrame containing the scan report.
         """
-        import asyncio
-        import inspect
-
         self.set_scanning_model(self.provider, self.model)
 
         supported_evaluators = self.get_supported_evaluators()
@@ -78,47 +259,34 @@ class RedTeaming:
                 raise ValueError(f"Invalid evaluators: {invalid_evaluators}. "
                                  f"Allowed evaluators: {supported_evaluators}.")
 
-        # Handle async model functions by wrapping them in a sync function
-        if inspect.iscoroutinefunction(model):
-            def sync_wrapper(*args, **kwargs):
-                try:
-                    # Try to get the current event loop
-                    loop = asyncio.get_event_loop()
-                except RuntimeError:
-                    # If no event loop exists (e.g., in Jupyter), create a new one
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-
-                try:
-                    # Handle both IPython and regular Python environments
-                    import nest_asyncio
-                    nest_asyncio.apply()
-                except ImportError:
-                    pass  # nest_asyncio not available, continue without it
-
-                return loop.run_until_complete(model(*args, **kwargs))
-            wrapped_model = sync_wrapper
-        else:
-            wrapped_model = model
+        runner = ConcurrentModelRunner(model, concurrency=concurrency, batch_size=batch_size, rate_limit=rate_limit)
 
         model_instance = scanner.Model(
-            model=wrapped_model,
+            model=runner.predict,
             model_type="text_generation",
             name="RagaAI's Scan",
             description="RagaAI's RedTeaming Scan",
             feature_names=["question"],
         )
 
+        timings = []
         try:
-            report = scanner.scan(model_instance, only=evaluators, raise_exceptions=True) if evaluators \
-                     else scanner.scan(model_instance, raise_exceptions=True)
+            report = _TimedScanner(runner, timings, only=evaluators or None).analyze(model_instance,
+                                                                                  raise_exceptions=True)
         except Exception as e:
             raise RuntimeError(f"Error occurred during model scan: {str(e)}")
 
         report_df = report.to_dataframe()
+        self.evaluator_timings = pd.DataFrame(
+            timings,
+            columns=["detector", "elapsed_s", "model_calls", "model_rows", "model_time_s", "issues"]
+        )
+        report_df.attrs["evaluator_timings"] = self.evaluator_timings
 
         if save_report:
             report_df.to_csv("raga-ai_red-teaming_scan.csv", index=False)
+        if save_timings:
+            self.evaluator_timings.to_csv("raga-ai_red-teaming_scan_timings.csv", index=False)
 
         return report_df
 
@@ -1,8 +1,8 @@
 import os
+import contextlib
 from groq import Groq
 import google.generativeai as genai
 import openai
-import PyPDF2
 import csv
 import markdown
 import pandas as pd
@@ -15,6 +15,9 @@ import tiktoken
 # import proxy_call
 from .internal_api_completion import api_completion as internal_api_completion
 from .proxy_call import api_completion as proxy_api_completion
+from .qna_dedup import NearDuplicateIndex
+from .llm_cache import resolve_cache
+from .document_pipeline import allocate_questions, chunk_text, extract_pdf_text, is_glob_pattern, iter_document_paths
 # from ragaai_catalyst import internal_api_completion
 # from ragaai_catalyst import proxy_call
 import ast
@@ -30,8 +33,10 @@ class SyntheticDataGeneration:
         """
         Initialize the SyntheticDataGeneration class with API clients for Groq, Gemini, and OpenAI.
         """
+        self.dedup_stats = []
 
-    def generate_qna(self, text, question_type="simple", n=5, model_config=dict(), api_key=None, **kwargs):
+    def generate_qna(self, text, question_type="simple", n=5, model_config=dict(), api_key=None, dedup_index=None,
+                     cache=None, refresh_cache=False, **kwargs):
         """
         Generate questions based on the given text using the specified model and provider.
         Uses batch processing for larger values of n to maintain response quality.
@@ -42,10 +47,17 @@ class SyntheticDataGeneration:
             n (int): The number of question/answer pairs to generate.
             model_config (dict): Configuration for the model including provider and model name.
             api_key (str, optional): The API key for the selected provider.
+            dedup_index (NearDuplicateIndex, optional): Index used to drop near-duplicate questions.
+                Defaults to a fresh MinHash index; pass one configured with an `embedding_fn` to
+                also catch paraphrases, or reuse one across calls to deduplicate across documents.
+            cache (LLMResponseCache | bool, optional): Response cache to replay LLM calls from, or True
+                for the shared default cache. Disabled by default.
+            refresh_cache (bool): Call the LLM even on a cache hit and overwrite the cached responses.
             **kwargs: Additional keyword arguments.
 
         Returns:
             pandas.DataFrame: A DataFrame containing exactly n generated questions and answers.
+                The per-batch duplicate rates are available afterwards in `self.dedup_stats`.
 
         Raises:
             ValueError: If an invalid provider is specified or API key is missing.
@@ -54,7 +66,6 @@ class SyntheticDataGeneration:
         if text_validity:
             raise ValueError(text_validity)
 
-        BATCH_SIZE = 5  # Optimal batch size for maintaining response quality
         provider = model_config.get("provider")
         model = model_config.get("model")
         api_base = model_config.get("api_base")
@@ -63,6 +74,40 @@ class SyntheticDataGeneration:
         # Initialize the appropriate client based on provider
         self._initialize_client(provider, api_key, api_base, api_version, internal_llm_proxy=kwargs.get("internal_llm_proxy", None))
 
+        if dedup_index is None:
+            dedup_index = NearDuplicateIndex()
+        self.dedup_stats = []
+
+        # Identical prompts are sampled repeatedly, so each repetition replays its own cache entry
+        llm_cache = resolve_cache(cache)
+        with (llm_cache.replay_scope() if llm_cache else contextlib.nullcontext()):
+            return self._generate_qna_pairs(text, question_type, n, model_config, api_key, dedup_index,
+                                            llm_cache, refresh_cache, kwargs)
+
+    def _generate_qna_pairs(self, text, question_type, n, model_config, api_key, dedup_index, llm_cache,
+                            refresh_cache, kwargs):
+        """
+        Generate n question/answer pairs from a text, in batches, replenishing the near duplicates.
+
+        Args:
+            text (str): The input text to generate questions from.
+            question_type (str): The type of questions to generate ('simple', 'mcq', or 'complex').
+            n (int): The number of question/answer pairs to generate.
+            model_config (dict): Configuration for the model including provider and model name.
+            api_key (str, optional): The API key for the selected provider.
+            dedup_index (NearDuplicateIndex): Index used to drop near-duplicate questions.
+            llm_cache (LLMResponseCache, optional): Response cache to replay LLM calls from.
+            refresh_cache (bool): Call the LLM even on a cache hit and overwrite the cached responses.
+            kwargs (dict): Additional keyword arguments of `generate_qna`.
+
+        Returns:
+            pandas.DataFrame: At most n generated questions and answers, indexed from 1.
+        """
+        BATCH_SIZE = 5  # Optimal batch size for maintaining response quality
+        MAX_STALLED_REPLENISH_ROUNDS = 3  # Stop replenishing when the model only returns duplicates
+        provider = model_config.get("provider")
+        api_base = model_config.get("api_base")
+
         # Initialize progress bar
         pbar = tqdm(total=n, desc="Generating QA pairs")
         
@@ -86,13 +131,15 @@ class SyntheticDataGeneration:
                 system_message = self._get_system_message(question_type, current_batch_size)
                 
                 if "internal_llm_proxy" in kwargs:
-                    batch_df = self._generate_internal_response(text, system_message, model_config, kwargs)
+                    batch_df = self._generate_internal_response(text, system_message, model_config, kwargs, llm_cache, refresh_cache)
                 else:
-                    batch_df = self._generate_batch_response(text, system_message, provider, model_config, api_key, api_base)
+                    batch_df = self._generate_batch_response(text, system_message, provider, model_config, api_key, api_base, llm_cache, refresh_cache)
                 
                 if not batch_df.empty and len(batch_df) > 0:
-                    all_responses.extend(batch_df.to_dict('records'))
-                    pbar.update(len(batch_df))
+                    new_rows = self._filter_near_duplicates(batch_df, dedup_index, phase="initial")
+                    all_responses.extend(new_rows)
+                    pbar.update(len(new_rows))
+                    pbar.set_postfix(duplicate_rate=f"{self.dedup_stats[-1]['duplicate_rate']:.0%}")
                     
             except Exception as e:
                 print(f"Batch generation failed:{str(e)}")
@@ -105,28 +152,31 @@ class SyntheticDataGeneration:
                     continue
         
         
-        # Convert to DataFrame and remove duplicates
+        # Near duplicates are already filtered out batch by batch, so only the shortfall is requested below
         result_df = pd.DataFrame(all_responses)
-        result_df = result_df.drop_duplicates(subset=['Question'])
+        stalled_rounds = 0
         
         # Replenish phase - generate additional questions if needed due to duplicates
-        while (len(result_df) < n) and ((len(result_df) >= 1)):
-            questions_needed = n - len(result_df)
+        while (len(result_df) < n) and ((len(result_df) >= 1)) and stalled_rounds < MAX_STALLED_REPLENISH_ROUNDS:
+            questions_needed = min(BATCH_SIZE, n - len(result_df))
             try:
                 system_message = self._get_system_message(question_type, questions_needed)
                 
                 if "internal_llm_proxy" in kwargs:
-                    additional_df = self._generate_internal_response(text, system_message, model_config, kwargs)
+                    additional_df = self._generate_internal_response(text, system_message, model_config, kwargs, llm_cache, refresh_cache)
                 else:
-                    additional_df = self._generate_batch_response(text, system_message, provider, model_config, api_key, api_base)
+                    additional_df = self._generate_batch_response(text, system_message, provider, model_config, api_key, api_base, llm_cache, refresh_cache)
                 
                 if not additional_df.empty and len(additional_df) > 0:
-                    # Only add questions that aren't already in result_df
-                    new_questions = additional_df[~additional_df['Question'].isin(result_df['Question'])]
-                    if not new_questions.empty:
-                        result_df = pd.concat([result_df, new_questions], ignore_index=True)
-                        result_df = result_df.drop_duplicates(subset=['Question'])
-                        pbar.update(len(new_questions))
+                    # Only add questions that aren't near duplicates of those already in result_df
+                    new_rows = self._filter_near_duplicates(additional_df, dedup_index, phase="replenish")
+                    pbar.set_postfix(duplicate_rate=f"{self.dedup_stats[-1]['duplicate_rate']:.0%}")
+                    if new_rows:
+                        result_df = pd.concat([result_df, pd.DataFrame(new_rows)], ignore_index=True)
+                        pbar.update(len(new_rows))
+                        stalled_rounds = 0
+                    else:
+                        stalled_rounds += 1
                     
             except Exception as e:
                 print(f"Replenishment generation failed")
@@ -137,6 +187,9 @@ class SyntheticDataGeneration:
                 else:
                     print("An unexpected error occurred. Retrying...")
                     continue
+
+        if len(result_df) < n and stalled_rounds >= MAX_STALLED_REPLENISH_ROUNDS:
+            print(f"Only {len(result_df)} unique QA pairs could be generated, the model kept returning duplicates")
         
         pbar.close()
         
@@ -146,6 +199,28 @@ class SyntheticDataGeneration:
         
         return final_df
 
+    def _filter_near_duplicates(self, batch_df, dedup_index, phase):
+        """
+        Drop the rows of a generated batch whose question is a near duplicate of an earlier one.
+
+        Args:
+            batch_df (pandas.DataFrame): The generated batch, with a 'Question' column.
+            dedup_index (NearDuplicateIndex): The index holding the questions kept so far.
+            phase (str): The generation phase, recorded in the batch statistics.
+
+        Returns:
+            list: The records of the rows that were kept.
+        """
+        records = batch_df.to_dict('records')
+        keep, duplicate_rate = dedup_index.filter_batch([record.get('Question', '') for record in records])
+        self.dedup_stats.append({
+            "phase": phase,
+            "generated": len(records),
+            "duplicates": len(records) - sum(keep),
+            "duplicate_rate": duplicate_rate,
+        })
+        return [record for record, kept in zip(records, keep) if kept]
+
     def _initialize_client(self, provider, api_key, api_base=None, api_version=None, internal_llm_proxy=None):
         """Initialize the appropriate client based on provider."""
         if not provider:
@@ -179,7 +254,8 @@ class SyntheticDataGeneration:
         else:
             raise ValueError(f"Provider is not recognized.")
 
-    def _generate_batch_response(self, text, system_message, provider, model_config, api_key, api_base):
+    def _generate_batch_response(self, text, system_message, provider, model_config, api_key, api_base,
+                                 cache=None, refresh_cache=False):
         """Generate a batch of responses using the specified provider."""
         MAX_RETRIES = 3
         
@@ -187,23 +263,27 @@ class SyntheticDataGeneration:
             try:
                 if provider == "gemini" and api_base:
                     messages = [{'role': 'user', 'content': system_message + text}]
-                    response = proxy_api_completion(messages=messages, model=model_config["model"], api_base=api_base)
+                    response = proxy_api_completion(messages=messages, model=model_config["model"], api_base=api_base,
+                                                    cache=cache, refresh_cache=refresh_cache)
                     # response = proxy_call.api_completion(messages=messages, model=model_config["model"], api_base=api_base)
                     return pd.DataFrame(ast.literal_eval(response[0]))
                 else:
-                    return self._generate_llm_response(text, system_message, model_config, api_key)
+                    return self._generate_llm_response(text, system_message, model_config, api_key,
+                                                       cache=cache, refresh_cache=refresh_cache)
             except (json.JSONDecodeError, ValueError) as e:
                 if attempt == MAX_RETRIES - 1:
                     raise Exception(f"Failed to generate valid response after {MAX_RETRIES} attempts: {str(e)}")
                 continue
 
-    def _generate_internal_response(self, text, system_message, model_config, kwargs):
+    def _generate_internal_response(self, text, system_message, model_config, kwargs, cache=None, refresh_cache=False):
         """Generate response using internal API."""
         messages = [{'role': 'user', 'content': system_message + text}]
         return internal_api_completion(
             messages=messages,
             model_config=model_config,
-            kwargs=kwargs
+            kwargs=kwargs,
+            cache=cache,
+            refresh_cache=refresh_cache
         )
 
     def validate_input(self,text):
@@ -260,7 +340,7 @@ class SyntheticDataGeneration:
         else:
             raise ValueError("Invalid question type")
 
-    def _generate_llm_response(self, text, system_message, model_config, api_key=None):
+    def _generate_llm_response(self, text, system_message, model_config, api_key=None, cache=None, refresh_cache=False):
         """
         Generate questions using LiteLLM which supports multiple providers (OpenAI, Groq, Gemini, etc.).
 
@@ -275,6 +355,8 @@ class SyntheticDataGeneration:
                 - max_tokens: Maximum tokens in response
                 - temperature: Temperature for response generation
             api_key (str, optional): The API key for the model provider.
+            cache (LLMResponseCache | bool, optional): Response cache to serve the completion from.
+            refresh_cache (bool): Call the LLM even on a cache hit and overwrite the cached response.
 
         Returns:
             pandas.DataFrame: A DataFrame containing the generated questions and answers.
@@ -309,15 +391,21 @@ class SyntheticDataGeneration:
             completion_params['model'] = f'{model_config["provider"]}/{model_config["model"]}'
 
         # Make the API call using LiteLLM
-        try:
-            response = completion(**completion_params)
-        except Exception as e:
-            if any(error in str(e).lower() for error in ["invalid api key", "incorrect api key", "unauthorized", "authentication"]):
-                raise ValueError(f"Invalid API key provided for {model_config.get('provider', 'the specified')} provider")
-            raise Exception(f"Error calling LLM API: {str(e)}")
+        def call_llm():
+            try:
+                response = completion(**completion_params)
+            except Exception as e:
+                if any(error in str(e).lower() for error in ["invalid api key", "incorrect api key", "unauthorized", "authentication"]):
+                    raise ValueError(f"Invalid API key provided for {model_config.get('provider', 'the specified')} provider")
+                raise Exception(f"Error calling LLM API: {str(e)}")
+            return response.choices[0].message.content
 
         # Extract the content from the response
-        content = response.choices[0].message.content
+        cache = resolve_cache(cache)
+        if cache is not None:
+            content = cache.get_or_call('synthetic_data_generation', completion_params, call_llm, refresh=refresh_cache)
+        else:
+            content = call_llm()
         content = content.replace('\n', '').replace('```json','').replace('```', '').strip()
 
         # Clean the response if needed (remove any prefix before the JSON list)
@@ -397,22 +485,107 @@ class SyntheticDataGeneration:
         else:
             raise ValueError("Input must be either a file path or a string of text")
 
-    def _read_pdf(self, file_path):
+    def process_documents(self, input_path):
+        """
+        Lazily process every supported document of a directory or glob pattern.
+
+        Args:
+            input_path (str): A directory (searched recursively), a glob pattern such as
+                "docs/**/*.pdf", or a single file path.
+
+        Yields:
+            tuple: The file path and the extracted text content of each document.
+
+        Raises:
+            ValueError: If a document cannot be read.
+        """
+        if os.path.isfile(input_path):
+            yield input_path, self.process_document(input_path)
+            return
+        for file_path in iter_document_paths(input_path):
+            yield file_path, self.process_document(file_path)
+
+    def generate_qna_from_documents(self, input_data, question_type="simple", n=5, model_config=dict(), api_key=None,
+                                    chunk_tokens=2000, overlap_tokens=200, dedup_index=None, cache=None,
+                                    refresh_cache=False, **kwargs):
+        """
+        Generate questions from one or many documents, splitting each into overlapping token windows
+        so that large documents fit the model context.
+
+        The n questions of each document are distributed across its chunks proportionally to their
+        token count. A single dedup index is shared by all chunks and documents, so overlapping
+        windows do not yield the same question twice. The chunks are generated one after the other.
+
+        Args:
+            input_data (str): A file path, a directory, a glob pattern, or a string of text.
+            question_type (str): The type of questions to generate ('simple', 'mcq', or 'complex').
+            n (int): The number of question/answer pairs to generate per document.
+            model_config (dict): Configuration for the model including provider and model name.
+            api_key (str, optional): The API key for the selected provider.
+            chunk_tokens (int): Maximum number of tokens sent to the model per chunk.
+            overlap_tokens (int): Number of tokens shared by consecutive chunks.
+            dedup_index (NearDuplicateIndex, optional): Index used to drop near-duplicate questions.
+            cache (LLMResponseCache | bool, optional): Response cache to replay LLM calls from, or True
+                for the shared default cache. Disabled by default.
+            refresh_cache (bool): Call the LLM even on a cache hit and overwrite the cached responses.
+            **kwargs: Additional keyword arguments, as accepted by `generate_qna`.
+
+        Returns:
+            pandas.DataFrame: The generated questions and answers, with a 'Source' column naming
+                the document each pair was generated from. The per-batch duplicate rates of every
+                chunk are available afterwards in `self.dedup_stats`.
+
+        Raises:
+            ValueError: If no document is found or a document cannot be read.
+        """
+        if dedup_index is None:
+            dedup_index = NearDuplicateIndex()
+
+        if os.path.isfile(input_data) or os.path.isdir(input_data) or is_glob_pattern(input_data):
+            documents = self.process_documents(input_data)
+        else:
+            documents = [("text", self.process_document(input_data))]
+
+        self._initialize_client(model_config.get("provider"), api_key, model_config.get("api_base"),
+                                model_config.get("api_version"), internal_llm_proxy=kwargs.get("internal_llm_proxy", None))
+        # Accumulated over every chunk of every document
+        self.dedup_stats = []
+
+        results = []
+        llm_cache = resolve_cache(cache)
+        with (llm_cache.replay_scope() if llm_cache else contextlib.nullcontext()):
+            for source, text in documents:
+                chunks = chunk_text(text, chunk_tokens=chunk_tokens, overlap_tokens=overlap_tokens)
+                allocations = allocate_questions([token_count for _, token_count in chunks], n)
+                for (chunk, _), chunk_n in zip(chunks, allocations):
+                    if chunk_n == 0:
+                        continue
+                    text_validity = self.validate_input(chunk)
+                    if text_validity:
+                        raise ValueError(text_validity)
+                    chunk_df = self._generate_qna_pairs(chunk, question_type, chunk_n, model_config, api_key,
+                                                        dedup_index, llm_cache, refresh_cache, kwargs)
+                    results.append(chunk_df.assign(Source=source))
+
+        if not results:
+            raise ValueError(f"No supported documents found for: {input_data}")
+        final_df = pd.concat(results, ignore_index=True)
+        final_df.index = range(1, len(final_df) + 1)
+        return final_df
+
+    def _read_pdf(self, file_path, max_workers=None):
         """
-        Read and extract text from a PDF file.
+        Read and extract text from a PDF file. Pages of large PDFs are extracted in parallel
+        worker processes.
 
         Args:
             file_path (str): The path to the PDF file.
+            max_workers (int, optional): Maximum number of worker processes. Defaults to the CPU count.
 
         Returns:
             str: The extracted text content from the PDF.
         """
-        text = ""
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-        return text
+        return extract_pdf_text(file_path, max_workers=max_workers)
 
     def _read_text(self, file_path):
         """
@@ -6,7 +6,11 @@ from .distributed import (
     trace_tool,
     current_span,
     trace_custom,
+    trace_session,
 )
+from .middleware import TraceContextMiddleware, AsyncTraceContextMiddleware
+from .agentic_tracing.utils.trace_stitcher import stitch_traces, latency_hot_spots
+from .utils.sanitization import Sanitizer
 
 __all__ = [
     "Tracer",
@@ -15,5 +19,11 @@ __all__ = [
     "trace_llm",
     "trace_tool",
     "current_span",
-    "trace_custom"
+    "trace_custom",
+    "trace_session",
+    "TraceContextMiddleware",
+    "AsyncTraceContextMiddleware",
+    "stitch_traces",
+    "latency_hot_spots",
+    "Sanitizer",
 ]
@@ -101,6 +101,8 @@ class NetworkCall:
     response: Dict[str, Any]
 
 class Interaction:
+    __slots__ = ("id", "type", "content", "timestamp")
+
     def __init__(self, id, type: str, content: str, timestamp: str):
         self.id = id
         self.type = type
@@ -173,6 +175,28 @@ class LLMCall:
     duration: float = field(default=0)
 
 class Component:
+    # A trace holds one component per traced call, without per-instance __dict__ they take
+    # less than half the memory. Payloads (info, data, network calls...) are held by reference.
+    __slots__ = (
+        "id",
+        "hash_id",
+        "source_hash_id",
+        "type",
+        "name",
+        "start_time",
+        "end_time",
+        "parent_id",
+        "info",
+        "extra_info",
+        "data",
+        "metadata",
+        "metrics",
+        "feedback",
+        "network_calls",
+        "interactions",
+        "error",
+    )
+
     def __init__(
         self,
         id: str,
@@ -204,27 +228,31 @@ class Component:
         self.info = info
         self.extra_info = extra_info
         self.data = data
-        self.metadata = metadata or {}
-        self.metrics = metrics or []
+        # Empty payloads of the tracers are kept too, rather than replaced by a copy
+        self.metadata = metadata if metadata is not None else {}
+        self.metrics = metrics if metrics is not None else []
         self.feedback = feedback
-        self.network_calls = network_calls or []
+        self.network_calls = network_calls if network_calls is not None else []
         self.interactions = []
         self.error = error
         if interactions:
             for interaction in interactions:
                 if isinstance(interaction, dict):
+                    # The defaults are only computed when missing
                     self.interactions.append(
                         Interaction(
-                            id=interaction.get("id", str(uuid.uuid4())),
+                            id=interaction["id"] if "id" in interaction else str(uuid.uuid4()),
                             type=interaction.get("interaction_type", ""),
                             content=str(interaction.get("content", "")),
-                            timestamp=interaction.get("timestamp", datetime.now().astimezone().isoformat())
+                            timestamp=(interaction["timestamp"] if "timestamp" in interaction
+                                       else datetime.now().astimezone().isoformat())
                         )
                     )
                 else:
                     self.interactions.append(interaction)
 
     def to_dict(self):
+        # Shallow, the serializer converts the network calls and interactions in the same pass as the rest
         return {
             "id": self.id,
             "hash_id": self.hash_id,
@@ -241,19 +269,25 @@ class Component:
             "metadata": self.metadata,
             "metrics": self.metrics,
             "feedback": self.feedback,
-            "network_calls": [call.to_dict() if hasattr(call, 'to_dict') else call for call in self.network_calls],
+            "network_calls": self.network_calls,
             "interactions": self.interactions
         }
 
 class LLMComponent(Component):
+    __slots__ = ()
+
     def __init__(self, id: str, hash_id: str, source_hash_id: str, type: str, name: str, start_time: str, end_time: str, parent_id: int, info: Dict[str, Any], extra_info: Optional[Dict[str, Any]] = None, data: Dict[str, Any]={}, metadata: Optional[Dict[str, Any]] = None, metrics: Optional[List[Dict[str, Any]]] = None, feedback: Optional[Any] = None, network_calls: Optional[List[NetworkCall]] = None, interactions: Optional[List[Union[Interaction, Dict]]] = None, error: Optional[Dict[str, Any]] = None):
         super().__init__(id, hash_id, source_hash_id, type, name, start_time, end_time, parent_id, info, extra_info, data, metadata, metrics, feedback, network_calls, interactions, error)
 
 class AgentComponent(Component):
+    __slots__ = ()
+
     def __init__(self, id: str, hash_id: str, source_hash_id: str, type: str, name: str, start_time: str, end_time: str, parent_id: int, info: Dict[str, Any], extra_info: Optional[Dict[str, Any]] = None, data: Dict[str, Any]={}, metadata: Optional[Dict[str, Any]] = None, metrics: Optional[List[Dict[str, Any]]] = None, feedback: Optional[Any] = None, network_calls: Optional[List[NetworkCall]] = None, interactions: Optional[List[Union[Interaction, Dict]]] = None, error: Optional[Dict[str, Any]] = None):
         super().__init__(id, hash_id, source_hash_id, type, name, start_time, end_time, parent_id, info, extra_info, data, metadata, metrics, feedback, network_calls, interactions, error)
 
 class ToolComponent(Component):
+    __slots__ = ()
+
     def __init__(self, id: str, hash_id: str, source_hash_id: str, type: str, name: str, start_time: str, end_time: str, parent_id: int, info: Dict[str, Any], extra_info: Optional[Dict[str, Any]] = None, data: Dict[str, Any]={}, metadata: Optional[Dict[str, Any]] = None, metrics: Optional[List[Dict[str, Any]]] = None, feedback: Optional[Any] = None, network_calls: Optional[List[NetworkCall]] = None, interactions: Optional[List[Union[Interaction, Dict]]] = None, error: Optional[Dict[str, Any]] = None):
         super().__init__(id, hash_id, source_hash_id, type, name, start_time, end_time, parent_id, info, extra_info, data, metadata, metrics, feedback, network_calls, interactions, error)
 
@@ -271,6 +305,8 @@ class ComponentInfo:
     cost: Optional[Dict[str, float]] = None
 
 class Trace:
+    __slots__ = ("id", "trace_name", "project_name", "start_time", "end_time", "metadata", "data", "replays", "metrics")
+
     def __init__(self, id: str, trace_name: str, project_name: str, start_time: str, end_time: str, metadata: Optional[Metadata] = None, data: Optional[List[Dict[str, Any]]] = None, replays: Optional[Dict[str, Any]] = None, metrics: Optional[List[Dict[str, Any]]] = None):
         self.id = id
         self.trace_name = trace_name
@@ -1,3 +1,4 @@
+import dataclasses
 import json
 import os
 from datetime import datetime
@@ -26,6 +27,21 @@ from ragaai_catalyst.tracers.agentic_tracing.utils.zip_list_of_unique_files impo
 from ragaai_catalyst.tracers.agentic_tracing.utils.span_attributes import SpanAttributes
 from ragaai_catalyst.tracers.agentic_tracing.utils.create_dataset_schema import create_dataset_schema_with_trace
 from ragaai_catalyst.tracers.agentic_tracing.utils.system_monitor import SystemMonitor
+from ragaai_catalyst.tracers.agentic_tracing.tracers.session import SessionAttribute, TraceSession, active_session
+from ragaai_catalyst.tracers.agentic_tracing.utils.trace_context import TraceContext
+from ragaai_catalyst.tracers.agentic_tracing.utils.trace_finalizer import TraceFinalizer
+from ragaai_catalyst.tracers.agentic_tracing.utils.workflow_builder import WorkflowBuilder
+from ragaai_catalyst.tracers.agentic_tracing.utils.history_deltas import encode_history_deltas, resolve_history_deltas
+from ragaai_catalyst.tracers.agentic_tracing.utils.payload_blobs import encode_blobs, resolve_blob_threshold
+from ragaai_catalyst.tracers.agentic_tracing.utils.trace_format import (
+    STREAM_SUFFIX,
+    TraceReader,
+    resolve_trace_format,
+    write_trace,
+)
+from ragaai_catalyst.tracers.utils.compression import compressed_path, open_trace_file, resolve_compression
+from ragaai_catalyst.tracers.utils.sanitization import default_sanitizer
+from ragaai_catalyst.tracers.utils.serialization import dump_bytes, to_serializable
 
 import logging
 
@@ -34,33 +50,34 @@ logging_level = (
     logger.setLevel(logging.DEBUG) if os.getenv("DEBUG") == "1" else logging.INFO
 )
 
+# The resources sampled by the system monitor, each in a '<name>_usage_list'
+RESOURCE_NAMES = ("memory", "cpu", "disk", "network")
+
 
 class TracerJSONEncoder(json.JSONEncoder):
+    # Kept for json.dump(cls=...) callers, conversions are done by the cached type dispatch of the serializer
     def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        if isinstance(obj, bytes):
-            try:
-                return obj.decode("utf-8")
-            except UnicodeDecodeError:
-                return str(obj)  # Fallback to string representation
-        if hasattr(obj, "to_dict"):  # Handle objects with to_dict method
-            return obj.to_dict()
-        if hasattr(obj, "__dict__"):
-            # Filter out None values and handle nested serialization
-            return {
-                k: v
-                for k, v in obj.__dict__.items()
-                if v is not None and not k.startswith("_")
-            }
-        try:
-            # Try to convert to a basic type
-            return str(obj)
-        except:
-            return None  # Last resort: return None instead of failing
+        return to_serializable(obj)
 
 
 class BaseTracer:
+    # The state of the trace being built lives on the current session, see `session()`
+    trace = SessionAttribute()
+    trace_id = SessionAttribute()
+    trace_name = SessionAttribute()
+    start_time = SessionAttribute()
+    data_key = SessionAttribute()
+    components = SessionAttribute()
+    workflow_builder = SessionAttribute()
+    span_attributes_dict = SessionAttribute()
+    visited_metrics = SessionAttribute()
+    trace_metrics = SessionAttribute()
+    component_network_calls = SessionAttribute()
+    component_user_interaction = SessionAttribute()
+    parent_context = SessionAttribute()
+    # Converts the arguments and results of traced calls, see Sanitizer
+    sanitizer = default_sanitizer
+
     def __init__(self, user_details):
         self.user_details = user_details
         self.project_name = self.user_details["project_name"]
@@ -74,21 +91,83 @@ class BaseTracer:
         self.trace_id = None
         self.start_time = None
         self.components: List[Component] = []
+        self.workflow_builder = WorkflowBuilder()
         self.file_tracker = TrackName()
         self.span_attributes_dict = {}
 
+        # Shared by the traces of every session
+        self._system_info = None
+        self._schema_created = False
+        self._schema_lock = threading.Lock()
+        self._uploaded_code_hashes = set()
+
         self.interval_time = self.user_details['interval_time']
         self.memory_usage_list = []
         self.cpu_usage_list = []
         self.disk_usage_list = []
         self.network_usage_list = []
+        # Sessions whose trace is open, oldest first, and the number of samples of each
+        # resource dropped from the front of its list once no open session needed them
+        self._resource_lock = threading.Lock()
+        self._open_sessions = []
+        self._dropped_samples = dict.fromkeys(RESOURCE_NAMES, 0)
         self.tracking_thread = None
         self.tracking = False
         self.system_monitor = None
         self.gt = None
 
+    @property
+    def current_session(self) -> TraceSession:
+        """The trace session active in the current context, or the default session of the tracer."""
+        session = active_session(self)
+        if session is not None:
+            return session
+        # Created lazily, mixins may set session attributes before BaseTracer.__init__ runs
+        default_session = self.__dict__.get("_default_session")
+        if default_session is None:
+            default_session = self.__dict__["_default_session"] = TraceSession(self)
+        return default_session
+
+    def session(self, trace_name: Optional[str] = None) -> TraceSession:
+        """
+        Create a trace session, a trace scoped to the current context.
+
+        Components traced inside `with tracer.session(...)` or `async with tracer.session(...)`
+        go to the trace of the session, which is finalized and uploaded when the block exits,
+        independently of the traces of other concurrent sessions. The tracer must be started.
+
+        Args:
+            trace_name (str, optional): The name of the trace. Defaults to the trace name of the tracer.
+
+        Returns:
+            TraceSession: The session, to be used as a context manager.
+        """
+        return TraceSession(self, trace_name)
+
+    def accept_trace_context(self, headers) -> Optional[TraceContext]:
+        """
+        Record the W3C trace context of an incoming request as the parent of the current trace.
+
+        The saved trace references the trace and span of the calling service, so that
+        `stitch_traces` can merge the traces of both services into one distributed trace.
+
+        Args:
+            headers: The request headers, a mapping or a list of (name, value) pairs.
+
+        Returns:
+            TraceContext: The incoming context, None if the request carries no valid `traceparent`.
+        """
+        self.parent_context = TraceContext.from_headers(headers)
+        return self.parent_context
+
+    def _in_session(self) -> bool:
+        return active_session(self) is not None
+
     def _get_system_info(self) -> SystemInfo:
-        return self.system_monitor.get_system_info()
+        # Collecting the installed packages is slow, collect them once and copy them per trace
+        if self._system_info is None:
+            self._system_info = self.system_monitor.get_system_info()
+        return dataclasses.replace(self._system_info, id=f"sys_{self.trace_id}")
 
     def _get_resources(self) -> Resources:
         return self.system_monitor.get_resources()
@@ -136,13 +215,30 @@ class BaseTracer:
     def start(self):
         """Initialize a new trace"""
         self.tracking = True
-        self.trace_id = str(uuid.uuid4())
         self.file_tracker.trace_main_file()
-        self.system_monitor = SystemMonitor(self.trace_id)
+        self.system_monitor = SystemMonitor(None)
+        self._system_info = None
+        with self._resource_lock:
+            self._dropped_samples = dict.fromkeys(RESOURCE_NAMES, 0)
         threading.Thread(target=self._track_memory_usage).start()
         threading.Thread(target=self._track_cpu_usage).start()
         threading.Thread(target=self._track_disk_usage).start()
         threading.Thread(target=self._track_network_usage).start()
+        self._start_trace()
+
+    def _start_trace(self):
+        """Initialize the trace of the current session"""
+        session = self.current_session
+        self.trace_id = str(uuid.uuid4())
+        if self.trace_name is None:
+            self.trace_name = self.user_details["trace_name"]
+        # Samples of the shared resource monitor taken during the trace of a session start at these offsets
+        if self._in_session():
+            with self._resource_lock:
+                session.resource_offsets = {
+                    name: self._dropped_samples[name] + len(self._resource_list(name)) for name in RESOURCE_NAMES
+                }
+                self._open_sessions.append(session)
 
         # Reset metrics
         self.visited_metrics = []
@@ -180,26 +276,64 @@ class BaseTracer:
 
     def stop(self):
         """Stop the trace and save to JSON file"""
+        self.tracking = False
+        self._finalize_trace()
+        self.file_tracker.reset()
+
+    def _resource_list(self, name):
+        return getattr(self, f"{name}_usage_list")
+
+    def _resource_samples(self, name, samples):
+        with self._resource_lock:
+            start = self.current_session.resource_offsets.get(name, 0) - self._dropped_samples[name]
+            return samples[max(start, 0):]
+
+    def _release_resource_samples(self, session):
+        """
+        Drop the resource samples taken before the oldest trace session still open, once a session ends.
+
+        The default trace keeps the samples that no session dropped.
+        """
+        with self._resource_lock:
+            if session in self._open_sessions:
+                self._open_sessions.remove(session)
+            for name in RESOURCE_NAMES:
+                samples = self._resource_list(name)
+                if self._open_sessions:
+                    keep_from = min(open_session.resource_offsets[name] for open_session in self._open_sessions)
+                else:
+                    keep_from = self._dropped_samples[name] + len(samples)
+                dropped = keep_from - self._dropped_samples[name]
+                if dropped > 0:
+                    del samples[:dropped]
+                    self._dropped_samples[name] += dropped
+
+    def _finalize_trace(self):
+        """Save and upload the trace of the current session"""
         if hasattr(self, "trace"):
             self.trace.data[0]["end_time"] = datetime.now().astimezone().isoformat()
             self.trace.end_time = datetime.now().astimezone().isoformat()
 
+            memory_usage_list = self._resource_samples("memory", self.memory_usage_list)
+            cpu_usage_list = self._resource_samples("cpu", self.cpu_usage_list)
+            disk_usage_list = self._resource_samples("disk", self.disk_usage_list)
+            network_usage_list = self._resource_samples("network", self.network_usage_list)
+
             # track memory usage
-            self.tracking = False
-            self.trace.metadata.resources.memory.values = self.memory_usage_list
+            self.trace.metadata.resources.memory.values = memory_usage_list
 
             # track cpu usage
-            self.trace.metadata.resources.cpu.values = self.cpu_usage_list
+            self.trace.metadata.resources.cpu.values = cpu_usage_list
 
             # track network and disk usage
             network_uploads, network_downloads = 0, 0
             disk_read, disk_write = 0, 0
 
             # Handle cases where lists might have different lengths
-            min_len = min(len(self.network_usage_list), len(self.disk_usage_list))
+            min_len = min(len(network_usage_list), len(disk_usage_list))
             for i in range(min_len):
-                network_usage = self.network_usage_list[i]
-                disk_usage = self.disk_usage_list[i]
+                network_usage = network_usage_list[i]
+                disk_usage = disk_usage_list[i]
 
                 # Safely get network usage values with defaults of 0
                 network_uploads += network_usage.get('uploads', 0) or 0
@@ -210,12 +344,12 @@ class BaseTracer:
                 disk_write += disk_usage.get('disk_write', 0) or 0
 
             # track disk usage
-            disk_list_len = len(self.disk_usage_list)
+            disk_list_len = len(disk_usage_list)
             self.trace.metadata.resources.disk.read = [disk_read / disk_list_len if disk_list_len > 0 else 0]
             self.trace.metadata.resources.disk.write = [disk_write / disk_list_len if disk_list_len > 0 else 0]
 
             # track network usage
-            network_list_len = len(self.network_usage_list)
+            network_list_len = len(network_usage_list)
             self.trace.metadata.resources.network.uploads = [
                 network_uploads / network_list_len if network_list_len > 0 else 0]
             self.trace.metadata.resources.network.downloads = [
@@ -227,15 +361,23 @@ class BaseTracer:
             self.trace.metadata.resources.disk.interval = float(self.interval_time)
             self.trace.metadata.resources.network.interval = float(self.interval_time)
 
-            # Change span ids to int
-            self.trace = self._change_span_ids_to_int(self.trace)
-            self.trace = self._change_agent_input_output(self.trace)
-            self.trace = self._extract_cost_tokens(self.trace)
+            # Number the spans, roll up agent input/output, sum costs, deduplicate spans and collect
+            # the workflow, metrics and dataset spans in a single walk of the span tree
+            finalizer = TraceFinalizer(self.trace.data[0]["spans"], self.trace_metrics, self.workflow_builder)
+            self.trace.data[0]["spans"] = finalizer.run()
+            self.trace.metadata.cost = finalizer.cost
+            self.trace.metadata.tokens = finalizer.tokens
+            self.trace.metadata.total_cost = finalizer.total_cost
+            self.trace.metadata.total_tokens = finalizer.total_tokens
 
             # Create traces directory if it doesn't exist
             self.traces_dir = tempfile.gettempdir()
-            filename = self.trace.id + ".json"
-            filepath = f"{self.traces_dir}/{filename}"
+            # A trace stream when RAGAAI_CATALYST_TRACE_FORMAT is 'msgpack' or 'json-stream'
+            trace_format = resolve_trace_format()
+            filename = self.trace.id + (".json" if trace_format == "json" else STREAM_SUFFIX)
+            # Compressed when RAGAAI_CATALYST_TRACE_COMPRESSION is set, uploads use the same compression
+            compression = resolve_compression()
+            filepath = compressed_path(f"{self.traces_dir}/{filename}", compression)
 
             # get unique files and zip it. Generate a unique hash ID for the contents of the files
             list_of_unique_files = self.file_tracker.get_unique_files()
@@ -246,42 +388,53 @@ class BaseTracer:
             # replace source code with zip_path
             self.trace.metadata.system_info.source_code = hash_id
 
-            # Add metrics to trace before saving
-            trace_data = self.trace.to_dict()
-            trace_data["metrics"] = self.trace_metrics
-
-            # Clean up trace_data before saving
-            cleaned_trace_data = self._clean_trace(trace_data)
-
-            # Format interactions and add to trace
-            interactions = self.format_interactions()
-            # trace_data["workflow"] = interactions["workflow"]
-            cleaned_trace_data["workflow"] = interactions["workflow"]
-
-            with open(filepath, "w") as f:
-                json.dump(cleaned_trace_data, f, cls=TracerJSONEncoder, indent=2)
+            # Add metrics and interactions to trace before saving
+            cleaned_trace_data = self.trace.to_dict()
+            cleaned_trace_data["metrics"] = self.trace_metrics
+            cleaned_trace_data["workflow"] = finalizer.workflow
+            if self.parent_context is not None:
+                cleaned_trace_data["trace_context"] = self.parent_context.to_dict()
+            # Chat histories are saved as deltas when RAGAAI_CATALYST_TRACE_HISTORY_DELTAS is set, and large
+            # payloads once when RAGAAI_CATALYST_TRACE_BLOB_THRESHOLD is set, readers restore them
+            if resolve_history_deltas():
+                cleaned_trace_data = encode_history_deltas(cleaned_trace_data)
+            blob_threshold = resolve_blob_threshold()
+            if blob_threshold is not None:
+                cleaned_trace_data = encode_blobs(cleaned_trace_data, blob_threshold)
+
+            if trace_format == "json":
+                with open_trace_file(filepath, "wb", compression) as f:
+                    f.write(dump_bytes(cleaned_trace_data, indent=2))
+            else:
+                write_trace(filepath, cleaned_trace_data, trace_format, compression, default=to_serializable)
 
             logger.info(" Traces saved successfully.")
             logger.debug(f"Trace saved to {filepath}")
             # Upload traces
 
             json_file_path = str(filepath)
+            trace_reader = TraceReader(json_file_path)
             project_name = self.project_name
             project_id = self.project_id
             dataset_name = self.dataset_name
             user_detail = self.user_details
             base_url = RagaAICatalyst.BASE_URL
 
-            ## create dataset schema
-            response = create_dataset_schema_with_trace(
-                dataset_name=dataset_name, project_name=project_name
-            )
+            ## create dataset schema, once for the traces of every session
+            with self._schema_lock:
+                if not self._schema_created:
+                    response = create_dataset_schema_with_trace(
+                        dataset_name=dataset_name, project_name=project_name
+                    )
+                    self._schema_created = True
 
             ##Upload trace metrics
             response = upload_trace_metric(
                 json_file_path=json_file_path,
                 dataset_name=self.dataset_name,
                 project_name=self.project_name,
+                trace_reader=trace_reader,
+                metrics=finalizer.metrics,
             )
 
             upload_traces = UploadAgenticTraces(
@@ -291,25 +444,33 @@ class BaseTracer:
                 dataset_name=dataset_name,
                 user_detail=user_detail,
                 base_url=base_url,
+                compression=compression,
+                trace_reader=trace_reader,
+                dataset_spans=finalizer.dataset_spans,
             )
             upload_traces.upload_agentic_traces()
 
-            # Upload Codehash
-            response = upload_code(
-                hash_id=hash_id,
-                zip_path=zip_path,
-                project_name=project_name,
-                dataset_name=dataset_name,
-            )
-            print(response)
+            # Upload Codehash, sessions running the same code upload it once
+            if hash_id not in self._uploaded_code_hashes:
+                response = upload_code(
+                    hash_id=hash_id,
+                    zip_path=zip_path,
+                    project_name=project_name,
+                    dataset_name=dataset_name,
+                )
+                self._uploaded_code_hashes.add(hash_id)
+                print(response)
 
         # Cleanup
         self.components = []
-        self.file_tracker.reset()
+        self.workflow_builder = WorkflowBuilder()
+        self.parent_context = None
 
     def add_component(self, component: Component):
         """Add a component to the trace"""
         self.components.append(component)
+        # Its interactions are ordered now rather than when the trace is finalized
+        self.workflow_builder.record(component)
 
     def __enter__(self):
         self.start()
@@ -318,587 +479,9 @@ class BaseTracer:
     def __exit__(self, exc_type, exc_value, traceback):
         self.stop()
 
-    def _process_children(self, children_list, parent_id, current_id):
-        """Helper function to process children recursively."""
-        for child in children_list:
-            child["id"] = current_id
-            child["parent_id"] = parent_id
-            current_id += 1
-            # Recursively process nested children if they exist
-            if "children" in child["data"]:
-                current_id = self._process_children(child["data"]["children"], child["id"], current_id)
-        return current_id
-
-    def _change_span_ids_to_int(self, trace):
-        id, parent_id = 1, 0
-        for span in trace.data[0]["spans"]:
-            span.id = id
-            span.parent_id = parent_id
-            id += 1
-            if span.type == "agent" and "children" in span.data:
-                id = self._process_children(span.data["children"], span.id, id)
-        return trace
-
-    def _change_agent_input_output(self, trace):
-        for span in trace.data[0]["spans"]:
-            if span.type == "agent":
-                childrens = span.data["children"]
-                span.data["input"] = None
-                span.data["output"] = None
-                if childrens:
-                    # Find first non-null input going forward
-                    for child in childrens:
-                        if "data" not in child:
-                            continue
-                        input_data = child["data"].get("input")
-
-                        if input_data:
-                            span.data["input"] = (
-                                input_data["args"]
-                                if hasattr(input_data, "args")
-                                else input_data
-                            )
-                            break
-
-                    # Find first non-null output going backward
-                    for child in reversed(childrens):
-                        if "data" not in child:
-                            continue
-                        output_data = child["data"].get("output")
-
-                        if output_data and output_data != "" and output_data != "None":
-                            span.data["output"] = output_data
-                            break
-        return trace
-
-    def _extract_cost_tokens(self, trace):
-        cost = {}
-        tokens = {}
-
-        def process_span_info(info):
-            if not isinstance(info, dict):
-                return
-            cost_info = info.get("cost", {})
-            for key, value in cost_info.items():
-                if key not in cost:
-                    cost[key] = 0
-                cost[key] += value
-            token_info = info.get("tokens", {})
-            for key, value in token_info.items():
-                if key not in tokens:
-                    tokens[key] = 0
-                tokens[key] += value
-
-        def process_spans(spans):
-            for span in spans:
-                # Get span type, handling both span objects and dictionaries
-                span_type = span.type if hasattr(span, 'type') else span.get('type')
-                span_info = span.info if hasattr(span, 'info') else span.get('info', {})
-                span_data = span.data if hasattr(span, 'data') else span.get('data', {})
-
-                # Process direct LLM spans
-                if span_type == "llm":
-                    process_span_info(span_info)
-                # Process agent spans recursively
-                elif span_type == "agent":
-                    # Process LLM children in the current agent span
-                    children = span_data.get("children", [])
-                    for child in children:
-                        child_type = child.get("type")
-                        if child_type == "llm":
-                            process_span_info(child.get("info", {}))
-                        # Recursively process nested agent spans
-                        elif child_type == "agent":
-                            process_spans([child])
-
-        process_spans(trace.data[0]["spans"])
-        trace.metadata.cost = cost
-        trace.metadata.tokens = tokens
-        return trace
-
-    def _clean_trace(self, trace):
-        # Convert span to dict if it has to_dict method
-        def _to_dict_if_needed(obj):
-            if hasattr(obj, "to_dict"):
-                return obj.to_dict()
-            return obj
-
-        def deduplicate_spans(spans):
-            seen_llm_spans = {}  # Dictionary to track unique LLM spans
-            unique_spans = []
-
-            for span in spans:
-                # Convert span to dictionary if needed
-                span_dict = _to_dict_if_needed(span)
-
-                # Skip spans without hash_id
-                if "hash_id" not in span_dict:
-                    continue
-
-                if span_dict.get("type") == "llm":
-                    # Create a unique key based on hash_id, input, and output
-                    span_key = (
-                        span_dict.get("hash_id"),
-                        str(span_dict.get("data", {}).get("input")),
-                        str(span_dict.get("data", {}).get("output")),
-                    )
-
-                    # Check if we've seen this span before
-                    if span_key not in seen_llm_spans:
-                        seen_llm_spans[span_key] = True
-                        unique_spans.append(span)
-                    else:
-                        # If we have interactions in the current span, replace the existing one
-                        current_interactions = span_dict.get("interactions", [])
-                        if current_interactions:
-                            # Find and replace the existing span with this one that has interactions
-                            for i, existing_span in enumerate(unique_spans):
-                                existing_dict = (
-                                    existing_span
-                                    if isinstance(existing_span, dict)
-                                    else existing_span.__dict__
-                                )
-                                if (
-                                        existing_dict.get("hash_id")
-                                        == span_dict.get("hash_id")
-                                        and str(existing_dict.get("data", {}).get("input"))
-                                        == str(span_dict.get("data", {}).get("input"))
-                                        and str(existing_dict.get("data", {}).get("output"))
-                                        == str(span_dict.get("data", {}).get("output"))
-                                ):
-                                    unique_spans[i] = span
-                                    break
-                
-                else:
-                    # For non-LLM spans, process their children if they exist
-                    if "data" in span_dict and "children" in span_dict["data"]:
-                        children = span_dict["data"]["children"]
-                        # Filter and deduplicate children
-                        filtered_children = deduplicate_spans(children)
-                        if isinstance(span, dict):
-                            span["data"]["children"] = filtered_children
-                        else:
-                            span.data["children"] = filtered_children
-                    unique_spans.append(span)                    
-
-            # Process spans to update model information for LLM spans with same name
-            llm_spans_by_name = {}
-            for i, span in enumerate(unique_spans):
-                span_dict = span if isinstance(span, dict) else span.__dict__
-                
-                if span_dict.get('type') == 'llm':
-                    span_name = span_dict.get('name')
-                    if span_name:
-                        if span_name not in llm_spans_by_name:
-                            llm_spans_by_name[span_name] = []
-                        llm_spans_by_name[span_name].append((i, span_dict))
-            
-            # Update model information for spans with same name
-            for spans_with_same_name in llm_spans_by_name.values():
-                if len(spans_with_same_name) > 1:
-                    # Check if any span has non-default model
-                    has_custom_model = any(
-                        span[1].get('info', {}).get('model') != 'default'
-                        for span in spans_with_same_name
-                    )
-                    
-                    # If we have a custom model, update all default models to 'custom'
-                    if has_custom_model:
-                        for idx, span_dict in spans_with_same_name:
-                            if span_dict.get('info', {}).get('model') == 'default':
-                                if isinstance(unique_spans[idx], dict):
-                                    if 'info' not in unique_spans[idx]:
-                                        unique_spans[idx]['info'] = {}
-                                    # unique_spans[idx]['info']['model'] = 'custom'
-                                    unique_spans[idx]['type'] = 'custom'
-                                else:
-                                    if not hasattr(unique_spans[idx], 'info'):
-                                        unique_spans[idx].info = {}
-                                    # unique_spans[idx].info['model'] = 'custom'
-                                    unique_spans[idx].type = 'custom'
-            
-            return unique_spans
-
-        # Remove any spans without hash ids
-        for data in trace.get("data", []):
-            if "spans" in data:
-                # First filter out spans without hash_ids, then deduplicate
-                data["spans"] = deduplicate_spans(data["spans"])
-
-        return trace
-
     def add_tags(self, tags: List[str]):
         raise NotImplementedError
 
-    def _process_child_interactions(self, child, interaction_id, interactions):
-        """
-        Helper method to process child interactions recursively.
-        
-        Args:
-            child (dict): The child span to process
-            interaction_id (int): Current interaction ID
-            interactions (list): List of interactions to append to
-            
-        Returns:
-            int: Next interaction ID to use
-        """
-        child_type = child.get("type")
-
-        if child_type == "tool":
-            # Tool call start
-            interactions.append(
-                {
-                    "id": str(interaction_id),
-                    "span_id": child.get("id"),
-                    "interaction_type": "tool_call_start",
-                    "name": child.get("name"),
-                    "content": {
-                        "parameters": [
-                            child.get("data", {}).get("input", {}).get("args"),
-                            child.get("data", {}).get("input", {}).get("kwargs"),
-                        ]
-                    },
-                    "timestamp": child.get("start_time"),
-                    "error": child.get("error"),
-                }
-            )
-            interaction_id += 1
-
-            # Tool call end
-            interactions.append(
-                {
-                    "id": str(interaction_id),
-                    "span_id": child.get("id"),
-                    "interaction_type": "tool_call_end",
-                    "name": child.get("name"),
-                    "content": {
-                        "returns": child.get("data", {}).get("output"),
-                    },
-                    "timestamp": child.get("end_time"),
-                    "error": child.get("error"),
-                }
-            )
-            interaction_id += 1
-
-        elif child_type == "llm":
-            interactions.append(
-                {
-                    "id": str(interaction_id),
-                    "span_id": child.get("id"),
-                    "interaction_type": "llm_call_start",
-                    "name": child.get("name"),
-                    "content": {
-                        "prompt": child.get("data", {}).get("input"),
-                    },
-                    "timestamp": child.get("start_time"),
-                    "error": child.get("error"),
-                }
-            )
-            interaction_id += 1
-
-            interactions.append(
-                {
-                    "id": str(interaction_id),
-                    "span_id": child.get("id"),
-                    "interaction_type": "llm_call_end",
-                    "name": child.get("name"),
-                    "content": {"response": child.get("data", {}).get("output")},
-                    "timestamp": child.get("end_time"),
-                    "error": child.get("error"),
-                }
-            )
-            interaction_id += 1
-
-        elif child_type == "agent":
-            interactions.append(
-                {
-                    "id": str(interaction_id),
-                    "span_id": child.get("id"),
-                    "interaction_type": "agent_call_start",
-                    "name": child.get("name"),
-                    "content": None,
-                    "timestamp": child.get("start_time"),
-                    "error": child.get("error"),
-                }
-            )
-            interaction_id += 1
-
-            # Process nested children recursively
-            if "children" in child.get("data", {}):
-                for nested_child in child["data"]["children"]:
-                    interaction_id = self._process_child_interactions(
-                        nested_child, interaction_id, interactions
-                    )
-
-            interactions.append(
-                {
-                    "id": str(interaction_id),
-                    "span_id": child.get("id"),
-                    "interaction_type": "agent_call_end",
-                    "name": child.get("name"),
-                    "content": child.get("data", {}).get("output"),
-                    "timestamp": child.get("end_time"),
-                    "error": child.get("error"),
-                }
-            )
-            interaction_id += 1
-
-        else:
-            interactions.append(
-                {
-                    "id": str(interaction_id),
-                    "span_id": child.get("id"),
-                    "interaction_type": f"{child_type}_call_start",
-                    "name": child.get("name"),
-                    "content": child.get("data", {}),
-                    "timestamp": child.get("start_time"),
-                    "error": child.get("error"),
-                }
-            )
-            interaction_id += 1
-
-            interactions.append(
-                {
-                    "id": str(interaction_id),
-                    "span_id": child.get("id"),
-                    "interaction_type": f"{child_type}_call_end",
-                    "name": child.get("name"),
-                    "content": child.get("data", {}),
-                    "timestamp": child.get("end_time"),
-                    "error": child.get("error"),
-                }
-            )
-            interaction_id += 1
-
-        # Process additional interactions and network calls
-        if "interactions" in child:
-            for interaction in child["interactions"]:
-                interaction["id"] = str(interaction_id)
-                interaction["span_id"] = child.get("id")
-                interaction["error"] = None
-                interactions.append(interaction)
-                interaction_id += 1
-
-        if "network_calls" in child:
-            for child_network_call in child["network_calls"]:
-                network_call = {}
-                network_call["id"] = str(interaction_id)
-                network_call["span_id"] = child.get("id")
-                network_call["interaction_type"] = "network_call"
-                network_call["name"] = None
-                network_call["content"] = {
-                    "request": {
-                        "url": child_network_call.get("url"),
-                        "method": child_network_call.get("method"),
-                        "headers": child_network_call.get("headers"),
-                    },
-                    "response": {
-                        "status_code": child_network_call.get("status_code"),
-                        "headers": child_network_call.get("response_headers"),
-                        "body": child_network_call.get("response_body"),
-                    },
-                }
-                network_call["timestamp"] = child_network_call.get("start_time")
-                network_call["error"] = child_network_call.get("error")
-                interactions.append(network_call)
-                interaction_id += 1
-
-        return interaction_id
-
-    def format_interactions(self) -> dict:
-        """
-        Format interactions from trace data into a standardized format.
-        Returns a dictionary containing formatted interactions based on trace data.
-
-        The function processes spans from self.trace and formats them into interactions
-        of various types including: agent_start, agent_end, input, output, tool_call_start,
-        tool_call_end, llm_call, file_read, file_write, network_call.
-
-        Returns:
-            dict: A dictionary with "workflow" key containing a list of interactions
-                  sorted by timestamp.
-        """
-        interactions = []
-        interaction_id = 1
-
-        if not hasattr(self, "trace") or not self.trace.data:
-            return {"workflow": []}
-
-        for span in self.trace.data[0]["spans"]:
-            # Process agent spans
-            if span.type == "agent":
-                # Add agent_start interaction
-                interactions.append(
-                    {
-                        "id": str(interaction_id),
-                        "span_id": span.id,
-                        "interaction_type": "agent_call_start",
-                        "name": span.name,
-                        "content": None,
-                        "timestamp": span.start_time,
-                        "error": span.error,
-                    }
-                )
-                interaction_id += 1
-
-                # Process children of agent recursively
-                if "children" in span.data:
-                    for child in span.data["children"]:
-                        interaction_id = self._process_child_interactions(
-                            child, interaction_id, interactions
-                        )
-
-                # Add agent_end interaction
-                interactions.append(
-                    {
-                        "id": str(interaction_id),
-                        "span_id": span.id,
-                        "interaction_type": "agent_call_end",
-                        "name": span.name,
-                        "content": span.data.get("output"),
-                        "timestamp": span.end_time,
-                        "error": span.error,
-                    }
-                )
-                interaction_id += 1
-
-            elif span.type == "tool":
-                interactions.append(
-                    {
-                        "id": str(interaction_id),
-                        "span_id": span.id,
-                        "interaction_type": "tool_call_start",
-                        "name": span.name,
-                        "content": {
-                            "prompt": span.data.get("input"),
-                            "response": span.data.get("output"),
-                        },
-                        "timestamp": span.start_time,
-                        "error": span.error,
-                    }
-                )
-                interaction_id += 1
-
-                interactions.append(
-                    {
-                        "id": str(interaction_id),
-                        "span_id": span.id,
-                        "interaction_type": "tool_call_end",
-                        "name": span.name,
-                        "content": {
-                            "prompt": span.data.get("input"),
-                            "response": span.data.get("output"),
-                        },
-                        "timestamp": span.end_time,
-                        "error": span.error,
-                    }
-                )
-                interaction_id += 1
-
-            elif span.type == "llm":
-                interactions.append(
-                    {
-                        "id": str(interaction_id),
-                        "span_id": span.id,
-                        "interaction_type": "llm_call_start",
-                        "name": span.name,
-                        "content": {
-                            "prompt": span.data.get("input"),
-                        },
-                        "timestamp": span.start_time,
-                        "error": span.error,
-                    }
-                )
-                interaction_id += 1
-
-                interactions.append(
-                    {
-                        "id": str(interaction_id),
-                        "span_id": span.id,
-                        "interaction_type": "llm_call_end",
-                        "name": span.name,
-                        "content": {"response": span.data.get("output")},
-                        "timestamp": span.end_time,
-                        "error": span.error,
-                    }
-                )
-                interaction_id += 1
-
-            else:
-                interactions.append(
-                    {
-                        "id": str(interaction_id),
-                        "span_id": span.id,
-                        "interaction_type": f"{span.type}_call_start",
-                        "name": span.name,
-                        "content": span.data,
-                        "timestamp": span.start_time,
-                        "error": span.error,
-                    }
-                )
-                interaction_id += 1
-
-                interactions.append(
-                    {
-                        "id": str(interaction_id),
-                        "span_id": span.id,
-                        "interaction_type": f"{span.type}_call_end",
-                        "name": span.name,
-                        "content": span.data,
-                        "timestamp": span.end_time,
-                        "error": span.error,
-                    }
-                )
-                interaction_id += 1
-
-            # Process interactions from span.data if they exist
-            if span.interactions:
-                for span_interaction in span.interactions:
-                    interaction = {}
-                    interaction["id"] = str(interaction_id)
-                    interaction["span_id"] = span.id
-                    interaction["interaction_type"] = span_interaction.type
-                    interaction["content"] = span_interaction.content
-                    interaction["timestamp"] = span_interaction.timestamp
-                    interaction["error"] = span.error
-                    interactions.append(interaction)
-                    interaction_id += 1
-
-            if span.network_calls:
-                for span_network_call in span.network_calls:
-                    network_call = {}
-                    network_call["id"] = str(interaction_id)
-                    network_call["span_id"] = span.id
-                    network_call["interaction_type"] = "network_call"
-                    network_call["name"] = None
-                    network_call["content"] = {
-                        "request": {
-                            "url": span_network_call.get("url"),
-                            "method": span_network_call.get("method"),
-                            "headers": span_network_call.get("headers"),
-                        },
-                        "response": {
-                            "status_code": span_network_call.get("status_code"),
-                            "headers": span_network_call.get("response_headers"),
-                            "body": span_network_call.get("response_body"),
-                        },
-                    }
-                    network_call["timestamp"] = span_network_call.get("timestamp")
-                    network_call["error"] = span_network_call.get("error")
-                    interactions.append(network_call)
-                    interaction_id += 1
-
-        # Sort interactions by timestamp
-        sorted_interactions = sorted(
-            interactions, key=lambda x: x["timestamp"] if x["timestamp"] else ""
-        )
-
-        # Reassign IDs to maintain sequential order after sorting
-        for idx, interaction in enumerate(sorted_interactions, 1):
-            interaction["id"] = str(idx)
-
-        return {"workflow": sorted_interactions}
-
     # TODO: Add support for execute metrics. Maintain list of all metrics to be added for this span
 
     def execute_metrics(self,
@@ -780,7 +780,7 @@ class LLMTracerMixin:
                 token_usage = extract_token_usage(result)
             cost = calculate_llm_cost(token_usage, model_name, self.model_costs)
             parameters = extract_parameters(kwargs)
-            input_data = extract_input_data(args, kwargs, result)
+            input_data = extract_input_data(args, kwargs, result, self.sanitizer)
 
             # End tracking network calls for this component
             self.end_component(component_id)
@@ -833,7 +833,7 @@ class LLMTracerMixin:
                 version=None,
                 memory_used=0,
                 start_time=start_time,
-                input_data=extract_input_data(args, kwargs, None),
+                input_data=extract_input_data(args, kwargs, None, self.sanitizer),
                 output_data=None,
                 error=error_component,
             )
@@ -889,7 +889,7 @@ class LLMTracerMixin:
                 token_usage = extract_token_usage(result)
             cost = calculate_llm_cost(token_usage, model_name, self.model_costs)
             parameters = extract_parameters(kwargs)
-            input_data = extract_input_data(args, kwargs, result)
+            input_data = extract_input_data(args, kwargs, result, self.sanitizer)
 
             # End tracking network calls for this component
             self.end_component(component_id)
@@ -944,7 +944,7 @@ class LLMTracerMixin:
                 version=None,
                 memory_used=memory_used,
                 start_time=start_time,
-                input_data=extract_input_data(args, kwargs, None),
+                input_data=extract_input_data(args, kwargs, None, self.sanitizer),
                 output_data=None,
                 error=error_component,
             )
@@ -1038,7 +1038,7 @@ class LLMTracerMixin:
                         version=None,
                         memory_used=memory_used,
                         start_time=start_time,
-                        input_data=extract_input_data(args, kwargs, None),
+                        input_data=extract_input_data(args, kwargs, None, self.sanitizer),
                         output_data=None,
                         error=error_component,
                     )
@@ -1132,7 +1132,7 @@ class LLMTracerMixin:
                         version=None,
                         memory_used=memory_used,
                         start_time=start_time,
-                        input_data=extract_input_data(args, kwargs, None),
+                        input_data=extract_input_data(args, kwargs, None, self.sanitizer),
                         output_data=None,
                         error=error_component,
                     )
@@ -16,6 +16,16 @@ from .network_tracer import NetworkTracer
 from .user_interaction_tracer import UserInteractionTracer
 from .custom_tracer import CustomTracerMixin
 from ..utils.span_attributes import SpanAttributes
+from ..utils.trace_context import TraceContext, new_span_id, w3c_trace_id
+from ..utils.process_spool import (
+    ProcessTask,
+    ProcessTraceContext,
+    monkey_patch_process_pool,
+    read_records,
+    restore_process_pool,
+    spool_component,
+    spool_path,
+)
 
 from ..data.data_structure import (
     Trace,
@@ -44,11 +54,14 @@ from ..data.data_structure import (
 from ....ragaai_catalyst import RagaAICatalyst
 from ragaai_catalyst.tracers.upload_traces import UploadTraces
 
+_COMPONENT_CLASSES = {"llm": LLMComponent, "agent": AgentComponent, "tool": ToolComponent}
+_COMPONENT_FIELDS = frozenset(Component.__slots__)
+
 
 class AgenticTracing(
     BaseTracer, LLMTracerMixin, ToolTracerMixin, AgentTracerMixin, CustomTracerMixin
 ):
-    def __init__(self, user_detail, auto_instrumentation=None):
+    def __init__(self, user_detail, auto_instrumentation=None, propagate_trace_context=False, sanitizer=None):
         # Initialize all parent classes
         self.user_interaction_tracer = UserInteractionTracer()
         LLMTracerMixin.__init__(self)
@@ -72,7 +85,12 @@ class AgenticTracing(
         self.current_component_id = contextvars.ContextVar(
             "current_component_id", default=None
         )
+        if sanitizer is not None:
+            self.sanitizer = sanitizer
         self.network_tracer = NetworkTracer()
+        if propagate_trace_context:
+            # Send a W3C traceparent with the outbound HTTP calls of traced components
+            self.network_tracer.context_provider = self.outgoing_trace_context
 
         # Handle auto_instrumentation
         if auto_instrumentation is None:
@@ -118,21 +136,25 @@ class AgenticTracing(
         self.agent_children = contextvars.ContextVar("agent_children", default=[])
         self.component_network_calls = {}  # Store network calls per component
         self.component_user_interaction = {}
+        self._network_call_tokens = {}
+        self._original_process_pool = None
 
 
     def start_component(self, component_id: str):
         """Start tracking network calls for a component"""
-        self.component_network_calls[component_id] = []
-        self.network_tracer.network_calls = []  # Reset network calls
+        # Calls made in this context, its tasks and its executor jobs are appended to the
+        # component's list as they happen, until a nested component starts its own
+        buffer, token = self.network_tracer.start_buffer()
+        self.component_network_calls[component_id] = buffer
+        self._network_call_tokens[component_id] = token
         self.current_component_id.set(component_id)
         self.user_interaction_tracer.component_id.set(component_id)
 
     def end_component(self, component_id: str):
         """End tracking network calls for a component"""
-        self.component_network_calls[component_id] = (
-            self.network_tracer.network_calls.copy()
-        )
-        self.network_tracer.network_calls = []  # Reset for next component
+        token = self._network_call_tokens.pop(component_id, None)
+        if token is not None:
+            self.network_tracer.end_buffer(token)
 
         # Store user interactions for the component
         for interaction in self.user_interaction_tracer.interactions:
@@ -172,6 +194,10 @@ class AgenticTracing(
         # Activate network tracing
         self.network_tracer.activate_patches()
 
+        # Propagate the trace context to process pool workers
+        if self._original_process_pool is None:
+            self._original_process_pool = monkey_patch_process_pool(self)
+
         # take care of the auto instrumentation
         if self.auto_instrument_user_interaction:
             ToolTracerMixin.instrument_user_interaction_calls(self)
@@ -214,108 +240,104 @@ class AgenticTracing(
             builtins.input = self.user_interaction_tracer.original_input
             builtins.open = self.user_interaction_tracer.original_open
 
-            # Calculate final metrics before stopping
-            self._calculate_final_metrics()
-
             # Deactivate network tracing
             self.network_tracer.deactivate_patches()
-
-            # Clear visited metrics when stopping trace
-            self.visited_metrics.clear()
+            if self._original_process_pool is not None:
+                restore_process_pool(self._original_process_pool)
+                self._original_process_pool = None
 
             # Stop base tracer (includes saving to file)
             super().stop()
 
             # Cleanup
             self.unpatch_llm_calls()
-            self.user_interaction_tracer.interactions = []  # Clear interactions list
             self.is_active = False
 
-    def _calculate_final_metrics(self):
-        """Calculate total cost and tokens from all components"""
-        total_cost = 0.0
-        total_tokens = 0
-
-        processed_components = set()
-
-        def process_component(component):
-            nonlocal total_cost, total_tokens
-            # Convert component to dict if it's an object
-            comp_dict = (
-                component.__dict__ if hasattr(component, "__dict__") else component
-            )
-
-            comp_id = comp_dict.get("id") or comp_dict.get("component_id")
-            if comp_id in processed_components:
-                return  # Skip if already processed
-            processed_components.add(comp_id)
-
-            if comp_dict.get("type") == "llm":
-                info = comp_dict.get("info", {})
-                if isinstance(info, dict):
-                    # Extract cost
-                    cost_info = info.get("cost", {})
-                    if isinstance(cost_info, dict):
-                        total_cost += cost_info.get("total_cost", 0)
-
-                    # Extract tokens
-                    token_info = info.get("tokens", {})
-                    if isinstance(token_info, dict):
-                        total_tokens += token_info.get("total_tokens", 0)
-                    else:
-                        token_info = info.get("token_usage", {})
-                        if isinstance(token_info, dict):
-                            total_tokens += token_info.get("total_tokens", 0)
-
-            # Process children if they exist
-            data = comp_dict.get("data", {})
-            if isinstance(data, dict):
-                children = data.get("children", [])
-                if children:
-                    for child in children:
-                        process_component(child)
-
-        # Process all root components
-        for component in self.components:
-            process_component(component)
-
-        # Update metadata in trace
-        if hasattr(self, "trace"):
-            if isinstance(self.trace.metadata, dict):
-                self.trace.metadata["total_cost"] = total_cost
-                self.trace.metadata["total_tokens"] = total_tokens
+    def outgoing_trace_context(self):
+        """
+        The W3C trace context of an outbound call of the current trace, None when no trace is active.
+
+        Calls share the distributed trace of the incoming request that started the trace, or a
+        trace derived from the trace id. Each call gets its own span id, recorded with the
+        headers of the call, which is how `stitch_traces` finds the span that made it.
+        """
+        if not self.trace_id:
+            return None
+        if self.parent_context is not None:
+            return self.parent_context.child()
+        return TraceContext(w3c_trace_id(self.trace_id), new_span_id())
+
+    def process_context(self):
+        """
+        The trace context to send to a worker process, None when no trace is active.
+
+        Components traced in the worker are spooled and merged into the current agent, or the
+        trace itself, when the trace is saved.
+        """
+        if not self.trace_id:
+            return None
+        return ProcessTraceContext(spool_path(self.trace_id), self.current_agent_id.get(), self.sanitizer)
+
+    def process_task(self, fn):
+        """
+        Wrap a function run in another process, e.g. as the target of `multiprocessing.Process`,
+        so that what it traces reaches the current trace. Jobs of `ProcessPoolExecutor` are
+        wrapped automatically while the tracer is started.
+        """
+        context = self.process_context()
+        return fn if context is None else ProcessTask(fn, context)
+
+    def _merge_process_spool(self):
+        """Add the components spooled by worker processes to their parent agents"""
+        path = spool_path(self.trace_id)
+        records = read_records(path)
+        if not records:
+            return
+
+        agent_children = {}
+
+        def index_agents(components):
+            for component in components:
+                if isinstance(component, dict):
+                    component_type, component_id, data = component.get("type"), component.get("id"), component.get("data")
+                else:
+                    component_type, component_id, data = component.type, component.id, component.data
+                if component_type == "agent" and isinstance(data, dict):
+                    children = data.setdefault("children", [])
+                    agent_children[component_id] = children
+                    index_agents(children)
+
+        index_agents(self.components)
+        for record in records:
+            children = agent_children.get(record["parent_id"])
+            if children is not None:
+                children.append(record["component"])
             else:
-                self.trace.metadata.total_cost = total_cost
-                self.trace.metadata.total_tokens = total_tokens
+                self.add_component(record["component"])
+        os.remove(path)
+
+    def _finalize_trace(self):
+        """Save and upload the trace of the current session"""
+        if self.trace_id:
+            self._merge_process_spool()
+
+        # Clear visited metrics when stopping trace
+        self.visited_metrics.clear()
+
+        super()._finalize_trace()
+        self.user_interaction_tracer.interactions = []  # Clear interactions list
+
+    @staticmethod
+    def _to_component(component_data: dict) -> Component:
+        """Convert a component dict to the Component type of its type"""
+        component_class = _COMPONENT_CLASSES.get(component_data["type"])
+        if component_class is None:
+            return Component(**component_data)
+        # The payloads are passed by reference, not copied
+        return component_class(**{k: v for k, v in component_data.items() if k in _COMPONENT_FIELDS})
 
     def add_component(self, component_data: dict, is_error: bool = False):
         """Add a component to the trace data"""
-        # Convert dict to appropriate Component type
-        filtered_data = {
-            k: v
-            for k, v in component_data.items()
-            if k
-            in [
-                "id",
-                "hash_id",
-                "source_hash_id",
-                "type",
-                "name",
-                "start_time",
-                "end_time",
-                "parent_id",
-                "info",
-                "extra_info",
-                "data",
-                "metadata",
-                "metrics",
-                "feedback",
-                "network_calls",
-                "interactions",
-                "error",
-            ]
-        }
-
         if component_data == None or component_data == {} or component_data.get("type", None) == None:
             # Only show warning if it hasn't been shown before
             if not self._warning_shown:
@@ -357,15 +379,6 @@ class AgenticTracing(
                 self._warning_shown = True
             return
 
-        if component_data["type"] == "llm":
-            component = LLMComponent(**filtered_data)
-        elif component_data["type"] == "agent":
-            component = AgentComponent(**filtered_data)
-        elif component_data["type"] == "tool":
-            component = ToolComponent(**filtered_data)
-        else:
-            component = Component(**component_data)
-
         # Check if there's an active agent context
         current_agent_id = self.current_agent_id.get()
         if current_agent_id and component_data["type"] in ["llm", "tool", "custom"]:
@@ -373,12 +386,15 @@ class AgenticTracing(
             current_children = self.agent_children.get()
             current_children.append(component_data)
             self.agent_children.set(current_children)
+        elif spool_component(component_data):
+            # In a worker process, the component goes to the trace of the parent process
+            return
         else:
-            # Add component to the main trace
-            super().add_component(component)
+            # Add component to the main trace, children of agents and spooled components stay dicts
+            super().add_component(self._to_component(component_data))
 
-        # Handle error case
-        if is_error:
+        # Handle error case, the trace of a session is finalized when the session exits
+        if is_error and not self._in_session():
             self.stop()
 
     def __enter__(self):
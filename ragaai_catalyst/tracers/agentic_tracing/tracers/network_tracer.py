@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 from datetime import datetime
 import socket
 from http.client import HTTPConnection, HTTPSConnection
@@ -6,10 +8,15 @@ import requests
 import urllib
 import uuid
 
+from ..utils.trace_context import TRACEPARENT, inject_headers
+
 
 class NetworkTracer:
     def __init__(self):
+        # Calls made outside of any component
         self.network_calls = []
+        # The calls of the component running in the current thread or task are appended to this buffer
+        self._call_buffer = contextvars.ContextVar("network_call_buffer", default=None)
         self.patches_applied = False  # Track whether patches are active
         # Store original functions for restoration
         self._original_urlopen = None
@@ -17,6 +24,34 @@ class NetworkTracer:
         self._original_http_request = None
         self._original_https_request = None
         self._original_socket_create_connection = None
+        self._original_thread_pool_submit = None
+        # Returns the W3C trace context of an outbound call, None to not propagate the trace
+        self.context_provider = None
+
+    def outbound_context(self):
+        """The trace context to send with an outbound call, None when the trace is not propagated."""
+        if self.context_provider is None:
+            return None
+        return self.context_provider()
+
+    def start_buffer(self):
+        """
+        Route the network calls of the current context, and of the threads and tasks it starts,
+        to a new buffer.
+
+        Returns:
+            tuple: The buffer (a list filled as calls are made) and the token to pass to `end_buffer`.
+        """
+        buffer = []
+        return buffer, self._call_buffer.set(buffer)
+
+    def end_buffer(self, token):
+        """Route the network calls of the current context back to the buffer active before `start_buffer`."""
+        try:
+            self._call_buffer.reset(token)
+        except ValueError:
+            # The component ended in another context than it started, e.g. in a callback
+            pass
 
     def record_call(
         self,
@@ -42,7 +77,8 @@ class NetworkTracer:
         # Extract protocol from URL
         protocol = "https" if url.startswith("https") else "http"
             
-        self.network_calls.append(
+        buffer = self._call_buffer.get()
+        (self.network_calls if buffer is None else buffer).append(
             {
                 "url": url,
                 "method": method,
@@ -76,6 +112,7 @@ class NetworkTracer:
                 monkey_patch_http_client(self)
             )
             self._original_socket_create_connection = monkey_patch_socket(self)
+            self._original_thread_pool_submit = monkey_patch_thread_pool()
             self.patches_applied = True
 
     def deactivate_patches(self):
@@ -87,6 +124,7 @@ class NetworkTracer:
                 self._original_http_request, self._original_https_request
             )
             restore_socket(self._original_socket_create_connection)
+            restore_thread_pool(self._original_thread_pool_submit)
             self.network_calls = []
             self.patches_applied = False
 
@@ -98,6 +136,14 @@ def monkey_patch_urllib(network_tracer):
     original_urlopen = urlopen
 
     def patched_urlopen(url, data=None, timeout=None, *args, **kwargs):
+        context = network_tracer.outbound_context()
+        if context is not None:
+            if isinstance(url, str):
+                url = urllib.request.Request(url)
+            if not url.has_header(TRACEPARENT.capitalize()):
+                for name, value in context.to_headers().items():
+                    url.add_header(name, value)
+
         if isinstance(url, str):
             method = "GET" if data is None else "POST"
             url_str = url
@@ -144,6 +190,13 @@ def monkey_patch_requests(network_tracer):
     original_request = requests.Session.request
 
     def patched_request(self, method, url, *args, **kwargs):
+        context = network_tracer.outbound_context()
+        if context is not None:
+            # headers is the 3rd argument after method and url: params, data, headers
+            if len(args) >= 3:
+                args = args[:2] + (inject_headers(args[2], context),) + args[3:]
+            else:
+                kwargs["headers"] = inject_headers(kwargs.get("headers"), context)
         start_time = datetime.now().astimezone()
         try:
             response = original_request(self, method, url, *args, **kwargs)
@@ -184,6 +237,9 @@ def monkey_patch_http_client(network_tracer):
     original_https_request = HTTPSConnection.request
 
     def patched_request(self, method, url, body=None, headers=None, *args, **kwargs):
+        context = network_tracer.outbound_context()
+        if context is not None:
+            headers = inject_headers(headers, context)
         start_time = datetime.now().astimezone() 
         try:
             result = (
@@ -263,6 +319,22 @@ def restore_socket(original_create_connection):
     socket.create_connection = original_create_connection
 
 
+def monkey_patch_thread_pool():
+    # Run executor jobs in a copy of the submitting context, so that the calls of worker
+    # threads are attributed to the component that submitted them, like asyncio tasks are
+    original_submit = ThreadPoolExecutor.submit
+
+    def patched_submit(self, fn, /, *args, **kwargs):
+        return original_submit(self, contextvars.copy_context().run, fn, *args, **kwargs)
+
+    ThreadPoolExecutor.submit = patched_submit
+    return original_submit
+
+
+def restore_thread_pool(original_submit):
+    ThreadPoolExecutor.submit = original_submit
+
+
 async def patch_aiohttp_trace_config(network_tracer):
     async def on_request_start(session, trace_config_ctx, params):
         trace_config_ctx.start = datetime.now().astimezone()
@@ -0,0 +1,135 @@
+import asyncio
+import contextvars
+
+from ..utils.workflow_builder import WorkflowBuilder
+
+# The session of the current request, task or thread. Each session records the tracer it belongs to.
+_active_session = contextvars.ContextVar("ragaai_trace_session", default=None)
+
+
+class TraceSession:
+    """
+    The state of one trace: its id, components, metrics and interactions.
+
+    A tracer always has a default session, used by `start()`/`stop()`. `tracer.session()`
+    creates another one scoped to the current context, so that concurrent requests of a
+    server each build, finalize and upload their own trace while sharing the instrumentation,
+    resource sampler and uploads of the tracer::
+
+        with tracer.session(trace_name="request"):
+            ...
+
+        async with tracer.session(trace_name="request"):
+            ...
+    """
+
+    __slots__ = (
+        "tracer",
+        "trace_name",
+        "trace_id",
+        "start_time",
+        "trace",
+        "data_key",
+        "components",
+        "workflow_builder",
+        "span_attributes_dict",
+        "visited_metrics",
+        "trace_metrics",
+        "component_network_calls",
+        "component_user_interaction",
+        "interactions",
+        "resource_offsets",
+        "parent_context",
+        "_token",
+    )
+
+    def __init__(self, tracer, trace_name=None):
+        """
+        Initialize the session.
+
+        Args:
+            tracer (BaseTracer): The tracer the session belongs to.
+            trace_name (str, optional): The name of the trace.
+        """
+        self.tracer = tracer
+        self.trace_name = trace_name
+        self.trace_id = None
+        self.start_time = None
+        self.data_key = None
+        self.components = []
+        self.workflow_builder = WorkflowBuilder()
+        self.span_attributes_dict = {}
+        self.visited_metrics = []
+        self.trace_metrics = []
+        self.component_network_calls = {}
+        self.component_user_interaction = {}
+        self.interactions = []
+        self.resource_offsets = {}
+        # The W3C trace context of the request that started the trace, in another service
+        self.parent_context = None
+        self._token = None
+
+    def __enter__(self):
+        if self.tracer.system_monitor is None:
+            raise ValueError("The tracer must be started before opening a trace session")
+        self._token = _active_session.set(self)
+        try:
+            self.tracer._start_trace()
+        except BaseException:
+            self.tracer._release_resource_samples(self)
+            _active_session.reset(self._token)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.tracer._finalize_trace()
+        finally:
+            self.tracer._release_resource_samples(self)
+            _active_session.reset(self._token)
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        try:
+            # Saving and uploading block, keep them off the event loop. The thread runs in a
+            # copy of the current context, where this session is active.
+            await asyncio.to_thread(self.tracer._finalize_trace)
+        finally:
+            self.tracer._release_resource_samples(self)
+            _active_session.reset(self._token)
+
+
+def active_session(tracer):
+    """Return the session of `tracer` active in the current context, or None."""
+    session = _active_session.get()
+    return session if session is not None and session.tracer is tracer else None
+
+
+class SessionAttribute:
+    """
+    A tracer attribute stored on its current session.
+
+    Args:
+        fallback (optional): A descriptor, such as a method, returned while the session has no value.
+    """
+
+    def __init__(self, fallback=None):
+        self.fallback = fallback
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, tracer, owner=None):
+        if tracer is None:
+            return self
+        try:
+            return getattr(tracer.current_session, self.name)
+        except AttributeError:
+            if self.fallback is not None:
+                return self.fallback.__get__(tracer, owner)
+            raise AttributeError(self.name) from None
+
+    def __set__(self, tracer, value):
+        setattr(tracer.current_session, self.name, value)
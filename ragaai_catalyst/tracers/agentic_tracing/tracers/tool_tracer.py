@@ -533,25 +533,9 @@ class ToolTracerMixin:
         pass
 
     def _sanitize_input(self, args: tuple, kwargs: dict) -> dict:
-        """Sanitize and format input data, including handling of nested lists and dictionaries."""
-
-        def sanitize_value(value):
-            if isinstance(value, (int, float, bool, str)):
-                return value
-            elif isinstance(value, list):
-                return [sanitize_value(item) for item in value]
-            elif isinstance(value, dict):
-                return {key: sanitize_value(val) for key, val in value.items()}
-            else:
-                return str(value)  # Convert non-standard types to string
-
-        return {
-            "args": [sanitize_value(arg) for arg in args],
-            "kwargs": {key: sanitize_value(val) for key, val in kwargs.items()},
-        }
+        """Sanitize and format input data, bounded by the sanitizer of the tracer."""
+        return self.sanitizer.sanitize_input(args, kwargs)
 
     def _sanitize_output(self, output: Any) -> Any:
         """Sanitize and format output data"""
-        if isinstance(output, (int, float, bool, str, list, dict)):
-            return output
-        return str(output)
+        return self.sanitizer.sanitize_output(output)
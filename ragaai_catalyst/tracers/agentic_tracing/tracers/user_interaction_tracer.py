@@ -42,7 +42,21 @@ class UserInteractionTracer:
         self.original_input = builtins.input
         self.original_print = builtins.print
         self.original_open = builtins.open
-        self.interactions = []
+        self._interactions = []
+
+    @property
+    def interactions(self):
+        # Interactions belong to the trace session of the tracer active in the current context
+        session = getattr(self.tracer, "current_session", None)
+        return session.interactions if session is not None else self._interactions
+
+    @interactions.setter
+    def interactions(self, interactions):
+        session = getattr(self.tracer, "current_session", None)
+        if session is not None:
+            session.interactions = interactions
+        else:
+            self._interactions = interactions
 
     def traced_input(self, prompt=""):
         # Get caller information
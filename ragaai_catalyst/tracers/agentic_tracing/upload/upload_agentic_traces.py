@@ -3,6 +3,14 @@ import json
 import os
 from datetime import datetime
 
+from ragaai_catalyst.tracers.agentic_tracing.utils.trace_format import TraceReader
+from ragaai_catalyst.tracers.utils.compression import (
+    compress_payload,
+    read_upload_payload,
+    resolve_compression,
+    upload_headers,
+)
+
 
 class UploadAgenticTraces:
     def __init__(self, 
@@ -11,15 +19,27 @@ class UploadAgenticTraces:
                  project_id,
                  dataset_name,
                  user_detail,
-                 base_url):
+                 base_url,
+                 compression=None,
+                 trace_reader=None,
+                 dataset_spans=None):
         self.json_file_path = json_file_path
         self.project_name = project_name
         self.project_id = project_id
         self.dataset_name = dataset_name
         self.user_detail = user_detail
         self.base_url = base_url
+        self.compression = resolve_compression(compression)
+        self.trace_reader = trace_reader
+        # Collected when the trace was finalized, read from the trace file otherwise
+        self.dataset_spans = dataset_spans
         self.timeout = 30
 
+    def _reader(self):
+        if self.trace_reader is None:
+            self.trace_reader = TraceReader(self.json_file_path)
+        return self.trace_reader
+
 
     def _get_presigned_url(self):
         payload = json.dumps({
@@ -46,16 +66,16 @@ class UploadAgenticTraces:
             return None
 
     def _put_presigned_url(self, presignedUrl, filename):
-        headers = {
-                "Content-Type": "application/json",
-            }
-
-        if "blob.core.windows.net" in presignedUrl:  # Azure
-            headers["x-ms-blob-type"] = "BlockBlob"
+        headers = upload_headers(presignedUrl, self.compression)
         print(f"Uploading agentic traces...")
         try:
-            with open(filename) as f:
-                payload = f.read().replace("\n", "").replace("\r", "").encode()
+            reader = self._reader()
+            if reader.is_stream or reader.has_blobs or reader.has_deltas:
+                # The upload API only accepts whole JSON traces, transcode trace streams and restore
+                # the payloads of the blob table and the chat histories at the network boundary
+                payload = compress_payload(reader.to_json_bytes(), self.compression)
+            else:
+                payload = read_upload_payload(filename, self.compression)
         except Exception as e:
             print(f"Error while reading file: {e}")
             return None
@@ -96,14 +116,14 @@ class UploadAgenticTraces:
             return None
 
     def _get_dataset_spans(self):
+        if self.dataset_spans is not None:
+            return self.dataset_spans
         try:
-            with open(self.json_file_path) as f:
-                data = json.load(f)
+            spans = self._reader().iter_spans()
         except Exception as e:
             print(f"Error while reading file: {e}")
             return None
         try:
-            spans = data["data"][0]["spans"]
             datasetSpans = []
             for span in spans:
                 if span["type"] != "agent":
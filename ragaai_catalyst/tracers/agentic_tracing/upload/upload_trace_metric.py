@@ -5,6 +5,7 @@ import os
 import json
 from ....ragaai_catalyst import RagaAICatalyst
 from ..utils.get_user_trace_metrics import get_user_trace_metrics
+from ..utils.trace_format import TraceReader
 
 logger = logging.getLogger(__name__)
 logging_level = (
@@ -14,12 +15,12 @@ logging_level = (
 )
 
 
-def upload_trace_metric(json_file_path, dataset_name, project_name):
+def upload_trace_metric(json_file_path, dataset_name, project_name, trace_reader=None, metrics=None):
     try:
-        with open(json_file_path, "r") as f:
-            traces = json.load(f)
-
-        metrics = get_trace_metrics_from_trace(traces)
+        if metrics is None:
+            # A reader shared with the other post-processing steps parses the trace file only once
+            traces = (trace_reader or TraceReader(json_file_path)).read()
+            metrics = get_trace_metrics_from_trace(traces)
         metrics = _change_metrics_format_for_payload(metrics)
 
         user_trace_metrics = get_user_trace_metrics(project_name, dataset_name)
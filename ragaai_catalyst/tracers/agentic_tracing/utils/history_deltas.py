@@ -0,0 +1,235 @@
+import os
+
+# The chat history of an LLM input stored as a delta is replaced by
+# {DELTA_REF: {"base": <id of the previous span of the conversation>, "prefix": <messages kept>, "messages": [<new>]}}
+# The inputs whose messages would read as a delta, {"$delta": ...}, {"$$delta": ...}..., are saved with
+# one more '$' in their key.
+DELTA_REF = "$delta"
+DELTAS_KEY = "history_deltas"
+
+_TRUE = ("1", "true", "yes", "on")
+
+
+def resolve_history_deltas(enabled=None):
+    """
+    Resolve whether the chat histories of LLM spans are saved as deltas.
+
+    Args:
+        enabled (bool, optional): Defaults to the RAGAAI_CATALYST_TRACE_HISTORY_DELTAS environment
+            variable, and to False.
+
+    Returns:
+        bool: Whether chat histories are saved as deltas.
+    """
+    if enabled is None:
+        enabled = (os.getenv("RAGAAI_CATALYST_TRACE_HISTORY_DELTAS") or "").lower() in _TRUE
+    return bool(enabled)
+
+
+def _get_messages(value):
+    # The input of LLM spans is the sanitized call: {"args": [...], "kwargs": {"messages": [...], ...}},
+    # or the message list itself
+    if isinstance(value, list) or _ref_like_key(value) is not None:
+        return value
+    if isinstance(value, dict):
+        kwargs = value.get("kwargs")
+        if isinstance(kwargs, dict) and isinstance(kwargs.get("messages"), (list, dict)):
+            return kwargs["messages"]
+    return None
+
+
+def _set_messages(value, messages):
+    if isinstance(value, list) or _ref_like_key(value) is not None:
+        return messages
+    return dict(value, kwargs=dict(value["kwargs"], messages=messages))
+
+
+def _ref_like_key(value):
+    # The key of a one-key dict that is a delta or escaped messages, else None
+    if isinstance(value, dict) and len(value) == 1:
+        key = next(iter(value))
+        if isinstance(key, str) and key.endswith(DELTA_REF) and not key[:-len(DELTA_REF)].strip("$"):
+            return key
+    return None
+
+
+def _common_prefix(messages, base):
+    count = min(len(messages), len(base))
+    # Successive calls mostly resend the whole previous history
+    if messages[:count] == base[:count]:
+        return count
+    prefix = 0
+    while prefix < count and messages[prefix] == base[prefix]:
+        prefix += 1
+    return prefix
+
+
+class HistoryDeltaEncoder:
+    """
+    Saves the chat history of an LLM input as the history of the previous call of the same
+    conversation, up to the messages they share, followed by the new messages.
+
+    Each call of a multi-turn agent resends the whole conversation, so a trace saving every
+    history grows with the square of the number of turns. A conversation is the sequence of
+    inputs starting with the same message, usually the system prompt: several agents can be
+    traced at once, each input is compared with the last input of the most recent conversations.
+    """
+
+    def __init__(self, max_conversations=16):
+        """
+        Initialize the encoder.
+
+        Args:
+            max_conversations (int): Number of recent conversations an input is compared with.
+        """
+        self.max_conversations = max_conversations
+        # (key, messages) of the last input of each conversation, the most recent last
+        self._conversations = []
+
+    def encode(self, key, value):
+        """
+        Encode an LLM input.
+
+        Args:
+            key: The id of the span or interaction holding the input, unique in the trace.
+            value: The input.
+
+        Returns:
+            The input, or a copy with its messages saved as a delta.
+        """
+        messages = _get_messages(value)
+        ref_key = _ref_like_key(messages)
+        if ref_key is not None:
+            # Messages that would read as a delta are escaped
+            return _set_messages(value, {"$" + ref_key: messages[ref_key]})
+        if not isinstance(messages, list) or not messages or key is None:
+            return value
+        for index in range(len(self._conversations) - 1, -1, -1):
+            base_key, base = self._conversations[index]
+            prefix = _common_prefix(messages, base)
+            if prefix:
+                del self._conversations[index]
+                self._conversations.append((key, messages))
+                delta = {"base": base_key, "prefix": prefix, "messages": messages[prefix:]}
+                return _set_messages(value, {DELTA_REF: delta})
+        self._conversations.append((key, messages))
+        if len(self._conversations) > self.max_conversations:
+            del self._conversations[0]
+        return value
+
+    def encode_span(self, span):
+        """
+        Encode the input of an LLM span and of its children, the children after their parent.
+
+        Args:
+            span (dict or Component): The span.
+
+        Returns:
+            dict: A copy of the span, with a copy of its data.
+        """
+        span = dict(span) if isinstance(span, dict) else span.to_dict()
+        data = span.get("data")
+        if not isinstance(data, dict):
+            return span
+        data = span["data"] = dict(data)
+        if span.get("type") == "llm" and "input" in data:
+            data["input"] = self.encode(span.get("id"), data["input"])
+        if data.get("children"):
+            data["children"] = [self.encode_span(child) for child in data["children"]]
+        return span
+
+
+class HistoryDeltaDecoder:
+    """
+    Restores the chat histories saved as deltas, from inputs (or spans) decoded in the order they were encoded.
+
+    The restored histories share the messages of the previous inputs.
+    """
+
+    def __init__(self):
+        # key -> messages of the inputs that can be the base of a delta
+        self._histories = {}
+
+    def decode(self, key, value):
+        """Decode an LLM input, returning the input itself when it holds no delta."""
+        messages = _get_messages(value)
+        ref_key = _ref_like_key(messages)
+        if ref_key == DELTA_REF:
+            delta = messages[DELTA_REF]
+            # A conversation continues from its last input only
+            base = self._histories.pop(delta["base"], None)
+            if base is None:
+                raise ValueError(f"The base {delta['base']} of a chat history delta is missing from the trace")
+            messages = base[:delta["prefix"]] + delta["messages"]
+            value = _set_messages(value, messages)
+        elif ref_key is not None:
+            # Escaped messages, not a history
+            return _set_messages(value, {ref_key[1:]: messages[ref_key]})
+        if isinstance(messages, list) and key is not None:
+            self._histories[key] = messages
+        return value
+
+    def decode_span(self, span):
+        """Decode the input of an LLM span and of its children, in place."""
+        data = span.get("data")
+        if isinstance(data, dict):
+            if span.get("type") == "llm" and "input" in data:
+                data["input"] = self.decode(span.get("id"), data["input"])
+            for child in data.get("children") or []:
+                self.decode_span(child)
+        return span
+
+
+def _is_llm_call(interaction):
+    return (isinstance(interaction, dict) and interaction.get("interaction_type") == "llm_call_start"
+            and isinstance(interaction.get("content"), dict) and "prompt" in interaction["content"])
+
+
+def encode_history_deltas(trace):
+    """
+    Save the chat histories of the LLM spans of a trace as deltas, see `HistoryDeltaEncoder`.
+
+    The inputs of the spans are encoded in the order of the trace, children after their parent,
+    and the prompts of the 'llm_call_start' interactions of the workflow, which repeat them.
+
+    Args:
+        trace (dict): The trace, left unmodified.
+
+    Returns:
+        dict: A copy of the trace.
+    """
+    encoder = HistoryDeltaEncoder()
+    spans = [encoder.encode_span(span) for span in trace["data"][0]["spans"]]
+    encoded = dict(trace, data=[dict(trace["data"][0], spans=spans)] + list(trace["data"][1:]))
+    if trace.get("workflow"):
+        encoder = HistoryDeltaEncoder()
+        workflow = encoded["workflow"] = list(trace["workflow"])
+        for index, interaction in enumerate(workflow):
+            if _is_llm_call(interaction):
+                prompt = encoder.encode(interaction.get("id"), interaction["content"]["prompt"])
+                workflow[index] = dict(interaction, content=dict(interaction["content"], prompt=prompt))
+    encoded[DELTAS_KEY] = True
+    return encoded
+
+
+def decode_history_deltas(trace):
+    """
+    Restore the chat histories of a trace read from a file, in place.
+
+    Args:
+        trace (dict): The trace.
+
+    Returns:
+        dict: The trace.
+    """
+    if not trace.pop(DELTAS_KEY, False):
+        return trace
+    decoder = HistoryDeltaDecoder()
+    for span in trace["data"][0]["spans"]:
+        decoder.decode_span(span)
+    decoder = HistoryDeltaDecoder()
+    for interaction in trace.get("workflow") or []:
+        if _is_llm_call(interaction):
+            content = interaction["content"]
+            content["prompt"] = decoder.decode(interaction.get("id"), content["prompt"])
+    return trace
@@ -1,4 +1,5 @@
 from ..data.data_structure import LLMCall
+from ...utils.sanitization import default_sanitizer
 from .trace_utils import (
     calculate_cost,
     convert_usage_to_dict,
@@ -271,23 +272,9 @@ def num_tokens_from_messages(model="gpt-4o-mini-2024-07-18", prompt_messages=Non
         "total_tokens": total_tokens
     }
 
-def extract_input_data(args, kwargs, result):
-    """Sanitize and format input data, including handling of nested lists and dictionaries."""
-
-    def sanitize_value(value):
-        if isinstance(value, (int, float, bool, str)):
-            return value
-        elif isinstance(value, list):
-            return [sanitize_value(item) for item in value]
-        elif isinstance(value, dict):
-            return {key: sanitize_value(val) for key, val in value.items()}
-        else:
-            return str(value)  # Convert non-standard types to string
-
-    return {
-        "args": [sanitize_value(arg) for arg in args],
-        "kwargs": {key: sanitize_value(val) for key, val in kwargs.items()},
-    }
+def extract_input_data(args, kwargs, result, sanitizer=None):
+    """Sanitize and format input data, bounded by `sanitizer`, the default sanitizer when None."""
+    return (sanitizer or default_sanitizer).sanitize_input(args, kwargs)
 
 
 def calculate_llm_cost(token_usage, model_name, model_costs):
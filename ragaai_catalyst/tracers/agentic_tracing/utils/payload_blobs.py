@@ -0,0 +1,305 @@
+import hashlib
+import os
+
+from ragaai_catalyst.tracers.utils.serialization import CIRCULAR_REFERENCE, dump_bytes
+
+# A payload stored in the blob table of the trace is replaced by {BLOB_REF: <digest>}. The one-key
+# dicts of the trace that would read as a reference, {"$blob": ...}, {"$$blob": ...}..., are saved
+# with one more '$' in their key.
+BLOB_REF = "$blob"
+BLOBS_KEY = "blobs"
+
+_DIGEST_SIZE = 16
+# Prefixes of the hashed bytes, a string and the JSON document of the same text are different blobs
+_STRING = b"s"
+_JSON = b"j"
+# Size of {"$blob": "<digest>"}
+_REF_SIZE = len(BLOB_REF) + 2 * _DIGEST_SIZE + 8
+
+
+def resolve_blob_threshold(threshold=None):
+    """
+    Resolve the size above which the payloads of a trace are stored in its blob table.
+
+    Args:
+        threshold (int, optional): Size in bytes, of the UTF-8 text of strings and of the JSON of
+            containers. Defaults to the RAGAAI_CATALYST_TRACE_BLOB_THRESHOLD environment variable.
+
+    Returns:
+        int: The threshold, or None when payloads are not deduplicated (the default).
+
+    Raises:
+        ValueError: If the threshold is not a positive integer.
+    """
+    if threshold is None:
+        value = os.getenv("RAGAAI_CATALYST_TRACE_BLOB_THRESHOLD")
+        if not value:
+            return None
+        try:
+            threshold = int(value)
+        except ValueError:
+            raise ValueError(f"RAGAAI_CATALYST_TRACE_BLOB_THRESHOLD must be an integer, got '{value}'")
+    if threshold <= 0:
+        raise ValueError(f"The blob threshold must be a positive number of bytes, got {threshold}")
+    return threshold
+
+
+def _is_ref(value):
+    return isinstance(value, dict) and len(value) == 1 and BLOB_REF in value
+
+
+def _ref_like_key(value):
+    # The key of a one-key dict that is a reference or an escaped dict, else None
+    if isinstance(value, dict) and len(value) == 1:
+        key = next(iter(value))
+        if isinstance(key, str) and key.endswith(BLOB_REF) and not key[:-len(BLOB_REF)].strip("$"):
+            return key
+    return None
+
+
+class BlobEncoder:
+    """
+    Stores the large payloads of a trace once, in a table keyed by their BLAKE2 digest.
+
+    Strings and containers larger than the threshold are replaced by a reference to their blob.
+    Containers are encoded bottom-up: their large items become references first, and the
+    container only becomes a blob itself if it is still larger than the threshold. A system
+    prompt repeated in every LLM span, or a document retrieved by several tools, is then saved
+    once however it is nested.
+
+    Sizes are those of the JSON of the values, estimated from their items so that only blobs are
+    serialized and hashed, and objects found several times in a trace, like the input of an LLM
+    span and its workflow interaction, are encoded once. Values are never modified, the
+    containers holding references are copies.
+    """
+
+    def __init__(self, threshold):
+        """
+        Initialize the encoder.
+
+        Args:
+            threshold (int): Size in bytes above which a payload is stored as a blob.
+        """
+        self.threshold = threshold
+        self.blobs = {}
+        # id() -> (value, encoded value, size), the value is kept so that its id is not reused
+        self._memo = {}
+
+    def _intern(self, value, payload):
+        digest = hashlib.blake2b(payload, digest_size=_DIGEST_SIZE).hexdigest()
+        self.blobs.setdefault(digest, value)
+        return {BLOB_REF: digest}
+
+    def encode(self, value):
+        """
+        Encode a payload.
+
+        Returns:
+            The payload, a reference to its blob, or a copy holding references to the blobs of its items.
+        """
+        return self._encode(value, set())[0]
+
+    def _encode(self, value, active):
+        if value is None or isinstance(value, (bool, int, float)):
+            return value, len(str(value))
+        key = id(value)
+        memo = self._memo.get(key)
+        if memo is not None:
+            return memo[1], memo[2]
+        if isinstance(value, str):
+            encoded, size = self._encode_str(value)
+        elif isinstance(value, (dict, list)):
+            if key in active:
+                # Cycles are left as they are, the serializer replaces them by a marker
+                return value, len(CIRCULAR_REFERENCE) + 2
+            active.add(key)
+            encoded, size = self._encode_container(value, active)
+            active.discard(key)
+        else:
+            # Other objects are saved as the serializer converts them
+            encoded, size = value, len(dump_bytes(value))
+        self._memo[key] = (value, encoded, size)
+        return encoded, size
+
+    def _encode_str(self, value):
+        # At most 4 bytes per character in UTF-8
+        if len(value) * 4 <= self.threshold:
+            return value, len(value) + 2
+        payload = value.encode("utf-8", "surrogatepass")
+        if len(payload) <= self.threshold:
+            return value, len(payload) + 2
+        return self._intern(value, _STRING + payload), _REF_SIZE
+
+    def _encode_container(self, value, active):
+        changed = False
+        if isinstance(value, dict):
+            encoded = {}
+            size = 1 + len(value)
+            for item_key, item in value.items():
+                encoded_item, item_size = self._encode(item, active)
+                encoded[item_key] = encoded_item
+                changed = changed or encoded_item is not item
+                size += len(str(item_key)) + 3 + item_size
+        else:
+            encoded = []
+            size = 1 + max(len(value), 1)
+            for item in value:
+                encoded_item, item_size = self._encode(item, active)
+                encoded.append(encoded_item)
+                changed = changed or encoded_item is not item
+                size += item_size
+        key = _ref_like_key(encoded)
+        if key is not None:
+            encoded, changed = {"$" + key: encoded[key]}, True
+            size += 1
+        if size <= self.threshold:
+            return (encoded if changed else value), size
+        return self._intern(encoded, _JSON + dump_bytes(encoded)), _REF_SIZE
+
+    def encode_span(self, span):
+        """
+        Encode the payloads of a span and its children: the input and output of its data and
+        the bodies of its network calls.
+
+        Args:
+            span (dict or Component): The span.
+
+        Returns:
+            dict: A copy of the span, with the copies of the data and network calls holding references.
+        """
+        span = dict(span) if isinstance(span, dict) else span.to_dict()
+        data = span.get("data")
+        if isinstance(data, dict):
+            data = span["data"] = dict(data)
+            for key in ("input", "output"):
+                if key in data:
+                    data[key] = self.encode(data[key])
+            if data.get("children"):
+                data["children"] = [self.encode_span(child) for child in data["children"]]
+        if span.get("network_calls"):
+            span["network_calls"] = [self._encode_network_call(call) for call in span["network_calls"]]
+        return span
+
+    def _encode_network_call(self, call):
+        if not isinstance(call, dict):
+            return call
+        call = dict(call)
+        for key in ("request", "response"):
+            message = call.get(key)
+            if isinstance(message, dict) and message.get("body") is not None:
+                call[key] = dict(message, body=self.encode(message["body"]))
+        return call
+
+
+def encode_blobs(trace, threshold):
+    """
+    Store the large payloads of a trace in its blob table, see `BlobEncoder`.
+
+    The input, output and network call bodies of the spans are encoded, and the contents of the
+    workflow interactions, which repeat them.
+
+    Args:
+        trace (dict): The trace, left unmodified.
+        threshold (int): Size in bytes above which a payload is stored as a blob.
+
+    Returns:
+        dict: A copy of the trace with a 'blobs' table, or the trace itself if no payload is large enough.
+    """
+    encoder = BlobEncoder(threshold)
+    spans = [encoder.encode_span(span) for span in trace["data"][0]["spans"]]
+    workflow = trace.get("workflow")
+    if workflow:
+        workflow = [
+            dict(interaction, content=encoder.encode(interaction["content"]))
+            if isinstance(interaction, dict) and interaction.get("content") is not None else interaction
+            for interaction in workflow
+        ]
+    if not encoder.blobs:
+        return trace
+    encoded = dict(trace, data=[dict(trace["data"][0], spans=spans)] + list(trace["data"][1:]))
+    if workflow:
+        encoded["workflow"] = workflow
+    encoded[BLOBS_KEY] = encoder.blobs
+    return encoded
+
+
+class BlobDecoder:
+    """
+    Restores the payloads replaced by references to the blob table of a trace.
+
+    A blob is decoded once, the payloads referencing the same blob share the decoded value.
+    """
+
+    def __init__(self, blobs):
+        """
+        Initialize the decoder.
+
+        Args:
+            blobs (dict): The blob table of the trace.
+        """
+        self.blobs = blobs
+        self._decoded = {}
+
+    def decode(self, value):
+        """Decode a payload, returning the payload itself when it holds no reference."""
+        if isinstance(value, dict):
+            if _is_ref(value):
+                digest = value[BLOB_REF]
+                decoded = self._decoded.get(digest)
+                if decoded is None:
+                    if digest not in self.blobs:
+                        raise ValueError(f"Blob {digest} is missing from the blob table of the trace")
+                    decoded = self._decoded[digest] = self.decode(self.blobs[digest])
+                return decoded
+            key = _ref_like_key(value)
+            if key is not None:
+                # An escaped dict of the trace
+                return {key[1:]: self.decode(value[key])}
+            for key, item in value.items():
+                decoded = self.decode(item)
+                if decoded is not item:
+                    value[key] = decoded
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                decoded = self.decode(item)
+                if decoded is not item:
+                    value[index] = decoded
+        return value
+
+    def decode_span(self, span):
+        """Decode the payloads of a span and its children, in place."""
+        data = span.get("data")
+        if isinstance(data, dict):
+            for key in ("input", "output"):
+                if key in data:
+                    data[key] = self.decode(data[key])
+            for child in data.get("children") or []:
+                self.decode_span(child)
+        for call in span.get("network_calls") or []:
+            for key in ("request", "response"):
+                message = call.get(key) if isinstance(call, dict) else None
+                if isinstance(message, dict) and message.get("body") is not None:
+                    message["body"] = self.decode(message["body"])
+        return span
+
+
+def decode_blobs(trace):
+    """
+    Restore the payloads of a trace read from a file and drop its blob table, in place.
+
+    Args:
+        trace (dict): The trace.
+
+    Returns:
+        dict: The trace.
+    """
+    blobs = trace.pop(BLOBS_KEY, None)
+    if blobs is None:
+        return trace
+    decoder = BlobDecoder(blobs)
+    for span in trace["data"][0]["spans"]:
+        decoder.decode_span(span)
+    for interaction in trace.get("workflow") or []:
+        if isinstance(interaction, dict) and interaction.get("content") is not None:
+            interaction["content"] = decoder.decode(interaction["content"])
+    return trace
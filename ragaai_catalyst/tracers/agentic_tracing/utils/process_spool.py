@@ -0,0 +1,176 @@
+import contextvars
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from ragaai_catalyst.tracers.utils.sanitization import default_sanitizer
+from ragaai_catalyst.tracers.utils.serialization import dump_bytes
+
+SPOOL_DIR = os.path.join(tempfile.gettempdir(), "raga_spool")
+
+# The task of a traced parent process running in the current context of a worker process
+_worker_task = contextvars.ContextVar("ragaai_process_task", default=None)
+
+
+def spool_path(trace_id):
+    """The spool of the components traced in worker processes for a trace."""
+    return os.path.join(SPOOL_DIR, f"{trace_id}.jsonl")
+
+
+class ProcessTraceContext:
+    """
+    The trace context sent to a worker process: where to spool components, their parent agent
+    and the sanitizer bounding the arguments and results of the calls recorded in the worker.
+    """
+
+    __slots__ = ("spool_path", "parent_id", "sanitizer")
+
+    def __init__(self, spool_path, parent_id=None, sanitizer=None):
+        self.spool_path = spool_path
+        self.parent_id = parent_id
+        self.sanitizer = sanitizer if sanitizer is not None else default_sanitizer
+
+    def __getstate__(self):
+        return (self.spool_path, self.parent_id, self.sanitizer)
+
+    def __setstate__(self, state):
+        self.spool_path, self.parent_id, self.sanitizer = state
+
+
+def write_record(context, component):
+    """
+    Append a component to the spool of the parent trace.
+
+    Each record is one line written with a single `os.write` on a file opened with O_APPEND,
+    so records of concurrent worker processes never interleave on a local file system.
+    """
+    os.makedirs(os.path.dirname(context.spool_path), exist_ok=True)
+    line = dump_bytes({"parent_id": context.parent_id, "component": component}) + b"\n"
+    fd = os.open(context.spool_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def spool_component(component):
+    """
+    Send a component finished in a worker process to the parent trace.
+
+    Returns:
+        bool: True if the current context runs a task of a traced parent process.
+    """
+    task = _worker_task.get()
+    if task is None:
+        return False
+    write_record(task.context, component)
+    task.spooled += 1
+    return True
+
+
+def read_records(path):
+    """Read the records of a spool file, skipping a truncated last line."""
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+class ProcessTask:
+    """
+    A picklable callable running a function in a worker process on behalf of a traced parent.
+
+    The function runs in an empty context, so that tracer state inherited by forked workers
+    does not leak into it. Components it traces are spooled to the parent trace; when it
+    traces none, the call itself is recorded as a tool component.
+    """
+
+    def __init__(self, fn, context):
+        self.fn = fn
+        self.context = context
+        self.spooled = 0
+
+    def __call__(self, *args, **kwargs):
+        return contextvars.Context().run(self._run, args, kwargs)
+
+    def _run(self, args, kwargs):
+        _worker_task.set(self)
+        # map() runs a chunk of calls with the same task, count the components of this call only
+        self.spooled = 0
+        start_time = datetime.now().astimezone().isoformat()
+        error, output = None, None
+        try:
+            output = self.fn(*args, **kwargs)
+            return output
+        except Exception as e:
+            error = {"code": 500, "type": type(e).__name__, "message": str(e), "details": {}}
+            raise
+        finally:
+            if not self.spooled:
+                write_record(self.context, self._call_component(start_time, args, kwargs, output, error))
+
+    def _call_component(self, start_time, args, kwargs, output, error):
+        name = getattr(self.fn, "__qualname__", None) or repr(self.fn)
+        return {
+            "id": str(uuid.uuid4()),
+            "hash_id": hashlib.md5(name.encode("utf-8")).hexdigest(),
+            "source_hash_id": None,
+            "type": "tool",
+            "name": name,
+            "start_time": start_time,
+            "end_time": datetime.now().astimezone().isoformat(),
+            "error": error,
+            "parent_id": self.context.parent_id,
+            "info": {"tool_type": "process", "version": None, "memory_used": 0, "pid": os.getpid()},
+            "data": {
+                "input": self.context.sanitizer.sanitize_input(args, kwargs),
+                "output": self.context.sanitizer.sanitize_output(output),
+            },
+            "metrics": [],
+            "network_calls": [],
+            "interactions": [],
+        }
+
+
+def _is_wrapped(fn):
+    # map() submits chunks as partial(_process_chunk, task), the task is already wrapped
+    return isinstance(fn, ProcessTask) or (
+        isinstance(fn, functools.partial) and any(isinstance(arg, ProcessTask) for arg in fn.args)
+    )
+
+
+def monkey_patch_process_pool(tracer):
+    # Wrap process pool jobs submitted while a trace is active
+    original_submit = ProcessPoolExecutor.submit
+    original_map = ProcessPoolExecutor.map
+
+    def patched_submit(self, fn, /, *args, **kwargs):
+        context = tracer.process_context()
+        if context is not None and not _is_wrapped(fn):
+            fn = ProcessTask(fn, context)
+        return original_submit(self, fn, *args, **kwargs)
+
+    def patched_map(self, fn, *iterables, **kwargs):
+        context = tracer.process_context()
+        if context is not None and not _is_wrapped(fn):
+            fn = ProcessTask(fn, context)
+        return original_map(self, fn, *iterables, **kwargs)
+
+    ProcessPoolExecutor.submit = patched_submit
+    ProcessPoolExecutor.map = patched_map
+    return original_submit, original_map
+
+
+def restore_process_pool(originals):
+    ProcessPoolExecutor.submit, ProcessPoolExecutor.map = originals
@@ -0,0 +1,126 @@
+import os
+import re
+import uuid
+
+# W3C Trace Context headers, https://www.w3.org/TR/trace-context/
+TRACEPARENT = "traceparent"
+TRACESTATE = "tracestate"
+SAMPLED = "01"
+
+_TRACEPARENT_RE = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?$")
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+
+def new_span_id():
+    """A random W3C span id, 16 lowercase hex characters."""
+    return os.urandom(8).hex()
+
+
+def w3c_trace_id(trace_id):
+    """The W3C trace id of a Catalyst trace id, a UUID."""
+    return uuid.UUID(trace_id).hex
+
+
+def get_header(headers, name):
+    """Get a header of a mapping or a list of (name, value) pairs, ignoring the case of the name."""
+    if not headers:
+        return None
+    items = headers.items() if hasattr(headers, "items") else headers
+    for key, value in items:
+        if isinstance(key, bytes):
+            key = key.decode("latin-1")
+        if key.lower() == name:
+            return value.decode("latin-1") if isinstance(value, bytes) else value
+    return None
+
+
+class TraceContext:
+    """
+    A W3C trace context: the distributed trace a call belongs to and the span that made it.
+
+    Outbound calls of a traced service carry it in their `traceparent`/`tracestate` headers,
+    the service receiving them records it as the parent of its own trace.
+    """
+
+    __slots__ = ("trace_id", "span_id", "flags", "tracestate")
+
+    def __init__(self, trace_id, span_id, flags=SAMPLED, tracestate=None):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.flags = flags
+        self.tracestate = tracestate
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{self.flags}"
+
+    @classmethod
+    def parse(cls, traceparent, tracestate=None):
+        """
+        Parse a `traceparent` header.
+
+        Returns:
+            TraceContext: The context, None if the header is missing or invalid.
+        """
+        if not traceparent:
+            return None
+        match = _TRACEPARENT_RE.match(traceparent.strip().lower())
+        if match is None:
+            return None
+        version, trace_id, span_id, flags, rest = match.groups()
+        # Version 00 has no trailing fields, later versions may add some
+        if version == "ff" or (version == "00" and rest):
+            return None
+        if trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+            return None
+        return cls(trace_id, span_id, flags, tracestate or None)
+
+    @classmethod
+    def from_headers(cls, headers):
+        """
+        Extract the context of incoming request headers.
+
+        Args:
+            headers: A mapping or a list of (name, value) pairs, as str or bytes, e.g. the
+                headers of an ASGI scope.
+
+        Returns:
+            TraceContext: The context, None if the request carries no valid `traceparent`.
+        """
+        return cls.parse(get_header(headers, TRACEPARENT), get_header(headers, TRACESTATE))
+
+    def child(self):
+        """A context for an outbound call of the span of this context, in the same trace."""
+        return TraceContext(self.trace_id, new_span_id(), self.flags, self.tracestate)
+
+    def to_headers(self):
+        headers = {TRACEPARENT: self.traceparent}
+        if self.tracestate:
+            headers[TRACESTATE] = self.tracestate
+        return headers
+
+    def to_dict(self):
+        return {"trace_id": self.trace_id, "parent_span_id": self.span_id, "tracestate": self.tracestate}
+
+    def __repr__(self):
+        return f"TraceContext({self.traceparent!r}, tracestate={self.tracestate!r})"
+
+
+def inject_headers(headers, context):
+    """
+    Add the headers of a trace context to outbound request headers.
+
+    Headers already set by the caller, or by an outer instrumented client, are kept.
+
+    Args:
+        headers (dict): The request headers, or None.
+        context (TraceContext): The context of the call.
+
+    Returns:
+        dict: A copy of the headers with the trace context.
+    """
+    headers = dict(headers or {})
+    if get_header(headers, TRACEPARENT) is None:
+        headers.update(context.to_headers())
+    return headers
@@ -0,0 +1,264 @@
+from .workflow_builder import WorkflowBuilder, _get
+
+_ENTER = 0
+_EXIT = 1
+
+
+def _set(span, key, value):
+    if isinstance(span, dict):
+        span[key] = value
+    else:
+        setattr(span, key, value)
+
+
+def _has_hash_id(span):
+    # Component objects always have one, a None hash_id included
+    return "hash_id" in span if isinstance(span, dict) else True
+
+
+def _model(span):
+    info = _get(span, "info")
+    return info.get("model") if isinstance(info, dict) else None
+
+
+def _add_amounts(totals, amounts):
+    if not isinstance(amounts, dict):
+        return
+    for key, value in amounts.items():
+        totals[key] = totals.get(key, 0) + value
+
+
+class TraceFinalizer:
+    """
+    Finalizes the spans of a trace in a single iterative walk of the span tree.
+
+    The walk computes together what the finalization of a trace needs, previously the result
+    of one recursive walk each:
+
+    - the integer span ids, numbered depth-first from 1, and parent ids
+    - the input and output of root agents, from their first and last children
+    - the total cost and tokens of the LLM calls, and their cost and tokens per key
+    - the deduplication of LLM spans, and the 'custom' type of default-model LLM spans
+      sharing their name with a custom-model one
+    - the workflow, the interactions of the spans ordered by timestamp, merged from the
+      interactions recorded by the `WorkflowBuilder` of the trace as its components completed
+    - the metrics of the trace and its spans
+    - the dataset spans sent with the trace upload
+
+    Ids, agent input/output and costs are computed over every span, the workflow, metrics
+    and dataset spans over the deduplicated spans, as the former passes did. The walk uses
+    an explicit stack, so deeply nested agents do not hit the recursion limit. Only agent
+    spans have children.
+    """
+
+    def __init__(self, spans, trace_metrics=None, workflow_builder=None):
+        """
+        Initialize the finalizer.
+
+        Args:
+            spans (list): The root spans of the trace, updated in place by `run()`.
+            trace_metrics (list, optional): The metrics of the trace.
+            workflow_builder (WorkflowBuilder, optional): The interactions recorded while tracing.
+                The interactions of spans it has not recorded, such as components merged from
+                worker processes, are recorded during the walk.
+        """
+        self.spans = spans
+        self.trace_metrics = trace_metrics or []
+        self.workflow_builder = workflow_builder or WorkflowBuilder()
+        self.total_cost = 0.0
+        self.total_tokens = 0
+        self.cost = {}
+        self.tokens = {}
+        self.workflow = []
+        self.metrics = []
+        self.dataset_spans = []
+
+    def run(self):
+        """
+        Finalize the spans.
+
+        Returns:
+            list: The deduplicated root spans.
+        """
+        next_id = 1
+        counted_ids = set()
+        self._dataset_hashes = set()
+        # Outputs of spans emitted before their id is known, see `_siblings`
+        self._pending = {}
+        # Spans whose interactions are in the workflow
+        self._emitted = set()
+        self.metrics.extend(self.trace_metrics)
+
+        roots, entries = self._siblings(self.spans, dedupe=True)
+        stack = []
+        for span, span_type, emitted in reversed(entries):
+            _set(span, "parent_id", 0)
+            stack.append((_ENTER, span, 0, span_type, emitted, True))
+        while stack:
+            event, span, depth, span_type, emitted, counted = stack.pop()
+            if event == _EXIT:
+                self._emit_end(span, depth, recording=emitted)
+                continue
+
+            # Totals count each component id once, with its subtree
+            original_id = _get(span, "id") or _get(span, "component_id")
+            if counted:
+                counted = original_id not in counted_ids
+                counted_ids.add(original_id)
+            span_id = next_id
+            next_id += 1
+            _set(span, "id", span_id)
+            for output, key in self._pending.pop(id(span), ()):
+                output[key] = span_id
+
+            if span_type == "llm":
+                self._add_llm_usage(_get(span, "info"), counted)
+
+            data = _get(span, "data")
+            children = data.get("children") if isinstance(data, dict) else None
+            if depth == 0 and span_type == "agent":
+                self._roll_up_agent_io(data, children)
+
+            if emitted is span:
+                recording = span not in self.workflow_builder
+                self._emit_start(span, span_id, depth, recording)
+                stack.append((_EXIT, span, depth, span_type, recording, counted))
+            elif emitted is not None:
+                # A later duplicate LLM span replacing this one, it has no children
+                self._emit_deferred(emitted, depth)
+
+            if children is not None and (depth > 0 or span_type == "agent"):
+                kept_children, child_entries = self._siblings(children, dedupe=emitted is span)
+                if emitted is span:
+                    data["children"] = kept_children
+                for child, child_type, child_emitted in reversed(child_entries):
+                    _set(child, "parent_id", span_id)
+                    stack.append((_ENTER, child, depth + 1, child_type, child_emitted, counted))
+
+        # The ids are final, build the workflow from the interactions ordered while tracing
+        self.workflow = self.workflow_builder.interactions(self._emitted)
+        self.spans = roots
+        return roots
+
+    def _siblings(self, spans, dedupe):
+        """
+        Deduplicate a list of sibling spans.
+
+        Returns:
+            tuple: The kept spans, and for every span a (span, type before deduplication,
+                emitted) entry, `emitted` being the span whose interactions, metrics and dataset
+                span are emitted at its position. A duplicate LLM span with interactions replaces
+                the first one, and is emitted at its position, as the kept spans are in that order.
+        """
+        if not dedupe:
+            return spans, [(span, _get(span, "type"), None) for span in spans]
+
+        kept = []
+        first_spans = []
+        llm_indexes = {}
+        for span in spans:
+            if not _has_hash_id(span):
+                continue
+            if _get(span, "type") == "llm":
+                data = _get(span, "data") or {}
+                key = (_get(span, "hash_id"), str(data.get("input")), str(data.get("output")))
+                index = llm_indexes.get(key)
+                if index is None:
+                    llm_indexes[key] = len(kept)
+                    kept.append(span)
+                    first_spans.append(span)
+                elif _get(span, "interactions"):
+                    kept[index] = span
+            else:
+                kept.append(span)
+                first_spans.append(span)
+
+        # Types before the renaming below, costs and totals are computed on the original types
+        emitted = {id(first): span for first, span in zip(first_spans, kept)}
+        entries = [(span, _get(span, "type"), emitted.get(id(span))) for span in spans]
+
+        llm_spans_by_name = {}
+        for span in kept:
+            name = _get(span, "name")
+            if _get(span, "type") == "llm" and name:
+                llm_spans_by_name.setdefault(name, []).append(span)
+        for same_name in llm_spans_by_name.values():
+            if len(same_name) > 1:
+                models = [_model(span) for span in same_name]
+                if any(model != "default" for model in models):
+                    for span, model in zip(same_name, models):
+                        if model == "default":
+                            _set(span, "type", "custom")
+        return kept, entries
+
+    def _emit_start(self, span, span_id, depth, recording):
+        """Emit the outputs of a span preceding those of its children."""
+        self._emitted.add(id(span))
+        if recording:
+            self.workflow_builder.enter(span, depth > 0)
+        if depth > 0:
+            self.metrics.extend(_get(span, "metrics") or [])
+        if depth <= 1:
+            span_type = _get(span, "type")
+            span_hash = _get(span, "hash_id")
+            if (depth == 0 and span_type == "agent") or span_hash not in self._dataset_hashes:
+                self._dataset_hashes.add(span_hash)
+                self.dataset_spans.append({
+                    "spanId": span_id,
+                    "spanName": _get(span, "name"),
+                    "spanHash": span_hash,
+                    "spanType": span_type,
+                })
+
+    def _emit_end(self, span, depth, recording):
+        """Emit the outputs of a span following those of its children."""
+        if recording:
+            self.workflow_builder.exit(span, depth > 0)
+        if depth == 0:
+            self.metrics.extend(_get(span, "metrics") or [])
+
+    def _emit_deferred(self, span, depth):
+        """Emit the outputs of a span whose id is assigned later, setting it then."""
+        dataset_length = len(self.dataset_spans)
+        recording = span not in self.workflow_builder
+        self._emit_start(span, None, depth, recording)
+        self._emit_end(span, depth, recording)
+        pending = self._pending.setdefault(id(span), [])
+        pending.extend((dataset_span, "spanId") for dataset_span in self.dataset_spans[dataset_length:])
+
+    def _add_llm_usage(self, info, counted):
+        if not isinstance(info, dict):
+            return
+        cost, tokens = info.get("cost", {}), info.get("tokens", {})
+        _add_amounts(self.cost, cost)
+        _add_amounts(self.tokens, tokens)
+        if counted:
+            if isinstance(cost, dict):
+                self.total_cost += cost.get("total_cost", 0)
+            if not isinstance(tokens, dict):
+                tokens = info.get("token_usage", {})
+            if isinstance(tokens, dict):
+                self.total_tokens += tokens.get("total_tokens", 0)
+
+    @staticmethod
+    def _roll_up_agent_io(data, children):
+        if not isinstance(data, dict):
+            return
+        data["input"] = None
+        data["output"] = None
+        if not children:
+            return
+        for child in children:
+            if "data" not in child:
+                continue
+            input_data = child["data"].get("input")
+            if input_data:
+                data["input"] = input_data["args"] if hasattr(input_data, "args") else input_data
+                break
+        for child in reversed(children):
+            if "data" not in child:
+                continue
+            output_data = child["data"].get("output")
+            if output_data and output_data != "" and output_data != "None":
+                data["output"] = output_data
+                break
@@ -0,0 +1,275 @@
+import contextlib
+import json
+import os
+import struct
+
+from ragaai_catalyst.tracers.utils.compression import open_trace_file
+from .history_deltas import DELTAS_KEY, HistoryDeltaDecoder, decode_history_deltas
+from .payload_blobs import BLOBS_KEY, BlobDecoder, decode_blobs
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MAGIC = b"RAGATRC"
+FORMAT_VERSION = 1
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+RECORD_TRACE = b"T"
+RECORD_SPAN = b"S"
+
+# Trace formats selectable with RAGAAI_CATALYST_TRACE_FORMAT
+TRACE_FORMATS = {"json": None, "json-stream": CODEC_JSON, "msgpack": CODEC_MSGPACK}
+STREAM_SUFFIX = ".rtrace"
+
+_HEADER = struct.Struct(">7sBB")
+_RECORD = struct.Struct(">cI")
+
+
+def resolve_trace_format(trace_format=None):
+    """
+    Resolve the on-disk format of agentic traces.
+
+    Args:
+        trace_format (str, optional): 'json' (a single JSON document), 'json-stream' or 'msgpack'.
+            Defaults to the RAGAAI_CATALYST_TRACE_FORMAT environment variable, then 'json'.
+
+    Returns:
+        str: The trace format.
+
+    Raises:
+        ValueError: If the format is not supported.
+        ImportError: If 'msgpack' is requested and the msgpack package is not installed.
+    """
+    trace_format = (trace_format or os.getenv("RAGAAI_CATALYST_TRACE_FORMAT") or "json").lower()
+    if trace_format not in TRACE_FORMATS:
+        raise ValueError(f"Unsupported trace format '{trace_format}'. Supported: {list(TRACE_FORMATS)}")
+    if trace_format == "msgpack" and msgpack is None:
+        raise ImportError("The msgpack trace format requires the 'msgpack' package: pip install msgpack")
+    return trace_format
+
+
+class TraceWriter:
+    """
+    Writes a trace stream file record by record.
+
+    A trace stream file starts with a fixed header: the magic bytes, the format version and the
+    codec of the records. It is followed by length-prefixed records: first the trace without its
+    spans, then one record per span. Records are MessagePack or compact JSON, so a file can be
+    read in one pass, span by span, and is only transcoded to JSON at the network boundary.
+    """
+
+    def __init__(self, file_path, codec=CODEC_MSGPACK, compression=None, default=None):
+        """
+        Initialize the writer and write the file header.
+
+        Args:
+            file_path (str): The file to write.
+            codec (int): CODEC_MSGPACK or CODEC_JSON.
+            compression (str, optional): Compression of the file, see `tracers.utils.compression`.
+            default (callable, optional): Converts objects the codec cannot encode, like `JSONEncoder.default`.
+        """
+        if codec == CODEC_MSGPACK and msgpack is None:
+            raise ImportError("The msgpack trace format requires the 'msgpack' package: pip install msgpack")
+        self.codec = codec
+        self.default = default
+        self._file = open_trace_file(file_path, "wb", compression)
+        self._file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, codec))
+
+    def _encode(self, obj):
+        if self.codec == CODEC_MSGPACK:
+            return msgpack.packb(obj, default=self.default, use_bin_type=True)
+        return json.dumps(obj, default=self.default, separators=(",", ":")).encode("utf-8")
+
+    def _write_record(self, kind, obj):
+        payload = self._encode(obj)
+        self._file.write(_RECORD.pack(kind, len(payload)))
+        self._file.write(payload)
+
+    def write_trace(self, trace):
+        """
+        Write a whole trace: its fields first, then each span of `trace['data'][0]['spans']`.
+
+        Args:
+            trace (dict): The trace.
+        """
+        spans = trace["data"][0]["spans"]
+        header = dict(trace, data=[dict(trace["data"][0], spans=[])] + list(trace["data"][1:]))
+        self._write_record(RECORD_TRACE, header)
+        for span in spans:
+            self._write_record(RECORD_SPAN, span)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def write_trace(file_path, trace, trace_format="msgpack", compression=None, default=None):
+    """
+    Write a trace in the given format.
+
+    Args:
+        file_path (str): The file to write.
+        trace (dict): The trace.
+        trace_format (str): 'json', 'json-stream' or 'msgpack'.
+        compression (str, optional): Compression of the file.
+        default (callable, optional): Converts objects the codec cannot encode.
+    """
+    codec = TRACE_FORMATS[resolve_trace_format(trace_format)]
+    if codec is None:
+        with open_trace_file(file_path, "wt", compression) as f:
+            json.dump(trace, f, default=default)
+        return
+    with TraceWriter(file_path, codec=codec, compression=compression, default=default) as writer:
+        writer.write_trace(trace)
+
+
+class TraceReader:
+    """
+    Reads a trace file, either a trace stream or a plain JSON document, parsing it at most once.
+
+    `header` and `iter_spans()` stream a trace stream file without materializing every span,
+    `read()` returns the whole trace and caches it for the next steps. Payloads stored in the
+    blob table of the trace and chat histories saved as deltas are restored, see `payload_blobs`
+    and `history_deltas`.
+    """
+
+    def __init__(self, file_path):
+        """
+        Initialize the reader.
+
+        Args:
+            file_path (str): The trace file, plain or compressed (inferred from its suffix).
+        """
+        self.file_path = file_path
+        self._trace = None
+        self._header = None
+        # Restore the spans streamed by iter_spans() when the trace has a blob table or history deltas
+        self._decoder = None
+        self._history_decoder = None
+        self._has_blobs = False
+        self._has_deltas = False
+        with open_trace_file(file_path, "rb") as f:
+            prefix = f.read(_HEADER.size)
+        self.is_stream = len(prefix) == _HEADER.size and prefix[:len(MAGIC)] == MAGIC
+        if self.is_stream:
+            _, self.version, self.codec = _HEADER.unpack(prefix)
+            if self.version > FORMAT_VERSION:
+                raise ValueError(f"Unsupported trace format version {self.version} in {file_path}")
+            if self.codec == CODEC_MSGPACK and msgpack is None:
+                raise ImportError("Reading msgpack traces requires the 'msgpack' package: pip install msgpack")
+
+    def _decode(self, payload):
+        if self.codec == CODEC_MSGPACK:
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        return json.loads(payload)
+
+    def _records(self):
+        with open_trace_file(self.file_path, "rb") as f:
+            f.read(_HEADER.size)
+            while True:
+                prefix = f.read(_RECORD.size)
+                if not prefix:
+                    return
+                kind, length = _RECORD.unpack(prefix)
+                yield kind, self._decode(f.read(length))
+
+    @property
+    def header(self):
+        """The trace without its spans."""
+        if self._header is None:
+            if self._trace is not None or not self.is_stream:
+                trace = self.read()
+                self._header = dict(trace, data=[dict(trace["data"][0], spans=[])] + list(trace["data"][1:]))
+            else:
+                # Close the file now rather than when the suspended generator is collected
+                with contextlib.closing(self._records()) as records:
+                    kind, self._header = next(records)
+                if kind != RECORD_TRACE:
+                    raise ValueError(f"Trace stream {self.file_path} does not start with a trace record")
+                blobs = self._header.pop(BLOBS_KEY, None)
+                if blobs is not None:
+                    self._decoder = BlobDecoder(blobs)
+                    self._has_blobs = True
+                if self._header.pop(DELTAS_KEY, False):
+                    self._history_decoder = HistoryDeltaDecoder()
+                    self._has_deltas = True
+        return self._header
+
+    @property
+    def has_blobs(self):
+        """Whether payloads of the trace were stored in a blob table, the file is then not the JSON trace as is."""
+        self.header
+        return self._has_blobs
+
+    @property
+    def has_deltas(self):
+        """Whether chat histories of the trace were saved as deltas, the file is then not the JSON trace as is."""
+        self.header
+        return self._has_deltas
+
+    def iter_spans(self):
+        """Iterate over the spans of the trace, streaming them from disk for trace stream files."""
+        if self._trace is not None or not self.is_stream:
+            yield from self.read()["data"][0]["spans"]
+            return
+        self.header
+        with contextlib.closing(self._records()) as records:
+            for kind, record in records:
+                if kind == RECORD_SPAN:
+                    if self._decoder is not None:
+                        record = self._decoder.decode_span(record)
+                    if self._history_decoder is not None:
+                        record = self._history_decoder.decode_span(record)
+                    yield record
+
+    def read(self):
+        """
+        Read the whole trace.
+
+        Returns:
+            dict: The trace, as it was before being written.
+        """
+        if self._trace is None:
+            if not self.is_stream:
+                with open_trace_file(self.file_path) as f:
+                    trace = json.load(f)
+            else:
+                spans = []
+                for kind, record in self._records():
+                    if kind == RECORD_TRACE:
+                        trace = record
+                    elif kind == RECORD_SPAN:
+                        spans.append(record)
+                trace["data"][0]["spans"] = spans
+            if isinstance(trace, dict) and BLOBS_KEY in trace:
+                self._has_blobs = True
+                trace = decode_blobs(trace)
+            if isinstance(trace, dict) and trace.get(DELTAS_KEY):
+                self._has_deltas = True
+                trace = decode_history_deltas(trace)
+            self._trace = trace
+        return self._trace
+
+    def to_json_bytes(self):
+        """Transcode the trace to compact JSON, for APIs that only accept JSON."""
+        return json.dumps(self.read(), separators=(",", ":")).encode("utf-8")
+
+
+def load_trace(file_path):
+    """
+    Load a trace file of any supported format.
+
+    Args:
+        file_path (str): The trace file.
+
+    Returns:
+        dict: The trace.
+    """
+    return TraceReader(file_path).read()
@@ -0,0 +1,147 @@
+import logging
+import os
+from datetime import datetime
+
+from ragaai_catalyst.tracers.utils.compression import FILE_SUFFIXES
+from .trace_context import TRACEPARENT, TraceContext, get_header, w3c_trace_id
+from .trace_format import STREAM_SUFFIX, TraceReader
+
+logger = logging.getLogger(__name__)
+
+TRACE_SUFFIXES = tuple(
+    suffix + compression_suffix
+    for suffix in (".json", STREAM_SUFFIX)
+    for compression_suffix in ("",) + tuple(FILE_SUFFIXES.values())
+)
+
+
+def _duration(start_time, end_time):
+    try:
+        return (datetime.fromisoformat(end_time) - datetime.fromisoformat(start_time)).total_seconds()
+    except (TypeError, ValueError):
+        return None
+
+
+def _load_traces(directory):
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(TRACE_SUFFIXES):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            trace = TraceReader(path).read()
+        except Exception as e:
+            logger.debug(f"Skipping {path}: {e}")
+            continue
+        # The trace directory may hold other JSON files
+        if isinstance(trace, dict) and trace.get("data") and "spans" in trace["data"][0]:
+            yield path, trace
+
+
+def _span_node(span, service, call_spans):
+    node = {
+        "name": span.get("name"),
+        "type": span.get("type"),
+        "service": service,
+        "start_time": span.get("start_time"),
+        "end_time": span.get("end_time"),
+        "duration": _duration(span.get("start_time"), span.get("end_time")),
+        "children": [],
+    }
+    # The W3C span ids sent with the outbound calls of the span
+    for call in span.get("network_calls") or []:
+        headers = (call.get("request") or {}).get("headers")
+        context = TraceContext.parse(get_header(headers, TRACEPARENT))
+        if context is not None:
+            call_spans[context.span_id] = node
+    data = span.get("data")
+    if isinstance(data, dict):
+        for child in data.get("children") or []:
+            node["children"].append(_span_node(child, service, call_spans))
+    return node
+
+
+def _trace_node(path, trace, call_spans):
+    service = trace.get("trace_name")
+    return {
+        "name": service,
+        "type": "trace",
+        "service": service,
+        "trace_id": trace.get("id"),
+        "path": path,
+        "trace_context": trace.get("trace_context"),
+        "start_time": trace.get("start_time"),
+        "end_time": trace.get("end_time"),
+        "duration": _duration(trace.get("start_time"), trace.get("end_time")),
+        "children": [_span_node(span, service, call_spans) for span in trace["data"][0]["spans"]],
+    }
+
+
+def _safe_w3c_trace_id(trace_id):
+    try:
+        return w3c_trace_id(trace_id)
+    except (TypeError, ValueError):
+        return trace_id
+
+
+def stitch_traces(directory):
+    """
+    Merge the traces of the services of distributed agents into distributed trace trees.
+
+    The trace of a service called with a W3C `traceparent` header, see `Tracer(propagate_trace_context=True)`
+    and the trace context middlewares, becomes a child of the span that made the call in the
+    trace of the caller.
+
+    Args:
+        directory (str): A directory of trace files, in any trace format and compression.
+
+    Returns:
+        list: One dict per distributed trace, with its W3C `trace_id` and its `roots`, the trees
+            of the traces whose caller was not found in the directory. Tree nodes are dicts with
+            `name`, `type` ('trace' for the trace of a service, else the span type), `service`,
+            `start_time`, `end_time`, `duration` in seconds and `children`.
+    """
+    call_spans = {}
+    nodes = [_trace_node(path, trace, call_spans) for path, trace in _load_traces(directory)]
+
+    distributed_traces = {}
+    for node in nodes:
+        context = node["trace_context"]
+        parent = call_spans.get(context["parent_span_id"]) if context else None
+        if parent is not None:
+            parent["children"].append(node)
+            continue
+        trace_id = context["trace_id"] if context else _safe_w3c_trace_id(node["trace_id"])
+        distributed_traces.setdefault(trace_id, {"trace_id": trace_id, "roots": []})["roots"].append(node)
+    return list(distributed_traces.values())
+
+
+def latency_hot_spots(distributed_traces, top=10):
+    """
+    Rank the nodes of stitched traces by self time, their duration not spent in their children.
+
+    Args:
+        distributed_traces (list): The result of `stitch_traces`.
+        top (int, optional): The number of hot spots. Defaults to 10.
+
+    Returns:
+        list: Dicts with the `trace_id`, `service`, `name`, `type`, `duration` and `self_time` of a node.
+    """
+    hot_spots = []
+    for distributed_trace in distributed_traces:
+        stack = list(distributed_trace["roots"])
+        while stack:
+            node = stack.pop()
+            stack.extend(node["children"])
+            if node["duration"] is None:
+                continue
+            children_time = sum(child["duration"] or 0 for child in node["children"])
+            hot_spots.append({
+                "trace_id": distributed_trace["trace_id"],
+                "service": node["service"],
+                "name": node["name"],
+                "type": node["type"],
+                "duration": node["duration"],
+                "self_time": max(node["duration"] - children_time, 0.0),
+            })
+    hot_spots.sort(key=lambda hot_spot: hot_spot["self_time"], reverse=True)
+    return hot_spots[:top]
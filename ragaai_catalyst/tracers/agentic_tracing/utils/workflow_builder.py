@@ -0,0 +1,213 @@
+import bisect
+import heapq
+import itertools
+import threading
+from operator import itemgetter
+
+# Event kinds, an event being one interaction of the workflow
+_CALL_START = 0
+_CALL_END = 1
+_INTERACTION = 2
+_NETWORK_CALL = 3
+
+
+def _get(span, key, default=None):
+    # Root spans are Component objects, their descendants are dicts
+    if isinstance(span, dict):
+        return span.get(key, default)
+    return getattr(span, key, default)
+
+
+def _timestamp(interaction):
+    if isinstance(interaction, dict):
+        return interaction.get("timestamp")
+    return getattr(interaction, "timestamp", None)
+
+
+def _network_call_interaction(span_id, call, timestamp):
+    return {
+        "id": None,
+        "span_id": span_id,
+        "interaction_type": "network_call",
+        "name": None,
+        "content": {
+            "request": {
+                "url": call.get("url"),
+                "method": call.get("method"),
+                "headers": call.get("headers"),
+            },
+            "response": {
+                "status_code": call.get("status_code"),
+                "headers": call.get("response_headers"),
+                "body": call.get("response_body"),
+            },
+        },
+        "timestamp": timestamp,
+        "error": call.get("error"),
+    }
+
+
+class WorkflowBuilder:
+    """
+    Keeps the interactions of the components of a trace ordered by timestamp as they are recorded.
+
+    Each thread inserts the events of the components it completes, one per interaction of the
+    workflow, in its own run sorted by (timestamp, sequence number). The sequence numbers
+    increase monotonically per thread, so interactions with the same timestamp keep the order
+    in which they were recorded. Finalizing the trace merges the runs, a k-way merge of
+    already sorted runs, instead of sorting the whole workflow.
+
+    Events reference their span: the span ids, the type of deduplicated LLM spans and the
+    output of agents are only known when the trace is finalized, so the interactions are
+    built from the spans then, see `interactions()`.
+    """
+
+    def __init__(self):
+        # Thread ident -> (events, sequence numbers)
+        self._runs = {}
+        self._recorded = set()
+
+    def __contains__(self, span):
+        return id(span) in self._recorded
+
+    def _run(self):
+        ident = threading.get_ident()
+        run = self._runs.get(ident)
+        if run is None:
+            run = self._runs.setdefault(ident, ([], itertools.count()))
+        return run
+
+    def _add(self, run, timestamp, kind, span, index, nested):
+        events, sequence = run
+        # Sequence numbers are unique in a run, spans are never compared
+        event = (timestamp or "", next(sequence), kind, index, nested, span)
+        if not events or event > events[-1]:
+            # Components mostly complete in timestamp order
+            events.append(event)
+        else:
+            bisect.insort(events, event)
+
+    def record(self, component):
+        """
+        Record the interactions of a root component and its descendants.
+
+        Args:
+            component (Component): A completed root component of the trace.
+        """
+        stack = [(component, False, False)]
+        while stack:
+            span, nested, exiting = stack.pop()
+            if exiting:
+                self.exit(span, nested)
+                continue
+            self.enter(span, nested)
+            stack.append((span, nested, True))
+            data = _get(span, "data")
+            children = data.get("children") if isinstance(data, dict) else None
+            if children is not None and (nested or _get(span, "type") == "agent"):
+                for child in reversed(children):
+                    stack.append((child, True, False))
+
+    def enter(self, span, nested):
+        """Record the interactions of a span preceding those of its children."""
+        self._recorded.add(id(span))
+        run = self._run()
+        self._add(run, _get(span, "start_time"), _CALL_START, span, None, nested)
+        if _get(span, "type") != "agent":
+            self._add(run, _get(span, "end_time"), _CALL_END, span, None, nested)
+
+    def exit(self, span, nested):
+        """Record the interactions of a span following those of its children."""
+        run = self._run()
+        if _get(span, "type") == "agent":
+            self._add(run, _get(span, "end_time"), _CALL_END, span, None, nested)
+        for index, interaction in enumerate(_get(span, "interactions") or []):
+            self._add(run, _timestamp(interaction), _INTERACTION, span, index, nested)
+        # Root spans record the time of a network call as 'timestamp', child spans as 'start_time'
+        timestamp_key = "start_time" if nested else "timestamp"
+        for index, call in enumerate(_get(span, "network_calls") or []):
+            self._add(run, call.get(timestamp_key), _NETWORK_CALL, span, index, nested)
+
+    def interactions(self, spans):
+        """
+        Build the workflow, numbered from 1.
+
+        Args:
+            spans (set): The ids (`id()`) of the spans whose interactions are in the workflow.
+
+        Returns:
+            list: The interactions, ordered by timestamp.
+        """
+        workflow = []
+        runs = [events for events, _ in self._runs.values()]
+        for _, _, kind, index, nested, span in heapq.merge(*runs, key=itemgetter(0)):
+            if id(span) not in spans:
+                continue
+            span_id = _get(span, "id")
+            if kind == _INTERACTION:
+                interaction = _get(span, "interactions")[index]
+                if isinstance(interaction, dict):
+                    # Interactions recorded on child spans are numbered in place, as they are saved with the trace
+                    interaction["span_id"] = span_id
+                    interaction["error"] = None
+                else:
+                    interaction = {
+                        "id": None,
+                        "span_id": span_id,
+                        "interaction_type": interaction.type,
+                        "content": interaction.content,
+                        "timestamp": interaction.timestamp,
+                        "error": _get(span, "error"),
+                    }
+            elif kind == _NETWORK_CALL:
+                call = _get(span, "network_calls")[index]
+                timestamp = call.get("start_time" if nested else "timestamp")
+                interaction = _network_call_interaction(span_id, call, timestamp)
+            else:
+                interaction = self._call_interaction(span, span_id, kind, nested)
+            interaction["id"] = str(len(workflow) + 1)
+            workflow.append(interaction)
+        return workflow
+
+    @staticmethod
+    def _call_interaction(span, span_id, kind, nested):
+        # The type may have changed to 'custom' during deduplication
+        span_type = _get(span, "type")
+        raw_data = _get(span, "data", {})
+        data = raw_data or {}
+        if kind == _CALL_START:
+            timestamp = _get(span, "start_time")
+            if span_type == "agent":
+                content = None
+            elif span_type == "tool" and not nested:
+                content = {"prompt": data.get("input"), "response": data.get("output")}
+            elif span_type == "tool":
+                input_data = data.get("input", {})
+                if not isinstance(input_data, dict):
+                    input_data = {}
+                content = {"parameters": [input_data.get("args"), input_data.get("kwargs")]}
+            elif span_type == "llm":
+                content = {"prompt": data.get("input")}
+            else:
+                content = raw_data
+        else:
+            timestamp = _get(span, "end_time")
+            if span_type == "agent":
+                content = data.get("output")
+            elif span_type == "tool" and not nested:
+                content = {"prompt": data.get("input"), "response": data.get("output")}
+            elif span_type == "tool":
+                content = {"returns": data.get("output")}
+            elif span_type == "llm":
+                content = {"response": data.get("output")}
+            else:
+                content = raw_data
+        return {
+            "id": None,
+            "span_id": span_id,
+            "interaction_type": f"{span_type}_call_{'start' if kind == _CALL_START else 'end'}",
+            "name": _get(span, "name"),
+            "content": content,
+            "timestamp": timestamp,
+            "error": _get(span, "error"),
+        }
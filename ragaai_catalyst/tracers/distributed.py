@@ -298,3 +298,19 @@ def current_span():
         raise ValueError("No active span found. Make sure you're calling this within a traced function.")
     
     return tracer.span(agent_name)
+
+
+def trace_session(trace_name: str = None):
+    """Scope the traces of the global tracer to a session, one trace per request.
+
+    Usage:
+        with trace_session(trace_name="request"):
+            ...
+
+        async with trace_session(trace_name="request"):
+            ...
+    """
+    tracer = get_current_tracer()
+    if not tracer:
+        raise ValueError("Tracing is not initialized. Call init_tracing() first.")
+    return tracer.session(trace_name=trace_name)
@@ -1,5 +1,6 @@
 from .file_span_exporter import FileSpanExporter
+from .jsonl_span_exporter import JSONLSpanExporter
 from .raga_exporter import RagaExporter
 
 
-__all__ = ["FileSpanExporter", "RagaExporter"]
+__all__ = ["FileSpanExporter", "JSONLSpanExporter", "RagaExporter"]
@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import aiohttp
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+from ..utils import get_unique_key
+from ..utils.compression import compressed_path, open_trace_file, resolve_compression
+
+logger = logging.getLogger(__name__)
+
+
+class JSONLSpanExporter(SpanExporter):
+    """
+    A span exporter appending compact JSONL records to one file per trace.
+
+    Spans are buffered in memory and appended when the buffer reaches `max_buffer_spans`
+    or when `flush_interval` seconds have passed since the last write, so files are never
+    re-read or rewritten. It is meant to be used with OpenTelemetry's `BatchSpanProcessor`,
+    which interleaves the spans of concurrent traces.
+
+    A trace is finished when its root span ends, or when no span of it was exported for
+    `trace_idle_timeout` seconds, e.g. a trace whose root span belongs to another service.
+    The file of a finished trace is converted to a JSON array and uploaded once, on a single
+    long-lived event loop running in a background thread. Traces still open are uploaded by
+    `shutdown()`.
+    """
+
+    def __init__(
+        self,
+        project_name=None,
+        session_id=None,
+        metadata=None,
+        pipeline=None,
+        raga_client=None,
+        max_buffer_spans=512,
+        flush_interval=5.0,
+        upload_timeout=30,
+        compression=None,
+        trace_idle_timeout=300.0,
+    ):
+        """
+        Initializes the JSONLSpanExporter.
+
+        Args:
+            project_name (str, optional): The name of the project. Defaults to None.
+            session_id (str, optional): The session ID. Defaults to None.
+            metadata (dict, optional): Metadata information. Defaults to None.
+            pipeline (dict, optional): The pipeline configuration. Defaults to None.
+            raga_client (RagaExporter, optional): Client used to upload finished traces. Traces are
+                only written locally when None.
+            max_buffer_spans (int): Number of buffered spans that triggers a write.
+            flush_interval (float): Maximum number of seconds spans stay buffered while exports keep coming.
+            upload_timeout (int): Timeout in seconds of the upload of a trace.
+            compression (str, optional): Compression of the local trace files, 'gzip' or 'zstd'.
+                Defaults to the RAGAAI_CATALYST_TRACE_COMPRESSION environment variable.
+            trace_idle_timeout (float): Seconds without spans after which a trace without a root span is finished.
+        """
+        self.project_name = project_name
+        self.session_id = session_id if session_id is not None else str(uuid.uuid4())
+        self.metadata = dict(metadata or {})
+        self.pipeline = dict(pipeline or {})
+        # The ids only depend on the configuration, compute them once
+        self.metadata["id"] = get_unique_key(self.metadata)
+        self.pipeline["id"] = get_unique_key(self.pipeline)
+        self.raga_client = raga_client
+        self.max_buffer_spans = max_buffer_spans
+        self.flush_interval = flush_interval
+        self.upload_timeout = upload_timeout
+        self.compression = resolve_compression(compression)
+        self.trace_idle_timeout = trace_idle_timeout
+
+        self.dir_name = os.path.join(tempfile.gettempdir(), "raga_temp")
+        os.makedirs(os.path.join(self.dir_name, "backup"), exist_ok=True)
+
+        self._buffer = {}  # Spans by trace id, in arrival order
+        self._buffered_spans = 0
+        self._last_flush = time.monotonic()
+        # Trace id -> time of its last span, for the traces not finished yet
+        self._open_traces = OrderedDict()
+        # Ids of the last finished traces, their late spans are written but not uploaded again
+        self._finished_traces = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._loop = None
+        self._loop_thread = None
+        self._session = None
+        self._uploads = []
+        # JSON array file of the last finished trace
+        self.last_trace_file = None
+
+    def _trace_file(self, trace_id, extension=".jsonl"):
+        return compressed_path(os.path.join(self.dir_name, trace_id + extension), self.compression)
+
+    def export(self, spans):
+        """
+        Buffer spans, appending them to their trace file when a flush threshold is reached.
+
+        Args:
+            spans (list): List of spans to be exported.
+
+        Returns:
+            SpanExportResult: SUCCESS, or FAILURE if the spans could not be written.
+        """
+        finished_traces = []
+        try:
+            with self._lock:
+                now = time.monotonic()
+                for span in spans:
+                    span_json = span.to_json(indent=None)
+                    span_dict = json.loads(span_json)
+                    # A digest of the compact span JSON, instead of a canonical re-serialization of the span
+                    span_dict["prompt_id"] = hashlib.sha256(span_json.encode("utf-8")).hexdigest()
+                    trace_id = span_dict["context"]["trace_id"]
+                    self._buffer.setdefault(trace_id, []).append(span_dict)
+                    self._buffered_spans += 1
+                    if trace_id in self._finished_traces:
+                        logger.debug(f"Span {span_dict.get('name')} exported after its trace {trace_id} was uploaded")
+                        continue
+                    if span_dict.get("parent_id") is None:
+                        # Root spans end after their children, BatchSpanProcessor exports spans as they end
+                        self._open_traces.pop(trace_id, None)
+                        self._finish(trace_id, finished_traces)
+                    else:
+                        self._open_traces[trace_id] = now
+                        self._open_traces.move_to_end(trace_id)
+                # Ordered by their last span, the idle traces come first
+                while self._open_traces:
+                    trace_id, last_span = next(iter(self._open_traces.items()))
+                    if now - last_span < self.trace_idle_timeout:
+                        break
+                    del self._open_traces[trace_id]
+                    self._finish(trace_id, finished_traces)
+
+                if (
+                    finished_traces
+                    or self._buffered_spans >= self.max_buffer_spans
+                    or time.monotonic() - self._last_flush >= self.flush_interval
+                ):
+                    self._flush_buffer()
+        except Exception as e:
+            logger.error(f"Error exporting spans: {e}")
+            return SpanExportResult.FAILURE
+
+        for trace_id in finished_traces:
+            self._schedule_upload(trace_id)
+        return SpanExportResult.SUCCESS
+
+    def _finish(self, trace_id, finished_traces):
+        """Mark a trace as finished, so that it is uploaded once. Holds the lock."""
+        finished_traces.append(trace_id)
+        self._finished_traces[trace_id] = None
+        if len(self._finished_traces) > 10000:
+            self._finished_traces.popitem(last=False)
+
+    def _flush_buffer(self):
+        """Append every buffered span to its trace file as one JSONL record per trace. Holds the lock."""
+        for trace_id, traces_list in self._buffer.items():
+            export_data = {
+                "project_name": self.project_name,
+                "trace_id": trace_id,
+                "session_id": self.session_id,
+                "traces": traces_list,
+                "metadata": self.metadata,
+                "pipeline": self.pipeline,
+            }
+            with open_trace_file(self._trace_file(trace_id), "at", self.compression) as f:
+                f.write(json.dumps(export_data, separators=(",", ":")) + "\n")
+        self._buffer.clear()
+        self._buffered_spans = 0
+        self._last_flush = time.monotonic()
+
+    def force_flush(self, timeout_millis=30000):
+        """Write every buffered span to disk."""
+        with self._lock:
+            self._flush_buffer()
+        return True
+
+    def _to_json_array(self, trace_id):
+        """Convert the JSONL file of a trace into the JSON array file expected by the upload API."""
+        json_file_path = self._trace_file(trace_id, ".json")
+        with open_trace_file(self._trace_file(trace_id), "rt", self.compression) as src, \
+                open_trace_file(json_file_path, "wt", self.compression) as dst:
+            dst.write("[")
+            for i, line in enumerate(src):
+                if i:
+                    dst.write(",")
+                dst.write(line.rstrip("\n"))
+            dst.write("]")
+        return json_file_path
+
+    def _ensure_loop(self):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(target=self._loop.run_forever, name="raga-trace-upload", daemon=True)
+            self._loop_thread.start()
+        return self._loop
+
+    def _schedule_upload(self, trace_id):
+        json_file_path = self._to_json_array(trace_id)
+        self.last_trace_file = json_file_path
+        if self.raga_client is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._upload_traces(json_file_path), self._ensure_loop())
+        self._uploads = [upload for upload in self._uploads if not upload.done()] + [future]
+
+    async def _upload_traces(self, json_file_path):
+        """Upload a trace file with the session shared by every upload of the loop."""
+        if not os.getenv("RAGAAI_CATALYST_TOKEN"):
+            raise ValueError("RAGAAI_CATALYST_TOKEN not found. Cannot upload traces.")
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        try:
+            upload_stat = await asyncio.wait_for(
+                self.raga_client.check_and_upload_files(session=self._session, file_paths=[json_file_path]),
+                timeout=self.upload_timeout,
+            )
+            return "Files uploaded successfully" if upload_stat else "No files to upload"
+        except asyncio.TimeoutError:
+            return f"Upload timed out after {self.upload_timeout} seconds"
+        except Exception as e:
+            return f"Upload failed: {str(e)}"
+
+    def wait_for_uploads(self):
+        """
+        Wait for the uploads still pending.
+
+        Returns:
+            list: The status message of each of these uploads, in the order they were scheduled.
+        """
+        uploads, self._uploads = self._uploads, []
+        results = []
+        for future in uploads:
+            try:
+                results.append(future.result(timeout=self.upload_timeout))
+            except Exception as e:
+                logger.error(f"Error uploading traces: {e}")
+                results.append(f"Upload failed: {str(e)}")
+        return results
+
+    def shutdown(self):
+        """Write the buffered spans, upload the traces still open and stop the upload loop."""
+        finished_traces = []
+        with self._lock:
+            self._flush_buffer()
+            while self._open_traces:
+                trace_id, _ = self._open_traces.popitem(last=False)
+                self._finish(trace_id, finished_traces)
+        for trace_id in finished_traces:
+            self._schedule_upload(trace_id)
+
+        for result in self.wait_for_uploads():
+            logger.debug(result)
+
+        if self._loop is not None:
+            if self._session is not None:
+                asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+                self._session = None
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+            self._loop.close()
+            self._loop = None
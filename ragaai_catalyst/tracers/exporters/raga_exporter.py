@@ -6,6 +6,7 @@ import logging
 from tqdm import tqdm
 import requests
 from ...ragaai_catalyst import RagaAICatalyst
+from ..utils.compression import compression_from_path, read_upload_payload, resolve_compression, upload_headers
 import shutil
 
 logger = logging.getLogger(__name__)
@@ -42,12 +43,14 @@ class RagaExporter:
     }
     TIMEOUT = 10
 
-    def __init__(self, project_name, dataset_name):
+    def __init__(self, project_name, dataset_name, compression=None):
         """
         Initializes a new instance of the RagaExporter class.
 
         Args:
             project_name (str): The name of the project.
+            compression (str, optional): Compression of uploaded traces, 'gzip' or 'zstd'.
+                Defaults to the RAGAAI_CATALYST_TRACE_COMPRESSION environment variable.
 
         Raises:
             ValueError: If the environment variables RAGAAI_CATALYST_ACCESS_KEY and RAGAAI_CATALYST_SECRET_KEY are not set.
@@ -59,6 +62,9 @@ class RagaExporter:
         self.access_key = os.getenv("RAGAAI_CATALYST_ACCESS_KEY")
         self.secret_key = os.getenv("RAGAAI_CATALYST_SECRET_KEY")
         self.max_urls = 20
+        self.max_concurrency = 8
+        self.compression = resolve_compression(compression)
+        self.upload_results = []
         if not self.access_key or not self.secret_key:
             raise ValueError(
                 "RAGAAI_CATALYST_ACCESS_KEY and RAGAAI_CATALYST_SECRET_KEY environment variables must be set"
@@ -305,17 +311,12 @@ class RagaExporter:
         """
 
         async def make_request():
-            headers = {
-                "Content-Type": "application/json",
-            }
-
-            if "blob.core.windows.net" in url:  # Azure
-                headers["x-ms-blob-type"] = "BlockBlob"
+            headers = upload_headers(url, self.compression)
             print(f"Uploading traces...")
             logger.debug(f"Uploading file:{file_path} with url {url}")
 
-            with open(file_path) as f:
-                data = f.read().replace("\n", "").replace("\r", "").encode()
+            # Reading and compressing the file is blocking, keep it off the event loop
+            data = await asyncio.to_thread(read_upload_payload, file_path, self.compression)
 
             async with session.put(
                     url, headers=headers, data=data, timeout=RagaExporter.TIMEOUT
@@ -336,117 +337,131 @@ class RagaExporter:
 
         return response.status
 
-    async def check_and_upload_files(self, session, file_paths):
+    async def _upload_and_stream(self, session, semaphore, file_path, presigned_url):
+        """
+        Uploads one file, streams it and moves it to the backup folder, under the upload semaphore.
+
+        Returns:
+            dict: The file path, its final status ('streamed', 'missing', 'upload_failed' or
+                  'stream_failed'), the upload and stream status codes and the backup path.
+        """
+        result = {
+            "file_path": file_path,
+            "status": None,
+            "upload_status": None,
+            "stream_status": None,
+            "backup_path": None,
+        }
+        if not os.path.isfile(file_path):
+            print(f"The file '{file_path}' does not exist.")
+            result["status"] = "missing"
+            return result
+
+        async with semaphore:
+            result["upload_status"] = await self.upload_file(session, presigned_url, file_path)
+            if result["upload_status"] not in (200, 201):
+                logger.error(f"Failed to upload the file '{os.path.basename(file_path)}'.")
+                result["status"] = "upload_failed"
+                return result
+            logger.debug(f"File '{os.path.basename(file_path)}' uploaded successfully.")
+
+            result["stream_status"] = await self.stream_trace(session, trace_uri=presigned_url)
+            if result["stream_status"] not in (200, 201):
+                logger.error(f"Failed to stream the file '{os.path.basename(file_path)}'.")
+                result["status"] = "stream_failed"
+                return result
+            logger.debug(f"File '{os.path.basename(file_path)}' streamed successfully.")
+
+        file_compression = compression_from_path(file_path)
+        backup_path = os.path.join(
+            os.path.dirname(file_path),
+            "backup",
+            os.path.basename(file_path).split(".")[0] + "_backup.json"
+            + (os.path.splitext(file_path)[1] if file_compression else ""),
+        )
+        # Moving can hit a slow disk, keep it off the event loop
+        await asyncio.to_thread(shutil.move, file_path, backup_path)
+        result["status"] = "streamed"
+        result["backup_path"] = backup_path
+        return result
+
+    async def check_and_upload_files(self, session, file_paths, max_concurrency=None, return_results=False):
         """
         Checks if there are files to upload, gets presigned URLs, uploads files, and streams them if successful.
 
+        Presigned URL batches are fetched in parallel, and every file is uploaded, streamed and
+        backed up in its own task, with at most `max_concurrency` uploads in flight.
+
         Args:
             self: The object instance.
             session (aiohttp.ClientSession): The aiohttp session to use for the request.
             file_paths (list): List of file paths to upload.
+            max_concurrency (int, optional): Maximum number of files uploaded at once. Defaults to `self.max_concurrency`.
+            return_results (bool): Return the per-file results instead of the overall status.
 
         Returns:
-            str: The status of the upload process.
-        """ """
-        Asynchronously uploads a file using the given session, url, and file path.
-
-        Args:
-            self: The RagaExporter instance.
-            session (aiohttp.ClientSession): The aiohttp session to use for the request.
-            url (str): The URL to upload the file to.
-            file_path (str): The path to the file to upload.
-
-        Returns:
-            int: The status code of the response.
+            str: The status of the upload process, or with `return_results` the list of per-file
+                 result dicts (see `_upload_and_stream`). The per-file results of the last call are
+                 also kept in `self.upload_results`.
         """
+        self.upload_results = []
         # Check if there are no files to upload
         if len(file_paths) == 0:
             print("No files to be uploaded.")
-            return None
+            return [] if return_results else None
 
         # Ensure a required environment token is available; if not, attempt to obtain it.
         if os.getenv("RAGAAI_CATALYST_TOKEN") is None:
             await get_token()
             if os.getenv("RAGAAI_CATALYST_TOKEN") is None:
                 print("Failed to obtain token.")
-                return None
+                return [] if return_results else None
 
-        # Initialize lists for URLs and tasks
-        presigned_urls = []
-        trace_folder_urls = []
-        tasks_json = []
-        tasks_stream = []
-        # Determine the number of files to process
+        # Fetch the URLs of every batch of at most max_urls files in parallel
         num_files = len(file_paths)
-
-        # If number of files exceeds the maximum allowed URLs, fetch URLs in batches
-        if num_files > self.max_urls:
-            for i in range(
-                (num_files // self.max_urls) + 1
-            ):  # Correct integer division
-                presigned_url_response = await self.get_presigned_url(
-                    session, self.max_urls
-                )
-                if presigned_url_response.get("success") == True:
-                    data = presigned_url_response.get("data", {})
-                    presigned_urls += data.get("presignedUrls", [])
-                    trace_folder_urls.append(data.get("traceFolderUrl", []))
-        else:
-            # Fetch URLs for all files if under the limit
-            presigned_url_response = await self.get_presigned_url(session, num_files)
+        batch_sizes = [min(self.max_urls, num_files - start) for start in range(0, num_files, self.max_urls)]
+        responses = await asyncio.gather(
+            *(self.get_presigned_url(session, batch_size) for batch_size in batch_sizes)
+        )
+        presigned_urls = []
+        for presigned_url_response in responses:
             if presigned_url_response.get("success") == True:
-                data = presigned_url_response.get("data", {})
-                presigned_urls += data.get("presignedUrls", [])
-                trace_folder_urls.append(data.get("traceFolderUrl", []))
+                presigned_urls += presigned_url_response.get("data", {}).get("presignedUrls", [])
 
         # If URLs were successfully obtained, start the upload process
-        if presigned_urls != []:
-            for file_path, presigned_url in tqdm(
-                zip(file_paths, presigned_urls), desc="Uploading traces"
-            ):
-                if not os.path.isfile(file_path):
-                    print(f"The file '{file_path}' does not exist.")
-                    continue
-
-                # Upload each file and collect the future tasks
-                upload_status = await self.upload_file(
-                    session, presigned_url, file_path
-                )
-                if upload_status == 200 or upload_status == 201:
-                    logger.debug(
-                        f"File '{os.path.basename(file_path)}' uploaded successfully."
-                    )
-                    stream_status = await self.stream_trace(
-                        session, trace_uri=presigned_url
-                    )
-                    if stream_status == 200 or stream_status == 201:
-                        logger.debug(
-                            f"File '{os.path.basename(file_path)}' streamed successfully."
-                        )
-                        shutil.move(
-                            file_path,
-                            os.path.join(
-                                os.path.dirname(file_path),
-                                "backup",
-                                os.path.basename(file_path).split(".")[0]
-                                + "_backup.json",
-                            ),
-                        )
-                    else:
-                        logger.error(
-                            f"Failed to stream the file '{os.path.basename(file_path)}'."
-                        )
-                else:
-                    logger.error(
-                        f"Failed to upload the file '{os.path.basename(file_path)}'."
-                    )
-
-            return "upload successful"
-
-        else:
+        if presigned_urls == []:
             # Log failure if no presigned URLs could be obtained
             print(f"Failed to get presigned URLs.")
-            return None
+            return [] if return_results else None
+
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        tasks = [
+            asyncio.ensure_future(self._upload_and_stream(session, semaphore, file_path, presigned_url))
+            for file_path, presigned_url in zip(file_paths, presigned_urls)
+        ]
+        with tqdm(total=len(tasks), desc="Uploading traces") as progress:
+            for task in asyncio.as_completed(tasks):
+                try:
+                    await task
+                except Exception as e:
+                    logger.error(f"Error uploading trace file: {e}")
+                progress.update(1)
+
+        for file_path, task in zip(file_paths, tasks):
+            if task.exception() is not None:
+                self.upload_results.append({
+                    "file_path": file_path,
+                    "status": "error",
+                    "error": str(task.exception()),
+                })
+            else:
+                self.upload_results.append(task.result())
+
+        streamed = sum(result["status"] == "streamed" for result in self.upload_results)
+        logger.info(f"{streamed}/{len(self.upload_results)} trace files uploaded and streamed.")
+        if return_results:
+            return self.upload_results
+        return "upload successful"
 
     async def tracer_stopsession(self, file_names):
         """
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional, Union, Sequence
+from typing import Any, Callable, Dict, List, Optional, Union, Sequence
 
 import attr
 from langchain.callbacks.base import BaseCallbackHandler
@@ -12,10 +12,15 @@ import asyncio
 from langchain_core.documents import Document
 import logging
 import tempfile
+import threading
+import time
 import sys
 import importlib
 from importlib.util import find_spec
 
+from ragaai_catalyst.tracers.utils.capture_policy import CapturePolicy
+from ragaai_catalyst.tracers.utils.token_stream import TokenStreamAccumulator
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -32,6 +37,9 @@ class LangchainTracer(BaseCallbackHandler):
         trace_all: bool = True,
         save_interval: Optional[int] = None,
         log_level: int = logging.INFO,
+        token_timeline_samples: int = 0,
+        on_trace_end: Optional[Callable[[Dict[str, Any], Dict[str, Any]], None]] = None,
+        capture_policy: Optional[CapturePolicy] = None,
     ):
         """
         Initialize the tracer with enhanced configuration options.
@@ -41,6 +49,13 @@ class LangchainTracer(BaseCallbackHandler):
             trace_all (bool): Whether to trace all components or only specific ones
             save_interval (Optional[int]): Interval in seconds to auto-save traces
             log_level (int): Logging level for the tracer
+            token_timeline_samples (int): Number of sampled tokens kept as a timeline in the
+                summary of each streamed LLM response (0 keeps no timeline)
+            on_trace_end (Optional[Callable]): Called with the trace and its additional metadata
+                whenever a top-level run finishes. Finished traces are kept in `finished_traces`
+                when not set
+            capture_policy (Optional[CapturePolicy]): Bounds what callbacks capture into the
+                trace. Defaults to `CapturePolicy()`
         """
         super().__init__()
         self.output_path = output_path
@@ -54,6 +69,12 @@ class LangchainTracer(BaseCallbackHandler):
         self._current_query = None
         self.filepath = None
         self.model_names = {}  # Store model names by component instance
+        self.token_timeline_samples = token_timeline_samples
+        self._llm_start_times = {}  # perf_counter at start, by LLM run id
+        self._token_streams = {}  # TokenStreamAccumulator by LLM run id
+        self.on_trace_end = on_trace_end
+        self.capture_policy = capture_policy or CapturePolicy()
+        self._lock = threading.RLock()
         logger.setLevel(log_level)
 
         if not os.path.exists(output_path):
@@ -77,9 +98,23 @@ class LangchainTracer(BaseCallbackHandler):
         return True
 
     def reset_trace(self):
-        """Reset the current trace to initial state with enhanced structure"""
-        self.current_trace: Dict[str, Any] = {
-            "start_time": None,
+        """Reset the tracer to initial state, dropping every active and finished trace"""
+        with self._lock:
+            self._traces: Dict[str, Dict[str, Any]] = {}  # Active traces by top-level run id
+            self._run_roots: Dict[str, str] = {}  # Top-level run id by run id
+            self.finished_traces: List[Dict[str, Any]] = []
+            self._last_trace = self._new_trace()
+
+    @property
+    def current_trace(self) -> Dict[str, Any]:
+        """The most recently started trace"""
+        return self._last_trace
+
+    def _new_trace(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Create the trace of a top-level run with enhanced structure"""
+        return {
+            "run_id": run_id,
+            "start_time": datetime.now() if run_id else None,
             "end_time": None,
             "actions": [],
             "llm_calls": [],
@@ -96,8 +131,68 @@ class LangchainTracer(BaseCallbackHandler):
                 "trace_all": self.trace_all,
                 "save_interval": self.save_interval,
             },
+            "runs": {},
+            "serialized_configs": {},
+            "additional_metadata": {},
         }
 
+    def _trace_for(self, run_id=None, parent_run_id=None) -> Dict[str, Any]:
+        """
+        Get the trace a run belongs to, registering the run in the run tree of its
+        top-level run. A run without a known parent starts a new trace.
+        """
+        if run_id is None:
+            return self._last_trace
+        run_id = str(run_id)
+        with self._lock:
+            root_id = self._run_roots.get(run_id)
+            if root_id is None:
+                parent_id = str(parent_run_id) if parent_run_id else None
+                root_id = self._run_roots.get(parent_id, run_id) if parent_id else run_id
+                if root_id == run_id:
+                    parent_id = None
+                    self._traces[run_id] = self._last_trace = self._new_trace(run_id)
+                self._run_roots[run_id] = root_id
+                runs = self._traces[root_id]["runs"]
+                runs[run_id] = {"parent_run_id": parent_id, "children": []}
+                if parent_id in runs:
+                    runs[parent_id]["children"].append(run_id)
+            return self._traces[root_id]
+
+    def _end_run(self, run_id) -> None:
+        """Mark a run as finished, flushing its trace when it is a top-level run"""
+        if run_id is None:
+            return
+        run_id = str(run_id)
+        with self._lock:
+            if self._run_roots.get(run_id) != run_id:
+                return
+            trace = self._traces.pop(run_id)
+            for member in trace["runs"]:
+                self._run_roots.pop(member, None)
+        self._flush_trace(trace)
+
+    def _flush_trace(self, trace: Dict[str, Any]) -> None:
+        """Hand a finished trace to `on_trace_end`, or keep it in `finished_traces`"""
+        trace["end_time"] = datetime.now()
+        if self.on_trace_end is None:
+            with self._lock:
+                self.finished_traces.append(trace)
+            return
+        try:
+            self.on_trace_end(trace, trace["additional_metadata"])
+        except Exception as e:
+            logger.error(f"Error handing over trace {trace['run_id']}: {e}")
+
+    def flush(self) -> None:
+        """Flush every trace whose top-level run has not finished yet"""
+        with self._lock:
+            traces = list(self._traces.values())
+            self._traces.clear()
+            self._run_roots.clear()
+        for trace in traces:
+            self._flush_trace(trace)
+
     async def _periodic_save(self):
         """Periodically save traces if save_interval is set"""
         while self._active and self.save_interval:
@@ -105,59 +200,49 @@ class LangchainTracer(BaseCallbackHandler):
             await self._async_save_trace()
 
     async def _async_save_trace(self, force: bool = False):
-        """Asynchronously save the current trace to a JSON file"""
-        if not self.current_trace["start_time"] and not force:
-            return
+        """Asynchronously save a snapshot of every active trace to its own JSON file"""
+        with self._lock:
+            traces = list(self._traces.values()) or [self._last_trace]
 
-        try:
-            self.current_trace["end_time"] = datetime.now()
-            
-            # Use the query from the trace or fallback to a default
-            safe_query = self._current_query or "unknown"
-            
-            # Sanitize the query for filename
-            safe_query = ''.join(c for c in safe_query if c.isalnum() or c.isspace())[:50].strip()
-
-            # Add a timestamp to ensure unique filenames
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"langchain_callback_traces.json"
-            filepath = os.path.join(self.output_path, filename)
-            self.filepath = filepath
-
-            trace_to_save = self.current_trace.copy()
-            trace_to_save["start_time"] = str(trace_to_save["start_time"])
-            trace_to_save["end_time"] = str(trace_to_save["end_time"])
-
-            # Save if there are meaningful events or if force is True
-            if (
-                len(trace_to_save["llm_calls"]) > 0
-                or len(trace_to_save["chain_starts"]) > 0
-                or len(trace_to_save["chain_ends"]) > 0
-                or len(trace_to_save["errors"]) > 0
-                or force
-            ):
-                async with asyncio.Lock():
+        for trace in traces:
+            if not trace["start_time"] and not force:
+                continue
+
+            try:
+                filename = f"langchain_callback_traces_{trace['run_id'] or 'default'}.json"
+                filepath = os.path.join(self.output_path, filename)
+                self.filepath = filepath
+
+                trace_to_save = trace.copy()
+                trace_to_save["start_time"] = str(trace_to_save["start_time"])
+                trace_to_save["end_time"] = str(trace_to_save["end_time"] or datetime.now())
+
+                # Save if there are meaningful events or if force is True
+                if (
+                    len(trace_to_save["llm_calls"]) > 0
+                    or len(trace_to_save["chain_starts"]) > 0
+                    or len(trace_to_save["chain_ends"]) > 0
+                    or len(trace_to_save["errors"]) > 0
+                    or force
+                ):
                     with open(filepath, "w", encoding="utf-8") as f:
-                        json.dump(trace_to_save, f, indent=2, default=str)
+                        json.dump(trace_to_save, f, separators=(",", ":"), default=str)
 
-                logger.info(f"Trace saved to: {filepath}")
-                
-                # Reset the current query after saving
-                self._current_query = None
-                
-                # Reset the trace
-                self.reset_trace()
+                    logger.info(f"Trace saved to: {filepath}")
 
-        except Exception as e:
-            logger.error(f"Error saving trace: {e}")
-            self.on_error(e, context="save_trace")
+            except Exception as e:
+                logger.error(f"Error saving trace: {e}")
+                self.on_error(e, context="save_trace")
 
     def _save_trace(self, force: bool = False):
         """Synchronous version of trace saving"""
-        if asyncio.get_event_loop().is_running():
-            asyncio.create_task(self._async_save_trace(force))
-        else:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop in this thread, or only a closed one left by asyncio.run
             asyncio.run(self._async_save_trace(force))
+        else:
+            loop.create_task(self._async_save_trace(force))
 
     def _create_safe_wrapper(self, original_func, component_name, method_name):
         """Create a safely wrapped version of an original function with enhanced error handling"""
@@ -442,7 +527,7 @@ class LangchainTracer(BaseCallbackHandler):
         """Start tracing with enhanced error handling and async support"""
         try:
             self.reset_trace()
-            self.current_trace["start_time"] = datetime.now()
+            self._last_trace["start_time"] = datetime.now()
             self._active = True
             self._monkey_patch()
 
@@ -463,6 +548,7 @@ class LangchainTracer(BaseCallbackHandler):
             if self._save_task:
                 self._save_task.cancel()
             self._restore_original_methods()
+            self.flush()
             # self._save_trace(force=True)
 
             return self.current_trace.copy(), self.additional_metadata
@@ -489,17 +575,17 @@ class LangchainTracer(BaseCallbackHandler):
         **kwargs: Any,
     ) -> None:
         try:
-            if not self.current_trace["start_time"]:
-                self.current_trace["start_time"] = datetime.now()
+            trace = self._trace_for(run_id, kwargs.get("parent_run_id"))
+            self._llm_start_times[str(run_id)] = time.perf_counter()
 
-            self.current_trace["llm_calls"].append(
+            trace["llm_calls"].append(
                 {
                     "timestamp": datetime.now(),
                     "event": "llm_start",
-                    "serialized": serialized,
-                    "prompts": prompts,
+                    "serialized": self.capture_policy.serialized(serialized, trace["serialized_configs"]),
+                    "prompts": self.capture_policy.truncate(prompts),
                     "run_id": str(run_id),
-                    "additional_kwargs": kwargs,
+                    "additional_kwargs": self.capture_policy.kwargs(kwargs),
                 }
             )
         except Exception as e:
@@ -507,19 +593,21 @@ class LangchainTracer(BaseCallbackHandler):
 
     def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
         try:
-            self.current_trace["llm_calls"].append(
+            trace = self._trace_for(run_id, kwargs.get("parent_run_id"))
+            self._flush_token_stream(run_id)
+            trace["llm_calls"].append(
                 {
                     "timestamp": datetime.now(),
                     "event": "llm_end",
-                    "response": response.dict(),
+                    "response": self.capture_policy.llm_response(response),
                     "run_id": str(run_id),
-                    "additional_kwargs": kwargs,
+                    "additional_kwargs": self.capture_policy.kwargs(kwargs),
                 }
             )
 
             # Calculate latency
             end_time = datetime.now()
-            latency = (end_time - self.current_trace["start_time"]).total_seconds()
+            latency = (end_time - trace["start_time"]).total_seconds()
 
             # Check if values are there in llm_output
             model = ""
@@ -600,7 +688,7 @@ class LangchainTracer(BaseCallbackHandler):
             except Exception as e:
                 model=""
 
-            self.additional_metadata = {
+            self.additional_metadata = trace["additional_metadata"] = {
                 'latency': latency,
                 'model_name': model,
                 'tokens': {
@@ -611,7 +699,9 @@ class LangchainTracer(BaseCallbackHandler):
             }
 
         except Exception as e:
-            self.on_error(e, context="llm_end")
+            self.on_error(e, context="llm_end", run_id=run_id)
+        finally:
+            self._end_run(run_id)
 
     def on_chat_model_start(
         self,
@@ -622,26 +712,28 @@ class LangchainTracer(BaseCallbackHandler):
         **kwargs: Any,
     ) -> None:
         try:
+            trace = self._trace_for(run_id, kwargs.get("parent_run_id"))
             messages_dict = [
                 [
                     {
                         "type": msg.type,
-                        "content": msg.content,
-                        "additional_kwargs": msg.additional_kwargs,
+                        "content": self.capture_policy.truncate(msg.content),
+                        "additional_kwargs": self.capture_policy.truncate(msg.additional_kwargs),
                     }
                     for msg in batch
                 ]
                 for batch in messages
             ]
+            self._llm_start_times[str(run_id)] = time.perf_counter()
 
-            self.current_trace["chat_model_calls"].append(
+            trace["chat_model_calls"].append(
                 {
                     "timestamp": datetime.now(),
                     "event": "chat_model_start",
-                    "serialized": serialized,
+                    "serialized": self.capture_policy.serialized(serialized, trace["serialized_configs"]),
                     "messages": messages_dict,
                     "run_id": str(run_id),
-                    "additional_kwargs": kwargs,
+                    "additional_kwargs": self.capture_policy.kwargs(kwargs),
                 }
             )
         except Exception as e:
@@ -656,6 +748,7 @@ class LangchainTracer(BaseCallbackHandler):
         **kwargs: Any,
     ) -> None:
         try:
+            trace = self._trace_for(run_id, kwargs.get("parent_run_id"))
             context = ""
             query = ""
             if isinstance(inputs, dict):
@@ -677,14 +770,14 @@ class LangchainTracer(BaseCallbackHandler):
                 
                 chain_event = {
                     "timestamp": datetime.now(),
-                    "serialized": serialized,
-                    "context": context,
-                    "query": inputs.get("question", inputs.get("input", "")),
+                    "serialized": self.capture_policy.serialized(serialized, trace["serialized_configs"]),
+                    "context": self.capture_policy.truncate(context),
+                    "query": self.capture_policy.truncate(query),
                     "run_id": str(run_id),
-                    "additional_kwargs": kwargs,
+                    "additional_kwargs": self.capture_policy.kwargs(kwargs),
                 }
 
-                self.current_trace["chain_starts"].append(chain_event)
+                trace["chain_starts"].append(chain_event)
         except Exception as e:
             self.on_error(e, context="chain_start")
 
@@ -692,25 +785,27 @@ class LangchainTracer(BaseCallbackHandler):
         self, outputs: Dict[str, Any], *, run_id: UUID, **kwargs: Any
     ) -> None:
         try:
-            self.current_trace["chain_ends"].append(
+            self._trace_for(run_id, kwargs.get("parent_run_id"))["chain_ends"].append(
                 {
                     "timestamp": datetime.now(),
-                    "outputs": outputs,
+                    "outputs": self.capture_policy.truncate(outputs),
                     "run_id": str(run_id),
-                    "additional_kwargs": kwargs,
+                    "additional_kwargs": self.capture_policy.kwargs(kwargs),
                 }
             )
         except Exception as e:
-            self.on_error(e, context="chain_end")
+            self.on_error(e, context="chain_end", run_id=run_id)
+        finally:
+            self._end_run(run_id)
 
     def on_agent_action(self, action: AgentAction, run_id: UUID, **kwargs: Any) -> None:
         try:
-            self.current_trace["agent_actions"].append(
+            self._trace_for(run_id, kwargs.get("parent_run_id"))["agent_actions"].append(
                 {
                     "timestamp": datetime.now(),
-                    "action": action.dict(),
+                    "action": self.capture_policy.truncate(action.dict()),
                     "run_id": str(run_id),
-                    "additional_kwargs": kwargs,
+                    "additional_kwargs": self.capture_policy.kwargs(kwargs),
                 }
             )
         except Exception as e:
@@ -718,13 +813,13 @@ class LangchainTracer(BaseCallbackHandler):
 
     def on_agent_finish(self, finish: AgentFinish, run_id: UUID, **kwargs: Any) -> None:
         try:
-            self.current_trace["agent_actions"].append(
+            self._trace_for(run_id, kwargs.get("parent_run_id"))["agent_actions"].append(
                 {
                     "timestamp": datetime.now(),
                     "event": "agent_finish",
-                    "finish": finish.dict(),
+                    "finish": self.capture_policy.truncate(finish.dict()),
                     "run_id": str(run_id),
-                    "additional_kwargs": kwargs,
+                    "additional_kwargs": self.capture_policy.kwargs(kwargs),
                 }
             )
         except Exception as e:
@@ -734,16 +829,17 @@ class LangchainTracer(BaseCallbackHandler):
         self, serialized: Dict[str, Any], query: str, *, run_id: UUID, **kwargs: Any
     ) -> None:
         try:
+            trace = self._trace_for(run_id, kwargs.get("parent_run_id"))
             retriever_event = {
                 "timestamp": datetime.now(),
                 "event": "retriever_start",
-                "serialized": serialized,
-                "query": query,
+                "serialized": self.capture_policy.serialized(serialized, trace["serialized_configs"]),
+                "query": self.capture_policy.truncate(query),
                 "run_id": str(run_id),
-                "additional_kwargs": kwargs,
+                "additional_kwargs": self.capture_policy.kwargs(kwargs),
             }
 
-            self.current_trace["retriever_actions"].append(retriever_event)
+            trace["retriever_actions"].append(retriever_event)
         except Exception as e:
             self.on_error(e, context="retriever_start")
 
@@ -751,36 +847,81 @@ class LangchainTracer(BaseCallbackHandler):
         self, documents: Sequence[Document], *, run_id: UUID, **kwargs: Any
     ) -> None:
         try:
-            processed_documents = [
-                {"page_content": doc.page_content, "metadata": doc.metadata}
-                for doc in documents
-            ]
-
             retriever_event = {
                 "timestamp": datetime.now(),
                 "event": "retriever_end",
-                "documents": processed_documents,
+                "documents": self.capture_policy.documents(documents),
+                "documents_total": len(documents),
                 "run_id": str(run_id),
-                "additional_kwargs": kwargs,
+                "additional_kwargs": self.capture_policy.kwargs(kwargs),
             }
 
-            self.current_trace["retriever_actions"].append(retriever_event)
+            self._trace_for(run_id, kwargs.get("parent_run_id"))["retriever_actions"].append(retriever_event)
         except Exception as e:
-            self.on_error(e, context="retriever_end")
+            self.on_error(e, context="retriever_end", run_id=run_id)
+        finally:
+            self._end_run(run_id)
 
-    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+    def on_tool_start(
+        self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any
+    ) -> None:
         try:
-            self.current_trace["tokens"].append(
+            trace = self._trace_for(run_id, kwargs.get("parent_run_id"))
+            trace["actions"].append(
                 {
                     "timestamp": datetime.now(),
-                    "event": "new_token",
-                    "token": token,
-                    "additional_kwargs": kwargs,
+                    "event": "tool_start",
+                    "serialized": self.capture_policy.serialized(serialized, trace["serialized_configs"]),
+                    "input": self.capture_policy.truncate(input_str),
+                    "run_id": str(run_id),
+                    "additional_kwargs": self.capture_policy.kwargs(kwargs),
                 }
             )
+        except Exception as e:
+            self.on_error(e, context="tool_start")
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        try:
+            self._trace_for(run_id, kwargs.get("parent_run_id"))["actions"].append(
+                {
+                    "timestamp": datetime.now(),
+                    "event": "tool_end",
+                    "output": self.capture_policy.truncate(output),
+                    "run_id": str(run_id),
+                    "additional_kwargs": self.capture_policy.kwargs(kwargs),
+                }
+            )
+        except Exception as e:
+            self.on_error(e, context="tool_end", run_id=run_id)
+        finally:
+            self._end_run(run_id)
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        try:
+            run_id = str(kwargs.get("run_id"))
+            stream = self._token_streams.get(run_id)
+            if stream is None:
+                stream = self._token_streams[run_id] = TokenStreamAccumulator(self._llm_start_times.get(run_id))
+            stream.add(token)
         except Exception as e:
             self.on_error(e, context="llm_new_token")
 
+    def _flush_token_stream(self, run_id, parent_run_id=None) -> None:
+        """Add the summary of the tokens streamed by an LLM run to the trace"""
+        run_id = str(run_id)
+        self._llm_start_times.pop(run_id, None)
+        stream = self._token_streams.pop(run_id, None)
+        if stream is None:
+            return
+        self._trace_for(run_id, parent_run_id)["tokens"].append(
+            {
+                "timestamp": datetime.now(),
+                "event": "token_stream",
+                "run_id": run_id,
+                **stream.summary(self.token_timeline_samples),
+            }
+        )
+
     def on_error(self, error: Exception, context: str = "", **kwargs: Any) -> None:
         """Enhanced error handling with context"""
         try:
@@ -789,21 +930,26 @@ class LangchainTracer(BaseCallbackHandler):
                 "error": str(error),
                 "error_type": type(error).__name__,
                 "context": context,
-                "additional_kwargs": kwargs,
+                "additional_kwargs": self.capture_policy.kwargs(kwargs),
             }
-            self.current_trace["errors"].append(error_event)
+            self._trace_for(kwargs.get("run_id"), kwargs.get("parent_run_id"))["errors"].append(error_event)
             logger.error(f"Error in {context}: {error}")
         except Exception as e:
             logger.critical(f"Error in error handler: {e}")
 
     def on_chain_error(self, error: Exception, **kwargs: Any) -> None:
         self.on_error(error, context="chain", **kwargs)
+        self._end_run(kwargs.get("run_id"))
 
     def on_llm_error(self, error: Exception, **kwargs: Any) -> None:
+        self._flush_token_stream(kwargs.get("run_id"), kwargs.get("parent_run_id"))
         self.on_error(error, context="llm", **kwargs)
+        self._end_run(kwargs.get("run_id"))
 
     def on_tool_error(self, error: Exception, **kwargs: Any) -> None:
         self.on_error(error, context="tool", **kwargs)
+        self._end_run(kwargs.get("run_id"))
 
     def on_retriever_error(self, error: Exception, **kwargs: Any) -> None:
         self.on_error(error, context="retriever", **kwargs)
+        self._end_run(kwargs.get("run_id"))
@@ -0,0 +1,120 @@
+"""
+WSGI and ASGI middlewares tracing each request of a service in its own trace session.
+
+The trace of a request made by another traced service, with a W3C `traceparent` header,
+records the trace and span of the caller, so that `stitch_traces` can merge the traces of
+both services into one distributed trace.
+
+Usage:
+    app.wsgi_app = TraceContextMiddleware(app.wsgi_app, tracer)  # Flask
+    app.add_middleware(AsyncTraceContextMiddleware, tracer=tracer)  # Starlette, FastAPI
+"""
+
+import contextvars
+import sys
+
+from .distributed import get_current_tracer
+
+
+def _resolve_tracer(tracer):
+    tracer = tracer or get_current_tracer()
+    if tracer is None:
+        raise ValueError("Tracing is not initialized. Pass a tracer or call init_tracing() first.")
+    return tracer
+
+
+def _wsgi_headers(environ):
+    return {key[5:].replace("_", "-").lower(): value for key, value in environ.items() if key.startswith("HTTP_")}
+
+
+class _TracedResponse:
+    """Iterates a WSGI response in the context of its trace session, which ends when the response is closed."""
+
+    def __init__(self, response, context, session):
+        self._response = response
+        self._iterator = iter(response)
+        self._context = context
+        self._session = session
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return self._context.run(next, self._iterator)
+        except StopIteration:
+            raise
+        except BaseException:
+            self._end(*sys.exc_info())
+            raise
+
+    def close(self):
+        try:
+            if hasattr(self._response, "close"):
+                self._context.run(self._response.close)
+        finally:
+            self._end(None, None, None)
+
+    def _end(self, exc_type, exc_value, traceback):
+        if not self._closed:
+            self._closed = True
+            self._context.run(self._session.__exit__, exc_type, exc_value, traceback)
+
+
+class TraceContextMiddleware:
+    """
+    A WSGI middleware tracing each request in a trace session.
+
+    The session lasts until the server closes the response, so that streamed responses are
+    traced entirely.
+
+    Args:
+        app: The WSGI application.
+        tracer (Tracer, optional): The started tracer. Defaults to the tracer of `init_tracing()`.
+        trace_name (str, optional): The name of the request traces. Defaults to the trace name of the tracer.
+    """
+
+    def __init__(self, app, tracer=None, trace_name=None):
+        self.app = app
+        self.tracer = tracer
+        self.trace_name = trace_name
+
+    def __call__(self, environ, start_response):
+        tracer = _resolve_tracer(self.tracer)
+        # The session and the application run in their own context, entered again for each chunk
+        context = contextvars.copy_context()
+        session = tracer.session(trace_name=self.trace_name)
+        context.run(session.__enter__)
+        context.run(tracer.accept_trace_context, _wsgi_headers(environ))
+        try:
+            response = context.run(self.app, environ, start_response)
+        except BaseException:
+            context.run(session.__exit__, *sys.exc_info())
+            raise
+        return _TracedResponse(response, context, session)
+
+
+class AsyncTraceContextMiddleware:
+    """
+    An ASGI middleware tracing each HTTP request in a trace session.
+
+    Args:
+        app: The ASGI application.
+        tracer (Tracer, optional): The started tracer. Defaults to the tracer of `init_tracing()`.
+        trace_name (str, optional): The name of the request traces. Defaults to the trace name of the tracer.
+    """
+
+    def __init__(self, app, tracer=None, trace_name=None):
+        self.app = app
+        self.tracer = tracer
+        self.trace_name = trace_name
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        tracer = _resolve_tracer(self.tracer)
+        async with tracer.session(trace_name=self.trace_name):
+            tracer.accept_trace_context(scope.get("headers"))
+            await self.app(scope, receive, send)
@@ -19,8 +19,8 @@ import tempfile
 import json
 import numpy as np
 from opentelemetry.sdk import trace as trace_sdk
-from opentelemetry.sdk.trace.export import SimpleSpanProcessor
-from ragaai_catalyst.tracers.exporters.file_span_exporter import FileSpanExporter
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from ragaai_catalyst.tracers.exporters.jsonl_span_exporter import JSONLSpanExporter
 from ragaai_catalyst.tracers.exporters.raga_exporter import RagaExporter
 from ragaai_catalyst.tracers.instrumentators import (
     LangchainInstrumentor,
@@ -33,6 +33,7 @@ from ragaai_catalyst.tracers.llamaindex_instrumentation import LlamaIndexInstrum
 from ragaai_catalyst import RagaAICatalyst
 from ragaai_catalyst.tracers.agentic_tracing import AgenticTracing, TrackName
 from ragaai_catalyst.tracers.agentic_tracing.tracers.llm_tracer import LLMTracerMixin
+from ragaai_catalyst.tracers.agentic_tracing.tracers.session import SessionAttribute
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +61,8 @@ class Tracer(AgenticTracing):
             'custom':True
         },
         interval_time=2,
+        propagate_trace_context=False,  # Send W3C traceparent headers with outbound HTTP calls
+        sanitizer=None,  # Bounds the arguments and results of traced calls saved in traces
         # auto_instrumentation=True/False  # to control automatic instrumentation of everything
 
     ):
@@ -75,6 +78,11 @@ class Tracer(AgenticTracing):
             description (str, optional): The description. Defaults to None.
             upload_timeout (int, optional): The upload timeout in seconds. Defaults to 30.
             update_llm_cost (bool, optional): Whether to update model costs from GitHub. Defaults to True.
+            propagate_trace_context (bool, optional): Whether to send W3C traceparent/tracestate headers
+                with outbound HTTP calls, so that traces of the services they call can be stitched to
+                this trace. Defaults to False.
+            sanitizer (Sanitizer, optional): Converts the arguments and results of traced calls, with
+                limits on depth, items and string sizes. Defaults to `Sanitizer()`.
         """
 
         user_detail = {
@@ -114,7 +122,12 @@ class Tracer(AgenticTracing):
                 if key not in auto_instrumentation:
                     auto_instrumentation[key] = True
         
-        super().__init__(user_detail=user_detail, auto_instrumentation=auto_instrumentation)
+        super().__init__(
+            user_detail=user_detail,
+            auto_instrumentation=auto_instrumentation,
+            propagate_trace_context=propagate_trace_context,
+            sanitizer=sanitizer,
+        )
 
         self.project_name = project_name
         self.dataset_name = dataset_name
@@ -212,14 +225,15 @@ class Tracer(AgenticTracing):
         return data
 
     def _setup_provider(self):
-        self.filespanx = FileSpanExporter(
+        self.span_exporter = JSONLSpanExporter(
             project_name=self.project_name,
             metadata=self.metadata,
             pipeline=self.pipeline,
             raga_client=self.raga_client,
+            upload_timeout=self.upload_timeout,
         )
         tracer_provider = trace_sdk.TracerProvider()
-        tracer_provider.add_span_processor(SimpleSpanProcessor(self.filespanx))
+        tracer_provider.add_span_processor(BatchSpanProcessor(self.span_exporter))
         return tracer_provider
 
     def _setup_instrumentor(self, tracer_type):
@@ -233,7 +247,7 @@ class Tracer(AgenticTracing):
         return instrumentors[tracer_type]().get()
 
     @contextmanager
-    def trace(self):
+    def _trace_context(self):
         """
         Synchronous context manager for tracing.
         Usage:
@@ -246,6 +260,9 @@ class Tracer(AgenticTracing):
         finally:
             self.stop()
 
+    # Once started, `trace` holds the trace of the current session, and the context manager before
+    trace = SessionAttribute(fallback=_trace_context)
+
     def start(self):
         """Start the tracer."""
         if self.tracer_type == "langchain":
@@ -253,7 +270,8 @@ class Tracer(AgenticTracing):
             #     self._instrumentor().instrument(tracer_provider=self._tracer_provider)
             #     self.is_instrumented = True
             # print(f"Tracer started for project: {self.project_name}")
-            self.langchain_tracer = LangchainTracer()
+            self._langchain_uploads = ThreadPoolExecutor(max_workers=4)
+            self.langchain_tracer = LangchainTracer(on_trace_end=self._on_langchain_trace_end)
             return self.langchain_tracer.start()
         elif self.tracer_type == "llamaindex":
             self.llamaindex_tracer = LlamaIndexInstrumentationTracer(self._pass_user_data())
@@ -275,79 +293,10 @@ class Tracer(AgenticTracing):
             # self.is_active = False
             # self.dataset_name = None
             
-            user_detail = self._pass_user_data()
-            data, additional_metadata = self.langchain_tracer.stop()
-
-            # Add cost if possible
-            if additional_metadata.get('model_name'):
-                try:
-                    model_cost_data = self.model_cost_dict[additional_metadata['model_name']]
-                    if 'tokens' in additional_metadata and all(k in additional_metadata['tokens'] for k in ['prompt', 'completion']):
-                        prompt_cost = additional_metadata["tokens"]["prompt"]*model_cost_data["input_cost_per_token"]
-                        completion_cost = additional_metadata["tokens"]["completion"]*model_cost_data["output_cost_per_token"]
-                        additional_metadata["cost"] = prompt_cost + completion_cost 
-
-                        additional_metadata["prompt_tokens"] = float(additional_metadata["tokens"].get("prompt", 0.0))
-                        additional_metadata["completion_tokens"] = float(additional_metadata["tokens"].get("completion", 0.0))
-
-                        logger.debug("Metadata added successfully")
-                    else:
-                        logger.warning("Token information missing in additional_metadata")
-
-                    if 'cost' in additional_metadata:
-                        additional_metadata["cost"] = float(additional_metadata["cost"])
-                    else:
-                        additional_metadata["cost"] = 0.0
-                        logger.warning("Total cost information not available")
-
-
-                except Exception as e:
-                    logger.warning(f"Error adding cost: {e}")
-            else:
-                logger.debug("Model name not available in additional_metadata, skipping cost calculation")
-            
-
-            # Safely remove tokens and cost dictionaries if they exist
-            additional_metadata.pop("tokens", None)
-            # additional_metadata.pop("cost", None)
-            
-            # Safely merge metadata
-            combined_metadata = {}
-            if user_detail.get('trace_user_detail', {}).get('metadata'):
-                combined_metadata.update(user_detail['trace_user_detail']['metadata'])
-            if additional_metadata:
-                combined_metadata.update(additional_metadata)
-
-            langchain_traces = langchain_tracer_extraction(data, self.user_context)
-            final_result = convert_langchain_callbacks_output(langchain_traces)
-            
-            # Safely set required fields in final_result
-            if final_result and isinstance(final_result, list) and len(final_result) > 0:
-                final_result[0]['project_name'] = user_detail.get('project_name', '')
-                final_result[0]['trace_id'] = str(uuid.uuid4())
-                final_result[0]['session_id'] = None
-                final_result[0]['metadata'] = combined_metadata
-                final_result[0]['pipeline'] = user_detail.get('trace_user_detail', {}).get('pipeline')
-
-                filepath_3 = os.path.join(os.getcwd(), "final_result.json")
-                with open(filepath_3, 'w') as f:
-                    json.dump(final_result, f, indent=2)
-                
-                print(filepath_3)
-            else:
-                logger.warning("No valid langchain traces found in final_result")
-
-            # additional_metadata_keys = list(additional_metadata.keys()) if additional_metadata else None
-            additional_metadata_dict = additional_metadata if additional_metadata else {}
-
-            UploadTraces(json_file_path=filepath_3,
-                         project_name=self.project_name,
-                         project_id=self.project_id,
-                         dataset_name=self.dataset_name,
-                         user_detail=user_detail,
-                         base_url=self.base_url
-                         ).upload_traces(additional_metadata_keys=additional_metadata_dict)
-            
+            # Traces of finished top-level runs are uploaded as soon as they end,
+            # stop() flushes the unfinished ones and waits for every upload
+            self.langchain_tracer.stop()
+            self._langchain_uploads.shutdown(wait=True)
             return 
 
         elif self.tracer_type == "llamaindex":
@@ -373,6 +322,82 @@ class Tracer(AgenticTracing):
         else:
             super().stop()
 
+    def _on_langchain_trace_end(self, data, additional_metadata):
+        """Upload the trace of a finished top-level langchain run in the background."""
+        future = self._langchain_uploads.submit(self._upload_langchain_trace, data, dict(additional_metadata))
+        future.add_done_callback(
+            lambda f: f.exception() and logger.error(f"Error uploading langchain trace: {f.exception()}")
+        )
+
+    def _upload_langchain_trace(self, data, additional_metadata):
+        """Convert the trace of a top-level langchain run and upload it from memory."""
+        user_detail = self._pass_user_data()
+
+        # Add cost if possible
+        if additional_metadata.get('model_name'):
+            try:
+                model_cost_data = self.model_cost_dict[additional_metadata['model_name']]
+                if 'tokens' in additional_metadata and all(k in additional_metadata['tokens'] for k in ['prompt', 'completion']):
+                    prompt_cost = additional_metadata["tokens"]["prompt"]*model_cost_data["input_cost_per_token"]
+                    completion_cost = additional_metadata["tokens"]["completion"]*model_cost_data["output_cost_per_token"]
+                    additional_metadata["cost"] = prompt_cost + completion_cost 
+
+                    additional_metadata["prompt_tokens"] = float(additional_metadata["tokens"].get("prompt", 0.0))
+                    additional_metadata["completion_tokens"] = float(additional_metadata["tokens"].get("completion", 0.0))
+
+                    logger.debug("Metadata added successfully")
+                else:
+                    logger.warning("Token information missing in additional_metadata")
+
+                if 'cost' in additional_metadata:
+                    additional_metadata["cost"] = float(additional_metadata["cost"])
+                else:
+                    additional_metadata["cost"] = 0.0
+                    logger.warning("Total cost information not available")
+
+
+            except Exception as e:
+                logger.warning(f"Error adding cost: {e}")
+        else:
+            logger.debug("Model name not available in additional_metadata, skipping cost calculation")
+        
+
+        # Safely remove tokens and cost dictionaries if they exist
+        additional_metadata.pop("tokens", None)
+        # additional_metadata.pop("cost", None)
+        
+        # Safely merge metadata
+        combined_metadata = {}
+        if user_detail.get('trace_user_detail', {}).get('metadata'):
+            combined_metadata.update(user_detail['trace_user_detail']['metadata'])
+        if additional_metadata:
+            combined_metadata.update(additional_metadata)
+
+        langchain_traces = langchain_tracer_extraction(data, self.user_context)
+        final_result = convert_langchain_callbacks_output(langchain_traces)
+        
+        # Safely set required fields in final_result
+        if final_result and isinstance(final_result, list) and len(final_result) > 0:
+            final_result[0]['project_name'] = user_detail.get('project_name', '')
+            final_result[0]['trace_id'] = str(uuid.uuid4())
+            final_result[0]['session_id'] = None
+            final_result[0]['metadata'] = combined_metadata
+            final_result[0]['pipeline'] = user_detail.get('trace_user_detail', {}).get('pipeline')
+        else:
+            logger.warning("No valid langchain traces found in final_result")
+            return
+
+        # additional_metadata_keys = list(additional_metadata.keys()) if additional_metadata else None
+        additional_metadata_dict = additional_metadata if additional_metadata else {}
+
+        UploadTraces(json_file_path=None,
+                     project_name=self.project_name,
+                     project_id=self.project_id,
+                     dataset_name=self.dataset_name,
+                     user_detail=user_detail,
+                     base_url=self.base_url
+                     ).upload_traces(additional_metadata_keys=additional_metadata_dict, traces=final_result)
+
     def get_upload_status(self):
         """Check the status of the trace upload."""
         if self.tracer_type == "langchain":
@@ -395,17 +420,11 @@ class Tracer(AgenticTracing):
 
     async def _upload_traces(self):
         """
-        Asynchronously uploads traces to the RagaAICatalyst server.
-
-        This function uploads the traces generated by the RagaAICatalyst client to the RagaAICatalyst server. It uses the `aiohttp` library to make an asynchronous HTTP request to the server. The function first checks if the `RAGAAI_CATALYST_TOKEN` environment variable is set. If not, it raises a `ValueError` with the message "RAGAAI_CATALYST_TOKEN not found. Cannot upload traces.".
-
-        The function then uses the `asyncio.wait_for` function to wait for the `check_and_upload_files` method of the `raga_client` object to complete. The `check_and_upload_files` method is called with the `session` object and a list of file paths to be uploaded. The `timeout` parameter is set to the value of the `upload_timeout` attribute of the `Tracer` object.
+        Asynchronously waits for the upload of the traces to the RagaAICatalyst server.
 
-        If the upload is successful, the function returns the string "Files uploaded successfully" if the `upload_stat` variable is truthy, otherwise it returns the string "No files to upload".
-
-        If the upload times out, the function returns a string with the message "Upload timed out after {self.upload_timeout} seconds".
-
-        If any other exception occurs during the upload, the function returns a string with the message "Upload failed: {str(e)}", where `{str(e)}` is the string representation of the exception.
+        The span exporter uploads each trace as soon as its root span ends, on its own
+        upload loop. This function exports the spans still queued in the span processor
+        and waits for the uploads of the span exporter still pending.
 
         Parameters:
             None
@@ -413,29 +432,18 @@ class Tracer(AgenticTracing):
         Returns:
             A string indicating the status of the upload.
         """
-        async with aiohttp.ClientSession() as session:
-            if not os.getenv("RAGAAI_CATALYST_TOKEN"):
-                raise ValueError(
-                    "RAGAAI_CATALYST_TOKEN not found. Cannot upload traces."
-                )
+        if not os.getenv("RAGAAI_CATALYST_TOKEN"):
+            raise ValueError(
+                "RAGAAI_CATALYST_TOKEN not found. Cannot upload traces."
+            )
 
-            try:
-                upload_stat = await asyncio.wait_for(
-                    self.raga_client.check_and_upload_files(
-                        session=session,
-                        file_paths=[self.filespanx.sync_file],
-                    ),
-                    timeout=self.upload_timeout,
-                )
-                return (
-                    "Files uploaded successfully"
-                    if upload_stat
-                    else "No files to upload"
-                )
-            except asyncio.TimeoutError:
-                return f"Upload timed out after {self.upload_timeout} seconds"
-            except Exception as e:
-                return f"Upload failed: {str(e)}"
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._tracer_provider.force_flush)
+        results = await loop.run_in_executor(None, self.span_exporter.wait_for_uploads)
+        failures = [result for result in results if result.startswith("Upload ")]
+        if failures:
+            return failures[-1]
+        return "Files uploaded successfully" if results else "No files to upload"
 
     def _cleanup(self):
         """
@@ -3,6 +3,13 @@ import json
 import os
 from datetime import datetime
 
+from ragaai_catalyst.tracers.utils.compression import (
+    compress_payload,
+    read_upload_payload,
+    resolve_compression,
+    upload_headers,
+)
+
 
 class UploadTraces:
     def __init__(self, 
@@ -11,13 +18,15 @@ class UploadTraces:
                  project_id,
                  dataset_name,
                  user_detail,
-                 base_url):
+                 base_url,
+                 compression=None):
         self.json_file_path = json_file_path
         self.project_name = project_name
         self.project_id = project_id
         self.dataset_name = dataset_name
         self.user_detail = user_detail
         self.base_url = base_url
+        self.compression = resolve_compression(compression)
         self.timeout = 10
 
     def _create_dataset_schema_with_trace(self, additional_metadata_keys=None, additional_pipeline_keys=None):
@@ -95,16 +104,13 @@ class UploadTraces:
             presignedUrls = response.json()["data"]["presignedUrls"][0]
             return presignedUrls
 
-    def _put_presigned_url(self, presignedUrl, filename):
-        headers = {
-                "Content-Type": "application/json",
-            }
-
-        if "blob.core.windows.net" in presignedUrl:  # Azure
-            headers["x-ms-blob-type"] = "BlockBlob"
+    def _put_presigned_url(self, presignedUrl, filename, traces=None):
+        headers = upload_headers(presignedUrl, self.compression)
         print(f"Uploading traces...")
-        with open(filename) as f:
-            payload = f.read().replace("\n", "").replace("\r", "").encode()
+        if traces is not None:
+            payload = compress_payload(json.dumps(traces, default=str).encode(), self.compression)
+        else:
+            payload = read_upload_payload(filename, self.compression)
             
 
         response = requests.request("PUT", 
@@ -131,13 +137,21 @@ class UploadTraces:
                                     data=payload,
                                     timeout=self.timeout)
 
-    def upload_traces(self, additional_metadata_keys=None, additional_pipeline_keys=None):
+    def upload_traces(self, additional_metadata_keys=None, additional_pipeline_keys=None, traces=None):
+        """
+        Upload the traces to the dataset.
+
+        Args:
+            additional_metadata_keys (dict, optional): Metadata columns added to the dataset schema.
+            additional_pipeline_keys (list, optional): Pipeline columns added to the dataset schema.
+            traces (list, optional): Traces uploaded straight from memory instead of from `json_file_path`.
+        """
         try:
             self._create_dataset_schema_with_trace(additional_metadata_keys, additional_pipeline_keys)
             presignedUrl = self._get_presigned_url()
             if presignedUrl is None:
                 return
-            self._put_presigned_url(presignedUrl, self.json_file_path)
+            self._put_presigned_url(presignedUrl, self.json_file_path, traces)
             self._insert_traces(presignedUrl)
             print("Traces uploaded")
         except Exception as e:
@@ -0,0 +1,127 @@
+import hashlib
+import json
+
+# Fields of serialized LangChain objects kept on every event, the full config is stored once per trace
+SERIALIZED_FIELDS = ("id", "name", "type")
+# Callback keyword arguments kept on every event
+KWARGS_FIELDS = ("parent_run_id", "tags", "metadata", "name", "invocation_params")
+# Fields of the LLM output kept from responses
+LLM_OUTPUT_FIELDS = ("token_usage", "usage", "model_name", "model", "system_fingerprint")
+
+
+class CapturePolicy:
+    """
+    Bounds what LangChain callbacks capture into a trace.
+
+    Strings are truncated, retrieved documents are capped, callback keyword arguments
+    and LLM outputs are reduced to allowlisted fields, and serialized configs, which
+    repeat on every call of the same component, are stored once per trace under their hash.
+    """
+
+    def __init__(self, max_string_length=16384, max_documents=20, max_items=100,
+                 serialized_fields=SERIALIZED_FIELDS, kwargs_fields=KWARGS_FIELDS,
+                 llm_output_fields=LLM_OUTPUT_FIELDS):
+        """
+        Initialize the policy.
+
+        Args:
+            max_string_length (int, optional): Maximum number of characters kept from a string. Unbounded when None.
+            max_documents (int, optional): Maximum number of retrieved documents kept. Unbounded when None.
+            max_items (int, optional): Maximum number of items kept from other lists and dicts. Unbounded when None.
+            serialized_fields (iterable): Fields of serialized objects kept on every event.
+            kwargs_fields (iterable): Callback keyword arguments kept on every event.
+            llm_output_fields (iterable): Fields of the LLM output kept from responses.
+        """
+        self.max_string_length = max_string_length
+        self.max_documents = max_documents
+        self.max_items = max_items
+        self.serialized_fields = tuple(serialized_fields)
+        self.kwargs_fields = tuple(kwargs_fields)
+        self.llm_output_fields = tuple(llm_output_fields)
+
+    def truncate(self, value):
+        """
+        Bound a JSON-like value: long strings are cut and long containers keep their first items.
+
+        Args:
+            value: The value to bound.
+
+        Returns:
+            The bounded value. Objects other than strings, lists, tuples and dicts are returned as is.
+        """
+        if isinstance(value, str):
+            if self.max_string_length is not None and len(value) > self.max_string_length:
+                return f"{value[:self.max_string_length]}...[{len(value) - self.max_string_length} more characters]"
+            return value
+        if isinstance(value, dict):
+            items = list(value.items())[:self.max_items]
+            return {key: self.truncate(item) for key, item in items}
+        if isinstance(value, (list, tuple)):
+            return [self.truncate(item) for item in value[:self.max_items]]
+        return value
+
+    def kwargs(self, kwargs):
+        """Keep the allowlisted callback keyword arguments."""
+        return {key: self.truncate(kwargs[key]) for key in self.kwargs_fields if kwargs.get(key) is not None}
+
+    def serialized(self, serialized, configs):
+        """
+        Reduce a serialized object to its allowlisted fields plus the hash of its config,
+        storing the config in `configs` the first time it is seen.
+
+        Args:
+            serialized (dict): The serialized object passed to the callback.
+            configs (dict): The serialized configs of the trace, by hash.
+
+        Returns:
+            dict: The allowlisted fields and the 'config_hash'.
+        """
+        if not isinstance(serialized, dict):
+            return self.truncate(serialized)
+        canonical = json.dumps(serialized, sort_keys=True, separators=(",", ":"), default=str)
+        config_hash = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        if config_hash not in configs:
+            configs[config_hash] = self.truncate(serialized)
+        reduced = {field: serialized[field] for field in self.serialized_fields if field in serialized}
+        reduced["config_hash"] = config_hash
+        return reduced
+
+    def documents(self, documents):
+        """
+        Keep the first documents of a retrieval, with bounded content and metadata.
+
+        Args:
+            documents (Sequence[Document]): The retrieved documents.
+
+        Returns:
+            list: Dicts with the 'page_content' and 'metadata' of the kept documents.
+        """
+        documents = list(documents)
+        kept = documents if self.max_documents is None else documents[:self.max_documents]
+        return [
+            {"page_content": self.truncate(doc.page_content), "metadata": self.truncate(doc.metadata)}
+            for doc in kept
+        ]
+
+    def llm_response(self, response):
+        """
+        Reduce an LLMResult to the text of its generations and the allowlisted LLM output fields.
+
+        Args:
+            response (LLMResult): The LLM response.
+
+        Returns:
+            dict: A dict with 'generations' (lists of {'text', 'generation_info'}) and 'llm_output'.
+        """
+        llm_output = response.llm_output or {}
+        return {
+            "generations": [
+                [
+                    {"text": self.truncate(generation.text),
+                     "generation_info": self.truncate(generation.generation_info)}
+                    for generation in generations
+                ]
+                for generations in response.generations
+            ],
+            "llm_output": {field: llm_output[field] for field in self.llm_output_fields if field in llm_output},
+        }
@@ -0,0 +1,148 @@
+import gzip
+import io
+import os
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SUPPORTED_COMPRESSIONS = ("gzip", "zstd")
+FILE_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+CHUNK_SIZE = 1 << 16
+
+
+def resolve_compression(compression=None):
+    """
+    Resolve the compression used for trace uploads and local trace files.
+
+    Args:
+        compression (str, optional): 'gzip', 'zstd', or 'none' to disable compression.
+            Defaults to the RAGAAI_CATALYST_TRACE_COMPRESSION environment variable, and to
+            no compression when it is not set.
+
+    Returns:
+        str: 'gzip', 'zstd', or None for no compression.
+
+    Raises:
+        ValueError: If the compression is not supported.
+        ImportError: If zstd is requested and the zstandard package is not installed.
+    """
+    if compression is None:
+        compression = os.getenv("RAGAAI_CATALYST_TRACE_COMPRESSION")
+    if not compression or compression.lower() == "none":
+        return None
+    compression = compression.lower()
+    if compression not in SUPPORTED_COMPRESSIONS:
+        raise ValueError(f"Unsupported compression '{compression}'. Supported: {SUPPORTED_COMPRESSIONS}")
+    if compression == "zstd" and zstandard is None:
+        raise ImportError("zstd compression requires the 'zstandard' package: pip install zstandard")
+    return compression
+
+
+def compression_from_path(file_path):
+    """Infer the compression of a trace file from its suffix, None for plain files."""
+    for compression, suffix in FILE_SUFFIXES.items():
+        if str(file_path).endswith(suffix):
+            return compression
+    return None
+
+
+def compressed_path(file_path, compression):
+    """Add the suffix of the compression to a file path."""
+    return f"{file_path}{FILE_SUFFIXES[compression]}" if compression else str(file_path)
+
+
+def open_trace_file(file_path, mode="rt", compression=None):
+    """
+    Open a trace file, transparently compressing or decompressing it.
+
+    Args:
+        file_path (str): The file path.
+        mode (str): The file mode, such as 'rt', 'wt', 'at' or 'rb'.
+        compression (str, optional): The compression of the file. Inferred from the suffix when None.
+
+    Returns:
+        A file object.
+    """
+    compression = compression or compression_from_path(file_path)
+    text_kwargs = {"encoding": "utf-8"} if "b" not in mode else {}
+    if compression == "gzip":
+        return gzip.open(file_path, mode, **text_kwargs)
+    if compression == "zstd":
+        resolve_compression("zstd")
+        return zstandard.open(file_path, mode, **text_kwargs)
+    return open(file_path, mode, **text_kwargs)
+
+
+def _compressor(compression, sink):
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=sink, mode="wb")
+    return zstandard.ZstdCompressor().stream_writer(sink, closefd=False)
+
+
+def read_upload_payload(file_path, compression=None):
+    """
+    Read a trace file into the body of an upload, stripping the line breaks of the JSON
+    and compressing it chunk by chunk while reading, so that only the compressed body is
+    held in memory.
+
+    Args:
+        file_path (str): The trace file, plain or compressed (inferred from its suffix).
+        compression (str, optional): The compression of the body. Plain body when None.
+
+    Returns:
+        bytes: The upload body.
+    """
+    sink = io.BytesIO()
+    writer = _compressor(compression, sink) if compression else sink
+    with open_trace_file(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            writer.write(chunk.replace(b"\n", b"").replace(b"\r", b""))
+    if compression:
+        writer.close()
+    return sink.getvalue()
+
+
+def compress_payload(payload, compression=None):
+    """
+    Compress an in-memory upload body.
+
+    Args:
+        payload (bytes): The body.
+        compression (str, optional): The compression. Returned unchanged when None.
+
+    Returns:
+        bytes: The compressed body.
+    """
+    if compression == "gzip":
+        return gzip.compress(payload)
+    if compression == "zstd":
+        resolve_compression("zstd")
+        return zstandard.ZstdCompressor().compress(payload)
+    return payload
+
+
+def upload_headers(url, compression=None):
+    """
+    Build the headers of a presigned PUT of a trace.
+
+    The compression is declared with Content-Encoding, which S3 stores as object metadata.
+    Azure blob storage needs it as the x-ms-blob-content-encoding blob property instead.
+
+    Args:
+        url (str): The presigned URL.
+        compression (str, optional): The compression of the body.
+
+    Returns:
+        dict: The request headers.
+    """
+    headers = {"Content-Type": "application/json"}
+    is_azure = "blob.core.windows.net" in url
+    if is_azure:
+        headers["x-ms-blob-type"] = "BlockBlob"
+    if compression:
+        headers["Content-Encoding"] = compression
+        if is_azure:
+            headers["x-ms-blob-content-encoding"] = compression
+    return headers
@@ -0,0 +1,146 @@
+import reprlib
+import sys
+
+from .serialization import MAX_DEPTH_EXCEEDED
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _truncate_bytes(text, max_bytes):
+    if max_bytes is None or len(text) * 4 <= max_bytes:
+        # At most 4 bytes per character in UTF-8
+        return text
+    encoded = text.encode("utf-8", "surrogatepass")
+    if len(encoded) <= max_bytes:
+        return text
+    kept = encoded[:max_bytes].decode("utf-8", "ignore")
+    return f"{kept}...[{len(encoded) - max_bytes} more bytes]"
+
+
+class Sanitizer:
+    """
+    Converts the arguments and results of traced functions to the values saved in a trace.
+
+    Strings, numbers and booleans are kept, lists and dicts are converted item by item, other
+    objects are saved as their bounded `str()`. Numpy arrays and pandas objects are summarized
+    by their shape and dtype instead of dumped.
+
+    The trace holds a snapshot of the objects when the call is traced, not the objects
+    themselves, which may change afterwards or be large.
+
+    Strings are truncated to a number of UTF-8 bytes, containers keep their first items and
+    are not converted past a depth, each with a marker saying what was left out. Objects found
+    several times in the same call, such as a document list passed twice, are converted once.
+    """
+
+    def __init__(self, max_depth=16, max_items=1000, max_string_bytes=64 * 1024):
+        """
+        Initialize the sanitizer.
+
+        Args:
+            max_depth (int, optional): Depth of nested containers past which they are replaced by a marker.
+                Unbounded when None.
+            max_items (int, optional): Maximum number of items kept from a list or dict. Unbounded when None.
+            max_string_bytes (int, optional): Maximum number of UTF-8 bytes kept from a string, including
+                the strings of other objects. Unbounded when None.
+        """
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.max_string_bytes = max_string_bytes
+        # Bounded str() of the containers saved as strings
+        self._repr = reprlib.Repr()
+        if max_items is not None:
+            self._repr.maxlist = self._repr.maxtuple = self._repr.maxset = self._repr.maxfrozenset = max_items
+            self._repr.maxdict = max_items
+        if max_depth is not None:
+            self._repr.maxlevel = max_depth
+        if max_string_bytes is not None:
+            self._repr.maxstring = self._repr.maxother = max_string_bytes
+
+    def sanitize_input(self, args, kwargs):
+        """
+        Sanitize the arguments of a traced call.
+
+        Returns:
+            dict: The sanitized 'args' and 'kwargs'.
+        """
+        memo = {}
+        return {
+            "args": [self._sanitize(arg, 1, memo) for arg in args],
+            "kwargs": {key: self._sanitize(value, 1, memo) for key, value in kwargs.items()},
+        }
+
+    def sanitize_output(self, output):
+        """Sanitize the result of a traced call."""
+        return self._sanitize(output, 0, {})
+
+    def stringify(self, value):
+        """The `str()` of an object, bounded to the maximum string size."""
+        if isinstance(value, (bytes, bytearray)) and self.max_string_bytes is not None:
+            if len(value) > self.max_string_bytes:
+                head = bytes(value[:self.max_string_bytes])
+                return f"{head}...[{len(value) - self.max_string_bytes} more bytes]"
+        if isinstance(value, (tuple, set, frozenset)):
+            # Builtin containers print like their repr, reprlib bounds it without building it whole
+            return self._repr.repr(value)
+        return _truncate_bytes(str(value), self.max_string_bytes)
+
+    def _sanitize(self, value, depth, memo):
+        if isinstance(value, (int, float, bool)):
+            return value
+        if isinstance(value, str):
+            return _truncate_bytes(value, self.max_string_bytes)
+        if value is None:
+            return "None"
+
+        key = id(value)
+        sanitized = memo.get(key)
+        if sanitized is not None:
+            return sanitized
+
+        if isinstance(value, (list, dict)):
+            if self.max_depth is not None and depth >= self.max_depth:
+                return MAX_DEPTH_EXCEEDED
+            # Memoized before its items, a container holding itself is saved as a cycle
+            if isinstance(value, list):
+                sanitized = memo[key] = []
+                for index, item in enumerate(value):
+                    if self.max_items is not None and index >= self.max_items:
+                        sanitized.append(f"...[{len(value) - index} more items]")
+                        break
+                    sanitized.append(self._sanitize(item, depth + 1, memo))
+            else:
+                sanitized = memo[key] = {}
+                for index, (item_key, item) in enumerate(value.items()):
+                    if self.max_items is not None and index >= self.max_items:
+                        sanitized["..."] = f"[{len(value) - index} more items]"
+                        break
+                    sanitized[item_key] = self._sanitize(item, depth + 1, memo)
+            return sanitized
+
+        sanitized = memo[key] = self._summary(value)
+        return sanitized
+
+    def _summary(self, value):
+        if np is not None:
+            if isinstance(value, np.ndarray):
+                return {"shape": list(value.shape), "dtype": str(value.dtype)}
+            if isinstance(value, np.generic):
+                return value.item()
+        # Only look for pandas objects once pandas is imported, it is slow to import
+        pandas = sys.modules.get("pandas")
+        if pandas is not None:
+            if isinstance(value, pandas.DataFrame):
+                columns = [str(column) for column in value.columns[:self.max_items]]
+                return {"type": "DataFrame", "shape": list(value.shape), "columns": columns}
+            if isinstance(value, pandas.Series):
+                name = None if value.name is None else str(value.name)
+                return {"type": "Series", "shape": list(value.shape), "dtype": str(value.dtype), "name": name}
+        return self.stringify(value)
+
+
+# Used by the tracers unless they are given another one
+default_sanitizer = Sanitizer()
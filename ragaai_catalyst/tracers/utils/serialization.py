@@ -0,0 +1,218 @@
+import dataclasses
+import json
+import uuid
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from pathlib import PurePath
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CIRCULAR_REFERENCE = "<circular reference>"
+MAX_DEPTH_EXCEEDED = "<max depth exceeded>"
+
+
+def _decode_bytes(obj):
+    try:
+        return bytes(obj).decode("utf-8")
+    except UnicodeDecodeError:
+        return str(bytes(obj))
+
+
+def _public_fields(items):
+    # Same filtering as the former TracerJSONEncoder: no None values, no private attributes
+    return {k: v for k, v in items if v is not None and not str(k).startswith("_")}
+
+
+def _to_str(obj):
+    try:
+        return str(obj)
+    except Exception:
+        return None  # Last resort: return None instead of failing
+
+
+def _object_dict(obj):
+    try:
+        return _public_fields(vars(obj).items())
+    except TypeError:
+        # No __dict__, e.g. objects with __slots__
+        return _to_str(obj)
+
+
+def _dataclass_dict(obj):
+    try:
+        # Attributes set after construction included, e.g. the totals of the trace metadata
+        return _public_fields(vars(obj).items())
+    except TypeError:
+        return _public_fields((field.name, getattr(obj, field.name)) for field in dataclasses.fields(obj))
+
+
+class TraceSerializer:
+    """
+    Serializes traces to JSON, with orjson as the backend when it is installed.
+
+    Objects JSON cannot encode are converted by an encoder picked from their type: registered
+    encoders (datetimes, bytes, enums, numpy values...) by MRO, then `to_dict()`, pydantic
+    models, dataclasses and `__dict__`, then `str()`. The encoder of each type is resolved
+    once and cached. Reference cycles are replaced by a marker instead of failing, and bytes
+    and numpy arrays above the size limits are replaced by a short description.
+    """
+
+    def __init__(self, max_bytes_length=1 << 20, max_array_size=100_000, max_depth=200):
+        """
+        Initialize the serializer.
+
+        Args:
+            max_bytes_length (int, optional): Bytes longer than this are replaced by a description. Unbounded when None.
+            max_array_size (int, optional): Numpy arrays with more elements are replaced by their shape
+                and dtype. Unbounded when None.
+            max_depth (int): Nesting depth after which values are replaced by a marker, when cycles are guarded.
+        """
+        self.max_bytes_length = max_bytes_length
+        self.max_array_size = max_array_size
+        self.max_depth = max_depth
+        self._encoders = {}
+        self._cache = {}
+        self.register(datetime, lambda obj: obj.isoformat())
+        self.register(date, lambda obj: obj.isoformat())
+        self.register(time, lambda obj: obj.isoformat())
+        self.register(timedelta, lambda obj: obj.total_seconds())
+        self.register(bytes, self._encode_bytes)
+        self.register(bytearray, self._encode_bytes)
+        self.register(memoryview, self._encode_bytes)
+        self.register(Enum, lambda obj: obj.value)
+        self.register(Decimal, str)
+        self.register(uuid.UUID, str)
+        self.register(PurePath, str)
+        self.register(set, list)
+        self.register(frozenset, list)
+        if np is not None:
+            self.register(np.ndarray, self._encode_array)
+            self.register(np.generic, lambda obj: obj.item())
+
+    def register(self, cls, encoder):
+        """
+        Register the encoder of a type and of its subclasses.
+
+        Args:
+            cls (type): The type.
+            encoder (callable): Converts an instance to a JSON-serializable value.
+        """
+        self._encoders[cls] = encoder
+        self._cache.clear()
+
+    def _encode_bytes(self, obj):
+        if self.max_bytes_length is not None and len(obj) > self.max_bytes_length:
+            return f"<{len(obj)} bytes>"
+        return _decode_bytes(obj)
+
+    def _encode_array(self, obj):
+        if self.max_array_size is not None and obj.size > self.max_array_size:
+            return {"shape": list(obj.shape), "dtype": str(obj.dtype)}
+        return obj.tolist()
+
+    def _resolve(self, cls):
+        for base in cls.__mro__:
+            if base in self._encoders:
+                return self._encoders[base]
+        if callable(getattr(cls, "to_dict", None)):
+            return lambda obj: obj.to_dict()
+        if callable(getattr(cls, "model_dump", None)):
+            return lambda obj: obj.model_dump()
+        if callable(getattr(cls, "dict", None)) and hasattr(cls, "__fields__"):
+            return lambda obj: obj.dict()
+        if dataclasses.is_dataclass(cls):
+            return _dataclass_dict
+        return _object_dict
+
+    def default(self, obj):
+        """Convert an object JSON cannot encode, for `json.dumps(default=...)` and similar hooks."""
+        cls = type(obj)
+        encoder = self._cache.get(cls)
+        if encoder is None:
+            encoder = self._cache[cls] = self._resolve(cls)
+        return encoder(obj)
+
+    def _guarded(self, obj, active, depth):
+        """Convert `obj` to plain JSON values, replacing reference cycles and excessive nesting by markers."""
+        if obj is None or isinstance(obj, (str, int, float, bool)):
+            return obj
+        if depth > self.max_depth:
+            return MAX_DEPTH_EXCEEDED
+        if id(obj) in active:
+            return CIRCULAR_REFERENCE
+        active.add(id(obj))
+        try:
+            if isinstance(obj, dict):
+                return {
+                    key if isinstance(key, str) else str(self._guarded(key, active, depth + 1)):
+                        self._guarded(value, active, depth + 1)
+                    for key, value in obj.items()
+                }
+            if isinstance(obj, (list, tuple)):
+                return [self._guarded(item, active, depth + 1) for item in obj]
+            return self._guarded(self.default(obj), active, depth + 1)
+        finally:
+            active.discard(id(obj))
+
+    def dump_bytes(self, obj, indent=None):
+        """
+        Serialize an object to UTF-8 JSON.
+
+        Args:
+            obj: The object.
+            indent (int, optional): Indentation of the output. orjson only supports 2.
+
+        Returns:
+            bytes: The JSON document.
+        """
+        if orjson is not None and indent in (None, 2):
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=self.default, option=option)
+            except TypeError:
+                # Cycles, integers above 64 bits, unsupported keys: use the standard library
+                pass
+        separators = None if indent else (",", ":")
+        try:
+            return json.dumps(obj, default=self.default, indent=indent, separators=separators).encode("utf-8")
+        except (ValueError, TypeError, RecursionError):
+            guarded = self._guarded(obj, set(), 0)
+            return json.dumps(guarded, indent=indent, separators=separators).encode("utf-8")
+
+    def dumps(self, obj, indent=None):
+        """Serialize an object to a JSON string."""
+        return self.dump_bytes(obj, indent).decode("utf-8")
+
+
+_serializer = TraceSerializer()
+
+
+def to_serializable(obj):
+    """Convert an object JSON cannot encode with the default serializer. Usable as `json.dumps(default=...)`."""
+    return _serializer.default(obj)
+
+
+def register_encoder(cls, encoder):
+    """Register the encoder of a type in the default serializer."""
+    _serializer.register(cls, encoder)
+
+
+def dump_bytes(obj, indent=None):
+    """Serialize an object to UTF-8 JSON with the default serializer."""
+    return _serializer.dump_bytes(obj, indent)
+
+
+def dumps(obj, indent=None):
+    """Serialize an object to a JSON string with the default serializer."""
+    return _serializer.dumps(obj, indent)
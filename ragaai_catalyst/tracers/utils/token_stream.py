@@ -0,0 +1,86 @@
+import time
+from array import array
+
+import numpy as np
+
+LATENCY_PERCENTILES = (50, 90, 99)
+
+
+class TokenStreamAccumulator:
+    """
+    Accumulates the tokens streamed by one LLM run.
+
+    Only the concatenated text and an array of token arrival times are kept, instead
+    of one event per token, and the stream is reported as latency summaries.
+    """
+
+    __slots__ = ("start_time", "_parts", "_timestamps")
+
+    def __init__(self, start_time=None):
+        """
+        Initialize the accumulator.
+
+        Args:
+            start_time (float, optional): `time.perf_counter()` value at which the run started,
+                used to measure the time to first token.
+        """
+        self.start_time = start_time
+        self._parts = []
+        self._timestamps = array("d")
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def add(self, token, timestamp=None):
+        """
+        Record a streamed token.
+
+        Args:
+            token (str): The token text.
+            timestamp (float, optional): `time.perf_counter()` value at which the token arrived. Defaults to now.
+        """
+        self._parts.append(token)
+        self._timestamps.append(time.perf_counter() if timestamp is None else timestamp)
+
+    @property
+    def text(self):
+        return "".join(self._parts)
+
+    def summary(self, timeline_samples=0):
+        """
+        Summarize the stream.
+
+        Args:
+            timeline_samples (int): Number of evenly spaced tokens to include as a
+                [seconds since first token, token index] timeline. No timeline when 0.
+
+        Returns:
+            dict: The streamed text and token count, the time to first token, the inter-token
+                latency mean and percentiles, and the throughput in tokens per second.
+        """
+        timestamps = np.frombuffer(self._timestamps, dtype=np.float64)
+        summary = {
+            "text": self.text,
+            "token_count": len(timestamps),
+            "time_to_first_token": None,
+            "inter_token_latency": None,
+            "tokens_per_second": None,
+        }
+        if not len(timestamps):
+            return summary
+
+        if self.start_time is not None:
+            summary["time_to_first_token"] = float(timestamps[0] - self.start_time)
+        if len(timestamps) > 1:
+            gaps = np.diff(timestamps)
+            summary["inter_token_latency"] = {
+                "mean": float(gaps.mean()),
+                **{f"p{q}": float(value) for q, value in zip(LATENCY_PERCENTILES, np.percentile(gaps, LATENCY_PERCENTILES))},
+            }
+            duration = timestamps[-1] - timestamps[0]
+            if duration > 0:
+                summary["tokens_per_second"] = float((len(timestamps) - 1) / duration)
+        if timeline_samples:
+            indices = np.unique(np.linspace(0, len(timestamps) - 1, num=min(timeline_samples, len(timestamps))).astype(int))
+            summary["timeline"] = [[float(timestamps[i] - timestamps[0]), int(i)] for i in indices]
+        return summary
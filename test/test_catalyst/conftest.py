@@ -0,0 +1,31 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from ragaai_catalyst.tracers.agentic_tracing.upload.upload_agentic_traces import UploadAgenticTraces
+from ragaai_catalyst.tracers.agentic_tracing.utils.trace_format import write_trace
+
+
+@pytest.fixture(params=["json", "json-stream"])
+def save_trace(request, tmp_path):
+    """Save a trace in each trace format, returning the path of the file."""
+    def save(trace, name="trace.rtrace"):
+        path = str(tmp_path / name)
+        write_trace(path, trace, request.param)
+        return path
+    return save
+
+
+@pytest.fixture
+def upload_trace(tmp_path):
+    """Save a trace and return the trace its upload sends."""
+    def upload(trace):
+        path = str(tmp_path / "upload.json")
+        write_trace(path, trace, "json")
+        uploader = UploadAgenticTraces(path, "project", "project-id", "dataset", {}, "http://localhost",
+                                       compression="none")
+        with patch("ragaai_catalyst.tracers.agentic_tracing.upload.upload_agentic_traces.requests.request") as request:
+            uploader._put_presigned_url("https://bucket/trace", path)
+        return json.loads(request.call_args.kwargs["data"])
+    return upload
@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from ragaai_catalyst import SyntheticDataGeneration
+from ragaai_catalyst.document_pipeline import allocate_questions, chunk_text, is_glob_pattern, iter_document_paths
+
+
+def test_chunk_text_overlaps_and_covers_text():
+    text = " ".join(f"word{i}" for i in range(3000))
+    chunks = chunk_text(text, chunk_tokens=1000, overlap_tokens=100)
+    assert len(chunks) > 1
+    assert all(token_count <= 1000 for _, token_count in chunks)
+    assert chunks[0][0].startswith("word0")
+    assert chunks[-1][0].endswith("word2999")
+
+
+def test_chunk_text_short_text_is_single_chunk():
+    assert chunk_text("a short text", chunk_tokens=100, overlap_tokens=10) == [("a short text", 3)]
+
+
+def test_chunk_text_invalid_overlap():
+    with pytest.raises(ValueError, match="overlap_tokens"):
+        chunk_text("text", chunk_tokens=10, overlap_tokens=10)
+
+
+def test_allocate_questions_is_proportional_and_exact():
+    assert allocate_questions([1000, 1000, 200], 10) == [5, 4, 1]
+    assert sum(allocate_questions([7, 13, 29, 1], 17)) == 17
+    assert allocate_questions([0, 0], 3) == [0, 0]
+
+
+def test_iter_document_paths(tmp_path):
+    (tmp_path / "nested").mkdir()
+    for name in ["b.txt", "a.md", "nested/c.csv", "ignored.docx"]:
+        (tmp_path / name).write_text("content")
+    assert [path.replace(str(tmp_path), "") for path in iter_document_paths(str(tmp_path))] == \
+        ["/a.md", "/b.txt", "/nested/c.csv"]
+    assert list(iter_document_paths(str(tmp_path / "*.txt"))) == [str(tmp_path / "b.txt")]
+    assert is_glob_pattern(str(tmp_path / "**" / "*.csv")) and is_glob_pattern(str(tmp_path / "[ab].*"))
+    assert not is_glob_pattern(str(tmp_path / "*.pdf"))
+    assert not is_glob_pattern("docs/report.pdf")
+    assert not is_glob_pattern("What is A/B testing? Explain [briefly].")
+
+
+def test_generate_qna_from_documents_streams_files(tmp_path):
+    for name in ["one.txt", "two.txt"]:
+        (tmp_path / name).write_text(f"Content of {name} that is long enough to generate questions from.")
+    synthetic_gen = SyntheticDataGeneration()
+
+    def fake_generate_qna_pairs(text, question_type, n, *args):
+        return pd.DataFrame({"Question": [f"{text[:14]} {i}?" for i in range(n)], "Answer": ["a"] * n})
+
+    with patch.object(synthetic_gen, "_initialize_client") as initialize_client, \
+            patch.object(synthetic_gen, "_generate_qna_pairs", side_effect=fake_generate_qna_pairs) as generate:
+        result = synthetic_gen.generate_qna_from_documents(str(tmp_path), n=2, model_config={"provider": "openai"})
+
+    assert len(result) == 4
+    assert [path.rsplit("/", 1)[-1] for path in result["Source"].unique()] == ["one.txt", "two.txt"]
+    assert initialize_client.call_count == 1
+    shared_indexes = {id(call.args[5]) for call in generate.call_args_list}
+    assert len(shared_indexes) == 1
+
+
+def test_generate_qna_from_documents_accumulates_dedup_stats(tmp_path):
+    for name in ["one.txt", "two.txt"]:
+        (tmp_path / name).write_text(f"Content of {name} that is long enough to generate questions from.")
+    synthetic_gen = SyntheticDataGeneration()
+    synthetic_gen.dedup_stats = [{"phase": "initial", "generated": 1, "duplicates": 0, "duplicate_rate": 0.0}]
+    batches = [pd.DataFrame({"Question": [question], "Answer": ["a"]})
+               for question in ["Where is the Eiffel tower?", "Who painted the Mona Lisa?"]]
+
+    with patch.object(synthetic_gen, "_initialize_client"), \
+            patch.object(synthetic_gen, "_get_system_message", return_value=""), \
+            patch.object(synthetic_gen, "_generate_batch_response", side_effect=batches):
+        result = synthetic_gen.generate_qna_from_documents(str(tmp_path), n=1, model_config={"provider": "openai"})
+
+    assert list(result["Question"]) == ["Where is the Eiffel tower?", "Who painted the Mona Lisa?"]
+    # One batch per document, the stats of an earlier call are reset
+    assert [stat["generated"] for stat in synthetic_gen.dedup_stats] == [1, 1]
+
+
+def test_generate_qna_from_documents_treats_text_with_wildcards_as_text():
+    text = "What does the report conclude? It says revenue grew [mostly] in Q3 *and* Q4."
+    synthetic_gen = SyntheticDataGeneration()
+
+    def fake_generate_qna_pairs(text, question_type, n, *args):
+        return pd.DataFrame({"Question": [f"question {i}?" for i in range(n)], "Answer": ["a"] * n})
+
+    with patch.object(synthetic_gen, "_initialize_client"), \
+            patch.object(synthetic_gen, "_generate_qna_pairs", side_effect=fake_generate_qna_pairs) as generate:
+        result = synthetic_gen.generate_qna_from_documents(text, n=2, model_config={"provider": "openai"})
+
+    assert len(result) == 2
+    assert list(result["Source"].unique()) == ["text"]
+    assert generate.call_args.args[0] == text
@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from ragaai_catalyst import GuardExecutor
+
+
+def llm_response(content):
+    response = MagicMock()
+    response.__getitem__.side_effect = lambda key: {"choices": [MagicMock(message=MagicMock(content=content))]}[key]
+    return response
+
+
+@pytest.fixture
+def executor():
+    guard_manager = MagicMock(base_url="http://catalyst", project_id=1, timeout=10)
+    guard_manager.get_deployment.return_value = {"success": True}
+    return GuardExecutor(7, guard_manager, field_map={"context": "document"})
+
+
+@pytest.fixture
+def conversation():
+    return [{"role": "user", "content": "hello"}], {"document": "ctx"}
+
+
+def test_acall_checks_output(executor, conversation):
+    messages, prompt_params = conversation
+    passed = {"data": {"status": "PASS"}}
+    with patch("litellm.acompletion", AsyncMock(return_value=llm_response("hi"))), \
+            patch.object(executor, "aexecute_deployment", AsyncMock(return_value=passed)) as ingest:
+        result = asyncio.run(executor.acall(messages, prompt_params, {"model": "gpt-4o-mini"}))
+    assert result[0] is None and result[2] is passed
+    assert ingest.call_args.args[0]["response"] == "hi"
+
+
+def test_speculative_acall_cancels_llm_on_input_failure(executor, conversation):
+    messages, prompt_params = conversation
+    failed = {"data": {"status": "FAIL", "alternateResponse": "blocked"}}
+    cancelled = asyncio.Event()
+
+    async def slow_completion(**kwargs):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def input_check(payload):
+        await asyncio.sleep(0.01)
+        return failed
+
+    async def run():
+        with patch("litellm.acompletion", slow_completion), \
+                patch.object(executor, "aexecute_deployment", input_check):
+            result = await asyncio.wait_for(
+                executor.acall(messages, prompt_params, {"model": "gpt-4o-mini"}, speculative=True), 1)
+        return result, cancelled.is_set()
+
+    result, was_cancelled = asyncio.run(run())
+    assert result == ("blocked", None, failed)
+    assert was_cancelled
+
+
+def test_abatch_does_not_share_model_params(executor, conversation):
+    messages, prompt_params = conversation
+    model_params = {"model": "gpt-4o-mini"}
+    passed = {"data": {"status": "PASS"}}
+
+    async def completion(**kwargs):
+        return llm_response(kwargs["messages"][0]["content"])
+
+    conversations = [([{"role": "user", "content": f"q{i}"}], dict(prompt_params)) for i in range(5)]
+    with patch("litellm.acompletion", completion), \
+            patch.object(executor, "aexecute_deployment", AsyncMock(return_value=passed)):
+        results = asyncio.run(executor.abatch(conversations, model_params))
+    assert [result[1]["choices"][0].message.content for result in results] == [f"q{i}" for i in range(5)]
+    assert model_params == {"model": "gpt-4o-mini"}
+
+
+def test_prescreen_skips_remote_call(conversation):
+    guard_manager = MagicMock(base_url="http://catalyst", project_id=1, timeout=10)
+    guard_manager.get_deployment.return_value = {"success": True, "data": {"guardrailsResponse": [
+        {"metricSpec": {"config": {"params": {"competitors": {"value": ["Google"]}}}}}]}}
+    executor = GuardExecutor(7, guard_manager, field_map={"context": "document"}, prescreen=True)
+    with patch.object(executor._http, "post") as post:
+        assert executor.execute_deployment({"prompt": "Google?"})["data"]["status"] == "FAIL"
+        assert executor.execute_deployment({"prompt": "fine"})["data"]["status"] == "PASS"
+    post.assert_not_called()
+
+
+def test_sessions_are_kept_per_event_loop(executor):
+    async def use_sessions():
+        session = executor._get_session()
+        assert executor._get_session() is session
+        return session
+
+    async def use_and_close():
+        session = await use_sessions()
+        await executor.aclose()
+        return session
+
+    first = asyncio.run(use_and_close())
+    assert first.closed and not executor._sessions
+    # A session left open by a loop that ended is dropped by the next loop
+    second = asyncio.run(use_sessions())
+    third = asyncio.run(use_and_close())
+    assert third is not second and third.closed and not executor._sessions
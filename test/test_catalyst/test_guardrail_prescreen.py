@@ -0,0 +1,81 @@
+import pytest
+
+from ragaai_catalyst.guardrail_prescreen import GuardrailPreScreen, KeywordAutomaton
+
+
+@pytest.fixture
+def deployment_details():
+    return {
+        "success": True,
+        "data": {
+            "name": "deployment",
+            "failAction": {"action": "ALTERNATE_RESPONSE", "args": '{"alternateResponse": "Not allowed"}'},
+            "guardrailsResponse": [
+                {"metricSpec": {"name": "Response Evaluator", "config": {"params": {
+                    "isActive": {"value": True}, "competitors": {"value": ["Google", "Amazon Web Services"]}}}}},
+                {"metricSpec": {"name": "Regex Check", "config": {"params": {
+                    "isActive": {"value": True}, "regex": {"value": r"\b\d{3}-\d{2}-\d{4}\b"}}}}},
+            ],
+        },
+    }
+
+
+def test_keyword_automaton_matches_whole_words():
+    automaton = KeywordAutomaton(["he", "she", "hers", "amazon web services"])
+    assert automaton.find("Ask HERS today") == "hers"
+    assert automaton.find("ushers and others") is None
+    assert automaton.find("hosted on Amazon Web Services.") == "amazon web services"
+    assert not KeywordAutomaton([])
+
+
+def test_from_deployment_decides_locally(deployment_details):
+    prescreen = GuardrailPreScreen.from_deployment(deployment_details)
+    assert not prescreen.remote_required
+
+    blocked = prescreen.screen({"prompt": "Is Google better?", "response": "maybe"})
+    assert blocked["data"]["status"] == "FAIL"
+    assert blocked["data"]["decisionPath"] == "keyword"
+    assert blocked["data"]["alternateResponse"] == "Not allowed"
+
+    assert prescreen.screen({"prompt": "my ssn is 123-45-6789"})["data"]["decisionPath"] == "regex"
+    assert prescreen.screen({"prompt": "hello"})["data"] == {"status": "PASS", "decisionPath": "rules"}
+    assert prescreen.screen({"prompt": "hello"})["data"]["decisionPath"] == "memo"
+
+
+def test_untranslatable_guardrails_need_remote(deployment_details):
+    deployment_details["data"]["guardrailsResponse"].append(
+        {"metricSpec": {"name": "Hallucination", "config": {"params": {"isActive": {"value": True}}}}})
+    prescreen = GuardrailPreScreen.from_deployment(deployment_details, allow_patterns=[r"(hi|hello)[!.]?"],
+                                                   max_length=50)
+    assert prescreen.remote_required
+    assert prescreen.screen({"prompt": "What is the capital of France?"}) is None
+    assert prescreen.screen({"prompt": "Hello!"})["data"]["decisionPath"] == "allow"
+    assert prescreen.screen({"prompt": "x" * 51})["data"]["decisionPath"] == "length"
+
+    prescreen.record_remote({"prompt": "What is the capital of France?"}, {"success": True, "data": {"status": "PASS"}})
+    assert prescreen.screen({"prompt": "What is the capital of France?"})["data"]["decisionPath"] == "memo"
+
+    stats = prescreen.stats()
+    assert stats["decisions"] == {"allow": 1, "length": 1, "remote": 1, "memo": 1}
+    assert stats["offload_ratio"] == 0.75
+
+
+def test_all_fail_deployments_are_not_decided_locally(deployment_details):
+    deployment_details["data"]["deploymentFailCondition"] = "ALL_FAIL"
+    prescreen = GuardrailPreScreen.from_deployment(deployment_details)
+    assert prescreen.screen({"prompt": "Is Google better?"}) is None
+
+
+def test_rules_apply_to_the_fields_of_their_guardrail(deployment_details):
+    guardrails = deployment_details["data"]["guardrailsResponse"]
+    guardrails[0]["metricSpec"]["config"]["mappings"] = [{"schemaName": "Response", "variableName": "Response"}]
+    guardrails.append({"metricSpec": {"name": "Hallucination", "config": {"params": {"isActive": {"value": False}}}}})
+    prescreen = GuardrailPreScreen.from_deployment(deployment_details)
+
+    # The inactive guardrail needs no remote call
+    assert not prescreen.remote_required
+    assert prescreen.screen({"prompt": "Is Google better?", "context": "Google docs"})["data"]["status"] == "PASS"
+    assert prescreen.screen({"prompt": "hi", "response": "Use Google"})["data"]["decisionPath"] == "keyword"
+    # Patterns of guardrails without mappings screen the prompt and response, not the context
+    assert prescreen.screen({"prompt": "hi", "context": "ssn 123-45-6789"})["data"]["status"] == "PASS"
+    assert prescreen.screen({"prompt": "ssn 123-45-6789"})["data"]["decisionPath"] == "regex"
@@ -0,0 +1,118 @@
+import copy
+import json
+
+from ragaai_catalyst.tracers.agentic_tracing.utils.history_deltas import (
+    DELTA_REF,
+    HistoryDeltaEncoder,
+    decode_history_deltas,
+    encode_history_deltas,
+    resolve_history_deltas,
+)
+from ragaai_catalyst.tracers.agentic_tracing.utils.payload_blobs import encode_blobs
+from ragaai_catalyst.tracers.agentic_tracing.utils.trace_format import TraceReader
+
+
+def llm_input(messages):
+    return {"args": [], "kwargs": {"model": "gpt-4o", "messages": messages}}
+
+
+def make_trace(turns=8):
+    """Two agents talking in turns, a tool called between them."""
+    histories = {
+        "planner": [{"role": "system", "content": "You plan. " * 50}],
+        "writer": [{"role": "system", "content": "You write. " * 50}],
+    }
+    spans, workflow = [], []
+    for turn in range(turns):
+        for agent, history in histories.items():
+            history.append({"role": "user", "content": f"{agent} turn {turn}"})
+            span_id = len(spans) + 1
+            spans.append({"id": span_id, "type": "llm", "name": agent,
+                          "data": {"input": llm_input(list(history)), "output": f"answer {turn}"}})
+            workflow.append({"id": str(len(workflow) + 1), "span_id": span_id, "interaction_type": "llm_call_start",
+                             "content": {"prompt": spans[-1]["data"]["input"]}})
+            history.append({"role": "assistant", "content": f"answer {turn}"})
+        spans.append({"id": len(spans) + 1, "type": "tool", "name": "search",
+                      "data": {"input": {"args": [[1, 2]], "kwargs": {}}, "output": "found"}})
+    # A child span continuing the planner conversation
+    spans.append({"id": len(spans) + 1, "type": "agent", "name": "agent", "data": {"children": [
+        {"id": len(spans) + 2, "type": "llm", "name": "planner",
+         "data": {"input": llm_input(histories["planner"] + [{"role": "user", "content": "last"}])}},
+    ]}})
+    return {"id": "trace-1", "data": [{"spans": spans}], "workflow": workflow}
+
+
+def test_resolve_history_deltas(monkeypatch):
+    monkeypatch.delenv("RAGAAI_CATALYST_TRACE_HISTORY_DELTAS", raising=False)
+    assert not resolve_history_deltas()
+    monkeypatch.setenv("RAGAAI_CATALYST_TRACE_HISTORY_DELTAS", "True")
+    assert resolve_history_deltas()
+    assert not resolve_history_deltas(False)
+
+
+def test_histories_continue_their_conversation():
+    encoder = HistoryDeltaEncoder()
+    system, other = {"role": "system", "content": "a"}, {"role": "system", "content": "b"}
+    first = [system, {"role": "user", "content": "1"}]
+
+    assert encoder.encode(1, first) is first
+    assert encoder.encode(2, [other]) == [other]
+    assert encoder.encode(3, first + [{"role": "user", "content": "2"}]) == {
+        DELTA_REF: {"base": 1, "prefix": 2, "messages": [{"role": "user", "content": "2"}]}}
+    # An edited history keeps the messages before the first change
+    assert encoder.encode(4, [system, {"role": "user", "content": "edited"}]) == {
+        DELTA_REF: {"base": 3, "prefix": 1, "messages": [{"role": "user", "content": "edited"}]}}
+    assert encoder.encode(5, [other, {"role": "user", "content": "3"}])[DELTA_REF]["base"] == 2
+    # Not a chat history
+    assert encoder.encode(6, {"args": ["prompt"], "kwargs": {}}) == {"args": ["prompt"], "kwargs": {}}
+
+
+def test_round_trip():
+    trace = make_trace()
+    original = copy.deepcopy(trace)
+    encoded = encode_history_deltas(trace)
+
+    assert trace == original
+    spans = encoded["data"][0]["spans"]
+    # The second planner call continues from the first one
+    assert spans[3]["data"]["input"]["kwargs"] == {"model": "gpt-4o", "messages": {DELTA_REF: {
+        "base": 1, "prefix": 2,
+        "messages": [{"role": "assistant", "content": "answer 0"}, {"role": "user", "content": "planner turn 1"}],
+    }}}
+    assert spans[-1]["data"]["children"][0]["data"]["input"]["kwargs"]["messages"][DELTA_REF]["base"] == spans[-4]["id"]
+    assert encoded["workflow"][2]["content"]["prompt"]["kwargs"]["messages"][DELTA_REF]["base"] == "1"
+    assert len(json.dumps(encoded)) < len(json.dumps(trace)) / 2
+    assert decode_history_deltas(json.loads(json.dumps(encoded))) == original
+
+
+def test_readers_restore_histories(save_trace):
+    trace = make_trace()
+    # Encoded as by the tracer, the deltas before the blobs
+    path = save_trace(encode_blobs(encode_history_deltas(trace), threshold=256))
+
+    reader = TraceReader(path)
+    assert reader.has_deltas and reader.has_blobs
+    assert "history_deltas" not in reader.header
+    assert list(reader.iter_spans()) == trace["data"][0]["spans"]
+    assert TraceReader(path).read() == trace
+
+
+def test_messages_looking_like_deltas_are_escaped(save_trace):
+    trace = make_trace()
+    spans = trace["data"][0]["spans"]
+    spans[0]["data"]["input"] = llm_input({DELTA_REF: {"base": 1, "prefix": 0, "messages": []}})
+    spans[1]["data"]["input"] = {"$" + DELTA_REF: "not a history"}
+    original = copy.deepcopy(trace)
+    encoded = encode_history_deltas(trace)
+
+    encoded_spans = encoded["data"][0]["spans"]
+    assert encoded_spans[0]["data"]["input"]["kwargs"]["messages"] == {
+        "$" + DELTA_REF: {"base": 1, "prefix": 0, "messages": []}}
+    assert encoded_spans[1]["data"]["input"] == {"$$" + DELTA_REF: "not a history"}
+    assert decode_history_deltas(json.loads(json.dumps(encoded))) == original
+    assert TraceReader(save_trace(encode_blobs(encoded, threshold=256))).read() == original
+
+
+def test_upload_restores_histories(upload_trace):
+    trace = make_trace()
+    assert upload_trace(encode_history_deltas(trace)) == trace
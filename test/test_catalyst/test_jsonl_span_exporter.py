@@ -0,0 +1,137 @@
+import json
+import tempfile
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.trace import set_span_in_context
+
+from ragaai_catalyst.tracers.exporters import JSONLSpanExporter
+from ragaai_catalyst.tracers.utils.compression import open_trace_file
+
+
+class FakeRagaClient:
+    def __init__(self):
+        self.uploaded = []
+
+    async def check_and_upload_files(self, session, file_paths):
+        for file_path in file_paths:
+            with open_trace_file(file_path) as f:
+                self.uploaded.append(json.load(f))
+        return "upload successful"
+
+
+@pytest.fixture
+def temp_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.setenv("RAGAAI_CATALYST_TOKEN", "token")
+    return tmp_path
+
+
+def test_spans_are_appended_and_finished_traces_uploaded(temp_dir):
+    client = FakeRagaClient()
+    exporter = JSONLSpanExporter(project_name="project", metadata={"env": "test"}, pipeline={},
+                                 raga_client=client, max_buffer_spans=2)
+    provider = TracerProvider()
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    tracer = provider.get_tracer(__name__)
+
+    for trace_number in range(2):
+        with tracer.start_as_current_span(f"root-{trace_number}"):
+            for i in range(3):
+                with tracer.start_as_current_span(f"child-{i}"):
+                    pass
+        provider.force_flush()
+    provider.shutdown()
+
+    assert len(client.uploaded) == 2
+    first_trace = client.uploaded[0]
+    spans = [span for record in first_trace for span in record["traces"]]
+    assert sorted(span["name"] for span in spans) == ["child-0", "child-1", "child-2", "root-0"]
+    assert all(len(span["prompt_id"]) == 64 for span in spans)
+    assert first_trace[0]["metadata"]["env"] == "test"
+    assert "id" in first_trace[0]["metadata"]
+
+    jsonl_file = temp_dir / "raga_temp" / f"{first_trace[0]['trace_id']}.jsonl"
+    lines = jsonl_file.read_text().splitlines()
+    assert len(lines) == len(first_trace)
+    assert all(": " not in line for line in lines)
+
+
+def test_spans_stay_buffered_below_thresholds(temp_dir):
+    exporter = JSONLSpanExporter(project_name="project", max_buffer_spans=100, flush_interval=60)
+    provider = TracerProvider()
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    tracer = provider.get_tracer(__name__)
+    with tracer.start_as_current_span("root"):
+        with tracer.start_as_current_span("child"):
+            pass
+        provider.force_flush()
+
+        assert not list((temp_dir / "raga_temp").glob("*.jsonl"))
+        exporter.force_flush()
+        assert len(list((temp_dir / "raga_temp").glob("*.jsonl"))) == 1
+    provider.shutdown()
+
+
+def test_spool_files_can_be_compressed(temp_dir):
+    client = FakeRagaClient()
+    exporter = JSONLSpanExporter(project_name="project", raga_client=client, compression="gzip")
+    provider = TracerProvider()
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    with provider.get_tracer(__name__).start_as_current_span("root"):
+        pass
+    provider.shutdown()
+
+    assert len(list((temp_dir / "raga_temp").glob("*.jsonl.gz"))) == 1
+    assert client.uploaded[0][0]["traces"][0]["name"] == "root"
+
+
+def test_interleaved_traces_are_uploaded_once(temp_dir):
+    exporter = JSONLSpanExporter(project_name="project", trace_idle_timeout=60)
+    scheduled = []
+    exporter._schedule_upload = scheduled.append
+    tracer = TracerProvider().get_tracer(__name__)
+
+    def trace_spans(name):
+        root = tracer.start_span(f"{name}-root")
+        children = [tracer.start_span(f"{name}-{i}", context=set_span_in_context(root)) for i in range(2)]
+        for child in children:
+            child.end()
+        root.end()
+        return children + [root]
+
+    a, b = trace_spans("a"), trace_spans("b")
+    exporter.export([a[0], b[0], a[1], b[1]])
+    assert scheduled == []
+    exporter.export([a[2]])
+    exporter.export([b[2]])
+    a_id, b_id = ("0x" + format(spans[0].context.trace_id, "032x") for spans in (a, b))
+    assert scheduled == [a_id, b_id]
+
+    # An open trace is uploaded when it is idle, or by shutdown()
+    c = trace_spans("c")
+    exporter.export(c[:2])
+    exporter.trace_idle_timeout = 0
+    exporter.export([])
+    d = trace_spans("d")
+    exporter.trace_idle_timeout = 60
+    exporter.export(d[:1])
+    exporter.shutdown()
+    assert scheduled == [a_id, b_id] + ["0x" + format(spans[0].context.trace_id, "032x") for spans in (c, d)]
+
+
+def test_wait_for_uploads_reports_the_pending_uploads(temp_dir):
+    client = FakeRagaClient()
+    exporter = JSONLSpanExporter(project_name="project", raga_client=client)
+    provider = TracerProvider()
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    with provider.get_tracer(__name__).start_as_current_span("root"):
+        pass
+    provider.force_flush()
+
+    assert exporter.wait_for_uploads() == ["Files uploaded successfully"]
+    assert exporter.wait_for_uploads() == []
+    with open_trace_file(exporter.last_trace_file) as f:
+        assert json.load(f)[0]["traces"][0]["name"] == "root"
+    provider.shutdown()
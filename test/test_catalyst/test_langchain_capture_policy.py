@@ -0,0 +1,71 @@
+import json
+import uuid
+
+from langchain.schema import LLMResult, Generation
+from langchain_core.documents import Document
+
+from ragaai_catalyst.tracers.langchain_callback import LangchainTracer
+from ragaai_catalyst.tracers.utils.capture_policy import CapturePolicy
+
+SERIALIZED = {"id": ["langchain", "chains", "RetrievalQA"], "name": "RetrievalQA",
+              "kwargs": {"prompt": "Use the context to answer. " * 100}}
+
+
+def test_truncate_bounds_strings_and_containers():
+    policy = CapturePolicy(max_string_length=5, max_items=2)
+    assert policy.truncate("abcdefgh") == "abcde...[3 more characters]"
+    assert policy.truncate({"a": ["x", "y", "z"], "b": 1, "c": 2}) == {"a": ["x", "y"], "b": 1}
+    assert policy.truncate(42) == 42
+
+
+def test_kwargs_are_allowlisted():
+    policy = CapturePolicy()
+    kwargs = {"parent_run_id": None, "tags": ["t"], "invocation_params": {"model": "gpt-4o"}, "huge": "x" * 10}
+    assert policy.kwargs(kwargs) == {"tags": ["t"], "invocation_params": {"model": "gpt-4o"}}
+
+
+def test_repeated_serialized_configs_are_stored_once():
+    tracer = LangchainTracer()
+    chain_id = uuid.uuid4()
+    tracer.on_chain_start(SERIALIZED, {"question": "q?"}, run_id=chain_id)
+    for _ in range(3):
+        tracer.on_llm_start(SERIALIZED, ["q?"], run_id=uuid.uuid4(), parent_run_id=chain_id)
+
+    trace = tracer.current_trace
+    assert len(trace["serialized_configs"]) == 1
+    config_hash, config = next(iter(trace["serialized_configs"].items()))
+    assert config == SERIALIZED
+    assert trace["llm_calls"][0]["serialized"] == {"id": SERIALIZED["id"], "name": "RetrievalQA",
+                                                   "config_hash": config_hash}
+
+
+def test_retriever_documents_are_capped():
+    tracer = LangchainTracer(capture_policy=CapturePolicy(max_string_length=10, max_documents=2))
+    run_id = uuid.uuid4()
+    tracer.on_retriever_start({}, "query", run_id=run_id)
+    tracer.on_retriever_end([Document(page_content="long document " * 50) for _ in range(5)], run_id=run_id)
+
+    event = tracer.finished_traces[0]["retriever_actions"][1]
+    assert event["documents_total"] == 5
+    assert len(event["documents"]) == 2
+    assert event["documents"][0]["page_content"].startswith("long docum...")
+
+
+def test_llm_response_keeps_generation_text_and_usage(tmp_path):
+    tracer = LangchainTracer(output_path=str(tmp_path))
+    run_id = uuid.uuid4()
+    tracer.on_llm_start({}, ["q?"], run_id=run_id)
+    response = LLMResult(generations=[[Generation(text="answer")]],
+                         llm_output={"token_usage": {"prompt_tokens": 3}, "model_name": "gpt-4o", "raw": "x"})
+    tracer.on_llm_end(response, run_id=run_id)
+
+    llm_end = tracer.finished_traces[0]["llm_calls"][1]
+    assert llm_end["response"]["generations"][0][0]["text"] == "answer"
+    assert llm_end["response"]["llm_output"] == {"token_usage": {"prompt_tokens": 3}, "model_name": "gpt-4o"}
+
+    tracer.on_chain_start({}, {"question": "q?"}, run_id=uuid.uuid4())
+    tracer.force_save()
+    with open(tracer.filepath) as f:
+        content = f.read()
+    assert "\n" not in content
+    assert json.loads(content)["chain_starts"][0]["query"] == "q?"
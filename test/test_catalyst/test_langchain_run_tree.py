@@ -0,0 +1,72 @@
+import uuid
+
+from langchain.schema import LLMResult, Generation
+from langchain_core.documents import Document
+
+from ragaai_catalyst.tracers.langchain_callback import LangchainTracer
+
+
+def run_chain(tracer, question, answer, finish=True):
+    chain_id, retriever_id, llm_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    tracer.on_chain_start({}, {"question": question}, run_id=chain_id)
+    tracer.on_retriever_start({}, question, run_id=retriever_id, parent_run_id=chain_id)
+    tracer.on_retriever_end([Document(page_content=f"context for {question}")],
+                            run_id=retriever_id, parent_run_id=chain_id)
+    tracer.on_llm_start({}, [question], run_id=llm_id, parent_run_id=chain_id)
+    tracer.on_llm_end(LLMResult(generations=[[Generation(text=answer)]]), run_id=llm_id, parent_run_id=chain_id)
+    if finish:
+        tracer.on_chain_end({"result": answer}, run_id=chain_id)
+    return chain_id, retriever_id, llm_id
+
+
+def test_top_level_runs_are_flushed_independently():
+    flushed = []
+    tracer = LangchainTracer(on_trace_end=lambda trace, metadata: flushed.append(trace))
+
+    first_id, retriever_id, llm_id = run_chain(tracer, "first?", "one", finish=False)
+    second_id, _, _ = run_chain(tracer, "second?", "two")
+
+    assert [trace["run_id"] for trace in flushed] == [str(second_id)]
+    tracer.on_chain_end({"result": "one"}, run_id=first_id)
+
+    first, second = flushed[1], flushed[0]
+    assert first["run_id"] == str(first_id)
+    assert [call["prompts"] for call in first["llm_calls"] if call["event"] == "llm_start"] == [["first?"]]
+    assert [call["prompts"] for call in second["llm_calls"] if call["event"] == "llm_start"] == [["second?"]]
+    assert first["runs"][str(first_id)]["children"] == [str(retriever_id), str(llm_id)]
+    assert first["runs"][str(llm_id)]["parent_run_id"] == str(first_id)
+    assert first["end_time"] is not None
+    assert not tracer._traces and not tracer._run_roots
+
+
+def test_stop_flushes_unfinished_runs():
+    tracer = LangchainTracer()
+    tracer.start()
+    chain_id, _, _ = run_chain(tracer, "question?", "answer", finish=False)
+    tracer.stop()
+
+    assert [trace["run_id"] for trace in tracer.finished_traces] == [str(chain_id)]
+    assert tracer.finished_traces[0]["additional_metadata"]["tokens"]["total"] == 0
+
+
+def test_runs_under_a_tool_stay_in_the_agent_trace():
+    flushed = []
+    tracer = LangchainTracer(on_trace_end=lambda trace, metadata: flushed.append(trace))
+    agent_id, tool_id, llm_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    tracer.on_chain_start({}, {"input": "weather in Paris?"}, run_id=agent_id)
+    tracer.on_tool_start({"name": "weather"}, "Paris", run_id=tool_id, parent_run_id=agent_id)
+    tracer.on_llm_start({}, ["summarize the forecast"], run_id=llm_id, parent_run_id=tool_id)
+    tracer.on_llm_end(LLMResult(generations=[[Generation(text="sunny")]]), run_id=llm_id, parent_run_id=tool_id)
+    tracer.on_tool_end("sunny", run_id=tool_id, parent_run_id=agent_id)
+    assert flushed == []
+    tracer.on_chain_end({"output": "sunny"}, run_id=agent_id)
+
+    assert [trace["run_id"] for trace in flushed] == [str(agent_id)]
+    trace = flushed[0]
+    assert trace["runs"][str(agent_id)]["children"] == [str(tool_id)]
+    assert trace["runs"][str(tool_id)]["children"] == [str(llm_id)]
+    assert [action["event"] for action in trace["actions"]] == ["tool_start", "tool_end"]
+    assert [call["prompts"] for call in trace["llm_calls"] if call["event"] == "llm_start"] == \
+        [["summarize the forecast"]]
+    assert not tracer._traces and not tracer._run_roots
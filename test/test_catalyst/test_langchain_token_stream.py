@@ -0,0 +1,48 @@
+import uuid
+
+import pytest
+from langchain.schema import LLMResult, Generation
+
+from ragaai_catalyst.tracers.langchain_callback import LangchainTracer
+from ragaai_catalyst.tracers.utils.token_stream import TokenStreamAccumulator
+
+
+def test_accumulator_summary():
+    stream = TokenStreamAccumulator(start_time=10.0)
+    for i, token in enumerate(["Hel", "lo", " wor", "ld", "!"]):
+        stream.add(token, timestamp=10.5 + 0.1 * i)
+
+    summary = stream.summary(timeline_samples=3)
+    assert summary["text"] == "Hello world!"
+    assert summary["token_count"] == 5
+    assert summary["time_to_first_token"] == pytest.approx(0.5)
+    assert summary["inter_token_latency"]["p50"] == pytest.approx(0.1)
+    assert summary["inter_token_latency"]["p99"] == pytest.approx(0.1)
+    assert summary["tokens_per_second"] == pytest.approx(10.0)
+    assert [index for _, index in summary["timeline"]] == [0, 2, 4]
+
+
+def test_empty_accumulator_summary():
+    summary = TokenStreamAccumulator().summary()
+    assert summary["token_count"] == 0
+    assert summary["time_to_first_token"] is None
+    assert "timeline" not in summary
+
+
+def test_tracer_folds_streamed_tokens_into_one_summary():
+    tracer = LangchainTracer(token_timeline_samples=2)
+    run_id = uuid.uuid4()
+    tracer.on_llm_start({}, ["Say hello"], run_id=run_id)
+    for token in ["Hello", ",", " there"]:
+        tracer.on_llm_new_token(token, run_id=run_id, chunk=None)
+    tracer.on_llm_end(LLMResult(generations=[[Generation(text="Hello, there")]]), run_id=run_id)
+
+    tokens = tracer.current_trace["tokens"]
+    assert len(tokens) == 1
+    assert tokens[0]["event"] == "token_stream"
+    assert tokens[0]["run_id"] == str(run_id)
+    assert tokens[0]["text"] == "Hello, there"
+    assert tokens[0]["token_count"] == 3
+    assert tokens[0]["time_to_first_token"] >= 0
+    assert len(tokens[0]["timeline"]) == 2
+    assert not tracer._token_streams
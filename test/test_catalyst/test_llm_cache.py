@@ -0,0 +1,89 @@
+import os
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+from ragaai_catalyst import LLMResponseCache, SyntheticDataGeneration
+from ragaai_catalyst.llm_cache import make_cache_key
+from ragaai_catalyst import internal_api_completion
+
+
+@pytest.fixture
+def request_doc():
+    return {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hello"}], "temperature": 0}
+
+
+def test_cache_key_is_canonical_and_ignores_secrets(request_doc):
+    reordered = {"temperature": 0, "messages": request_doc["messages"], "model": "gpt-4o-mini", "api_key": "secret"}
+    assert make_cache_key("ns", request_doc) == make_cache_key("ns", reordered)
+    assert make_cache_key("ns", request_doc) != make_cache_key("other", request_doc)
+
+
+def test_memory_hits_and_stats(request_doc):
+    cache = LLMResponseCache()
+    fn = MagicMock(return_value="response")
+    assert cache.get_or_call("ns", request_doc, fn) == "response"
+    assert cache.get_or_call("ns", request_doc, fn) == "response"
+    assert fn.call_count == 1
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+
+
+def test_refresh_and_failed_responses(request_doc):
+    cache = LLMResponseCache()
+    cache.get_or_call("ns", request_doc, lambda: "old")
+    assert cache.get_or_call("ns", request_doc, lambda: "new", refresh=True) == "new"
+    assert cache.get_or_call("ns", request_doc, lambda: "unused") == "new"
+    assert cache.get_or_call("ns", {"other": 1}, lambda: ["x", None], should_cache=lambda r: None not in r) == ["x", None]
+    assert cache.get("missing") == (False, None)
+
+
+def test_lru_eviction_and_ttl(request_doc):
+    cache = LLMResponseCache(max_entries=1, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == (False, None)
+    assert cache.get("b") == (True, 2)
+    time.sleep(0.1)
+    assert cache.get("b") == (False, None)
+
+
+def test_disk_tier_survives_new_instance(tmp_path, request_doc):
+    path = str(tmp_path / "cache" / "llm.sqlite")
+    LLMResponseCache(path=path).get_or_call("ns", request_doc, lambda: {"answer": 42})
+    cache = LLMResponseCache(path=path)
+    assert cache.get_or_call("ns", request_doc, lambda: pytest.fail("should be cached")) == {"answer": 42}
+    assert cache.stats()["disk_hits"] == 1
+    # The pickles are only writable by their owner
+    assert os.stat(path).st_mode & 0o077 == 0
+
+
+def test_replay_scope_gives_repetitions_their_own_entry(request_doc):
+    cache = LLMResponseCache()
+    responses = iter(["first", "second"])
+    with cache.replay_scope():
+        assert [cache.get_or_call("ns", request_doc, lambda: next(responses)) for _ in range(2)] == ["first", "second"]
+    with cache.replay_scope():
+        assert [cache.get_or_call("ns", request_doc, lambda: pytest.fail("cached")) for _ in range(2)] == ["first", "second"]
+
+
+def test_internal_api_completion_is_cached():
+    cache = LLMResponseCache()
+    messages = [{"role": "user", "content": "hello"}]
+    kwargs = {"internal_llm_proxy": "http://proxy", "user_id": "1"}
+    with patch.object(internal_api_completion, "_api_completion", return_value="df") as call:
+        for _ in range(2):
+            internal_api_completion.api_completion(messages, {"model": "m", "job_id": 1}, kwargs, cache=cache)
+    assert call.call_count == 1
+
+
+def test_generate_llm_response_uses_cache():
+    cache = LLMResponseCache()
+    response = MagicMock()
+    response.choices[0].message.content = '[{"Question": "q?", "Answer": "a"}]'
+    synthetic_gen = SyntheticDataGeneration()
+    with patch("ragaai_catalyst.synthetic_data_generation.completion", return_value=response) as completion:
+        for api_key in ["key-1", "key-2"]:
+            df = synthetic_gen._generate_llm_response("text", "system", {"model": "gpt-4o-mini"}, api_key, cache=cache)
+    assert completion.call_count == 1
+    assert list(df["Question"]) == ["q?"]
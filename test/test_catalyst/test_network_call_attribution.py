@@ -0,0 +1,97 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from ragaai_catalyst.tracers.agentic_tracing import AgenticTracing
+from ragaai_catalyst.tracers.agentic_tracing.tracers.network_tracer import (
+    monkey_patch_thread_pool,
+    restore_thread_pool,
+)
+
+
+@pytest.fixture
+def tracer():
+    return AgenticTracing({
+        "project_name": "project",
+        "project_id": "project-id",
+        "dataset_name": "dataset",
+        "trace_name": "trace",
+        "interval_time": 1,
+        "trace_user_detail": {},
+    })
+
+
+@pytest.fixture
+def thread_pool_context():
+    original_submit = monkey_patch_thread_pool()
+    yield
+    restore_thread_pool(original_submit)
+
+
+def record(tracer, url):
+    now = datetime.now().astimezone()
+    tracer.network_tracer.record_call(method="GET", url=url, status_code=200, start_time=now, end_time=now)
+
+
+def urls(tracer, component_id):
+    return sorted(call["url"] for call in tracer.component_network_calls[component_id])
+
+
+def test_concurrent_tasks_keep_their_calls(tracer):
+    async def component(name):
+        tracer.start_component(name)
+        try:
+            for i in range(3):
+                record(tracer, f"https://{name}/{i}")
+                await asyncio.sleep(0)
+        finally:
+            tracer.end_component(name)
+
+    async def main():
+        await asyncio.gather(*(component(f"tool-{n}") for n in range(4)))
+
+    asyncio.run(main())
+
+    for n in range(4):
+        assert urls(tracer, f"tool-{n}") == [f"https://tool-{n}/{i}" for i in range(3)]
+    assert tracer.network_tracer.network_calls == []
+
+
+def test_gather_children_are_attributed_to_parent(tracer):
+    async def fetch(i):
+        record(tracer, f"https://llm/{i}")
+
+    async def main():
+        tracer.start_component("agent")
+        await asyncio.gather(*(fetch(i) for i in range(3)))
+        tracer.end_component("agent")
+
+    asyncio.run(main())
+
+    assert urls(tracer, "agent") == [f"https://llm/{i}" for i in range(3)]
+
+
+def test_executor_jobs_are_attributed_to_submitter(tracer, thread_pool_context):
+    tracer.start_component("agent")
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(lambda i: record(tracer, f"https://tool/{i}"), range(6)))
+    tracer.end_component("agent")
+
+    assert urls(tracer, "agent") == [f"https://tool/{i}" for i in range(6)]
+
+
+def test_nested_component_does_not_erase_parent_calls(tracer):
+    tracer.start_component("agent")
+    record(tracer, "https://agent/before")
+    tracer.start_component("tool")
+    record(tracer, "https://tool")
+    tracer.end_component("tool")
+    record(tracer, "https://agent/after")
+    tracer.end_component("agent")
+    record(tracer, "https://outside")
+
+    assert urls(tracer, "agent") == ["https://agent/after", "https://agent/before"]
+    assert urls(tracer, "tool") == ["https://tool"]
+    assert [call["url"] for call in tracer.network_tracer.network_calls] == ["https://outside"]
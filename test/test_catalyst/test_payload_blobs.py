@@ -0,0 +1,118 @@
+import copy
+import json
+
+import pytest
+
+from ragaai_catalyst.tracers.agentic_tracing.data.data_structure import LLMComponent
+from ragaai_catalyst.tracers.agentic_tracing.utils.payload_blobs import (
+    BLOB_REF,
+    BlobEncoder,
+    decode_blobs,
+    encode_blobs,
+    resolve_blob_threshold,
+)
+from ragaai_catalyst.tracers.agentic_tracing.utils.trace_format import TraceReader
+
+SYSTEM_PROMPT = "You are a helpful assistant. " * 100
+DOCUMENT = {"page_content": "lorem ipsum " * 200, "metadata": {"source": "doc"}}
+
+
+def make_trace():
+    spans = []
+    for i in range(10):
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": f"question {i}"}]
+        spans.append({
+            "id": f"llm-{i}",
+            "type": "llm",
+            "data": {"input": messages, "output": f"answer {i}"},
+            "network_calls": [{
+                "url": "https://api",
+                "request": {"headers": {}, "body": {"model": "gpt-4o", "messages": messages}},
+                "response": {"headers": {}, "body": None},
+            }],
+        })
+    spans.append({
+        "id": "agent",
+        "type": "agent",
+        "data": {"children": [
+            {"id": "tool", "type": "tool", "data": {"input": {"args": [], "kwargs": {}}, "output": [DOCUMENT] * 3}},
+        ]},
+    })
+    workflow = [{"id": str(i + 1), "content": {"prompt": span["data"].get("input")}} for i, span in enumerate(spans)]
+    return {"id": "trace-1", "data": [{"spans": spans}], "workflow": workflow}
+
+
+def test_resolve_blob_threshold(monkeypatch):
+    monkeypatch.delenv("RAGAAI_CATALYST_TRACE_BLOB_THRESHOLD", raising=False)
+    assert resolve_blob_threshold() is None
+    monkeypatch.setenv("RAGAAI_CATALYST_TRACE_BLOB_THRESHOLD", "1024")
+    assert resolve_blob_threshold() == 1024
+    with pytest.raises(ValueError, match="positive"):
+        resolve_blob_threshold(0)
+
+
+def test_large_payloads_are_stored_once():
+    encoder = BlobEncoder(threshold=256)
+    tools = [{"name": f"tool-{i}", "description": "x" * 100} for i in range(5)]
+    encoded = encoder.encode({"prompt": SYSTEM_PROMPT, "tools": tools, "small": "hi", "again": SYSTEM_PROMPT})
+
+    assert encoded["small"] == "hi"
+    # The same string is one blob
+    assert encoded["prompt"] == encoded["again"] and BLOB_REF in encoded["prompt"]
+    # Items under the threshold are kept, the list holding them is larger and becomes a blob
+    assert encoder.blobs[encoded["tools"][BLOB_REF]] == tools
+    assert len(encoder.blobs) == 2
+
+
+def test_round_trip(tmp_path):
+    trace = make_trace()
+    original = copy.deepcopy(trace)
+    encoded = encode_blobs(trace, threshold=1024)
+
+    # The trace is left as it was
+    assert trace == original
+    assert encoded["data"][0]["spans"][0]["data"]["input"][0]["content"] == {
+        BLOB_REF: next(iter(encoded["blobs"]))}
+    assert len(json.dumps(encoded)) < len(json.dumps(trace)) / 3
+    assert decode_blobs(copy.deepcopy(encoded)) == original
+
+
+def test_readers_restore_payloads(save_trace):
+    trace = make_trace()
+    path = save_trace(encode_blobs(trace, threshold=1024))
+
+    reader = TraceReader(path)
+    assert reader.has_blobs
+    assert "blobs" not in reader.header
+    assert list(reader.iter_spans()) == trace["data"][0]["spans"]
+    assert reader.read() == trace
+
+    assert not TraceReader(save_trace(trace, "plain.json")).has_blobs
+
+
+def test_dicts_looking_like_references_are_escaped(save_trace):
+    trace = make_trace()
+    lookalikes = [{BLOB_REF: "not a digest"}, {"$" + BLOB_REF: [{BLOB_REF: 1}]}, {BLOB_REF: 1, "other": 2}]
+    trace["data"][0]["spans"][0]["data"]["output"] = lookalikes
+    trace["workflow"][0]["content"] = {BLOB_REF: SYSTEM_PROMPT}
+    original = copy.deepcopy(trace)
+    encoded = encode_blobs(trace, threshold=1024)
+
+    assert encoded["data"][0]["spans"][0]["data"]["output"][:2] == [
+        {"$" + BLOB_REF: "not a digest"}, {"$$" + BLOB_REF: [{"$" + BLOB_REF: 1}]}]
+    assert decode_blobs(copy.deepcopy(encoded)) == original
+    assert TraceReader(save_trace(encoded)).read() == original
+
+
+def test_components_are_encoded():
+    component = LLMComponent("llm", "h", None, "llm", "chat", "a", "b", None, {},
+                             data={"input": SYSTEM_PROMPT, "output": "answer"})
+    encoded = encode_blobs({"data": [{"spans": [component]}]}, threshold=1024)
+
+    assert encoded["data"][0]["spans"][0]["data"]["input"] == {BLOB_REF: next(iter(encoded["blobs"]))}
+    assert component.data["input"] == SYSTEM_PROMPT
+
+
+def test_upload_restores_payloads(upload_trace):
+    trace = make_trace()
+    assert upload_trace(encode_blobs(trace, threshold=1024)) == trace
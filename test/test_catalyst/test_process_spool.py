@@ -0,0 +1,131 @@
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from ragaai_catalyst.tracers.agentic_tracing import AgenticTracing
+from ragaai_catalyst.tracers.agentic_tracing.utils.process_spool import (
+    monkey_patch_process_pool,
+    read_records,
+    restore_process_pool,
+    spool_path,
+)
+from ragaai_catalyst.tracers.utils.sanitization import Sanitizer
+
+pytestmark = pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="worker tests fork the test process"
+)
+
+_tracer = None
+
+
+def square(x):
+    return x * x
+
+
+def traced_tool(x):
+    _tracer.add_component({
+        "id": str(uuid.uuid4()),
+        "hash_id": "hash",
+        "source_hash_id": None,
+        "type": "tool",
+        "name": f"tool-{x}",
+        "start_time": "start",
+        "end_time": "end",
+        "parent_id": None,
+        "info": {"pid": os.getpid()},
+        "data": {"input": x, "output": x},
+    })
+    return x
+
+
+def traced_odd(x):
+    return traced_tool(x) if x % 2 else square(x)
+
+
+def long_text(x):
+    return "page " * x
+
+
+@pytest.fixture
+def tracer():
+    global _tracer
+    _tracer = AgenticTracing({
+        "project_name": "project",
+        "project_id": "project-id",
+        "dataset_name": "dataset",
+        "trace_name": "trace",
+        "interval_time": 1,
+        "trace_user_detail": {},
+    })
+    _tracer.trace_id = str(uuid.uuid4())
+    _tracer.components = [{"type": "agent", "id": "agent-1", "data": {"children": []}}]
+    originals = monkey_patch_process_pool(_tracer)
+    yield _tracer
+    restore_process_pool(originals)
+    if os.path.exists(spool_path(_tracer.trace_id)):
+        os.remove(spool_path(_tracer.trace_id))
+
+
+def run_in_agent(tracer, fn, values):
+    token = tracer.current_agent_id.set("agent-1")
+    try:
+        with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("fork")) as executor:
+            results = list(executor.map(fn, values))
+            results.append(executor.submit(fn, values[-1] + 1).result())
+    finally:
+        tracer.current_agent_id.reset(token)
+    return results
+
+
+def test_untraced_worker_calls_are_recorded(tracer):
+    assert run_in_agent(tracer, square, [1, 2, 3]) == [1, 4, 9, 16]
+
+    records = read_records(spool_path(tracer.trace_id))
+    assert len(records) == 4
+    assert {record["parent_id"] for record in records} == {"agent-1"}
+    assert sorted(record["component"]["data"]["output"] for record in records) == [1, 4, 9, 16]
+    assert all(record["component"]["info"]["pid"] != os.getpid() for record in records)
+
+
+def test_worker_components_are_merged_into_parent_agent(tracer):
+    run_in_agent(tracer, traced_tool, [1, 2])
+    tracer._merge_process_spool()
+
+    children = tracer.components[0]["data"]["children"]
+    assert sorted(child["name"] for child in children) == ["tool-1", "tool-2", "tool-3"]
+    assert all(child["info"]["pid"] != os.getpid() for child in children)
+    # The parent trace only gets the components through the spool
+    assert len(tracer.components) == 1
+    assert not os.path.exists(spool_path(tracer.trace_id))
+
+
+def test_components_without_agent_go_to_the_trace(tracer):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("fork")) as executor:
+        executor.submit(square, 3).result()
+    tracer._merge_process_spool()
+
+    assert len(tracer.components) == 2
+    assert tracer.components[1].name.endswith("square")
+
+
+def test_calls_of_a_map_chunk_are_recorded_independently(tracer):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("fork")) as executor:
+        assert list(executor.map(traced_odd, [1, 2, 3, 4], chunksize=4)) == [1, 4, 3, 16]
+
+    records = read_records(spool_path(tracer.trace_id))
+    assert sorted(record["component"]["name"].rsplit(".", 1)[-1] for record in records) == \
+        ["tool-1", "tool-3", "traced_odd", "traced_odd"]
+
+
+def test_recorded_calls_are_sanitized(tracer):
+    tracer.sanitizer = Sanitizer(max_string_bytes=10)
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("fork")) as executor:
+        executor.submit(long_text, 1000).result()
+
+    component = read_records(spool_path(tracer.trace_id))[0]["component"]
+    assert component["data"]["input"] == {"args": [1000], "kwargs": {}}
+    assert component["data"]["output"].startswith("page page ")
+    assert len(component["data"]["output"]) < 100
@@ -0,0 +1,91 @@
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+from ragaai_catalyst.prompt_manager import PromptCache, PromptManager, PromptObject
+
+
+@pytest.fixture
+def prompt_text():
+    return [
+        {"role": "system", "content": "You answer questions about {{topic}}. Keep {{ spaced }} and {{\"quoted\"}}."},
+        {"role": "user", "content": "{{question}} about {{topic}}"},
+    ]
+
+
+def test_compile_fills_placeholders(prompt_text):
+    prompt = PromptObject(prompt_text, [], "gpt-4o-mini")
+    compiled = prompt.compile(topic="France", question="What is the capital?", spaced="x")
+    assert compiled == [
+        {"role": "system", "content": "You answer questions about France. Keep {{ spaced }} and {{\"quoted\"}}."},
+        {"role": "user", "content": "What is the capital? about France"},
+    ]
+    assert prompt.text[1]["content"] == "{{question}} about {{topic}}"
+    assert sorted(prompt.get_variables()) == ["question", "spaced", "topic"]
+
+
+def test_compile_validates_variables(prompt_text):
+    prompt = PromptObject(prompt_text, [], "gpt-4o-mini")
+    with pytest.raises(ValueError, match="Missing variable"):
+        prompt.compile(topic="France", spaced="x")
+    with pytest.raises(ValueError, match="Extra variable"):
+        prompt.compile(topic="France", question="q", spaced="x", other="y")
+    with pytest.raises(ValueError, match="must be a string"):
+        prompt.compile(topic="France", question=1, spaced="x")
+
+
+def test_text_reassignment_recompiles(prompt_text):
+    prompt = PromptObject(prompt_text, [], "gpt-4o-mini")
+    prompt.compile(topic="a", question="b", spaced="c")
+    prompt.text = [{"role": "user", "content": "Hi {{name}}"}]
+    assert prompt.compile(name="Ada") == [{"role": "user", "content": "Hi Ada"}]
+
+
+def make_response(status_code, etag="v1", content="Hello"):
+    response = MagicMock(status_code=status_code, headers={"ETag": etag})
+    response.json.return_value = {"data": {"docs": [{
+        "textFields": [{"role": "user", "content": content}],
+        "modelSpecs": {"parameters": [], "model": "gpt-4o-mini"}}]}}
+    return response
+
+
+@pytest.fixture
+def prompt_manager():
+    with patch.object(PromptManager, "__init__", lambda self, *args, **kwargs: None):
+        manager = PromptManager("project")
+    manager.project_name = "project"
+    manager.base_url = "http://catalyst/playground/prompt"
+    manager.headers = {}
+    manager.timeout = 10
+    manager.prompt_cache = PromptCache(ttl=60, background_refresh=False)
+    return manager
+
+
+def test_cached_prompt_is_revalidated_with_etag(prompt_manager):
+    with patch.object(prompt_manager, "_fetch_prompt",
+                      return_value=PromptObject([{"role": "user", "content": "Hello"}], [], "m", etag="v1")) as fetch:
+        first = prompt_manager.get_prompt("greeting")
+        assert prompt_manager.get_prompt("greeting") is first
+    assert fetch.call_count == 1
+
+    prompt_manager.prompt_cache.ttl = 0
+    with patch("ragaai_catalyst.prompt_manager.requests.get", return_value=make_response(304)) as get:
+        assert prompt_manager.get_prompt("greeting") is first
+    assert get.call_args.kwargs["headers"]["If-None-Match"] == "v1"
+
+    with patch("ragaai_catalyst.prompt_manager.requests.get", return_value=make_response(200, "v2", "Hi")):
+        updated = prompt_manager.get_prompt("greeting")
+    assert updated.etag == "v2" and updated.text[0]["content"] == "Hi"
+
+
+def test_background_refresh_serves_stale_prompt(prompt_manager):
+    prompt_manager.prompt_cache = PromptCache(ttl=0, background_refresh=True)
+    stale = PromptObject([{"role": "user", "content": "Hello"}], [], "m", etag="v1")
+    prompt_manager.prompt_cache.put(("project", "greeting", None), stale)
+    with patch("ragaai_catalyst.prompt_manager.requests.get", return_value=make_response(200, "v2", "Hi")):
+        assert prompt_manager.get_prompt("greeting") is stale
+        for _ in range(100):
+            if prompt_manager.prompt_cache.get(("project", "greeting", None))["prompt"] is not stale:
+                break
+            time.sleep(0.01)
+    assert prompt_manager.prompt_cache.get(("project", "greeting", None))["prompt"].etag == "v2"
@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from ragaai_catalyst import SyntheticDataGeneration
+from ragaai_catalyst.qna_dedup import NearDuplicateIndex
+
+SAMPLE_TEXT = "The Eiffel Tower was completed in 1889 and is located in Paris, the capital of France."
+
+
+def test_exact_and_normalized_duplicates_are_dropped():
+    index = NearDuplicateIndex()
+    keep, duplicate_rate = index.filter_batch([
+        "What is the capital of France?",
+        "what is the capital of France",
+        "When was the Eiffel Tower completed?",
+    ])
+    assert keep == [True, False, True]
+    assert duplicate_rate == pytest.approx(1 / 3)
+    assert len(index) == 2
+
+
+def test_near_duplicates_across_batches():
+    index = NearDuplicateIndex(threshold=0.7)
+    index.filter_batch(["In which year was the tower in Paris finally completed by the engineers?"])
+    assert index.is_duplicate("In which year was the tower in Paris finally completed by engineers?")
+    assert not index.is_duplicate("Who designed the tower?")
+
+
+def test_embedding_threshold_catches_paraphrases():
+    vectors = {
+        "What is the capital of France?": [1.0, 0.0],
+        "Which city is France's capital?": [0.99, 0.01],
+        "Who built the tower?": [0.0, 1.0],
+    }
+    index = NearDuplicateIndex(embedding_fn=lambda texts: [vectors[text] for text in texts])
+    keep, _ = index.filter_batch(list(vectors))
+    assert keep == [True, False, True]
+
+
+def test_invalid_threshold():
+    with pytest.raises(ValueError, match="threshold"):
+        NearDuplicateIndex(threshold=0)
+
+
+def test_generate_qna_requests_only_shortfall():
+    synthetic_gen = SyntheticDataGeneration()
+    batches = [
+        pd.DataFrame({"Question": ["Q one about Paris?", "Q one about Paris?", "Q two about towers?"],
+                      "Answer": ["a", "a", "b"]}),
+        pd.DataFrame({"Question": ["Q three about France?"], "Answer": ["c"]}),
+    ]
+    requested_sizes = []
+
+    def fake_system_message(question_type, n):
+        requested_sizes.append(n)
+        return ""
+
+    with patch.object(synthetic_gen, "_initialize_client"), \
+            patch.object(synthetic_gen, "_get_system_message", side_effect=fake_system_message), \
+            patch.object(synthetic_gen, "_generate_batch_response", side_effect=batches):
+        result = synthetic_gen.generate_qna(SAMPLE_TEXT, n=3, model_config={"provider": "openai", "model": "gpt-4o-mini"})
+
+    assert list(result["Question"]) == ["Q one about Paris?", "Q two about towers?", "Q three about France?"]
+    assert requested_sizes == [3, 1]
+    assert [stat["duplicates"] for stat in synthetic_gen.dedup_stats] == [1, 0]
@@ -0,0 +1,68 @@
+import asyncio
+
+from ragaai_catalyst.tracers.exporters.raga_exporter import RagaExporter
+
+
+class FakeExporter(RagaExporter):
+    def __init__(self, failing=()):
+        self.project_name = "project"
+        self.dataset_name = "dataset"
+        self.max_urls = 2
+        self.max_concurrency = 3
+        self.upload_results = []
+        self.failing = set(failing)
+        self.url_requests = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def get_presigned_url(self, session, num_files):
+        self.url_requests.append(num_files)
+        await asyncio.sleep(0.01)
+        start = sum(self.url_requests[:-1])
+        return {"success": True, "data": {"presignedUrls": [f"url-{start + i}" for i in range(num_files)]}}
+
+    async def upload_file(self, session, url, file_path):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.02)
+        self.in_flight -= 1
+        return 500 if file_path in self.failing else 200
+
+    async def stream_trace(self, session, trace_uri):
+        return 200
+
+
+def make_files(tmp_path, count):
+    (tmp_path / "backup").mkdir()
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"trace{i}.json"
+        path.write_text("[]")
+        paths.append(str(path))
+    return paths
+
+
+def test_uploads_run_concurrently_and_report_per_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("RAGAAI_CATALYST_TOKEN", "token")
+    paths = make_files(tmp_path, 5)
+    exporter = FakeExporter(failing={paths[1]})
+
+    results = asyncio.run(exporter.check_and_upload_files(None, paths + [str(tmp_path / "missing.json")],
+                                                          return_results=True))
+
+    assert sorted(exporter.url_requests) == [2, 2, 2]
+    assert exporter.peak == 3
+    assert [result["status"] for result in results] == [
+        "streamed", "upload_failed", "streamed", "streamed", "streamed", "missing"
+    ]
+    assert (tmp_path / "backup" / "trace0_backup.json").exists()
+    assert not (tmp_path / "trace0.json").exists()
+    assert (tmp_path / "trace1.json").exists()
+
+
+def test_default_return_value_is_kept(tmp_path, monkeypatch):
+    monkeypatch.setenv("RAGAAI_CATALYST_TOKEN", "token")
+    exporter = FakeExporter()
+    assert asyncio.run(exporter.check_and_upload_files(None, make_files(tmp_path, 1))) == "upload successful"
+    assert exporter.upload_results[0]["status"] == "streamed"
+    assert asyncio.run(exporter.check_and_upload_files(None, [])) is None
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pandas as pd
+import pytest
+from giskard.scanner.scanner import Scanner
+
+from ragaai_catalyst import RedTeaming
+from ragaai_catalyst.redteaming import ConcurrentModelRunner
+
+
+def make_probes(n):
+    return pd.DataFrame({"question": [f"question {i}" for i in range(n)]})
+
+
+def test_sync_model_batches_run_concurrently_in_order():
+    in_flight, peak = [0], [0]
+    lock = threading.Lock()
+
+    def model(df):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return [f"answer to {question}" for question in df["question"]]
+
+    runner = ConcurrentModelRunner(model, concurrency=4, batch_size=2)
+    outputs = runner.predict(make_probes(8))
+
+    assert outputs == [f"answer to question {i}" for i in range(8)]
+    assert peak[0] == 4
+    assert runner.stats()["calls"] == 4
+    assert runner.stats()["rows"] == 8
+
+
+def test_default_batch_size_splits_probes_across_workers():
+    batch_sizes = []
+
+    def model(df):
+        batch_sizes.append(len(df))
+        return list(df["question"])
+
+    ConcurrentModelRunner(model, concurrency=3).predict(make_probes(7))
+    assert sorted(batch_sizes) == [1, 3, 3]
+
+
+def test_async_model_respects_semaphore():
+    in_flight, peak = [0], [0]
+
+    async def model(df):
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.02)
+        in_flight[0] -= 1
+        return list(df["question"])
+
+    runner = ConcurrentModelRunner(model, concurrency=2, batch_size=1)
+    assert runner.predict(make_probes(5)) == [f"question {i}" for i in range(5)]
+    assert peak[0] == 2
+
+
+def test_rate_limit_spaces_call_starts():
+    starts = []
+
+    def model(df):
+        starts.append(time.monotonic())
+        return list(df["question"])
+
+    ConcurrentModelRunner(model, concurrency=4, batch_size=1, rate_limit=20).predict(make_probes(4))
+    starts.sort()
+    assert starts[-1] - starts[0] >= 0.14
+
+
+def test_invalid_concurrency():
+    with pytest.raises(ValueError, match="concurrency"):
+        ConcurrentModelRunner(Mock(), concurrency=0)
+
+
+def test_run_scan_reports_evaluator_timings(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test_api_key")
+    red_teaming = RedTeaming()
+
+    detector = Mock()
+    detector.__class__ = type("FakeDetector", (), {})
+
+    def detector_run(model, dataset, features=None):
+        model.predict(make_probes(4))
+        return ["issue"]
+
+    detector.run = detector_run
+
+    def get_detectors(self, *args, **kwargs):
+        return [detector]
+
+    def fake_analyze(self, model_instance, **kwargs):
+        # Scans run by other code are not timed
+        assert Scanner.get_detectors is get_detectors
+        assert Scanner().get_detectors() == [detector] and detector.run is detector_run
+        for scan_detector in self.get_detectors():
+            scan_detector.run(Mock(predict=model_instance.model), None)
+        report = Mock()
+        report.to_dataframe.return_value = pd.DataFrame({"result": ["fail"]})
+        return report
+
+    with patch.object(red_teaming, "set_scanning_model"), \
+            patch.object(Scanner, "get_detectors", get_detectors), \
+            patch.object(Scanner, "analyze", fake_analyze):
+        report_df = red_teaming.run_scan(
+            model=lambda df: list(df["question"]), save_report=False, concurrency=2
+        )
+
+    timings = report_df.attrs["evaluator_timings"]
+    assert list(timings["detector"]) == ["FakeDetector"]
+    assert timings.iloc[0]["model_calls"] == 2
+    assert timings.iloc[0]["model_rows"] == 4
+    assert timings.iloc[0]["issues"] == 1
+    assert red_teaming.evaluator_timings is timings
@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from ragaai_catalyst.tracers.agentic_tracing import AgenticTracing
+from ragaai_catalyst.tracers.agentic_tracing.utils.llm_utils import extract_input_data
+from ragaai_catalyst.tracers.utils import serialization
+from ragaai_catalyst.tracers.utils.sanitization import Sanitizer
+from ragaai_catalyst.tracers.utils.serialization import MAX_DEPTH_EXCEEDED
+
+
+class Document:
+    str_calls = 0
+
+    def __init__(self, text):
+        self.text = text
+
+    def __str__(self):
+        Document.str_calls += 1
+        return self.text
+
+
+def test_limits_leave_markers():
+    sanitizer = Sanitizer(max_depth=3, max_items=2, max_string_bytes=4)
+    sanitized = sanitizer.sanitize_input(
+        ("héllo", [1, 2, 3, 4], {"a": 1, "b": 2, "c": 3}, [[["deep"]]]), {"flag": True, "none": None})
+
+    # 'é' is 2 bytes in UTF-8
+    assert sanitized["args"][0] == "hél...[2 more bytes]"
+    assert sanitized["args"][1] == [1, 2, "...[2 more items]"]
+    assert sanitized["args"][2] == {"a": 1, "b": 2, "...": "[1 more items]"}
+    assert sanitized["args"][3] == [[MAX_DEPTH_EXCEEDED]]
+    assert sanitized["kwargs"] == {"flag": True, "none": "None"}
+
+
+def test_objects_are_saved_as_a_bounded_snapshot():
+    Document.str_calls = 0
+    document = Document("x" * 10)
+    sanitizer = Sanitizer(max_string_bytes=8)
+    sanitized = sanitizer.sanitize_input(([document, document], {"same": document}), {})
+
+    # Shared objects are converted once
+    assert Document.str_calls == 1
+    [documents, mapping] = sanitized["args"]
+    assert documents == ["xxxxxxxx...[2 more bytes]"] * 2 and mapping["same"] == documents[0]
+    # Later changes of the object are not saved
+    document.text = "changed"
+    assert json.loads(serialization.dumps(sanitized))["args"][0] == ["xxxxxxxx...[2 more bytes]"] * 2
+    assert sanitizer.sanitize_output((1, 2)) == "(1, 2)"
+
+
+def test_shared_and_cyclic_containers():
+    documents = [{"text": "a"}]
+    cycle = []
+    cycle.append(cycle)
+    sanitized = Sanitizer().sanitize_input((documents, documents, cycle), {})
+
+    assert sanitized["args"][0] is sanitized["args"][1]
+    assert sanitized["args"][2][0] is sanitized["args"][2]
+    assert json.loads(serialization.dumps(sanitized["args"][2])) == [serialization.CIRCULAR_REFERENCE]
+
+
+def test_numpy_and_pandas_are_summarized():
+    frame = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+    embedding = np.zeros(1536, dtype=np.float32)
+    sanitized = extract_input_data((frame, embedding, np.int64(3)), {"column": frame["a"]}, None)
+
+    assert sanitized["args"] == [
+        {"type": "DataFrame", "shape": [3, 2], "columns": ["a", "b"]},
+        {"shape": [1536], "dtype": "float32"},
+        3,
+    ]
+    assert sanitized["kwargs"]["column"] == {"type": "Series", "shape": [3], "dtype": "int64", "name": "a"}
+
+
+def test_tracer_sanitizer():
+    user_detail = {
+        "project_name": "project",
+        "project_id": "project-id",
+        "dataset_name": "dataset",
+        "trace_name": "trace",
+        "interval_time": 1,
+        "trace_user_detail": {},
+    }
+    tracer = AgenticTracing(user_detail, sanitizer=Sanitizer(max_items=1))
+    assert tracer._sanitize_input(([1, 2],), {}) == {"args": [[1, "...[1 more items]"]], "kwargs": {}}
+    assert tracer._sanitize_output([1, 2]) == [1, "...[1 more items]"]
+    assert AgenticTracing(user_detail)._sanitize_output([1, 2]) == [1, 2]
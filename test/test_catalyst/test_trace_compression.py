@@ -0,0 +1,66 @@
+import gzip
+import json
+
+import pytest
+import zstandard
+
+from ragaai_catalyst.tracers.utils.compression import (
+    compress_payload,
+    open_trace_file,
+    read_upload_payload,
+    resolve_compression,
+    upload_headers,
+)
+
+TRACE = {"data": [{"spans": [{"name": f"span {i}", "input": "hello\nworld"} for i in range(50)]}]}
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "trace.json"
+    path.write_text(json.dumps(TRACE, indent=2))
+    return str(path)
+
+
+def test_resolve_compression(monkeypatch):
+    monkeypatch.delenv("RAGAAI_CATALYST_TRACE_COMPRESSION", raising=False)
+    assert resolve_compression() is None
+    monkeypatch.setenv("RAGAAI_CATALYST_TRACE_COMPRESSION", "GZIP")
+    assert resolve_compression() == "gzip"
+    assert resolve_compression("none") is None
+    with pytest.raises(ValueError, match="Unsupported compression"):
+        resolve_compression("brotli")
+
+
+def test_plain_payload_strips_line_breaks(trace_file):
+    payload = read_upload_payload(trace_file)
+    assert b"\n" not in payload
+    assert json.loads(payload) == TRACE
+
+
+def test_compressed_payloads_round_trip(trace_file):
+    gzip_payload = read_upload_payload(trace_file, "gzip")
+    assert json.loads(gzip.decompress(gzip_payload)) == TRACE
+    assert len(gzip_payload) < len(read_upload_payload(trace_file)) / 5
+
+    zstd_payload = read_upload_payload(trace_file, "zstd")
+    assert json.loads(zstandard.ZstdDecompressor().decompressobj().decompress(zstd_payload)) == TRACE
+    assert gzip.decompress(compress_payload(b"[]", "gzip")) == b"[]"
+
+
+def test_compressed_local_files_are_read_transparently(tmp_path):
+    path = str(tmp_path / "trace.json.gz")
+    with open_trace_file(path, "wt") as f:
+        json.dump(TRACE, f)
+    with open_trace_file(path) as f:
+        assert json.load(f) == TRACE
+    assert json.loads(gzip.decompress(read_upload_payload(path, "gzip"))) == TRACE
+    assert json.loads(read_upload_payload(path)) == TRACE
+
+
+def test_upload_headers_declare_encoding():
+    assert upload_headers("https://bucket.s3.amazonaws.com/x", "gzip")["Content-Encoding"] == "gzip"
+    azure = upload_headers("https://acct.blob.core.windows.net/x", "zstd")
+    assert azure["x-ms-blob-type"] == "BlockBlob"
+    assert azure["x-ms-blob-content-encoding"] == "zstd"
+    assert "Content-Encoding" not in upload_headers("https://bucket.s3.amazonaws.com/x")
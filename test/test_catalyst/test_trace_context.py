@@ -0,0 +1,211 @@
+import asyncio
+import json
+import threading
+import uuid
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from ragaai_catalyst.tracers.agentic_tracing import AgenticTracing
+from ragaai_catalyst.tracers.agentic_tracing.tracers.base import BaseTracer
+from ragaai_catalyst.tracers.agentic_tracing.utils.trace_context import TraceContext, inject_headers
+from ragaai_catalyst.tracers.agentic_tracing.utils.trace_stitcher import latency_hot_spots, stitch_traces
+from ragaai_catalyst.tracers.middleware import AsyncTraceContextMiddleware, TraceContextMiddleware
+
+TRACEPARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({key.lower(): value for key, value in self.headers.items()}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = HTTPServer(("127.0.0.1", 0), EchoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture
+def tracer():
+    tracer = AgenticTracing({
+        "project_name": "project",
+        "project_id": "project-id",
+        "dataset_name": "dataset",
+        "trace_name": "trace",
+        "interval_time": 1,
+        "trace_user_detail": {},
+    }, propagate_trace_context=True)
+    tracer.trace_id = str(uuid.uuid4())
+    tracer.network_tracer.activate_patches()
+    yield tracer
+    tracer.network_tracer.deactivate_patches()
+
+
+def test_parse_traceparent():
+    context = TraceContext.from_headers([(b"Traceparent", TRACEPARENT.encode()), (b"tracestate", b"vendor=1")])
+    assert (context.trace_id, context.span_id, context.flags) == (
+        "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", "01")
+    assert context.traceparent == TRACEPARENT
+    assert context.tracestate == "vendor=1"
+    for invalid in ["", "00-4bf92f35-00f067aa0ba902b7-01", f"00-{'0' * 32}-00f067aa0ba902b7-01", TRACEPARENT + "-x"]:
+        assert TraceContext.parse(invalid) is None
+
+
+def test_inject_keeps_existing_traceparent():
+    headers = inject_headers({"TraceParent": TRACEPARENT}, TraceContext("a" * 32, "b" * 16))
+    assert headers == {"TraceParent": TRACEPARENT}
+
+
+def test_outbound_calls_carry_the_trace(tracer, server):
+    received = requests.get(f"http://{server}/", headers={"x-test": "1"}).json()
+    context = TraceContext.parse(received["traceparent"])
+    assert context.trace_id == uuid.UUID(tracer.trace_id).hex
+    assert received["x-test"] == "1"
+
+    connection = HTTPConnection(*server.split(":"))
+    connection.request("GET", "/")
+    # The http.client patch reads the response to record it
+    recorded = tracer.network_tracer.network_calls[-1]
+    assert TraceContext.parse(recorded["request"]["headers"]["traceparent"]).span_id != context.span_id
+
+
+def test_calls_of_a_child_trace_share_the_parent_trace(tracer, server):
+    tracer.accept_trace_context({"traceparent": TRACEPARENT})
+    received = requests.get(f"http://{server}/").json()
+    context = TraceContext.parse(received["traceparent"])
+    assert context.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert context.span_id != "00f067aa0ba902b7"
+
+
+def test_calls_are_not_propagated_by_default(server):
+    tracer = AgenticTracing({
+        "project_name": "project",
+        "project_id": "project-id",
+        "dataset_name": "dataset",
+        "trace_name": "trace",
+        "interval_time": 1,
+        "trace_user_detail": {},
+    })
+    tracer.trace_id = str(uuid.uuid4())
+    tracer.network_tracer.activate_patches()
+    try:
+        assert "traceparent" not in requests.get(f"http://{server}/").json()
+    finally:
+        tracer.network_tracer.deactivate_patches()
+
+
+@pytest.fixture
+def session_tracer():
+    tracer = BaseTracer({
+        "project_name": "project",
+        "dataset_name": "dataset",
+        "project_id": "project-id",
+        "trace_name": "default",
+        "interval_time": 1,
+    })
+    tracer.system_monitor = MagicMock()
+    finalized = []
+
+    def finalize(self):
+        finalized.append((self.trace_id, self.parent_context))
+
+    with patch.object(BaseTracer, "_get_system_info"), patch.object(BaseTracer, "_get_resources"), \
+            patch("ragaai_catalyst.tracers.agentic_tracing.tracers.base.Metadata"), \
+            patch("ragaai_catalyst.tracers.agentic_tracing.tracers.base.Trace"), \
+            patch.object(BaseTracer, "_finalize_trace", finalize):
+        tracer.finalized = finalized
+        yield tracer
+
+
+def test_wsgi_middleware_records_the_parent(session_tracer):
+    def app(environ, start_response):
+        start_response("200 OK", [])
+        yield session_tracer.trace_id.encode()
+
+    middleware = TraceContextMiddleware(app, session_tracer)
+    response = middleware({"HTTP_TRACEPARENT": TRACEPARENT, "HTTP_TRACESTATE": "vendor=1"}, lambda *args: None)
+    body = b"".join(response)
+    assert session_tracer.finalized == []
+    response.close()
+
+    [(trace_id, parent_context)] = session_tracer.finalized
+    assert body == trace_id.encode()
+    assert parent_context.to_dict() == {
+        "trace_id": "4bf92f3577b34da6a3ce929d0e0e4736", "parent_span_id": "00f067aa0ba902b7", "tracestate": "vendor=1"}
+    assert session_tracer.parent_context is None
+
+
+def test_asgi_middleware_records_the_parent(session_tracer):
+    async def app(scope, receive, send):
+        await send(session_tracer.parent_context.traceparent)
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = AsyncTraceContextMiddleware(app, session_tracer)
+    asyncio.run(middleware({"type": "http", "headers": [(b"traceparent", TRACEPARENT.encode())]}, None, send))
+
+    assert sent == [TRACEPARENT]
+    assert session_tracer.finalized[0][1].traceparent == TRACEPARENT
+
+
+def write_trace(directory, name, start, end, spans, trace_context=None):
+    trace = {
+        "id": str(uuid.uuid4()),
+        "trace_name": name,
+        "start_time": f"2024-01-01T00:00:{start:02d}+00:00",
+        "end_time": f"2024-01-01T00:00:{end:02d}+00:00",
+        "data": [{"spans": spans}],
+    }
+    if trace_context:
+        trace["trace_context"] = trace_context
+    with open(directory / f"{trace['id']}.json", "w") as f:
+        json.dump(trace, f)
+
+
+def span(name, start, end, traceparent=None, children=None):
+    return {
+        "name": name,
+        "type": "agent" if children else "tool",
+        "start_time": f"2024-01-01T00:00:{start:02d}+00:00",
+        "end_time": f"2024-01-01T00:00:{end:02d}+00:00",
+        "network_calls": [{"request": {"headers": {"Traceparent": traceparent}}}] if traceparent else [],
+        "data": {"children": children or []},
+    }
+
+
+def test_stitch_traces(tmp_path):
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    call = f"00-{trace_id}-00f067aa0ba902b7-01"
+    write_trace(tmp_path, "planner", 0, 10, [span("plan", 0, 10, children=[span("search", 1, 9, call)])])
+    write_trace(tmp_path, "search-service", 2, 8, [span("retrieve", 2, 7)],
+                {"trace_id": trace_id, "parent_span_id": "00f067aa0ba902b7", "tracestate": None})
+    (tmp_path / "other.json").write_text("[]")
+
+    [distributed_trace] = stitch_traces(str(tmp_path))
+
+    [root] = distributed_trace["roots"]
+    assert root["service"] == "planner"
+    search = root["children"][0]["children"][0]
+    assert search["name"] == "search"
+    [child_trace] = search["children"]
+    assert (child_trace["type"], child_trace["service"], child_trace["duration"]) == ("trace", "search-service", 6.0)
+
+    hot_spots = latency_hot_spots([distributed_trace], top=3)
+    assert [(hot_spot["name"], hot_spot["self_time"]) for hot_spot in hot_spots[:1]] == [("retrieve", 5.0)]
+    assert sorted(hot_spot["name"] for hot_spot in hot_spots[1:]) == ["plan", "search"]
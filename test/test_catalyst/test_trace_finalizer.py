@@ -0,0 +1,155 @@
+import threading
+
+from ragaai_catalyst.tracers.agentic_tracing.data.data_structure import Component
+from ragaai_catalyst.tracers.agentic_tracing.utils.trace_finalizer import TraceFinalizer
+from ragaai_catalyst.tracers.agentic_tracing.utils.workflow_builder import WorkflowBuilder
+
+
+def span(span_type, name, second, **fields):
+    values = {
+        "id": f"{name}-{second}",
+        "hash_id": f"{name}-hash",
+        "source_hash_id": None,
+        "type": span_type,
+        "name": name,
+        "start_time": f"2025-01-01T00:00:{second:02d}",
+        "end_time": f"2025-01-01T00:00:{second + 1:02d}",
+        "parent_id": None,
+        "info": {},
+        "error": None,
+        "data": {},
+        "metrics": [],
+        "network_calls": [],
+        "interactions": [],
+    }
+    values.update(fields)
+    return values
+
+
+def llm(name, second, output="answer", model="gpt-4o", **fields):
+    return span("llm", name, second, info={
+        "model": model,
+        "cost": {"total_cost": 0.5},
+        "tokens": {"total_tokens": 10},
+    }, data={"input": "prompt", "output": output}, **fields)
+
+
+def agent(name, second, children, **fields):
+    return span("agent", name, second, data={"input": None, "output": None, "children": children}, **fields)
+
+
+def test_single_pass_finalization():
+    interaction = {"interaction_type": "input", "content": "question", "timestamp": "2025-01-01T00:00:03.5"}
+    children = [
+        span("tool", "search", 1, data={"input": {"args": ["query"], "kwargs": {}}, "output": "results"},
+             network_calls=[{"url": "https://search", "method": "GET", "start_time": "2025-01-01T00:00:01.5"}]),
+        llm("chat", 3, metrics=[{"name": "accuracy"}]),
+        llm("chat", 5, interactions=[interaction]),
+        agent("nested", 6, [llm("chat", 7)]),
+        llm("chat", 8, output="other", model="default"),
+    ]
+    roots = [
+        Component(**agent("planner", 0, children, metrics=[{"name": "planning"}], end_time="2025-01-01T00:00:09")),
+        Component(**span("tool", "format", 10, data={"input": "x", "output": "y"})),
+    ]
+
+    finalizer = TraceFinalizer(roots, trace_metrics=[{"name": "trace-metric"}])
+    roots = finalizer.run()
+
+    planner = roots[0]
+    kept = planner.data["children"]
+    assert (planner.id, planner.parent_id) == (1, 0)
+    # Ids are assigned to every span, deduplicated ones included
+    assert [(child["id"], child["parent_id"]) for child in kept] == [(2, 1), (4, 1), (5, 1), (7, 1)]
+    assert kept[2]["data"]["children"][0]["parent_id"] == 5
+    assert roots[1].id == 8
+    # The duplicate LLM span with interactions replaces the first one
+    assert kept[1]["start_time"] == "2025-01-01T00:00:05"
+    # Same name as a custom-model LLM span, the default-model one becomes custom
+    assert [child["type"] for child in kept] == ["tool", "llm", "agent", "custom"]
+
+    assert planner.data["input"] == {"args": ["query"], "kwargs": {}}
+    assert planner.data["output"] == "other"
+    assert finalizer.total_cost == 2.0 and finalizer.total_tokens == 40
+    assert finalizer.cost == {"total_cost": 2.0} and finalizer.tokens == {"total_tokens": 40}
+
+    workflow = finalizer.workflow
+    assert [interaction["id"] for interaction in workflow] == [str(i) for i in range(1, len(workflow) + 1)]
+    timestamps = [interaction["timestamp"] for interaction in workflow]
+    assert timestamps == sorted(timestamps)
+    assert [interaction["interaction_type"] for interaction in workflow[:6]] == [
+        "agent_call_start", "tool_call_start", "network_call", "tool_call_end", "input", "llm_call_start"]
+    assert "custom_call_start" in {interaction["interaction_type"] for interaction in workflow}
+    # Interactions of child spans are numbered in place, they are saved with the trace
+    assert (interaction["id"], interaction["span_id"]) == ("5", 4)
+
+    # The metrics of the replaced span are not in the trace
+    assert [metric["name"] for metric in finalizer.metrics] == ["trace-metric", "planning"]
+    assert [(s["spanId"], s["spanName"], s["spanType"]) for s in finalizer.dataset_spans] == [
+        (1, "planner", "agent"), (2, "search", "tool"), (4, "chat", "llm"), (5, "nested", "agent"), (8, "format", "tool")]
+
+
+def test_deep_traces_do_not_hit_the_recursion_limit():
+    depth = 5000
+    children = [llm("leaf", 1)]
+    for level in range(depth):
+        children = [agent(f"agent-{level}", 0, children)]
+    root = Component(**agent("root", 0, children))
+
+    finalizer = TraceFinalizer([root])
+    finalizer.run()
+
+    assert finalizer.total_tokens == 10
+    assert len(finalizer.workflow) == 2 * (depth + 1) + 2
+    node = root.data["children"][0]
+    for expected_id in range(2, 10):
+        assert node["id"] == expected_id and node["parent_id"] == expected_id - 1
+        node = node["data"]["children"][0]
+
+
+def workflow_trace(offset):
+    # Children complete before their agent, the agent start is recorded out of order
+    children = [span("tool", f"tool-{offset}", offset + 1, network_calls=[
+        {"url": "https://api", "start_time": f"2025-01-01T00:00:{offset + 1:02d}.5"}])]
+    return [
+        Component(**agent(f"agent-{offset}", offset, children, end_time=f"2025-01-01T00:00:{offset + 3:02d}")),
+        Component(**llm(f"chat-{offset}", offset + 4)),
+    ]
+
+
+def test_workflow_recorded_while_tracing():
+    builder = WorkflowBuilder()
+    spans = workflow_trace(0) + workflow_trace(10)
+    # Each thread records its components in its own run
+    threads = [threading.Thread(target=lambda roots=roots: [builder.record(root) for root in roots])
+               for roots in (spans[2:], spans[:2])]
+    for thread in threads:
+        thread.start()
+        thread.join()
+    # A component merged when the trace is finalized, as from a worker process, is recorded then
+    spans[0].data["children"].append(span("tool", "spooled", 1))
+
+    finalizer = TraceFinalizer(spans, workflow_builder=builder)
+    finalizer.run()
+
+    expected = TraceFinalizer(workflow_trace(0) + workflow_trace(10))
+    expected.spans[0].data["children"].append(span("tool", "spooled", 1))
+    expected.run()
+    assert finalizer.workflow == expected.workflow
+    assert [interaction["interaction_type"] for interaction in finalizer.workflow[:6]] == [
+        "agent_call_start", "tool_call_start", "tool_call_start", "network_call", "tool_call_end", "tool_call_end"]
+    assert [interaction["id"] for interaction in finalizer.workflow] == [
+        str(i) for i in range(1, len(finalizer.workflow) + 1)]
+
+
+def test_recorded_duplicate_llm_spans_leave_the_workflow():
+    children = [llm("chat", 1), llm("chat", 3)]
+    root = Component(**agent("planner", 0, children, end_time="2025-01-01T00:00:05"))
+    builder = WorkflowBuilder()
+    builder.record(root)
+
+    finalizer = TraceFinalizer([root], workflow_builder=builder)
+    finalizer.run()
+
+    assert [(interaction["interaction_type"], interaction["span_id"]) for interaction in finalizer.workflow] == [
+        ("agent_call_start", 1), ("llm_call_start", 2), ("llm_call_end", 2), ("agent_call_end", 1)]
@@ -0,0 +1,91 @@
+import json
+import struct
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from ragaai_catalyst.tracers.agentic_tracing.upload.upload_agentic_traces import UploadAgenticTraces
+from ragaai_catalyst.tracers.agentic_tracing.utils.trace_format import (
+    MAGIC,
+    TraceReader,
+    load_trace,
+    resolve_trace_format,
+    write_trace,
+)
+
+TRACE = {
+    "id": "trace-1",
+    "metrics": [{"name": "latency"}],
+    "data": [{"start_time": "now", "spans": [
+        {"id": i, "name": f"span {i}", "hash_id": f"h{i}", "type": "llm", "data": {"input": "hello\nworld"}}
+        for i in range(20)
+    ]}],
+}
+
+
+@pytest.fixture(params=["json", "json-stream", "msgpack"])
+def trace_format(request):
+    if request.param == "msgpack":
+        pytest.importorskip("msgpack")
+    return request.param
+
+
+def test_resolve_trace_format(monkeypatch):
+    monkeypatch.delenv("RAGAAI_CATALYST_TRACE_FORMAT", raising=False)
+    assert resolve_trace_format() == "json"
+    monkeypatch.setenv("RAGAAI_CATALYST_TRACE_FORMAT", "JSON-Stream")
+    assert resolve_trace_format() == "json-stream"
+    with pytest.raises(ValueError, match="Unsupported trace format"):
+        resolve_trace_format("avro")
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_round_trip(tmp_path, trace_format, compression):
+    path = str(tmp_path / ("trace.rtrace.gz" if compression else "trace.rtrace"))
+    write_trace(path, TRACE, trace_format, compression)
+    reader = TraceReader(path)
+    assert reader.is_stream == (trace_format != "json")
+    assert reader.read() == TRACE
+    assert load_trace(path) == TRACE
+    assert json.loads(reader.to_json_bytes()) == TRACE
+
+
+def test_stream_header_and_spans(tmp_path):
+    path = str(tmp_path / "trace.rtrace")
+    write_trace(path, TRACE, "json-stream")
+    with open(path, "rb") as f:
+        assert f.read(len(MAGIC)) == MAGIC
+
+    reader = TraceReader(path)
+    assert reader.header["id"] == "trace-1"
+    assert reader.header["data"][0]["spans"] == []
+    assert [span["id"] for span in reader.iter_spans()] == list(range(20))
+    # Streaming does not materialize the trace
+    assert reader._trace is None
+
+
+def test_unknown_objects_use_default(tmp_path):
+    path = str(tmp_path / "trace.rtrace")
+    trace = {"data": [{"spans": [{"start": datetime(2024, 1, 1)}]}]}
+    write_trace(path, trace, "json-stream", default=lambda obj: obj.isoformat())
+    assert load_trace(path)["data"][0]["spans"][0]["start"] == "2024-01-01T00:00:00"
+
+
+def test_newer_version_is_rejected(tmp_path):
+    path = tmp_path / "trace.rtrace"
+    path.write_bytes(struct.pack(">7sBB", MAGIC, 99, 0))
+    with pytest.raises(ValueError, match="Unsupported trace format version"):
+        TraceReader(str(path))
+
+
+def test_upload_transcodes_stream_to_json(tmp_path):
+    path = str(tmp_path / "trace.rtrace")
+    write_trace(path, TRACE, "json-stream")
+    uploader = UploadAgenticTraces(path, "project", "project-id", "dataset", {}, "http://localhost",
+                                   compression="none")
+
+    with patch("ragaai_catalyst.tracers.agentic_tracing.upload.upload_agentic_traces.requests.request") as request:
+        uploader._put_presigned_url("https://bucket/trace", path)
+    assert json.loads(request.call_args.kwargs["data"]) == TRACE
+    assert [span["spanId"] for span in uploader._get_dataset_spans()] == list(range(20))
@@ -0,0 +1,154 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+
+import numpy as np
+import pytest
+from pydantic import BaseModel
+
+from ragaai_catalyst.tracers.agentic_tracing.data.data_structure import LLMComponent
+from ragaai_catalyst.tracers.agentic_tracing.tracers.base import TracerJSONEncoder
+from ragaai_catalyst.tracers.agentic_tracing.tracers.main_tracer import AgenticTracing
+from ragaai_catalyst.tracers.utils import serialization
+from ragaai_catalyst.tracers.utils.serialization import CIRCULAR_REFERENCE, TraceSerializer
+
+
+class Color(Enum):
+    RED = "red"
+
+
+@dataclass
+class Point:
+    x: int
+    y: int = None
+    _hidden: str = "secret"
+
+
+class Usage(BaseModel):
+    prompt_tokens: int
+
+
+class WithToDict:
+    def to_dict(self):
+        return {"kind": "custom"}
+
+
+class Plain:
+    def __init__(self):
+        self.name = "plain"
+        self.empty = None
+        self._private = 1
+
+
+class Slotted:
+    __slots__ = ("value",)
+
+    def __repr__(self):
+        return "Slotted()"
+
+
+VALUES = {
+    "time": datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc),
+    "bytes": b"hello",
+    "binary": b"\xff\xfe",
+    "enum": Color.RED,
+    "dataclass": Point(1),
+    "pydantic": Usage(prompt_tokens=3),
+    "to_dict": WithToDict(),
+    "object": Plain(),
+    "slotted": Slotted(),
+    "numpy": [np.float32(1.5), np.int64(2), np.arange(3)],
+    "set": {1},
+    1: "int key",
+}
+
+EXPECTED = {
+    "time": "2024-01-02T03:04:05.123456+00:00",
+    "bytes": "hello",
+    "binary": "b'\\xff\\xfe'",
+    "enum": "red",
+    "dataclass": {"x": 1},
+    "pydantic": {"prompt_tokens": 3},
+    "to_dict": {"kind": "custom"},
+    "object": {"name": "plain"},
+    "slotted": "Slotted()",
+    "numpy": [1.5, 2, [0, 1, 2]],
+    "set": [1],
+    "1": "int key",
+}
+
+
+@pytest.mark.parametrize("backend", ["orjson", "json"])
+def test_dispatch(monkeypatch, backend):
+    if backend == "json":
+        monkeypatch.setattr(serialization, "orjson", None)
+    assert json.loads(TraceSerializer().dump_bytes(VALUES)) == EXPECTED
+
+
+def test_encoder_is_cached_per_type():
+    serializer = TraceSerializer()
+    serializer.default(Plain())
+    assert Plain in serializer._cache
+    serializer.register(Plain, lambda obj: "registered")
+    assert serializer.dumps(Plain()) == '"registered"'
+
+
+def test_tracer_json_encoder_delegates():
+    assert json.loads(json.dumps(VALUES, cls=TracerJSONEncoder)) == EXPECTED
+
+
+def test_cycles_are_replaced():
+    trace = {"spans": []}
+    trace["spans"].append(trace)
+    plain = Plain()
+    plain.me = plain
+    assert json.loads(serialization.dumps(trace)) == {"spans": [CIRCULAR_REFERENCE]}
+    assert json.loads(serialization.dumps(plain)) == {"name": "plain", "me": CIRCULAR_REFERENCE}
+
+
+def test_size_guards():
+    serializer = TraceSerializer(max_bytes_length=4, max_array_size=2)
+    assert json.loads(serializer.dumps([b"hello", np.zeros((2, 3))])) == [
+        "<5 bytes>", {"shape": [2, 3], "dtype": "float64"},
+    ]
+
+
+def test_indent_matches_json():
+    data = {"a": [1, {"b": None}]}
+    assert serialization.dumps(data, indent=2) == json.dumps(data, indent=2)
+
+
+def test_dataclass_attributes_set_after_construction():
+    point = Point(1)
+    point.total = 2
+    assert json.loads(serialization.dumps(point)) == {"x": 1, "total": 2}
+
+
+def test_slotted_components():
+    component_data = {
+        "id": "span", "hash_id": "hash", "source_hash_id": None, "type": "llm", "name": "chat",
+        "start_time": "2025-01-01T00:00:00", "end_time": "2025-01-01T00:00:01", "parent_id": None,
+        "info": {"model": "gpt-4o"}, "data": {"input": "prompt"}, "metrics": [],
+        "network_calls": [{"url": "https://api"}],
+        "interactions": [{"id": "1", "interaction_type": "input", "content": "hi", "timestamp": "2025-01-01T00:00:00"}],
+        "unknown": "dropped",
+    }
+    component = AgenticTracing._to_component(component_data)
+    assert isinstance(component, LLMComponent) and not hasattr(component, "__dict__")
+    # Payloads are held by reference
+    assert component.data is component_data["data"] and component.metrics is component_data["metrics"]
+    assert json.loads(serialization.dumps(component))["interactions"] == [
+        {"id": "1", "interaction_type": "input", "content": "hi", "timestamp": "2025-01-01T00:00:00"}]
+
+
+def test_llamaindex_encoder_keeps_object_attributes():
+    from ragaai_catalyst.tracers.llamaindex_callback import CustomEncoder
+
+    class Payload:
+        def __init__(self):
+            self.text = "hello"
+            self.score = None
+            self._private = 1
+
+    assert json.loads(json.dumps(Payload(), cls=CustomEncoder)) == {"text": "hello", "score": None, "_private": 1}
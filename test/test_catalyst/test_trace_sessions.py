@@ -0,0 +1,110 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ragaai_catalyst.tracers.agentic_tracing.tracers.base import BaseTracer
+
+
+@pytest.fixture
+def tracer():
+    tracer = BaseTracer({
+        "project_name": "project",
+        "dataset_name": "dataset",
+        "project_id": "project-id",
+        "trace_name": "default",
+        "interval_time": 1,
+    })
+    tracer.system_monitor = MagicMock()
+    finalized = []
+
+    def finalize(self):
+        finalized.append((self.trace_name, self.trace_id, list(self.components), list(self.trace_metrics)))
+
+    with patch.object(BaseTracer, "_get_system_info"), patch.object(BaseTracer, "_get_resources"), \
+            patch("ragaai_catalyst.tracers.agentic_tracing.tracers.base.Metadata"), \
+            patch("ragaai_catalyst.tracers.agentic_tracing.tracers.base.Trace"), \
+            patch.object(BaseTracer, "_finalize_trace", finalize):
+        tracer.finalized = finalized
+        yield tracer
+
+
+def test_async_sessions_are_isolated(tracer):
+    async def request(name):
+        async with tracer.session(trace_name=name):
+            for i in range(3):
+                tracer.add_component(f"{name}-{i}")
+                tracer.trace_metrics.append(name)
+                await asyncio.sleep(0)
+
+    async def main():
+        await asyncio.gather(*(request(f"request-{n}") for n in range(5)))
+
+    asyncio.run(main())
+
+    assert len(tracer.finalized) == 5
+    assert len({trace_id for _, trace_id, _, _ in tracer.finalized}) == 5
+    for name, _, components, metrics in tracer.finalized:
+        assert components == [f"{name}-{i}" for i in range(3)]
+        assert metrics == [name] * 3
+    # The default trace is left untouched
+    assert tracer.components == []
+    assert tracer.trace_name == "default"
+
+
+def test_thread_sessions_are_isolated(tracer):
+    def request(name):
+        with tracer.session(trace_name=name) as session:
+            tracer.add_component(name)
+            assert tracer.current_session is session
+        return name
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(request, [f"request-{n}" for n in range(8)]))
+
+    assert sorted(components for _, _, components, _ in tracer.finalized) == [[f"request-{n}"] for n in range(8)]
+
+
+def test_session_defaults_to_tracer_trace_name(tracer):
+    with tracer.session():
+        assert tracer.trace_name == "default"
+        assert tracer.trace_id is not None
+
+
+def test_session_requires_started_tracer(tracer):
+    tracer.system_monitor = None
+    with pytest.raises(ValueError, match="must be started"):
+        with tracer.session():
+            pass
+
+
+def test_resource_samples_are_dropped_after_the_oldest_open_session(tracer):
+    second_started, first_ended = threading.Event(), threading.Event()
+
+    def second_request():
+        with tracer.session(trace_name="second"):
+            tracer.memory_usage_list.append(3)
+            second_started.set()
+            first_ended.wait(5)
+            tracer.memory_usage_list.append(4)
+            return tracer._resource_samples("memory", tracer.memory_usage_list)
+
+    tracer.memory_usage_list.extend([0, 1])
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with tracer.session(trace_name="first"):
+            tracer.memory_usage_list.append(2)
+            second = executor.submit(second_request)
+            second_started.wait(5)
+        # Only the samples of the second session, still open, are kept
+        assert tracer.memory_usage_list == [3]
+        first_ended.set()
+        assert second.result() == [3, 4]
+
+    assert tracer.memory_usage_list == [] and tracer.cpu_usage_list == []
+    assert tracer._dropped_samples["memory"] == 5
+    tracer.memory_usage_list.append(5)
+    with tracer.session():
+        tracer.memory_usage_list.append(6)
+        assert tracer._resource_samples("memory", tracer.memory_usage_list) == [6]